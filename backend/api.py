@@ -1,87 +1,115 @@
 
 from contextlib import asynccontextmanager
-from apscheduler.schedulers.background import BackgroundScheduler
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 
-# Inicializar la conexión a la base de datos
-from database import DatabaseConnection, database_url
+# Inicializar las conexiones a la base de datos (modo WAL, lectores + escritor serializado)
+from database import ConexionesDB
+from cache_http import CacheHTTPMiddleware
+from limite_intentos import LimiteIntentosMiddleware
+from concurrencia import configurar_threadpool
+from utils.security import ServicioHash
+from utils.tokens import cargar_clave
 from services.turno_service import TurnoService
-import sqlite3
-
-DatabaseConnection()
-
-def chequear_recordatorios_background(): # para testear el scheduler
-    # turno_router.notificar_recordatorios()
-    conn = None
-    try:
-        # 1. Crear conexión independiente (check_same_thread=False es CLAVE)
-        conn = sqlite3.connect(database_url, check_same_thread=False)
-        conn.row_factory = sqlite3.Row # Para manejar diccionarios
-        
+from services.slot_service import SlotService
+from services.bandeja_salida_service import DespachadorEmails
+from services.planificador_service import JobService, PlanificadorJobs
+from services.agenda_ausentes import AgendaAusentes
+import config
+
+ConexionesDB()
+
+def chequear_recordatorios_background():
+    """Encola los recordatorios de los turnos próximos (los envían los workers de DespachadorEmails)."""
+    # 1. Tomar la conexión de escritura (serializada con los requests que escriben)
+    with ConexionesDB.escritura().conexion() as conn:
         # 2. Instanciar el servicio con esta conexión
         service = TurnoService(conn)
-        
-        # 3. Ejecutar la lógica de notificación
-        # (Esto imprimirá en consola si manda mails)
+
+        # 3. Encolar los recordatorios
         cantidad = service.notificar_recordatorios_turnos()
 
-        if cantidad > 0:
-            print(f"[NOTIFICADOR] Se enviaron {cantidad} recordatorios de turnos.")
-            
-    except Exception as e:
-        print(f"[NOTIFICADOR] Error: {e}")
-        
-    finally:
-        # 4. Cerrar la conexión siempre
-        if conn:
-            conn.close()
+    if cantidad > 0:
+        print(f"[NOTIFICADOR] Se encolaron los recordatorios de {cantidad} turnos.")
+    return f"{cantidad} turnos notificados"
 
 
 def marcar_turnos_ausentes_background():
-    """Marca como 'Ausente' los turnos pasados que no fueron atendidos ni cancelados."""
-    conn = None
-    try:
-        # 1. Crear conexión independiente (check_same_thread=False es CLAVE)
-        conn = sqlite3.connect(database_url, check_same_thread=False)
-        conn.row_factory = sqlite3.Row # Para manejar diccionarios
-        
+    """Marca como 'Ausente' los turnos pasados que no fueron atendidos ni cancelados (la llama AgendaAusentes)."""
+    # 1. Tomar la conexión de escritura (serializada con los requests que escriben)
+    with ConexionesDB.escritura().conexion() as conn:
         # 2. Instanciar el servicio con esta conexión
         service = TurnoService(conn)
-        
+
         # 3. Ejecutar la lógica de marcar ausentes
-        cantidad = service.marcar_turnos_ausentes()
-
-        if cantidad > 0:
-            print(f"[AUSENTES] Se marcaron {cantidad} turnos como ausentes.")
-            
-    except Exception as e:
-        print(f"[AUSENTES] Error: {e}")
-        
-    finally:
-        # 4. Cerrar la conexión siempre
-        if conn:
-            conn.close()
+        ids_marcados = service.marcar_turnos_ausentes()
+
+    if ids_marcados:
+        print(f"[AUSENTES] Se marcaron {len(ids_marcados)} turnos como ausentes: {ids_marcados[:20]}"
+              + (" ..." if len(ids_marcados) > 20 else ""))
+    return ids_marcados
+
+def recargar_agenda_ausentes_background():
+    """Suma a la agenda de ausentes de este proceso los turnos pendientes de los otros (incluidos los de un proceso que ya no está)."""
+    with ConexionesDB.lectura().conexion() as conn:
+        nuevos = AgendaAusentes().recargar(conn)
+    return f"{nuevos} vencimientos agregados a la agenda"
+
+def extender_calendario_slots_background():
+    """Mantiene generado el calendario de slots hasta el horizonte configurado (y limpia los pasados)."""
+    with ConexionesDB.escritura().conexion() as conn:
+        cantidad = SlotService(conn).asegurar_horizonte_todos()
+
+    print(f"[SLOTS] Calendario al día para {cantidad} médicos.")
+    return f"calendario al día para {cantidad} médicos"
+
+def purgar_historial_jobs_background():
+    """Borra del historial de jobs las ejecuciones más viejas que JOB_HISTORIAL_DIAS."""
+    with ConexionesDB.escritura().conexion() as conn:
+        borradas = JobService(conn).purgar_historial(config.JOB_HISTORIAL_DIAS)
+    return f"{borradas} ejecuciones borradas"
 
 # --- LIFESPAN (Ciclo de vida de FastAPI) ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # 1. Al iniciar la app: Arrancar el Scheduler
-    scheduler = BackgroundScheduler()
-    
-    # Configuramos para que corra cada 10 o 30 segundos
-    scheduler.add_job(chequear_recordatorios_background, 'interval', seconds=50)
-    scheduler.add_job(marcar_turnos_ausentes_background, 'interval', seconds=15)
-    scheduler.start()
-
-    print("Scheduler de notificaciones INICIADO")
+    # Los handlers son sincrónicos y corren en el threadpool de AnyIO (ver concurrencia.py)
+    configurar_threadpool()
+    # Procesos de bcrypt levantados antes del primer login
+    ServicioHash().iniciar()
+    # Clave de los tokens: la de TURNERO_TOKEN_SECRETO o la compartida de ClaveServidor
+    cargar_clave()
+
+    # 1. Al iniciar la app: registrar los jobs y arrancar el planificador. Con varios procesos
+    #    (uvicorn --workers N) cada job lo corre sólo el proceso que tiene su lease en la base.
+    planificador = PlanificadorJobs()
+
+    # El calendario de slots se genera al arrancar y después una vez por día
+    planificador.agregar("slots", extender_calendario_slots_background, config.JOB_SLOTS_SEG, al_iniciar=True)
+    planificador.agregar("recordatorios", chequear_recordatorios_background, config.JOB_RECORDATORIOS_SEG)
+    planificador.agregar("historial_jobs", purgar_historial_jobs_background, 24 * 3600)
+    planificador.agregar("ausentes", recargar_agenda_ausentes_background, config.JOB_AUSENTES_SEG)
+    planificador.iniciar()
+
+    # Los ausentes se marcan cuando vence cada turno pendiente (sin revisar la base cada tanto)
+    with ConexionesDB.lectura().conexion() as conn:
+        AgendaAusentes().iniciar(conn, marcar_turnos_ausentes_background)
+
+    # Workers que envían los emails encolados en BandejaSalida (entre procesos no se pisan:
+    # cada lote se reserva con un UPDATE)
+    DespachadorEmails().iniciar()
+
+    print(f"Planificador de jobs INICIADO ({planificador.duenio})")
     
     yield # Aquí corre tu API
     
-    # 2. Al apagar la app: Apagar el Scheduler
-    scheduler.shutdown()
-    print("Scheduler de notificaciones APAGADO")
+    # 2. Al apagar la app: apagar el planificador (libera sus leases), la agenda de ausentes
+    #    y los workers de emails
+    planificador.detener()
+    AgendaAusentes().detener()
+    DespachadorEmails().detener()
+    ServicioHash().detener()
+    print("Planificador de jobs APAGADO")
 
 
 class FastAPIApp:
@@ -97,12 +125,19 @@ class FastAPIApp:
 
     @staticmethod
     def _configure_middleware(app: FastAPI):
+        # Límite de intentos de login / recuperación de contraseña: el más interno, así los 429
+        # salen con CORS y no pasan por el cache
+        app.add_middleware(LimiteIntentosMiddleware)
+        # ETag / 304 de los GET. Se agrega antes que CORS para quedar por dentro:
+        # las respuestas 304 también tienen que salir con los encabezados de CORS
+        app.add_middleware(CacheHTTPMiddleware)
         app.add_middleware(
             CORSMiddleware,
             allow_origins=["*"],
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            expose_headers=["ETag", "X-Next-Cursor", "Link", "Retry-After"],
         )
 
     @classmethod
@@ -140,10 +175,11 @@ FastAPIApp.include_router(receta_router)
 FastAPIApp.include_router(horario_atencion_router)
 FastAPIApp.include_router(analytics_router)
 FastAPIApp.include_router(auth_router)
+FastAPIApp.include_router(disponibilidad_router)
 
-# Evento de cierre: cerrar la conexión a la base de datos
+# Evento de cierre: cerrar las conexiones a la base de datos
 @app.on_event("shutdown")
 def shutdown_event():
-    """Cierra la conexión a la base de datos al apagar la aplicación"""
-    DatabaseConnection.close()
+    """Cierra las conexiones a la base de datos al apagar la aplicación"""
+    ConexionesDB.close()
 
@@ -0,0 +1,219 @@
+"""
+Prueba de carga con tráfico mixto contra la API levantada con uvicorn.
+
+Uso (desde backend/):
+
+    python benchmarks/carga_mixta.py                      # copia de la base configurada, 30 s
+    python benchmarks/carga_mixta.py -u 32 -d 60 --db ruta.db
+    python benchmarks/carga_mixta.py --url http://127.0.0.1:8000   # contra una API ya levantada
+
+Sin --url levanta `uvicorn api:app` (un proceso) sobre una copia temporal de la base, con los
+emails en memoria, y la apaga al terminar.
+Cada usuario virtual (un hilo con su conexión keep-alive) elige en cada vuelta un request
+según los pesos de MEZCLA: lecturas livianas, páginas de listados, listados completos, logins
+(bcrypt) y PDFs. Informa por tipo cantidad, errores, req/s y latencia p50/p95/p99/máx.
+Lo que importa es la cola de los livianos: si un request pesado bloqueara el event loop,
+su p99 crecería hasta el tiempo de un bcrypt o de un PDF.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode, urlparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (tipo, peso): en cada vuelta un usuario elige un tipo con esta probabilidad relativa
+MEZCLA = (
+    ("liviano", 70),
+    ("pagina", 15),
+    ("listado", 5),
+    ("login", 6),
+    ("pdf", 4),
+)
+
+
+def _percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))] if ordenados else 0.0
+
+
+def _copiar_base(origen: str, destino: str):
+    with sqlite3.connect(f"file:{origen}?mode=ro", uri=True) as fuente, sqlite3.connect(destino) as copia:
+        fuente.backup(copia)
+
+
+def _datos(ruta_db: str) -> dict:
+    """Ids y credenciales reales de la base para armar los requests"""
+    conexion = sqlite3.connect(f"file:{ruta_db}?mode=ro", uri=True)
+    try:
+        turnos = [r[0] for r in conexion.execute("SELECT id_turno FROM Turno ORDER BY id_turno LIMIT 500")]
+        medicos = [r[0] for r in conexion.execute("SELECT id_medico FROM Medico")]
+        # El administrador de db_poblate.py (contraseña '123')
+        admin = conexion.execute("""
+            SELECT u.email, r.nombre FROM Usuario u
+            JOIN UsuarioRol ur ON ur.id_usuario = u.id_usuario
+            JOIN Rol r ON r.id_rol = ur.id_rol
+            ORDER BY u.id_usuario LIMIT 1
+        """).fetchone()
+        fechas = conexion.execute("SELECT MIN(fecha_hora_inicio), MAX(fecha_hora_inicio) FROM Turno").fetchone()
+    finally:
+        conexion.close()
+    if not turnos or not medicos or admin is None:
+        raise SystemExit("La base no tiene datos (poblarla con database/db_poblate.py)")
+    return {"turnos": turnos, "medicos": medicos, "email": admin[0], "rol": admin[1],
+            "desde": fechas[0][:10], "hasta": fechas[1][:10]}
+
+
+def _request(tipo: str, datos: dict, azar: random.Random):
+    """(método, ruta, cuerpo) de un request del tipo indicado"""
+    if tipo == "liviano":
+        opcion = azar.randrange(3)
+        if opcion == 0:
+            return "GET", f"/turnos/{azar.choice(datos['turnos'])}", None
+        if opcion == 1:
+            return "GET", f"/medicos/{azar.choice(datos['medicos'])}", None
+        return "GET", "/especialidades/", None
+    if tipo == "pagina":
+        return "GET", "/turnos/?" + urlencode({"limit": 50, "after": azar.choice(datos["turnos"])}), None
+    if tipo == "listado":
+        return "GET", "/turnos/", None
+    if tipo == "login":
+        return "POST", "/auth/login", {"email": datos["email"], "password": "123", "rol": datos["rol"]}
+    return "GET", "/estadisticas/rendimiento-medico/pdf?" + urlencode({
+        "fecha_desde": datos["desde"], "fecha_hasta": datos["hasta"], "id_medico": azar.choice(datos["medicos"]),
+    }), None
+
+
+def _usuario(url, datos: dict, fin: float, semilla: int, resultados: dict, lock: threading.Lock):
+    azar = random.Random(semilla)
+    tipos = [t for t, _ in MEZCLA]
+    pesos = [p for _, p in MEZCLA]
+    conexion = http.client.HTTPConnection(url.hostname, url.port, timeout=120)
+    propios = {t: ([], 0) for t in tipos}
+
+    while time.perf_counter() < fin:
+        tipo = azar.choices(tipos, pesos)[0]
+        metodo, ruta, cuerpo = _request(tipo, datos, azar)
+        encabezados = {"Content-Type": "application/json"} if cuerpo is not None else {}
+        t0 = time.perf_counter()
+        try:
+            conexion.request(metodo, ruta, body=json.dumps(cuerpo) if cuerpo is not None else None, headers=encabezados)
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            ok = respuesta.status < 400
+        except (OSError, http.client.HTTPException):
+            conexion.close()
+            conexion = http.client.HTTPConnection(url.hostname, url.port, timeout=120)
+            ok = False
+        latencias, errores = propios[tipo]
+        latencias.append(time.perf_counter() - t0)
+        propios[tipo] = (latencias, errores + (0 if ok else 1))
+
+    conexion.close()
+    with lock:
+        for tipo, (latencias, errores) in propios.items():
+            resultados[tipo][0].extend(latencias)
+            resultados[tipo][1] += errores
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _esperar_api(url, timeout: float = 30.0):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        try:
+            conexion = http.client.HTTPConnection(url.hostname, url.port, timeout=2)
+            conexion.request("GET", "/")
+            if conexion.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"La API no respondió en {timeout}s")
+
+
+def _correr(url, datos: dict, usuarios: int, duracion: float):
+    resultados = {t: [[], 0] for t, _ in MEZCLA}
+    lock = threading.Lock()
+    fin = time.perf_counter() + duracion
+    hilos = [
+        threading.Thread(target=_usuario, args=(url, datos, fin, i, resultados, lock))
+        for i in range(usuarios)
+    ]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    total = time.perf_counter() - inicio
+
+    cantidad = sum(len(l) for l, _ in resultados.values())
+    print(f"\n{usuarios} usuarios, {total:.1f}s, {cantidad} requests ({cantidad / total:.1f} req/s)")
+    print(f"  {'tipo':<9}{'req':>7}{'errores':>9}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'máx ms':>9}")
+    for tipo, (latencias, errores) in resultados.items():
+        if not latencias:
+            continue
+        print(f"  {tipo:<9}{len(latencias):>7}{errores:>9}{len(latencias) / total:>8.1f}"
+              f"{_percentil(latencias, 50) * 1000:>9.1f}{_percentil(latencias, 95) * 1000:>9.1f}"
+              f"{_percentil(latencias, 99) * 1000:>9.1f}{max(latencias) * 1000:>9.1f}")
+    return resultados
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="API ya levantada (default: levanta una sobre una copia de la base)")
+    parser.add_argument("--db", help="base a copiar / de donde sacar los datos (default: la configurada)")
+    parser.add_argument("-u", "--usuarios", type=int, default=16, help="usuarios concurrentes (default 16)")
+    parser.add_argument("-d", "--duracion", type=float, default=30.0, help="segundos de carga (default 30)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        origen = os.path.abspath(args.db)
+    else:
+        os.environ.setdefault("TURNERO_DB_RUTA", "")
+        sys.path.insert(0, BACKEND_DIR)
+        from database import database_url
+        origen = str(database_url)
+    if not os.path.exists(origen):
+        raise SystemExit(f"No existe la base {origen} (crearla con database/db_init.py y db_poblate.py)")
+
+    if args.url:
+        url = urlparse(args.url)
+        _esperar_api(url)
+        _correr(url, _datos(origen), args.usuarios, args.duracion)
+        return 0
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_db = os.path.join(directorio, "carga.db")
+        _copiar_base(origen, ruta_db)
+        datos = _datos(ruta_db)
+        puerto = _puerto_libre()
+        entorno = {**os.environ, "TURNERO_DB_RUTA": ruta_db, "TURNERO_EMAIL_TRANSPORTE": "memoria"}
+        servidor = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "api:app", "--port", str(puerto), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            url = urlparse(f"http://127.0.0.1:{puerto}")
+            _esperar_api(url)
+            _correr(url, datos, args.usuarios, args.duracion)
+        finally:
+            servidor.terminate()
+            servidor.wait(10)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Benchmark del transporte de email contra el servidor SMTP local (utils/servidor_smtp_local.py).
+
+Uso (desde backend/):
+
+    python benchmarks/envio_emails.py                       # 500 mensajes, 2 workers
+    python benchmarks/envio_emails.py -n 2000 -w 4 --latencia-ms 5
+
+Compara:
+  - una sesión por mail: conectar, EHLO, login, enviar y cerrar en cada mensaje (el costo
+    de conexión que pagaba EmailSender antes de tener el transporte);
+  - sesiones reutilizadas: TransporteSMTP con su pool, en lotes de EMAIL_LOTE mensajes
+    repartidos entre los workers (como lo hace DespachadorEmails).
+La latencia simula la ida y vuelta a un servidor remoto en cada intercambio SMTP.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from utils.servidor_smtp_local import ServidorSMTPLocal
+from utils.transporte_email import TransporteSMTP
+
+
+def _transporte(servidor: ServidorSMTPLocal, keepalive: float, tamanio_pool: int) -> TransporteSMTP:
+    return TransporteSMTP(
+        remitente="benchmark@turnero.local", host=servidor.host, puerto=servidor.puerto,
+        seguridad="ninguna", usuario="benchmark", password="benchmark",
+        tamanio_pool=tamanio_pool, keepalive=keepalive,
+    )
+
+
+def _correr(nombre: str, transporte: TransporteSMTP, servidor: ServidorSMTPLocal,
+            mensajes: list, workers: int, lote: int):
+    """Reparte los mensajes en lotes entre `workers` hilos e informa el throughput"""
+    lotes = [mensajes[i:i + lote] for i in range(0, len(mensajes), lote)]
+    siguiente = iter(lotes)
+    lock = threading.Lock()
+    errores = []
+
+    def trabajar():
+        while True:
+            with lock:
+                actual = next(siguiente, None)
+            if actual is None:
+                return
+            errores.extend(e for e in transporte.enviar_lote(actual) if e is not None)
+
+    sesiones_antes, recibidos_antes = servidor.sesiones, servidor.recibidos
+    inicio = time.perf_counter()
+    hilos = [threading.Thread(target=trabajar) for _ in range(workers)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - inicio
+    transporte.cerrar()
+
+    recibidos = servidor.recibidos - recibidos_antes
+    print(f"\n[{nombre}] {len(mensajes)} mensajes, {workers} workers, lotes de {lote}")
+    print(f"  {duracion:.2f}s -> {recibidos / duracion:.1f} mensajes/s")
+    print(f"  sesiones SMTP: {servidor.sesiones - sesiones_antes}  recibidos: {recibidos}  errores: {len(errores)}")
+    return recibidos == len(mensajes) and not errores
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--mensajes", type=int, default=500)
+    parser.add_argument("-w", "--workers", type=int, default=config.EMAIL_WORKERS)
+    parser.add_argument("--lote", type=int, default=config.EMAIL_LOTE)
+    parser.add_argument("--latencia-ms", type=float, default=2.0, help="demora por cada ida y vuelta al servidor")
+    args = parser.parse_args(argv)
+
+    mensajes = [
+        (f"paciente{i}@turnero.local", "Recordatorio de turno médico",
+         f"Estimado/a paciente {i}, le recordamos que tiene un turno programado.")
+        for i in range(args.mensajes)
+    ]
+
+    with ServidorSMTPLocal(latencia_ms=args.latencia_ms, guardar_mensajes=False) as servidor:
+        # Un mensaje por lote y sin keep-alive: cada envío abre y cierra su propia sesión
+        ok = _correr("una sesión por mail", _transporte(servidor, keepalive=0, tamanio_pool=args.workers),
+                     servidor, mensajes, args.workers, lote=1)
+        ok = _correr("sesiones reutilizadas", _transporte(servidor, keepalive=60, tamanio_pool=args.workers),
+                     servidor, mensajes, args.workers, lote=args.lote) and ok
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
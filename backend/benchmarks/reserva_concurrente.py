@@ -0,0 +1,199 @@
+"""
+Benchmark de reservas concurrentes: varios procesos, cada uno con su propia conexión de
+escritura, intentan reservar los mismos slots a la vez con TurnoService.create.
+
+Uso (desde backend/):
+
+    python benchmarks/reserva_concurrente.py                      # copia de la base configurada
+    python benchmarks/reserva_concurrente.py --db ruta.db -p 8 -s 20
+
+Trabaja sobre una copia temporal de la base, así que no modifica la original.
+Corre dos escenarios:
+  - contendido: todos los procesos piden los mismos slots (cada uno con su paciente);
+    por slot tiene que haber exactamente una reserva y el resto TurnoNoDisponibleError.
+  - disperso: cada proceso pide slots distintos, sin conflictos.
+Informa reservas, conflictos, otros errores, reservas/s y latencia p50/p99 por intento,
+y falla (exit 1) si algún slot quedó con más de un turno o si hubo errores inesperados.
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _preparar_entorno(ruta_db: str):
+    """Config lee la ruta de la base al importarse: hay que fijarla antes de importar los servicios"""
+    os.environ["TURNERO_DB_RUTA"] = ruta_db
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+
+def _conectar(ruta_db: str) -> sqlite3.Connection:
+    from database import configurar_conexion
+    conexion = sqlite3.connect(ruta_db, check_same_thread=False)
+    conexion.row_factory = sqlite3.Row
+    return configurar_conexion(conexion)
+
+
+def _trabajador(ruta_db: str, id_paciente: int, slots: list, barrera, resultados):
+    """Reserva los slots en orden y devuelve (exitos, conflictos, errores, latencias, inicio, fin)"""
+    _preparar_entorno(ruta_db)
+    from models.turno import TurnoCreate
+    from services.turno_service import TurnoService, TurnoNoDisponibleError
+
+    conexion = _conectar(ruta_db)
+    service = TurnoService(conexion)
+    exitos, conflictos, errores, latencias = 0, 0, [], []
+
+    barrera.wait()
+    t_inicio = time.time()
+    # La validación imprime cada intento: se descarta para no medir la consola
+    with contextlib.redirect_stdout(io.StringIO()):
+        for id_medico, inicio, fin in slots:
+            turno = TurnoCreate(
+                id_paciente=id_paciente, id_medico=id_medico,
+                fecha_hora_inicio=inicio, fecha_hora_fin=fin,
+                id_estado_turno=1, motivo_consulta="benchmark",
+            )
+            t0 = time.perf_counter()
+            try:
+                service.create(turno)
+                exitos += 1
+            except TurnoNoDisponibleError:
+                conflictos += 1
+            except Exception as e:
+                errores.append(f"{type(e).__name__}: {e}")
+            latencias.append(time.perf_counter() - t0)
+
+    t_fin = time.time()
+    conexion.close()
+    resultados.put((exitos, conflictos, errores, latencias, t_inicio, t_fin))
+
+
+def _percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))] if ordenados else 0.0
+
+
+def _copiar_base(origen: str, destino: str):
+    with sqlite3.connect(f"file:{origen}?mode=ro", uri=True) as fuente, sqlite3.connect(destino) as copia:
+        fuente.backup(copia)
+
+
+def _datos_de_prueba(ruta_db: str, cantidad_pacientes: int, cantidad_slots: int):
+    """Pacientes y slots libres futuros (de un mismo médico) para repartir entre los procesos"""
+    from services.slot_service import SlotService
+
+    conexion = _conectar(ruta_db)
+    pacientes = [r[0] for r in conexion.execute(
+        "SELECT id_paciente FROM Paciente ORDER BY id_paciente LIMIT ?", (cantidad_pacientes,)
+    )]
+    if len(pacientes) < cantidad_pacientes:
+        raise SystemExit(f"La base tiene {len(pacientes)} pacientes, se necesitan {cantidad_pacientes}")
+
+    # Los pacientes no deben tener turnos propios que se crucen con los slots elegidos
+    conexion.execute("DELETE FROM Turno WHERE id_paciente IN ({})".format(", ".join("?" for _ in pacientes)), pacientes)
+    conexion.execute("UPDATE Slot SET id_turno = NULL WHERE id_turno NOT IN (SELECT id_turno FROM Turno)")
+    conexion.commit()
+
+    slot_service = SlotService(conexion)
+    slot_service.asegurar_horizonte_todos()
+    # Todos del mismo médico: así un paciente nunca choca consigo mismo en dos slots simultáneos
+    filas = conexion.execute("""
+        SELECT id_medico, fecha_hora_inicio, fecha_hora_fin FROM Slot
+        WHERE id_turno IS NULL AND fecha_hora_inicio > datetime('now', 'localtime', '+1 day')
+        AND id_medico = (SELECT MIN(id_medico) FROM Slot)
+        ORDER BY fecha_hora_inicio
+        LIMIT ?
+    """, (cantidad_slots,)).fetchall()
+    conexion.close()
+    if len(filas) < cantidad_slots:
+        raise SystemExit(f"Hay {len(filas)} slots libres, se necesitan {cantidad_slots}")
+    return pacientes, [tuple(f) for f in filas]
+
+
+def _correr(ruta_db: str, nombre: str, reparto: list, esperadas: int) -> bool:
+    """reparto: [(id_paciente, [slots...]), ...] un elemento por proceso; esperadas: reservas que deben salir"""
+    contexto = multiprocessing.get_context("spawn")
+    barrera = contexto.Barrier(len(reparto))
+    resultados = contexto.Queue()
+    procesos = [
+        contexto.Process(target=_trabajador, args=(ruta_db, id_paciente, slots, barrera, resultados))
+        for id_paciente, slots in reparto
+    ]
+    for p in procesos:
+        p.start()
+    parciales = [resultados.get() for _ in procesos]
+    for p in procesos:
+        p.join()
+    # Se mide desde que se libera la barrera, sin el arranque de los procesos
+    duracion = max(r[5] for r in parciales) - min(r[4] for r in parciales)
+
+    exitos = sum(r[0] for r in parciales)
+    conflictos = sum(r[1] for r in parciales)
+    errores = [e for r in parciales for e in r[2]]
+    latencias = [l for r in parciales for l in r[3]]
+
+    # Invariante: ningún slot con más de un turno activo del médico
+    conexion = sqlite3.connect(ruta_db)
+    dobles = conexion.execute("""
+        SELECT COUNT(*) FROM (
+            SELECT id_medico, fecha_hora_inicio FROM Turno
+            WHERE motivo_consulta = 'benchmark'
+            AND id_estado_turno != (SELECT id_estado_turno FROM EstadoTurno WHERE nombre = 'Cancelado')
+            GROUP BY id_medico, fecha_hora_inicio HAVING COUNT(*) > 1
+        )
+    """).fetchone()[0]
+    conexion.close()
+
+    print(f"\n[{nombre}] {len(procesos)} procesos, {len(latencias)} intentos en {duracion:.2f}s")
+    print(f"  reservas: {exitos}/{esperadas}  conflictos: {conflictos}  otros errores: {len(errores)}  slots duplicados: {dobles}")
+    print(f"  {exitos / duracion:.1f} reservas/s, {len(latencias) / duracion:.1f} intentos/s")
+    print(f"  latencia por intento: p50 {_percentil(latencias, 50) * 1000:.1f} ms, "
+          f"p99 {_percentil(latencias, 99) * 1000:.1f} ms")
+    for error in sorted(set(errores))[:5]:
+        print(f"  ! {error}")
+    return dobles == 0 and not errores and exitos == esperadas
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", help="base a copiar (default: la configurada en TURNERO_DB_RUTA o la del repo)")
+    parser.add_argument("-p", "--procesos", type=int, default=8, help="procesos concurrentes (default 8)")
+    parser.add_argument("-s", "--slots", type=int, default=20, help="slots por escenario (default 20)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        origen = os.path.abspath(args.db)
+    else:
+        _preparar_entorno(os.getenv("TURNERO_DB_RUTA", ""))
+        from database import database_url
+        origen = str(database_url)
+    if not os.path.exists(origen):
+        raise SystemExit(f"No existe la base {origen} (crearla con database/db_init.py y db_poblate.py)")
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_db = os.path.join(directorio, "benchmark.db")
+        _copiar_base(origen, ruta_db)
+        _preparar_entorno(ruta_db)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            pacientes, slots = _datos_de_prueba(ruta_db, args.procesos, args.slots * 2)
+        contendidos, dispersos = slots[:args.slots], slots[args.slots:]
+
+        ok = _correr(ruta_db, "contendido", [(p, contendidos) for p in pacientes], len(contendidos))
+        reparto = [(p, dispersos[i::len(pacientes)]) for i, p in enumerate(pacientes)]
+        ok = _correr(ruta_db, "disperso", reparto, len(dispersos)) and ok
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
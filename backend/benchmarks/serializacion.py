@@ -0,0 +1,113 @@
+"""
+Benchmark de serialización de respuestas: una agenda de 1000 turnos con todo su grafo
+(paciente, usuario, obra social, médico, especialidad, estado).
+
+Uso (desde backend/):
+
+    python benchmarks/serializacion.py                 # base configurada, 1000 turnos
+    python benchmarks/serializacion.py --db ruta.db -n 1000 -r 50
+
+Lee los turnos una sola vez con TurnoService (si la base tiene menos, repite los que hay) y mide:
+  - sólo serializar: jsonable_encoder + json.dumps (lo que hacían los endpoints) contra
+    a_json de utils/serializacion.py (con orjson si está instalado y con json);
+  - el endpoint entero, sin base: una app FastAPI mínima con las dos formas de responder, la
+    anterior (`response_model=List[dict]` + jsonable_encoder) y la actual (RespuestaJSON).
+Verifica además que los bytes del JSON sean los mismos por los dos caminos.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _medir(funcion, repeticiones: int) -> float:
+    """ms por llamada (mediana de las repeticiones, después de una vuelta de calentamiento)"""
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return sorted(tiempos)[len(tiempos) // 2] * 1000
+
+
+def _agenda(cantidad: int) -> list:
+    from database import ConexionesDB
+    from services.turno_service import TurnoService
+    with ConexionesDB.lectura().conexion() as conexion:
+        turnos = TurnoService(conexion).get_all(limit=cantidad)
+    if not turnos:
+        raise SystemExit("La base no tiene turnos (poblarla con database/db_poblate.py)")
+    return (turnos * (cantidad // len(turnos) + 1))[:cantidad]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", help="base de donde leer los turnos (default: la configurada)")
+    parser.add_argument("-n", "--turnos", type=int, default=1000, help="turnos de la agenda (default 1000)")
+    parser.add_argument("-r", "--repeticiones", type=int, default=30, help="mediciones por caso (default 30)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        os.environ["TURNERO_DB_RUTA"] = os.path.abspath(args.db)
+    sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault("TURNERO_EMAIL_TRANSPORTE", "memoria")
+
+    from fastapi import FastAPI
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from fastapi.testclient import TestClient
+    from utils import serializacion
+
+    agenda = _agenda(args.turnos)
+
+    def antes() -> bytes:
+        return JSONResponse(jsonable_encoder(agenda)).body
+
+    casos = [("jsonable_encoder + json.dumps", antes)]
+    if serializacion.orjson is not None:
+        casos.append(("a_json (orjson)", lambda: serializacion.a_json(agenda)))
+    encoder_json = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+                                    default=serializacion._por_defecto)
+    casos.append(("a_json (json)", lambda: encoder_json.encode(agenda).encode("utf-8")))
+
+    esperado = antes()
+    for nombre, funcion in casos[1:]:
+        if funcion() != esperado:
+            raise SystemExit(f"{nombre}: el JSON no coincide con el de jsonable_encoder")
+
+    # El endpoint entero: misma agenda, sin base, por las dos formas de responder
+    app = FastAPI()
+
+    @app.get("/antes", response_model=List[dict])
+    def agenda_antes():
+        return jsonable_encoder(agenda)
+
+    @app.get("/despues", response_model=List[dict])
+    def agenda_despues():
+        return serializacion.RespuestaJSON(agenda)
+
+    with TestClient(app) as cliente:
+        if cliente.get("/antes").content != cliente.get("/despues").content:
+            raise SystemExit("Los endpoints no devuelven el mismo JSON")
+        casos.append(("endpoint: response_model + jsonable_encoder", lambda: cliente.get("/antes")))
+        casos.append(("endpoint: RespuestaJSON", lambda: cliente.get("/despues")))
+
+        print(f"\nAgenda de {len(agenda)} turnos, {len(esperado) / 1024:.0f} KiB de JSON, "
+              f"mediana de {args.repeticiones} repeticiones")
+        # Cada caso se compara con el primero de su grupo (serializar / endpoint)
+        base = None
+        for nombre, funcion in casos:
+            ms = _medir(funcion, args.repeticiones)
+            if nombre.endswith("jsonable_encoder + json.dumps") or nombre.endswith("+ jsonable_encoder"):
+                base = ms
+            print(f"  {nombre:<46}{ms:>9.2f} ms{base / ms:>8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
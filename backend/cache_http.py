@@ -0,0 +1,137 @@
+"""
+Cache HTTP de los GET con ETag / If-None-Match.
+Los triggers de la migración 6 suben la versión de una tabla (VersionTabla) en cada escritura.
+El ETag de un GET se arma con la ruta, los parámetros y las versiones de las tablas que lee
+ese endpoint: si el cliente (navegador o proxy) manda el mismo ETag en If-None-Match, se
+responde 304 sin ejecutar el endpoint, es decir sin consultar ni serializar nada.
+"""
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from database import ConexionesDB
+
+_PERSONAS = ("Usuario", "Paciente", "Medico", "ObraSocial", "Especialidad")
+_TURNOS = ("Turno", "EstadoTurno") + _PERSONAS
+_CONSULTAS = ("Consulta", "Receta") + _TURNOS
+
+# (prefijo de la ruta, tablas que leen sus GET, se puede guardar en caches compartidos).
+# Gana el primer prefijo que coincide; las rutas que no están acá no se cachean.
+# Los endpoints cuyo resultado depende de la hora (próximos turnos, disponibilidad,
+# estadísticas del día) o que escriben van con tablas None: nunca se cachean.
+REGLAS: Tuple[Tuple[str, Optional[Tuple[str, ...]], bool], ...] = (
+    ("/turnos/paciente/proximos", None, False),
+    ("/turnos/medico/proximos", None, False),
+    ("/turnos/prueba_notificaciones", None, False),
+    ("/estadisticas/diarias", None, False),
+    ("/disponibilidad", None, False),
+    ("/turnos", _TURNOS, False),
+    ("/consultas", _CONSULTAS, False),
+    ("/recetas", _CONSULTAS, False),
+    ("/estadisticas", _TURNOS, False),
+    ("/medicos/mis_pacientes", _TURNOS, False),
+    ("/medicos", ("Medico", "Usuario", "Especialidad"), False),
+    ("/pacientes", ("Paciente", "Usuario", "ObraSocial"), False),
+    ("/horarios-atencion", ("HorarioAtencion", "Medico", "Usuario", "Especialidad"), False),
+    ("/usuarios", ("Usuario",), False),
+    ("/usuario-roles", ("UsuarioRol", "Usuario", "Rol"), False),
+    ("/roles", ("Rol",), True),
+    ("/especialidades", ("Especialidad",), True),
+    ("/obras-sociales", ("ObraSocial",), True),
+    ("/estados-turno", ("EstadoTurno",), True),
+)
+
+# Siempre se revalida (no-cache): el cliente guarda la respuesta pero pregunta en cada uso,
+# y la pregunta cuesta una lectura de VersionTabla en vez del endpoint entero
+CACHE_CONTROL_PRIVADO = b"private, no-cache"
+CACHE_CONTROL_PUBLICO = b"public, no-cache"
+
+_lock = threading.Lock()
+_contadores = {"no_modificados": 0, "completos": 0, "sin_cache": 0}
+
+
+def regla_para(ruta: str) -> Optional[Tuple[Tuple[str, ...], bool]]:
+    """(tablas, publico) de la ruta, o None si sus GET no se cachean"""
+    for prefijo, tablas, publico in REGLAS:
+        if ruta == prefijo or ruta.startswith(prefijo + "/"):
+            return (tablas, publico) if tablas else None
+    return None
+
+
+def versiones(tablas: Tuple[str, ...]) -> Tuple[int, ...]:
+    """Versión actual de cada tabla, en el mismo orden (una lectura por clave primaria)"""
+    marcadores = ", ".join("?" for _ in tablas)
+    with ConexionesDB.lectura().conexion() as conn:
+        filas = dict(conn.execute(
+            f"SELECT tabla, version FROM VersionTabla WHERE tabla IN ({marcadores})", tablas
+        ).fetchall())
+    return tuple(filas.get(tabla, 0) for tabla in tablas)
+
+
+def calcular_etag(ruta: str, query: bytes, tablas: Tuple[str, ...]) -> bytes:
+    huella = hashlib.blake2b(digest_size=12)
+    huella.update(ruta.encode())
+    huella.update(b"?" + query)
+    huella.update(repr(versiones(tablas)).encode())
+    # Débil: el mismo contenido puede viajar comprimido o no según el cliente
+    return b'W/"' + huella.hexdigest().encode() + b'"'
+
+
+def _coincide(if_none_match: bytes, etag: bytes) -> bool:
+    candidatos = [c.strip() for c in if_none_match.split(b",")]
+    return b"*" in candidatos or etag in candidatos or etag[2:] in candidatos
+
+
+def _contar(nombre: str):
+    with _lock:
+        _contadores[nombre] += 1
+
+
+def metricas() -> Dict[str, int]:
+    with _lock:
+        return dict(_contadores)
+
+
+class CacheHTTPMiddleware:
+    """Middleware ASGI: agrega ETag y Cache-Control a los GET cacheables y responde 304"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        regla = regla_para(scope["path"])
+        if regla is None:
+            _contar("sin_cache")
+            await self.app(scope, receive, send)
+            return
+
+        tablas, publico = regla
+        # Las versiones se leen antes que los datos: si algo se escribe en el medio, la
+        # respuesta es más nueva que su ETag y lo peor que pasa es un 200 de más.
+        # La lectura de VersionTabla es bloqueante: va al threadpool como los handlers
+        etag = await run_in_threadpool(calcular_etag, scope["path"], scope.get("query_string", b""), tablas)
+        encabezados = [
+            (b"etag", etag),
+            (b"cache-control", CACHE_CONTROL_PUBLICO if publico else CACHE_CONTROL_PRIVADO),
+        ]
+
+        if_none_match = next((v for k, v in scope["headers"] if k == b"if-none-match"), None)
+        if if_none_match is not None and _coincide(if_none_match, etag):
+            _contar("no_modificados")
+            await send({"type": "http.response.start", "status": 304, "headers": encabezados})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start" and mensaje["status"] == 200:
+                mensaje = {**mensaje, "headers": list(mensaje.get("headers", [])) + encabezados}
+                _contar("completos")
+            await send(mensaje)
+
+        await self.app(scope, receive, enviar)
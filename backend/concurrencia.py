@@ -0,0 +1,123 @@
+"""
+Modelo de ejecución de los endpoints.
+
+Los handlers son `def` (sincrónicos): FastAPI los corre en el threadpool de AnyIO, así una
+consulta a SQLite, un bcrypt o un PDF ocupan un hilo y nunca frenan el event loop, que sigue
+aceptando y respondiendo al resto de las conexiones. El threadpool tiene HILOS_TRABAJO hilos.
+
+Los endpoints caros tienen además un tope propio (LimiteConcurrencia) para que unos pocos
+requests lentos no ocupen todos los hilos. El tope se espera en el event loop, antes de
+tomar un hilo; si la espera supera CONCURRENCIA_ESPERA_MAX_SEG se responde 503.
+
+    @router.get("/pdf", dependencies=[Depends(LIMITE_PDF)])
+    def descargar_pdf(...):
+"""
+import asyncio
+import time
+from typing import Dict, Optional
+
+import anyio.to_thread
+from fastapi import HTTPException
+
+import config
+
+_threadpool: Optional[anyio.CapacityLimiter] = None
+
+
+def configurar_threadpool():
+    """Fija el tamaño del threadpool de los handlers (se llama desde el lifespan, en el event loop)"""
+    global _threadpool
+    _threadpool = anyio.to_thread.current_default_thread_limiter()
+    _threadpool.total_tokens = config.HILOS_TRABAJO
+
+
+class LimiteConcurrencia:
+    """
+    Dependency que deja pasar a lo sumo `maximo` requests a la vez por el endpoint (o grupo de
+    endpoints) que la usa; el resto espera su turno. El cupo se libera cuando termina de
+    enviarse la respuesta, así en las exportaciones cubre todo el streaming.
+    Los contadores se tocan sólo desde el event loop, no necesitan lock.
+    """
+    _registrados: Dict[str, 'LimiteConcurrencia'] = {}
+
+    def __init__(self, nombre: str, maximo: int):
+        self.nombre = nombre
+        self.maximo = maximo
+        self._loop = None
+        self._semaforo = None
+        self._en_curso = 0
+        self._esperando = 0
+        self._atendidos = 0
+        self._rechazados = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+        LimiteConcurrencia._registrados[nombre] = self
+
+    def _semaforo_del_loop(self) -> asyncio.Semaphore:
+        # Un semáforo de asyncio pertenece a un event loop; con uvicorn hay uno solo, pero
+        # los tests y scripts pueden levantar la app más de una vez
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaforo = asyncio.Semaphore(self.maximo)
+        return self._semaforo
+
+    async def __call__(self):
+        semaforo = self._semaforo_del_loop()
+        inicio = time.perf_counter()
+        self._esperando += 1
+        try:
+            await asyncio.wait_for(semaforo.acquire(), config.CONCURRENCIA_ESPERA_MAX_SEG)
+        except asyncio.TimeoutError:
+            self._rechazados += 1
+            raise HTTPException(
+                status_code=503,
+                detail=f"Servidor ocupado ({self.nombre}), reintentar en unos segundos",
+                headers={"Retry-After": "1"},
+            )
+        finally:
+            self._esperando -= 1
+
+        espera = time.perf_counter() - inicio
+        self._espera_total += espera
+        self._espera_max = max(self._espera_max, espera)
+        self._en_curso += 1
+        try:
+            yield
+        finally:
+            self._en_curso -= 1
+            self._atendidos += 1
+            semaforo.release()
+
+    def metricas(self) -> Dict:
+        return {
+            "maximo": self.maximo,
+            "en_curso": self._en_curso,
+            "esperando": self._esperando,
+            "atendidos": self._atendidos,
+            "rechazados": self._rechazados,
+            "espera_media_ms": round(self._espera_total / self._atendidos * 1000, 2) if self._atendidos else 0.0,
+            "espera_max_ms": round(self._espera_max * 1000, 2),
+        }
+
+
+# Generación de PDFs (fpdf): CPU pura
+LIMITE_PDF = LimiteConcurrencia("pdf", config.CONCURRENCIA_PDF)
+# Exportaciones en streaming: cada una retiene una conexión de lectura mientras envía
+LIMITE_EXPORTACION = LimiteConcurrencia("exportacion", config.CONCURRENCIA_EXPORTACION)
+# Login y cambio / recuperación de contraseña: esperan un proceso de bcrypt (utils/security.py)
+LIMITE_AUTH = LimiteConcurrencia("auth", config.CONCURRENCIA_AUTH)
+
+
+def metricas() -> Dict:
+    hilos = None
+    if _threadpool is not None:
+        hilos = {
+            "total": int(_threadpool.total_tokens),
+            "en_uso": int(_threadpool.borrowed_tokens),
+            "esperando": _threadpool.statistics().tasks_waiting,
+        }
+    return {
+        "hilos": hilos,
+        "limites": {nombre: limite.metricas() for nombre, limite in LimiteConcurrencia._registrados.items()},
+    }
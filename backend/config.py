@@ -0,0 +1,144 @@
+"""
+Configuración del backend.
+Cada valor se puede sobreescribir con una variable de entorno; los defaults son los de desarrollo.
+"""
+import os
+import tempfile
+
+
+def _env_int(nombre: str, default: int) -> int:
+    return int(os.getenv(nombre, default))
+
+
+def _env_float(nombre: str, default: float) -> float:
+    return float(os.getenv(nombre, default))
+
+
+def _env_cubeta(nombre: str, rafaga: int, por_minuto: float):
+    """'ráfaga/por_minuto' (p. ej. '20/10') -> (20, 10.0)"""
+    valor = os.getenv(nombre)
+    if not valor:
+        return rafaga, por_minuto
+    texto_rafaga, _, texto_por_minuto = valor.partition("/")
+    return int(texto_rafaga), float(texto_por_minuto or por_minuto)
+
+
+# --- Base de datos ---
+# Ruta del archivo SQLite; vacío usa database/turnero_medico.db
+DB_RUTA = os.getenv("TURNERO_DB_RUTA", "")
+# Conexiones de solo lectura que mantiene abiertas el pool (una por request GET concurrente).
+# Las escrituras van siempre por una única conexión serializada.
+DB_POOL_TAMANIO = _env_int("TURNERO_DB_POOL_TAMANIO", 8)
+# Segundos que un request espera una conexión libre antes de responder 503
+DB_POOL_TIMEOUT_SEG = _env_float("TURNERO_DB_POOL_TIMEOUT_SEG", 10.0)
+
+# PRAGMAs que se aplican a cada conexión (la base corre en modo WAL)
+DB_CACHE_KIB = _env_int("TURNERO_DB_CACHE_KIB", 32 * 1024)            # cache de páginas por conexión
+DB_MMAP_BYTES = _env_int("TURNERO_DB_MMAP_BYTES", 256 * 1024 * 1024)  # lectura por memory-map
+DB_BUSY_TIMEOUT_MS = _env_int("TURNERO_DB_BUSY_TIMEOUT_MS", 5000)     # espera ante un lock antes de fallar
+
+# --- Turnos ---
+# Máximo de días que se pueden pedir en una búsqueda de disponibilidad
+DISPONIBILIDAD_MAX_DIAS = _env_int("TURNERO_DISPONIBILIDAD_MAX_DIAS", 180)
+# Días hacia adelante que se mantienen generados en el calendario de slots (tabla Slot)
+SLOT_HORIZONTE_DIAS = _env_int("TURNERO_SLOT_HORIZONTE_DIAS", 180)
+# Lo más lejos que se puede reservar (el horizonte se extiende a pedido hasta este límite)
+SLOT_HORIZONTE_MAX_DIAS = _env_int("TURNERO_SLOT_HORIZONTE_MAX_DIAS", 730)
+
+# --- Emails ---
+# Workers que despachan la bandeja de salida; cada uno reutiliza su propia conexión SMTP
+EMAIL_WORKERS = _env_int("TURNERO_EMAIL_WORKERS", 2)
+# Mensajes que toma un worker en cada vuelta
+EMAIL_LOTE = _env_int("TURNERO_EMAIL_LOTE", 20)
+# Intentos antes de dar un mensaje por fallido; entre intentos la espera se duplica hasta el máximo
+EMAIL_MAX_INTENTOS = _env_int("TURNERO_EMAIL_MAX_INTENTOS", 5)
+EMAIL_BACKOFF_BASE_SEG = _env_float("TURNERO_EMAIL_BACKOFF_BASE_SEG", 30.0)
+EMAIL_BACKOFF_MAX_SEG = _env_float("TURNERO_EMAIL_BACKOFF_MAX_SEG", 3600.0)
+# Cada cuánto revisa la bandeja un worker ocioso (además de cuando se encola algo)
+EMAIL_ESPERA_SEG = _env_float("TURNERO_EMAIL_ESPERA_SEG", 10.0)
+# Cuánto queda reservado un mensaje tomado antes de que otro worker pueda retomarlo
+EMAIL_RESERVA_SEG = _env_float("TURNERO_EMAIL_RESERVA_SEG", 300.0)
+# Transporte de los emails: 'smtp' (un servidor real o el local de utils/servidor_smtp_local.py),
+# 'archivo' (un .eml por mensaje en EMAIL_ARCHIVO_DIR) o 'memoria' (sólo los cuenta, para pruebas)
+EMAIL_TRANSPORTE = os.getenv("TURNERO_EMAIL_TRANSPORTE", "smtp")
+EMAIL_REMITENTE = os.getenv("TURNERO_EMAIL_REMITENTE", "turnerovitalis@gmail.com")
+EMAIL_ARCHIVO_DIR = os.getenv("TURNERO_EMAIL_ARCHIVO_DIR", os.path.join(tempfile.gettempdir(), "turnero_emails"))
+
+# Servidor SMTP. EMAIL_SMTP_SEGURIDAD: 'ssl' (SMTPS), 'starttls' o 'ninguna' (servidor local)
+EMAIL_SMTP_HOST = os.getenv("TURNERO_EMAIL_SMTP_HOST", "smtp.gmail.com")
+EMAIL_SMTP_PUERTO = _env_int("TURNERO_EMAIL_SMTP_PUERTO", 465)
+EMAIL_SMTP_SEGURIDAD = os.getenv("TURNERO_EMAIL_SMTP_SEGURIDAD", "ssl")
+EMAIL_SMTP_USUARIO = os.getenv("TURNERO_EMAIL_SMTP_USUARIO", "turnerovitalis@gmail.com")
+EMAIL_SMTP_PASSWORD = os.getenv("TURNERO_EMAIL_SMTP_PASSWORD", "tfos ucsg apjj srvu")  # App password de Gmail
+# Sesiones SMTP abiertas como máximo (se reutilizan entre envíos) y cuánto puede quedar ociosa una
+EMAIL_SMTP_POOL = _env_int("TURNERO_EMAIL_SMTP_POOL", 4)
+EMAIL_SMTP_KEEPALIVE_SEG = _env_float("TURNERO_EMAIL_SMTP_KEEPALIVE_SEG", 60.0)
+# Timeout de conexión y envío contra el servidor SMTP
+EMAIL_SMTP_TIMEOUT_SEG = _env_float("TURNERO_EMAIL_SMTP_TIMEOUT_SEG", 20.0)
+
+# --- Jobs en segundo plano ---
+# Cada cuánto corre cada job. Con varios procesos de la API sólo lo corre el dueño del lease.
+JOB_RECORDATORIOS_SEG = _env_float("TURNERO_JOB_RECORDATORIOS_SEG", 50.0)
+JOB_SLOTS_SEG = _env_float("TURNERO_JOB_SLOTS_SEG", 24 * 3600.0)
+# Los ausentes no se buscan cada tanto: se marcan cuando vence cada turno (AgendaAusentes),
+# esperando esta ventana para juntar en un UPDATE los que terminan casi a la vez
+AUSENTES_VENTANA_SEG = _env_float("TURNERO_AUSENTES_VENTANA_SEG", 1.0)
+# Cada cuánto el dueño del job 'ausentes' recarga en su agenda los turnos pendientes de todos los
+# procesos: si el proceso que creó un turno ya no está, éste igual se marca a tiempo
+JOB_AUSENTES_SEG = _env_float("TURNERO_JOB_AUSENTES_SEG", 300.0)
+# Margen que el lease de un job sobrevive a su intervalo: si el dueño no lo renueva en
+# intervalo + margen (se cayó o quedó colgado) otro proceso toma el job
+JOB_LEASE_MARGEN_SEG = _env_float("TURNERO_JOB_LEASE_MARGEN_SEG", 60.0)
+# Días que se guarda el historial de ejecuciones (JobEjecucion)
+JOB_HISTORIAL_DIAS = _env_int("TURNERO_JOB_HISTORIAL_DIAS", 7)
+
+# --- Listados ---
+# Tope de `limit` en los listados paginados (turnos, pacientes, médicos, consultas, recetas, usuario-roles)
+PAGINA_LIMITE_MAX = _env_int("TURNERO_PAGINA_LIMITE_MAX", 1000)
+# Filas que lee cada fetchmany de las exportaciones en streaming (una por chunk de la respuesta)
+EXPORTACION_LOTE_FILAS = _env_int("TURNERO_EXPORTACION_LOTE_FILAS", 500)
+
+# --- Ejecución de los endpoints ---
+# Hilos del threadpool donde corren los handlers (todos son sincrónicos). Unos cuantos más
+# que conexiones de lectura: los requests de base esperan en el pool de conexiones y los de
+# CPU (bcrypt, PDF) quedan acotados por sus propios topes de abajo
+HILOS_TRABAJO = _env_int("TURNERO_HILOS_TRABAJO", 24)
+# Requests simultáneos por grupo de endpoints caros; el resto espera hasta CONCURRENCIA_ESPERA_MAX_SEG
+# y después recibe 503
+CONCURRENCIA_PDF = _env_int("TURNERO_CONCURRENCIA_PDF", 2)
+CONCURRENCIA_EXPORTACION = _env_int("TURNERO_CONCURRENCIA_EXPORTACION", 4)
+# Login y contraseñas: el bcrypt corre en los BCRYPT_PROCESOS de abajo; con el doble de requests
+# admitidos cada proceso tiene siempre el próximo hash esperando
+CONCURRENCIA_AUTH = _env_int("TURNERO_CONCURRENCIA_AUTH", 2 * (os.cpu_count() or 2))
+CONCURRENCIA_ESPERA_MAX_SEG = _env_float("TURNERO_CONCURRENCIA_ESPERA_MAX_SEG", 30.0)
+
+# --- Contraseñas (bcrypt) ---
+# Costo de bcrypt para los hashes nuevos. Si se cambia, cada usuario se rehashea con el costo
+# nuevo la próxima vez que inicia sesión
+BCRYPT_COSTO = _env_int("TURNERO_BCRYPT_COSTO", 12)
+# Procesos dedicados a bcrypt (0 = en el hilo del request) y operaciones pendientes como máximo
+# (en curso + en cola) antes de responder 503
+BCRYPT_PROCESOS = _env_int("TURNERO_BCRYPT_PROCESOS", os.cpu_count() or 2)
+BCRYPT_MAX_PENDIENTES = _env_int("TURNERO_BCRYPT_MAX_PENDIENTES", 64)
+
+# --- Sesiones (tokens firmados, utils/tokens.py) ---
+# Secreto con el que se firman los tokens. Vacío: uno al azar que genera el primer proceso y
+# guarda en ClaveServidor, compartido por todos los procesos y entre reinicios
+TOKEN_SECRETO = os.getenv("TURNERO_TOKEN_SECRETO", "")
+# Vigencia de un token desde el login
+TOKEN_TTL_SEG = _env_int("TURNERO_TOKEN_TTL_SEG", 8 * 3600)
+# Cada cuánto mira cada proceso si hay revocaciones nuevas (VersionTabla de TokenRevocado):
+# un logout atendido por otro proceso tarda a lo sumo esto en valer en éste
+TOKEN_REVOCADOS_REVISION_SEG = _env_float("TURNERO_TOKEN_REVOCADOS_REVISION_SEG", 1.0)
+
+# --- Límite de intentos (limite_intentos.py) ---
+# Token bucket por IP y por email de /auth/login y /auth/recover-password: 'ráfaga/por minuto'
+# = intentos seguidos admitidos y cuántos se recuperan por minuto. Los logins exitosos no consumen
+LIMITE_LOGIN_IP = _env_cubeta("TURNERO_LIMITE_LOGIN_IP", 20, 10.0)
+LIMITE_LOGIN_EMAIL = _env_cubeta("TURNERO_LIMITE_LOGIN_EMAIL", 5, 1.0)
+LIMITE_RECUPERO_IP = _env_cubeta("TURNERO_LIMITE_RECUPERO_IP", 5, 1.0)
+LIMITE_RECUPERO_EMAIL = _env_cubeta("TURNERO_LIMITE_RECUPERO_EMAIL", 2, 0.2)
+# 1 = las cubetas viven en la base (tabla IntentoCubeta): compartidas por todos los procesos y
+# sin vaciarse al reiniciar. 0 = en memoria de cada proceso: con uvicorn --workers N cada
+# límite vale N veces, así que hay que dividir los valores de arriba por N
+LIMITE_PERSISTIR = _env_int("TURNERO_LIMITE_PERSISTIR", 0)
@@ -1,80 +1,485 @@
 """
-Singleton para la conexión con la base de datos SQLite.
+Conexiones a la base de datos SQLite.
+La base corre en modo WAL: los requests de lectura toman una conexión de solo lectura
+de un pool y nunca quedan bloqueados por las escrituras, que pasan todas por una única
+conexión serializada (la API, los jobs del scheduler y los scripts escriben por ahí).
 """
+import importlib.util
+import queue
 import sqlite3
-from typing import Optional
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
 from pathlib import Path
 
+from fastapi import HTTPException, Request
+
+import config
+
 # Obtener la ruta base del proyecto
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATABASE_DIR = BASE_DIR / "database"
-database_url: Path = DATABASE_DIR / "turnero_medico.db"
+database_url: Path = Path(config.DB_RUTA) if config.DB_RUTA else DATABASE_DIR / "turnero_medico.db"
+
+# Métodos HTTP que se atienden con una conexión de solo lectura
+METODOS_LECTURA = {"GET", "HEAD", "OPTIONS"}
+
+
+def configurar_conexion(conexion: sqlite3.Connection, solo_lectura: bool = False) -> sqlite3.Connection:
+    """
+    Aplica la configuración de almacenamiento a una conexión.
+    journal_mode=WAL queda persistido en el archivo, el resto de los PRAGMAs es por conexión.
+    """
+    conexion.execute(f"PRAGMA busy_timeout = {config.DB_BUSY_TIMEOUT_MS}")
+    if not solo_lectura:
+        conexion.execute("PRAGMA journal_mode = WAL")
+    conexion.execute("PRAGMA synchronous = NORMAL")
+    conexion.execute(f"PRAGMA cache_size = -{config.DB_CACHE_KIB}")
+    conexion.execute(f"PRAGMA mmap_size = {config.DB_MMAP_BYTES}")
+    conexion.execute("PRAGMA temp_store = MEMORY")
+    if solo_lectura:
+        conexion.execute("PRAGMA query_only = ON")
+    return conexion
+
+
+class PoolAgotadoError(Exception):
+    """No se liberó ninguna conexión del pool dentro del timeout configurado"""
+
+
+class PoolConexiones:
+    """
+    Pool acotado de conexiones SQLite.
+    Las conexiones se crean a demanda hasta `tamanio`; si están todas en uso, quien
+    la pide espera hasta `timeout` segundos. Al tomar una conexión se verifica que
+    siga sana y al devolverla se revierte cualquier transacción que haya quedado abierta,
+    así un request nunca confirma cambios a medio escribir de otro.
+    Con `tamanio=1` el pool serializa a quienes lo usan (así se maneja el escritor).
+    """
+
+    def __init__(self, nombre: str, tamanio: int, timeout: float, solo_lectura: bool = False):
+        self.nombre = nombre
+        self.tamanio = tamanio
+        self.timeout = timeout
+        self.solo_lectura = solo_lectura
+        self._libres: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._creadas = 0
+
+        # Métricas
+        self._checkouts = 0
+        self._en_uso = 0
+        self._esperas = 0
+        self._espera_total_seg = 0.0
+        self._espera_max_seg = 0.0
+        self._timeouts = 0
+        self._reemplazadas = 0
+
+    def _crear_conexion(self) -> sqlite3.Connection:
+        if self.solo_lectura:
+            conexion = sqlite3.connect(
+                f"{database_url.as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False  # la conexión viaja entre hilos, pero la usa un solo request a la vez
+            )
+        else:
+            conexion = sqlite3.connect(str(database_url), check_same_thread=False)
+        conexion.row_factory = sqlite3.Row  # Permite acceso por nombre de columna
+        return configurar_conexion(conexion, self.solo_lectura)
+
+    @staticmethod
+    def _esta_sana(conexion: sqlite3.Connection) -> bool:
+        """Health check: la conexión responde a una consulta trivial"""
+        try:
+            conexion.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def obtener(self) -> sqlite3.Connection:
+        """Toma una conexión del pool, esperando como máximo `timeout` segundos"""
+        inicio = time.perf_counter()
+        conexion = None
+        try:
+            conexion = self._libres.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                puede_crear = self._creadas < self.tamanio
+                if puede_crear:
+                    self._creadas += 1
+            if puede_crear:
+                try:
+                    conexion = self._crear_conexion()
+                except sqlite3.Error:
+                    with self._lock:
+                        self._creadas -= 1
+                    raise
+            else:
+                try:
+                    conexion = self._libres.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._timeouts += 1
+                    raise PoolAgotadoError(f"No hay conexiones libres ({self.nombre}) después de {self.timeout}s")
+
+        if not self._esta_sana(conexion):
+            try:
+                conexion.close()
+            except sqlite3.Error:
+                pass
+            conexion = self._crear_conexion()
+            with self._lock:
+                self._reemplazadas += 1
+
+        espera = time.perf_counter() - inicio
+        with self._lock:
+            self._checkouts += 1
+            self._en_uso += 1
+            if espera > 0.001:
+                self._esperas += 1
+            self._espera_total_seg += espera
+            self._espera_max_seg = max(self._espera_max_seg, espera)
+        return conexion
+
+    def devolver(self, conexion: sqlite3.Connection):
+        """Devuelve la conexión al pool, revirtiendo lo que no se haya confirmado"""
+        try:
+            if conexion.in_transaction:
+                conexion.rollback()
+        except sqlite3.Error:
+            conexion.close()
+            conexion = self._crear_conexion()
+            with self._lock:
+                self._reemplazadas += 1
+
+        with self._lock:
+            self._en_uso -= 1
+        self._libres.put(conexion)
 
+    @contextmanager
+    def conexion(self):
+        """Context manager para usar una conexión del pool fuera de un request (jobs, scripts)"""
+        conexion = self.obtener()
+        try:
+            yield conexion
+        finally:
+            self.devolver(conexion)
 
-class DatabaseConnection:
-    _instance: Optional['DatabaseConnection'] = None
-    _connection: Optional[sqlite3.Connection] = None
+    def verificar(self) -> bool:
+        """Health check del pool: toma una conexión, la prueba y la devuelve"""
+        try:
+            with self.conexion() as conexion:
+                return self._esta_sana(conexion)
+        except (PoolAgotadoError, sqlite3.Error):
+            return False
+
+    def metricas(self) -> dict:
+        """Estado y métricas de espera del pool"""
+        with self._lock:
+            return {
+                "tamanio": self.tamanio,
+                "creadas": self._creadas,
+                "en_uso": self._en_uso,
+                "libres": self._libres.qsize(),
+                "checkouts": self._checkouts,
+                "checkouts_con_espera": self._esperas,
+                "espera_promedio_ms": round(1000 * self._espera_total_seg / self._checkouts, 3) if self._checkouts else 0.0,
+                "espera_max_ms": round(1000 * self._espera_max_seg, 3),
+                "timeouts": self._timeouts,
+                "reemplazadas": self._reemplazadas,
+            }
+
+    def cerrar(self):
+        """Cierra las conexiones libres del pool"""
+        while True:
+            try:
+                self._libres.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._creadas = self._en_uso
+
+
+def _cargar_db_init():
+    """Importa database/db_init.py (está fuera del paquete backend) para usar sus migraciones"""
+    spec = importlib.util.spec_from_file_location("db_init", DATABASE_DIR / "db_init.py")
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+class ConexionesDB:
+    """
+    Singleton con las conexiones de la aplicación:
+    - escritura: una sola conexión, serializada (pool de tamaño 1)
+    - lectura: pool de conexiones de solo lectura (TURNERO_DB_POOL_TAMANIO)
+    - versiones: una conexión de solo lectura aparte, para lecturas por clave primaria del
+      estado compartido entre procesos (VersionTabla, tokens revocados) desde dependencias
+      que pueden correr con una conexión del pool de lectura ya tomada
+    """
+    _instance: Optional['ConexionesDB'] = None
 
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(DatabaseConnection, cls).__new__(cls)
+            cls._instance = super(ConexionesDB, cls).__new__(cls)
+            cls._instance._escritura = None
+            cls._instance._lectura = None
+            cls._instance._versiones = None
         return cls._instance
 
     def __init__(self):
-        """Inicializa la conexión si aún no existe"""
-        if self._connection is None:
-            self._connection = sqlite3.connect(
-                str(database_url),
-                check_same_thread=False
-            )
-            self._connection.row_factory = sqlite3.Row  # Permite acceso por nombre de columna
-            print(f"✅ Conexión a base de datos establecida: {database_url}")
+        """Inicializa los pools si aún no existen"""
+        if self._escritura is None:
+            self._escritura = PoolConexiones("escritura", 1, config.DB_POOL_TIMEOUT_SEG)
+            self._lectura = PoolConexiones("lectura", config.DB_POOL_TAMANIO, config.DB_POOL_TIMEOUT_SEG, solo_lectura=True)
+            self._versiones = PoolConexiones("versiones", 1, config.DB_POOL_TIMEOUT_SEG, solo_lectura=True)
+
+            # Abrir el escritor al iniciar deja la base en modo WAL antes de que lleguen lecturas,
+            # y de paso aplica las migraciones de esquema pendientes (database/db_init.py)
+            with self._escritura.conexion() as conexion:
+                modo = conexion.execute("PRAGMA journal_mode").fetchone()[0]
+                _cargar_db_init().aplicar_migraciones(conexion)
+            print(f"✅ Conexiones a base de datos establecidas ({modo}, {config.DB_POOL_TAMANIO} lectores): {database_url}")
 
     @classmethod
-    def get_connection(cls) -> sqlite3.Connection:
-        """
-        Retorna la conexión singleton a la base de datos.
-        
-        sqlite3.Connection: Conexión activa a la base de datos
-        """
-        if cls._instance is None:
+    def escritura(cls) -> PoolConexiones:
+        """Retorna el pool (de una conexión) de escritura"""
+        if cls._instance is None or cls._instance._escritura is None:
+            cls()
+        return cls._instance._escritura
+
+    @classmethod
+    def lectura(cls) -> PoolConexiones:
+        """Retorna el pool de conexiones de solo lectura"""
+        if cls._instance is None or cls._instance._lectura is None:
             cls()
-        return cls._instance._connection
+        return cls._instance._lectura
 
     @classmethod
-    def commit(cls):
-        """Confirma los cambios en la base de datos"""
-        cls.get_connection().commit()
+    def versiones(cls) -> PoolConexiones:
+        """Retorna el pool (de una conexión) de solo lectura para el estado compartido"""
+        if cls._instance is None or cls._instance._versiones is None:
+            cls()
+        return cls._instance._versiones
 
     @classmethod
-    def rollback(cls):
-        """Revierte los cambios en la base de datos"""
-        cls.get_connection().rollback()
+    def metricas(cls) -> dict:
+        return {
+            "escritura": cls.escritura().metricas(),
+            "lectura": cls.lectura().metricas(),
+            "versiones": cls.versiones().metricas(),
+        }
 
     @classmethod
     def close(cls):
-        """Cierra la conexión a la base de datos"""
-        if cls._connection is not None:
-            cls._connection.close()
-            cls._connection = None
-            print("🔒 Conexión a base de datos cerrada")
-
-    def __enter__(self):
-        """Context manager: entrada"""
-        return self.get_connection()
-
-    def __exit__(self, exc_type):
-        """Context manager: salida"""
-        if exc_type is not None:
-            self.rollback()
-        else:
-            self.commit()
+        """Cierra las conexiones a la base de datos"""
+        if cls._instance is not None and cls._instance._escritura is not None:
+            cls._instance._lectura.cerrar()
+            cls._instance._versiones.cerrar()
+            cls._instance._escritura.cerrar()
+            print("🔒 Conexiones a base de datos cerradas")
 
 
-def get_db() -> sqlite3.Connection:
+class IdentityMap:
+    """
+    Mapa de identidad de un request: cada entidad cargada (Paciente, Medico, Usuario, ...)
+    se guarda por (entidad, id) y las siguientes lecturas del mismo request la devuelven
+    desde memoria en vez de volver a consultar la base.
+    """
+
+    def __init__(self):
+        self._entidades: Dict[Tuple[str, Hashable], Any] = {}
+
+    def obtener(self, entidad: str, clave: Hashable, cargar: Callable[[], Any]) -> Any:
+        """Devuelve la entidad si ya fue cargada en el request, si no la carga con `cargar` y la registra"""
+        if (entidad, clave) in self._entidades:
+            return self._entidades[(entidad, clave)]
+
+        obj = cargar()
+        if obj is not None:
+            self._entidades[(entidad, clave)] = obj
+        return obj
+
+    def registrar(self, entidad: str, clave: Hashable, obj: Any) -> Any:
+        """Registra una entidad ya construida (por ejemplo desde un JOIN) si no estaba cargada"""
+        return self._entidades.setdefault((entidad, clave), obj)
+
+    def contiene(self, entidad: str, clave: Hashable) -> bool:
+        return (entidad, clave) in self._entidades
+
+    def limpiar(self):
+        """Descarta todo lo cargado (se llama en cada commit/rollback para no servir datos viejos)"""
+        self._entidades.clear()
+
+    @staticmethod
+    def de(db) -> 'IdentityMap':
+        """
+        Retorna el identity map asociado a la conexión del request.
+        Las conexiones sueltas (scheduler, scripts) no tienen uno, en ese caso
+        se devuelve un mapa descartable y cada lectura va a la base como antes.
+        """
+        identity_map = getattr(db, 'identity_map', None)
+        return identity_map if identity_map is not None else IdentityMap()
+
+
+def version_tabla(db, tabla: str) -> int:
+    """
+    Versión de la tabla en VersionTabla (la suben los triggers en cada escritura, de cualquier
+    proceso). Los caches de proceso la comparan con la que tenían para saber si lo que guardan
+    sigue vigente. Dentro de un request se lee una sola vez (identity map), salvo con una
+    transacción abierta, que puede haberla cambiado.
+    """
+    def leer() -> int:
+        fila = db.execute("SELECT version FROM VersionTabla WHERE tabla = ?", (tabla,)).fetchone()
+        return fila[0] if fila else 0
+
+    if db.in_transaction:
+        return leer()
+    return IdentityMap.de(db).obtener('VersionTabla', tabla, leer)
+
+
+class CacheCatalogos:
+    """
+    Cache de proceso para las tablas de catálogo (EstadoTurno, Rol, Especialidad, ObraSocial),
+    que cambian muy de vez en cuando y se leen en casi todos los requests. Mismo uso que el
+    IdentityMap (entidad, clave, cargar) pero compartido entre requests. Lo cacheado de cada
+    entidad vale mientras no cambie la versión de su tabla en VersionTabla, que suben las
+    escrituras de cualquier proceso: así nunca se sirve un catálogo más viejo que el ETag
+    del request (cache_http.py). La versión se lee una vez por request (version_tabla).
+    """
+    _instance: Optional['CacheCatalogos'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(CacheCatalogos, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._entradas = {}
+            cls._instance._versiones = {}
+            cls._instance._contadores = {}
+        return cls._instance
+
+    def _contar(self, entidad: str, nombre: str):
+        contadores = self._contadores.setdefault(entidad, {"aciertos": 0, "fallos": 0, "invalidaciones": 0})
+        contadores[nombre] += 1
+
+    def obtener(self, db, entidad: str, clave: Hashable, cargar: Callable[[], Any]) -> Any:
+        """Devuelve la entidad cacheada o la carga con `cargar` (lo que no existe no se cachea)"""
+        version = version_tabla(db, entidad)
+        with self._lock:
+            # Una transacción abierta que modificó la tabla ve una versión sin confirmar:
+            # ni descarta lo cacheado ni guarda lo que lee
+            if version != self._versiones.get(entidad) and not db.in_transaction:
+                self._descartar(entidad)
+                self._versiones[entidad] = version
+            vigente = version == self._versiones.get(entidad)
+            entrada = self._entradas.get((entidad, clave)) if vigente else None
+            if entrada is not None:
+                self._contar(entidad, "aciertos")
+                return entrada
+            self._contar(entidad, "fallos")
+
+        # La versión se leyó antes que la fila: lo cargado es al menos tan nuevo como ella
+        obj = cargar()
+        with self._lock:
+            if obj is not None and vigente and self._versiones.get(entidad) == version:
+                self._entradas[(entidad, clave)] = obj
+        return obj
+
+    def _descartar(self, entidad: str):
+        """Saca las entradas de la entidad (con el lock tomado)"""
+        claves = [c for c in self._entradas if c[0] == entidad]
+        for clave in claves:
+            del self._entradas[clave]
+        if claves:
+            self._contar(entidad, "invalidaciones")
+
+    def invalidar(self, entidad: str):
+        """Descarta todo lo cacheado de la entidad (se llama después del commit que la cambia)"""
+        with self._lock:
+            self._descartar(entidad)
+            self._versiones.pop(entidad, None)
+
+    def metricas(self) -> Dict[str, Dict]:
+        with self._lock:
+            metricas = {}
+            for entidad, contadores in self._contadores.items():
+                consultas = contadores["aciertos"] + contadores["fallos"]
+                metricas[entidad] = {
+                    **contadores,
+                    "entradas": sum(1 for c in self._entradas if c[0] == entidad),
+                    "tasa_aciertos": round(contadores["aciertos"] / consultas, 4) if consultas else 0.0,
+                }
+            return metricas
+
+
+class SesionDB:
+    """
+    Conexión de un request: delega todo en la sqlite3.Connection y le agrega
+    el IdentityMap que comparten todos los servicios creados en ese request.
+    """
+
+    def __init__(self, conexion: sqlite3.Connection):
+        self.conexion = conexion
+        self.identity_map = IdentityMap()
+
+    def cursor(self) -> sqlite3.Cursor:
+        return self.conexion.cursor()
+
+    def execute(self, *args) -> sqlite3.Cursor:
+        return self.conexion.execute(*args)
+
+    def commit(self):
+        """Confirma los cambios y descarta las entidades cargadas, que pueden haber quedado viejas"""
+        self.conexion.commit()
+        self.identity_map.limpiar()
+
+    def rollback(self):
+        """Revierte los cambios y descarta las entidades cargadas"""
+        self.conexion.rollback()
+        self.identity_map.limpiar()
+
+    def __getattr__(self, nombre):
+        return getattr(self.conexion, nombre)
+
+
+def _sesion_desde_pool(pool: PoolConexiones):
+    try:
+        conexion = pool.obtener()
+    except PoolAgotadoError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    sesion = SesionDB(conexion)
+    try:
+        yield sesion
+    finally:
+        sesion.identity_map.limpiar()
+        pool.devolver(conexion)
+
+
+def get_db(request: Request):
     """
     Dependency Injection para FastAPI.
-    Retorna la conexión a la base de datos.
+    Toma una conexión para el request y la entrega envuelta en una SesionDB
+    (conexión + identity map): los GET usan el pool de solo lectura y el resto de
+    los métodos la conexión de escritura. FastAPI cachea la dependencia por request,
+    así que todos los servicios del mismo request comparten la misma sesión;
+    al terminar, la conexión vuelve a su pool.
     """
-    return DatabaseConnection.get_connection()
+    if request.method in METODOS_LECTURA:
+        pool = ConexionesDB.lectura()
+    else:
+        pool = ConexionesDB.escritura()
+    yield from _sesion_desde_pool(pool)
 
+
+def get_db_escritura():
+    """Dependency Injection para los endpoints GET que igual necesitan escribir"""
+    yield from _sesion_desde_pool(ConexionesDB.escritura())
+
+
+def get_db_lectura():
+    """
+    Dependency Injection para los endpoints que sólo leen aunque no sean GET (p. ej. los POST
+    de estadísticas): no toman el escritor, que queda tomado hasta terminar de mandar la respuesta
+    """
+    yield from _sesion_desde_pool(ConexionesDB.lectura())
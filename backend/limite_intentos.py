@@ -0,0 +1,307 @@
+"""
+Límite de intentos de login y de recuperación de contraseña.
+
+Cada intento consume un token de dos cubetas (token bucket): la de la IP y la del email del
+body. Una cubeta admite una ráfaga de `capacidad` intentos y recupera `por_minuto` por minuto;
+si alguna de las dos está vacía el middleware responde 429 con Retry-After, antes de que el
+request llegue al router: sin bcrypt ni emails. Los logins exitosos devuelven sus tokens,
+así sólo cuentan los intentos fallidos.
+
+Por defecto las cubetas viven en memoria (AlmacenIntentos) y cada proceso tiene las suyas: con
+uvicorn --workers N un cliente tiene N veces el límite configurado (dividir los valores por N).
+Con LIMITE_PERSISTIR viven en la tabla IntentoCubeta: cada intento admitido las lee y las
+actualiza en una transacción corta del escritor, así todos los procesos comparten los límites y
+un reinicio no los vacía. Cada proceso guarda además lo último que vio de cada cubeta: los otros
+procesos sólo pueden haberla vaciado más (salvo los tokens que devolvieron logins exitosos
+atendidos por ellos), así que si esa copia está vacía el intento se rechaza sin tocar la base:
+una ráfaga de intentos rechazados no hace cola en el escritor.
+La IP es la del cliente de la conexión: detrás de un proxy, levantar uvicorn con
+--proxy-headers para que sea la de X-Forwarded-For.
+"""
+import json
+import math
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+import config
+from database import ConexionesDB, PoolAgotadoError
+
+# Bodies más grandes no son un login: se rechazan sin leerlos enteros
+CUERPO_MAX_BYTES = 16 * 1024
+
+
+class Limite:
+    """Parámetros de una familia de cubetas (p. ej. 'login_ip': una cubeta por IP)"""
+    _registrados: Dict[str, 'Limite'] = {}
+
+    def __init__(self, nombre: str, capacidad: int, por_minuto: float, devolver_si_ok: bool = False):
+        self.nombre = nombre
+        self.capacidad = capacidad
+        self.por_seg = por_minuto / 60.0
+        self.devolver_si_ok = devolver_si_ok
+        self.rechazados = 0
+        Limite._registrados[nombre] = self
+
+    def clave(self, valor: str) -> str:
+        return f"{self.nombre}:{valor}"
+
+    def tokens(self, tokens: float, actualizado: float, ahora: float) -> float:
+        """Tokens de una cubeta que tenía `tokens` en `actualizado`, recargada hasta `ahora`"""
+        return min(float(self.capacidad), tokens + max(0.0, ahora - actualizado) * self.por_seg)
+
+    def segundos_hasta_llena(self) -> float:
+        return self.capacidad / self.por_seg if self.por_seg > 0 else math.inf
+
+
+# (límite por IP, límite por email) de cada ruta protegida (sólo POST)
+RUTAS: Dict[str, Tuple[Limite, Limite]] = {
+    "/auth/login": (
+        Limite("login_ip", *config.LIMITE_LOGIN_IP, devolver_si_ok=True),
+        Limite("login_email", *config.LIMITE_LOGIN_EMAIL, devolver_si_ok=True),
+    ),
+    "/auth/recover-password": (
+        Limite("recupero_ip", *config.LIMITE_RECUPERO_IP),
+        Limite("recupero_email", *config.LIMITE_RECUPERO_EMAIL),
+    ),
+}
+
+
+class AlmacenIntentos:
+    """
+    Cubetas de todos los límites: clave -> (tokens, actualizado). Único por proceso.
+    En memoria, una cubeta que se recargó por completo es igual a una que no existe: se
+    descartan cada minuto, así el diccionario sólo tiene las claves con intentos recientes.
+    Con LIMITE_PERSISTIR se usa la tabla IntentoCubeta, y cada minuto se borran sus filas llenas;
+    el diccionario queda como la última copia vista de cada cubeta, para rechazar sin la base.
+    """
+    _instance: Optional['AlmacenIntentos'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AlmacenIntentos, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._cubetas = {}
+            cls._instance._ultima_purga = time.time()
+            cls._instance._rechazados_sin_base = 0
+        return cls._instance
+
+    @property
+    def compartido(self) -> bool:
+        """Las cubetas están en la base: tomar y devolver usan el escritor (llamarlos desde un hilo)"""
+        return bool(config.LIMITE_PERSISTIR)
+
+    def tomar(self, pedidos: List[Tuple[Limite, str]]) -> float:
+        """
+        Consume un token de cada cubeta pedida (todas o ninguna). Devuelve 0 si se consumieron,
+        o los segundos que faltan para que todas tengan un token.
+        """
+        if self.compartido:
+            return self._tomar_compartido(pedidos)
+
+        ahora = time.time()
+        with self._lock:
+            espera, disponibles = self._consumir(pedidos, [self._cubetas.get(clave) for _, clave in pedidos], ahora)
+            if espera:
+                return espera
+            for (limite, clave), tokens in zip(pedidos, disponibles):
+                self._cubetas[clave] = (tokens - 1.0, ahora)
+            if ahora - self._ultima_purga >= 60:
+                self._purgar(ahora)
+            return 0.0
+
+    def _tomar_compartido(self, pedidos: List[Tuple[Limite, str]]) -> float:
+        claves = [clave for _, clave in pedidos]
+        # La copia local tiene a lo sumo los tokens de la compartida: si ya está vacía, no se va a la base
+        with self._lock:
+            espera, _ = self._consumir(pedidos, [self._cubetas.get(clave) for clave in claves], time.time())
+            if espera:
+                self._rechazados_sin_base += 1
+                return espera
+
+        # BEGIN IMMEDIATE: entre la lectura y la escritura ningún otro proceso toca las cubetas
+        with ConexionesDB.escritura().conexion() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            ahora = time.time()
+            filas = {clave: (tokens, actualizado) for clave, tokens, actualizado in conn.execute(f"""
+                SELECT clave, tokens, actualizado
+                FROM IntentoCubeta
+                WHERE clave IN ({", ".join("?" * len(claves))})
+            """, claves).fetchall()}
+            with self._lock:
+                espera, disponibles = self._consumir(pedidos, [filas.get(clave) for clave in claves], ahora)
+                if espera:
+                    # Se copia lo que hay en la base: los próximos intentos se rechazan sin ella
+                    self._cubetas.update((clave, fila) for clave, fila in filas.items())
+                else:
+                    for clave, tokens in zip(claves, disponibles):
+                        self._cubetas[clave] = (tokens - 1.0, ahora)
+                purgar = not espera and ahora - self._ultima_purga >= 60
+                if purgar:
+                    self._purgar(ahora)
+            if espera:
+                conn.rollback()
+                return espera
+            conn.executemany("""
+                INSERT INTO IntentoCubeta (clave, tokens, actualizado)
+                VALUES (?, ?, ?)
+                ON CONFLICT (clave) DO UPDATE SET tokens = excluded.tokens, actualizado = excluded.actualizado
+            """, [(clave, tokens - 1.0, ahora) for clave, tokens in zip(claves, disponibles)])
+            if purgar:
+                conn.execute("DELETE FROM IntentoCubeta WHERE actualizado <= ?", (ahora - self._vigencia_max(),))
+            conn.commit()
+        return 0.0
+
+    @staticmethod
+    def _consumir(pedidos: List[Tuple[Limite, str]], cubetas: List[Optional[Tuple[float, float]]],
+                  ahora: float) -> Tuple[float, List[float]]:
+        """(segundos de espera o 0, tokens disponibles de cada cubeta antes de consumir)"""
+        disponibles = []
+        espera = 0.0
+        for (limite, _), cubeta in zip(pedidos, cubetas):
+            tokens = limite.tokens(*cubeta, ahora) if cubeta else float(limite.capacidad)
+            disponibles.append(tokens)
+            if tokens < 1.0:
+                limite.rechazados += 1
+                espera = max(espera, (1.0 - tokens) / limite.por_seg if limite.por_seg > 0 else math.inf)
+        return espera, disponibles
+
+    def devolver(self, limite: Limite, clave: str):
+        """Reintegra el token de un intento que salió bien"""
+        ahora = time.time()
+        with self._lock:
+            cubeta = self._cubetas.get(clave)
+            if cubeta is not None:
+                self._cubetas[clave] = (min(float(limite.capacidad), limite.tokens(*cubeta, ahora) + 1.0), ahora)
+        if self.compartido:
+            # Recarga y reintegro en una sola sentencia: no hace falta leer la cubeta antes
+            with ConexionesDB.escritura().conexion() as conn:
+                conn.execute("""
+                    UPDATE IntentoCubeta
+                    SET tokens = MIN(?, tokens + MAX(0.0, ? - actualizado) * ? + 1.0), actualizado = ?
+                    WHERE clave = ?
+                """, (float(limite.capacidad), ahora, limite.por_seg, ahora, clave))
+                conn.commit()
+
+    def _purgar(self, ahora: float):
+        self._ultima_purga = ahora
+        for clave in [c for c, (tokens, actualizado) in self._cubetas.items()
+                      if self._limite_de(c).tokens(tokens, actualizado, ahora) >= self._limite_de(c).capacidad]:
+            del self._cubetas[clave]
+
+    @staticmethod
+    def _limite_de(clave: str) -> Limite:
+        return Limite._registrados[clave.split(":", 1)[0]]
+
+    @staticmethod
+    def _vigencia_max() -> float:
+        """Lo que tarda en recargarse la cubeta más lenta: una fila más vieja ya está llena"""
+        return min(max(l.segundos_hasta_llena() for l in Limite._registrados.values()), 7 * 24 * 3600.0)
+
+    def metricas(self) -> Dict:
+        with self._lock:
+            return {
+                # Compartidas: son las copias locales, no se cuentan las filas de IntentoCubeta
+                # (sería recorrer la tabla)
+                "cubetas": len(self._cubetas),
+                "persistidas": self.compartido,
+                "rechazados_sin_base": self._rechazados_sin_base,
+                "rechazados": {nombre: l.rechazados for nombre, l in Limite._registrados.items()},
+            }
+
+
+def _email(cuerpo: bytes) -> Optional[str]:
+    try:
+        datos = json.loads(cuerpo)
+    except ValueError:
+        return None
+    email = datos.get("email") if isinstance(datos, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+async def _responder(send, status: int, detalle: str, encabezados: List[Tuple[bytes, bytes]] = ()):
+    cuerpo = json.dumps({"detail": detalle}, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(cuerpo)).encode())]
+                   + list(encabezados),
+    })
+    await send({"type": "http.response.body", "body": cuerpo})
+
+
+class LimiteIntentosMiddleware:
+    """Middleware ASGI: aplica RUTAS a los POST antes de que lleguen al router"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in RUTAS:
+            await self.app(scope, receive, send)
+            return
+
+        # El email está en el body: se lee acá y se le vuelve a entregar entero a la app
+        partes = []
+        tamanio = 0
+        while True:
+            mensaje = await receive()
+            if mensaje["type"] == "http.disconnect":
+                return
+            partes.append(mensaje.get("body", b""))
+            tamanio += len(partes[-1])
+            if tamanio > CUERPO_MAX_BYTES:
+                await _responder(send, 413, "Body demasiado grande")
+                return
+            if not mensaje.get("more_body", False):
+                break
+        cuerpo = b"".join(partes)
+
+        limite_ip, limite_email = RUTAS[scope["path"]]
+        cliente = scope.get("client")
+        pedidos = [(limite_ip, limite_ip.clave(cliente[0] if cliente else "desconocida"))]
+        email = _email(cuerpo)
+        if email:
+            pedidos.append((limite_email, limite_email.clave(email)))
+
+        almacen = AlmacenIntentos()
+        try:
+            espera = await run_in_threadpool(almacen.tomar, pedidos) if almacen.compartido else almacen.tomar(pedidos)
+        except (PoolAgotadoError, sqlite3.OperationalError):
+            await _responder(send, 503, "No se pudo verificar el límite de intentos", [(b"retry-after", b"1")])
+            return
+        if espera:
+            segundos = math.ceil(min(espera, 24 * 3600))
+            await _responder(send, 429, f"Demasiados intentos, reintentar en {segundos} segundos",
+                             [(b"retry-after", str(segundos).encode())])
+            return
+
+        entregado = False
+
+        async def recibir():
+            nonlocal entregado
+            if not entregado:
+                entregado = True
+                return {"type": "http.request", "body": cuerpo, "more_body": False}
+            return await receive()
+
+        estado = None
+
+        async def enviar(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        await self.app(scope, recibir, enviar)
+
+        if estado is not None and estado < 400:
+            for limite, clave in pedidos:
+                if limite.devolver_si_ok:
+                    if almacen.compartido:
+                        await run_in_threadpool(almacen.devolver, limite, clave)
+                    else:
+                        almacen.devolver(limite, clave)
@@ -3,6 +3,7 @@ Módulo de modelos.
 """
 
 from .consulta import *
+from .disponibilidad import *
 from .especialidad import *
 from .estadoturno import *
 from .horarioAtencion import *
@@ -11,6 +12,7 @@ from .obraSocial import *
 from .paciente import *
 from .receta import *
 from .rol import *
+from .slot import *
 from .turno import *
 from .usuario import *
 from .usuarioRol import *
@@ -1,7 +1,11 @@
 from typing import Optional
 
+from .modelo import Modelo
+
+
+class ConsultaBase(Modelo):
+    __slots__ = ("id_turno", "fecha_consulta")
 
-class ConsultaBase:
     def __init__(self,
                  id_turno: int,
                  fecha_consulta: str):
@@ -10,6 +14,8 @@ class ConsultaBase:
 
 
 class ConsultaCreate(ConsultaBase):
+    __slots__ = ("diagnostico", "notas_privadas_medico", "tratamiento")
+
     def __init__(self,
                  id_turno: int,
                  fecha_consulta: str,
@@ -22,7 +28,9 @@ class ConsultaCreate(ConsultaBase):
         self.tratamiento = tratamiento
 
 
-class ConsultaUpdate:
+class ConsultaUpdate(Modelo):
+    __slots__ = ("diagnostico", "notas_privadas_medico", "tratamiento")
+
     def __init__(self,
                  diagnostico: Optional[str] = None,
                  notas_privadas_medico: Optional[str] = None,
@@ -33,6 +41,9 @@ class ConsultaUpdate:
 
 
 class ConsultaResponse(ConsultaBase):
+    __slots__ = ("id_consulta", "diagnostico", "notas_privadas_medico", "tratamiento", "turno")
+    _anidados = {"turno": "TurnoResponse"}
+
     def __init__(self,
                  id_consulta: int,
                  id_turno: int,
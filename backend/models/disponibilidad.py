@@ -0,0 +1,13 @@
+from .modelo import Modelo
+
+class TurnoLibreResponse(Modelo):
+    """Un turno disponible para reservar (lo que hace falta para el POST /turnos/)"""
+    __slots__ = ("id_medico", "fecha_hora_inicio", "fecha_hora_fin")
+
+    def __init__(self,
+                 id_medico: int,
+                 fecha_hora_inicio: str,
+                 fecha_hora_fin: str):
+        self.id_medico = id_medico
+        self.fecha_hora_inicio = fecha_hora_inicio
+        self.fecha_hora_fin = fecha_hora_fin
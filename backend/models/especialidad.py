@@ -1,18 +1,26 @@
 from typing import Optional
 
+from .modelo import Modelo
+
+
+class EspecialidadBase(Modelo):
+    __slots__ = ("nombre",)
 
-class EspecialidadBase:
     def __init__(self, nombre: str):
         self.nombre = nombre
 
 
 class EspecialidadCreate(EspecialidadBase):
+    __slots__ = ("descripcion",)
+
     def __init__(self, nombre: str, descripcion: Optional[str] = None):
         super().__init__(nombre)
         self.descripcion = descripcion
 
 
-class EspecialidadUpdate:
+class EspecialidadUpdate(Modelo):
+    __slots__ = ("nombre", "descripcion")
+
     def __init__(self,
                  nombre: Optional[str] = None,
                  descripcion: Optional[str] = None):
@@ -21,6 +29,8 @@ class EspecialidadUpdate:
 
 
 class EspecialidadResponse(EspecialidadBase):
+    __slots__ = ("id_especialidad", "descripcion")
+
     def __init__(self,
                  nombre: str,
                  id_especialidad: int,
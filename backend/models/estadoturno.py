@@ -1,17 +1,25 @@
 from typing import Optional
 
-class EstadoTurnoBase:
+from .modelo import Modelo
+
+class EstadoTurnoBase(Modelo):
+    __slots__ = ("nombre",)
+
     def __init__(self, nombre: str):
         self.nombre = nombre
 
 
 class EstadoTurnoCreate(EstadoTurnoBase):
+    __slots__ = ("descripcion",)
+
     def __init__(self, nombre: str, descripcion: Optional[str] = None):
         super().__init__(nombre)
         self.descripcion = descripcion
 
 
-class EstadoTurnoUpdate:
+class EstadoTurnoUpdate(Modelo):
+    __slots__ = ("nombre", "descripcion")
+
     def __init__(self,
                  nombre: Optional[str] = None,
                  descripcion: Optional[str] = None):
@@ -20,6 +28,8 @@ class EstadoTurnoUpdate:
 
 
 class EstadoTurnoResponse(EstadoTurnoBase):
+    __slots__ = ("id_estado_turno", "descripcion")
+
     def __init__(self,
                  nombre: str,
                  id_estado_turno: int,
@@ -1,7 +1,11 @@
 from typing import Optional
 
+from .modelo import Modelo
+
+
+class HorarioAtencionBase(Modelo):
+    __slots__ = ("id_medico", "dia_semana", "hora_inicio", "hora_fin", "duracion_turno_min")
 
-class HorarioAtencionBase:
     def __init__(self,
                  id_medico: int,
                  dia_semana: int,  # 0=Lunes, 1=Martes, ..., 6=Domingo
@@ -16,6 +20,8 @@ class HorarioAtencionBase:
 
 
 class HorarioAtencionCreate(HorarioAtencionBase):
+    __slots__ = ()
+
     def __init__(self,
                  id_medico: int,
                  dia_semana: int,
@@ -25,7 +31,9 @@ class HorarioAtencionCreate(HorarioAtencionBase):
         super().__init__(id_medico, dia_semana, hora_inicio, hora_fin, duracion_turno_min)
 
 
-class HorarioAtencionUpdate:
+class HorarioAtencionUpdate(Modelo):
+    __slots__ = ("dia_semana", "hora_inicio", "hora_fin", "duracion_turno_min")
+
     def __init__(self,
                  dia_semana: Optional[int] = None,
                  hora_inicio: Optional[str] = None,
@@ -38,6 +46,9 @@ class HorarioAtencionUpdate:
 
 
 class HorarioAtencionResponse(HorarioAtencionBase):
+    __slots__ = ("id_horario_atencion", "medico")
+    _anidados = {"medico": "MedicoResponse"}
+
     def __init__(self,
                  id_horario_atencion: int,
                  id_medico: int,
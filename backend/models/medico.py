@@ -1,7 +1,11 @@
 from typing import Optional
 
+from .modelo import Modelo
+
+
+class MedicoBase(Modelo):
+    __slots__ = ("matricula", "dni", "nombre", "apellido")
 
-class MedicoBase:
     def __init__(self,
                  matricula: str,
                  dni: str,
@@ -14,6 +18,8 @@ class MedicoBase:
 
 
 class MedicoCreate(MedicoBase):
+    __slots__ = ("id_usuario", "id_especialidad", "telefono", "noti_cancel_email_act")
+
     def __init__(self, 
                  matricula: str, 
                  dni: str, 
@@ -31,7 +37,12 @@ class MedicoCreate(MedicoBase):
         self.noti_cancel_email_act = noti_cancel_email_act
 
 
-class MedicoUpdate:
+class MedicoUpdate(Modelo):
+    __slots__ = (
+        "matricula", "dni", "nombre", "apellido", "telefono", "id_especialidad",
+        "noti_cancel_email_act",
+    )
+
     def __init__(self,
                  matricula: Optional[str] = None,
                  dni: Optional[str] = None,
@@ -68,6 +79,12 @@ class MedicoUpdate:
 
 
 class MedicoResponse(MedicoBase):
+    __slots__ = (
+        "id_medico", "id_usuario", "id_especialidad", "telefono", "noti_cancel_email_act",
+        "usuario", "especialidad",
+    )
+    _anidados = {"usuario": "UsuarioResponse", "especialidad": "EspecialidadResponse"}
+
     def __init__(self,
                  id_medico: int,
                  id_usuario: int,
@@ -0,0 +1,43 @@
+from typing import Dict, Tuple
+
+
+class Modelo:
+    """
+    Base de los modelos. Los atributos de cada clase van en `__slots__` (sin __dict__ por
+    instancia: menos memoria y acceso más rápido) y `dict(modelo)` devuelve los campos en el
+    orden en que se declararon, los de la clase base primero. `_campos` lo usa el serializador
+    de las respuestas (utils/serializacion.py).
+    `_anidados` declara qué campos son entidades anidadas y de qué clase (por nombre, así no
+    hace falta importar los otros modelos): la proyección de los listados (utils/paginacion.py)
+    valida `fields` y `expand` con eso, sin mirar ningún elemento.
+    """
+    __slots__ = ()
+    _campos: Tuple[str, ...] = ()
+    _anidados: Dict[str, str] = {}
+    _clases: Dict[str, type] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        Modelo._clases[cls.__name__] = cls
+        # Una subclase sin __slots__ tendría __dict__ y sus atributos no saldrían en el JSON
+        if "__slots__" not in cls.__dict__:
+            raise TypeError(f"{cls.__name__} tiene que declarar __slots__")
+        campos = []
+        for clase in reversed(cls.__mro__):
+            for campo in clase.__dict__.get("__slots__", ()):
+                if campo not in campos:
+                    campos.append(campo)
+        cls._campos = tuple(campos)
+
+    @classmethod
+    def campos_simples(cls) -> Tuple[str, ...]:
+        """Los campos que no son entidades anidadas, en orden"""
+        return tuple(c for c in cls._campos if c not in cls._anidados)
+
+    @classmethod
+    def clase_anidada(cls, campo: str) -> type:
+        return Modelo._clases[cls._anidados[campo]]
+
+    def __iter__(self):
+        for campo in self._campos:
+            yield campo, getattr(self, campo)
@@ -1,12 +1,18 @@
 from typing import Optional
 
+from .modelo import Modelo
+
+
+class ObraSocialBase(Modelo):
+    __slots__ = ("nombre",)
 
-class ObraSocialBase:
     def __init__(self, nombre: str):
         self.nombre = nombre
 
 
 class ObraSocialCreate(ObraSocialBase):
+    __slots__ = ("cuit", "direccion", "telefono", "mail")
+
     def __init__(self, 
                  nombre: str,
                  cuit: Optional[str] = None,
@@ -20,7 +26,9 @@ class ObraSocialCreate(ObraSocialBase):
         self.mail = mail
 
 
-class ObraSocialUpdate:
+class ObraSocialUpdate(Modelo):
+    __slots__ = ("nombre", "cuit", "direccion", "telefono", "mail")
+
     def __init__(self,
                  nombre: Optional[str] = None,
                  cuit: Optional[str] = None,
@@ -35,6 +43,8 @@ class ObraSocialUpdate:
 
 
 class ObraSocialResponse(ObraSocialBase):
+    __slots__ = ("id_obra_social", "cuit", "direccion", "telefono", "mail")
+
     def __init__(self,
                  nombre: str,
                  id_obra_social: int,
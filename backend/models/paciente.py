@@ -1,7 +1,11 @@
 from typing import Optional
 
+from .modelo import Modelo
+
+
+class PacienteBase(Modelo):
+    __slots__ = ("dni", "nombre", "apellido", "telefono")
 
-class PacienteBase:
     def __init__(self, 
                  dni: str, 
                  nombre: str, 
@@ -14,6 +18,8 @@ class PacienteBase:
 
 
 class PacienteCreate(PacienteBase):
+    __slots__ = ("id_usuario", "fecha_nacimiento", "id_obra_social", "nro_afiliado")
+
     def __init__(self, 
                  dni: str, 
                  nombre: str, 
@@ -30,7 +36,12 @@ class PacienteCreate(PacienteBase):
         self.nro_afiliado = nro_afiliado
 
 
-class PacienteUpdate:
+class PacienteUpdate(Modelo):
+    __slots__ = (
+        "nombre", "apellido", "fecha_nacimiento", "telefono", "id_obra_social", "id_usuario",
+        "nro_afiliado", "noti_reserva_email_act",
+    )
+
     def __init__(self,
                  nombre: Optional[str] = None,
                  apellido: Optional[str] = None,
@@ -51,6 +62,12 @@ class PacienteUpdate:
 
 
 class PacienteResponse(PacienteBase):
+    __slots__ = (
+        "id_paciente", "id_usuario", "fecha_nacimiento", "id_obra_social", "nro_afiliado",
+        "usuario", "obra_social", "noti_reserva_email_act",
+    )
+    _anidados = {"usuario": "UsuarioResponse", "obra_social": "ObraSocialResponse"}
+
     def __init__(self,
                  dni: str,
                  nombre: str,
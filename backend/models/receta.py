@@ -1,7 +1,11 @@
 from typing import Optional
 
+from .modelo import Modelo
+
+
+class RecetaBase(Modelo):
+    __slots__ = ("id_consulta", "medicamento", "fecha_emision")
 
-class RecetaBase:
     def __init__(self,
                  id_consulta: int,
                  medicamento: str,
@@ -12,6 +16,8 @@ class RecetaBase:
 
 
 class RecetaCreate(RecetaBase):
+    __slots__ = ("dosis", "instrucciones")
+
     def __init__(self,
                  id_consulta: int,
                  medicamento: str,
@@ -23,7 +29,9 @@ class RecetaCreate(RecetaBase):
         self.instrucciones = instrucciones
 
 
-class RecetaUpdate:
+class RecetaUpdate(Modelo):
+    __slots__ = ("medicamento", "dosis", "instrucciones")
+
     def __init__(self,
                  medicamento: Optional[str] = None,
                  dosis: Optional[str] = None,
@@ -34,6 +42,9 @@ class RecetaUpdate:
 
 
 class RecetaResponse(RecetaBase):
+    __slots__ = ("id_receta", "dosis", "instrucciones", "consulta")
+    _anidados = {"consulta": "ConsultaResponse"}
+
     def __init__(self,
                  id_receta: int,
                  id_consulta: int,
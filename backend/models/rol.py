@@ -1,18 +1,26 @@
 from typing import Optional
 
+from .modelo import Modelo
+
+
+class RolBase(Modelo):
+    __slots__ = ("nombre",)
 
-class RolBase:
     def __init__(self, nombre: str):
         self.nombre = nombre
 
 
 class RolCreate(RolBase):
+    __slots__ = ("descripcion",)
+
     def __init__(self, nombre: str, descripcion: Optional[str] = None):
         super().__init__(nombre)
         self.descripcion = descripcion
 
 
-class RolUpdate:
+class RolUpdate(Modelo):
+    __slots__ = ("nombre", "descripcion")
+
     def __init__(self, 
                  nombre: Optional[str] = None,
                  descripcion: Optional[str] = None):
@@ -21,6 +29,8 @@ class RolUpdate:
 
 
 class RolResponse(RolBase):
+    __slots__ = ("id_rol", "descripcion")
+
     def __init__(self, 
                  nombre: str,
                  id_rol: int,
@@ -0,0 +1,20 @@
+from typing import Optional
+
+from .modelo import Modelo
+
+
+class SlotResponse(Modelo):
+    """Un turno reservable del calendario materializado (id_turno None = libre)"""
+    __slots__ = ("id_slot", "id_medico", "fecha_hora_inicio", "fecha_hora_fin", "id_turno")
+
+    def __init__(self,
+                 id_slot: int,
+                 id_medico: int,
+                 fecha_hora_inicio: str,
+                 fecha_hora_fin: str,
+                 id_turno: Optional[int] = None):
+        self.id_slot = id_slot
+        self.id_medico = id_medico
+        self.fecha_hora_inicio = fecha_hora_inicio
+        self.fecha_hora_fin = fecha_hora_fin
+        self.id_turno = id_turno
@@ -1,7 +1,14 @@
 from typing import Optional
 
+from .modelo import Modelo
+
+
+class TurnoBase(Modelo):
+    __slots__ = (
+        "id_paciente", "id_medico", "fecha_hora_inicio", "fecha_hora_fin",
+        "recordatorio_notificado", "reserva_notificada",
+    )
 
-class TurnoBase:
     def __init__(self,
                  id_paciente: int,
                  id_medico: int,
@@ -17,6 +24,8 @@ class TurnoBase:
         self.reserva_notificada = reserva_notificada
 
 class TurnoCreate(TurnoBase):
+    __slots__ = ("id_estado_turno", "motivo_consulta")
+
     def __init__(self,
                  id_paciente: int,
                  id_medico: int,
@@ -29,7 +38,9 @@ class TurnoCreate(TurnoBase):
         self.motivo_consulta = motivo_consulta
 
 
-class TurnoUpdate:
+class TurnoUpdate(Modelo):
+    __slots__ = ("id_estado_turno", "motivo_consulta", "fecha_hora_inicio", "fecha_hora_fin")
+
     def __init__(self,
                  id_estado_turno: Optional[int] = None,
                  motivo_consulta: Optional[str] = None,
@@ -42,6 +53,11 @@ class TurnoUpdate:
 
 
 class TurnoResponse(TurnoBase):
+    __slots__ = (
+        "id_turno", "id_estado_turno", "motivo_consulta", "paciente", "medico", "estado_turno",
+    )
+    _anidados = {"paciente": "PacienteResponse", "medico": "MedicoResponse", "estado_turno": "EstadoTurnoResponse"}
+
     def __init__(self,
                  id_turno: int,
                  id_paciente: int,
@@ -1,25 +1,35 @@
 from typing import Optional
 import datetime
 
-class Usuario:
+from .modelo import Modelo
+
+class Usuario(Modelo):
+    __slots__ = ("email",)
+
     def __init__(self, email: str):
         self.email = email
 
 
 class UsuarioCreate(Usuario):
+    __slots__ = ("password", "activo", "recordatorios_activados")
+
     def __init__(self, email: str, password: str, activo: bool = True, recordatorios_activados: bool = True):
         super().__init__(email)
         self.password = password
         self.activo = activo
         self.recordatorios_activados = recordatorios_activados
         
-class UsuarioLogin:
+class UsuarioLogin(Modelo):
+    __slots__ = ("email", "password")
+
     def __init__(self, email: str, password: str):
         self.email = email
         self.password = password
 
 
-class UsuarioUpdate:
+class UsuarioUpdate(Modelo):
+    __slots__ = ("email", "activo", "recordatorios_activados")
+
     def __init__(self, 
                  email: Optional[str] = None,
                  activo: Optional[bool] = None,
@@ -29,6 +39,8 @@ class UsuarioUpdate:
         self.recordatorios_activados = recordatorios_activados
 
 class UsuarioResponse(Usuario):
+    __slots__ = ("id_usuario", "activo", "recordatorios_activados")
+
     def __init__(self, 
                  email: str, 
                  id_usuario: int,
@@ -1,18 +1,27 @@
 from typing import Optional
 
+from .modelo import Modelo
+
+
+class UsuarioRolBase(Modelo):
+    __slots__ = ("id_usuario", "id_rol")
 
-class UsuarioRolBase:
     def __init__(self, id_usuario: int, id_rol: int):
         self.id_usuario = id_usuario
         self.id_rol = id_rol
 
 
 class UsuarioRolCreate(UsuarioRolBase):
+    __slots__ = ()
+
     def __init__(self, id_usuario: int, id_rol: int):
         super().__init__(id_usuario, id_rol)
 
 
 class UsuarioRolResponse(UsuarioRolBase):
+    __slots__ = ("usuario", "rol")
+    _anidados = {"usuario": "UsuarioResponse", "rol": "RolResponse"}
+
     def __init__(self, 
                  id_usuario: int, 
                  id_rol: int,
@@ -23,3 +32,18 @@ class UsuarioRolResponse(UsuarioRolBase):
         self.rol = rol
 
 
+class SesionResponse(UsuarioRolResponse):
+    """Respuesta del login: el usuario-rol con el que se ingresó y el token de sesión"""
+    __slots__ = ("access_token", "token_type", "expires_in")
+
+    def __init__(self,
+                 id_usuario: int,
+                 id_rol: int,
+                 usuario,
+                 rol,
+                 access_token: str,
+                 expires_in: int):
+        super().__init__(id_usuario, id_rol, usuario, rol)
+        self.access_token = access_token
+        self.token_type = "bearer"
+        self.expires_in = expires_in
@@ -17,6 +17,7 @@ from .receta_router import router as receta_router
 from .horario_atencion_router import router as horario_atencion_router
 from .analytics_router import router as analytics_router
 from .auth_router import router as auth_router
+from .disponibilidad_router import router as disponibilidad_router
 
 # Lista de todos los routers disponibles
 __all__ = ["path_router",
@@ -33,4 +34,5 @@ __all__ = ["path_router",
            "receta_router",
            "horario_atencion_router",
            "analytics_router",
-           "auth_router"]
\ No newline at end of file
+           "auth_router",
+           "disponibilidad_router"]
\ No newline at end of file
@@ -5,6 +5,7 @@
 # GET /estadisticas/especialidad - Turnos por especialidad.
 # GET /estadisticas/rendimiento-medico - Listado de turnos por doctor. Entre 2 fechas. Lista de objetos como Ej: {"id": 101,"date": "2025-10-20", "time": "09:00", "patient": "Gomez, Juan", "socialWork": "OSDE 210", "status": "Atendido"}
 # GET /estadisticas/rendimiento-medico/pdf - Descarga de reporte PDF.
+# GET /estadisticas/rendimiento-medico/export - Mismo listado en NDJSON o CSV, en streaming.
 # GET /estadisticas/volumen-pacientes - Evolución de pacientes en el tiempo.
 # GET /estadisticas/asistencia - Comparativa Asistencias vs. Inasistencias.
 
@@ -13,12 +14,16 @@ from services.medico_service import MedicoService
 from fastapi import APIRouter, HTTPException, Response
 from fastapi.responses import FileResponse
 import sqlite3
-from database import get_db
+from database import get_db_lectura
 # from utils.pdf_generator import generate_pdf_report
 import datetime
 from services.analytics_service import AnalyticsService
 from fastapi import Depends
 from utils.pdf_downloader import generar_pdf_rendimiento
+from utils.exportacion import respuesta_exportacion
+from concurrencia import LIMITE_EXPORTACION, LIMITE_PDF
+from utils.serializacion import RespuestaJSON
+from typing import Literal
 
 router = APIRouter(
     prefix="/estadisticas",
@@ -26,34 +31,34 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-def get_analytics_service(db: sqlite3.Connection = Depends(get_db)) -> AnalyticsService:
-    """Dependency Injection para el servicio de analytics"""
+def get_analytics_service(db: sqlite3.Connection = Depends(get_db_lectura)) -> AnalyticsService:
+    """Dependency Injection para el servicio de analytics (sólo lee, también en los POST)"""
     return AnalyticsService(db)
 
-def get_medico_service(db: sqlite3.Connection = Depends(get_db)) -> MedicoService:
+def get_medico_service(db: sqlite3.Connection = Depends(get_db_lectura)) -> MedicoService:
     """Dependency Injection para el servicio de médicos"""
     return MedicoService(db)
 
 @router.get("/volumen-pacientes")
-async def get_volumen_pacientes(fecha_desde:str, fecha_hasta:str, service: AnalyticsService = Depends(get_analytics_service)):
+def get_volumen_pacientes(fecha_desde:str, fecha_hasta:str, service: AnalyticsService = Depends(get_analytics_service)):
     """Obtiene la evolución del volumen de pacientes en el tiempo"""
     try:
         stats = service.get_volumen_pacientes(fecha_desde, fecha_hasta)
-        return stats
+        return RespuestaJSON(stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo volumen de pacientes: {str(e)}")
     
 @router.get("/asistencia-vs-inasistencia")
-async def get_asistencia_vs_inasistencia(fecha_desde:str, fecha_hasta:str, service: AnalyticsService = Depends(get_analytics_service)):
+def get_asistencia_vs_inasistencia(fecha_desde:str, fecha_hasta:str, service: AnalyticsService = Depends(get_analytics_service)):
     """Obtiene la comparativa de asistencias vs inasistencias"""
     try:
         stats = service.get_asistencia_vs_inasistencia(fecha_desde, fecha_hasta)
-        return stats
+        return RespuestaJSON(stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo comparativa de asistencias: {str(e)}")
 
 @router.get("/diarias")
-async def get_resumen_diario(service: AnalyticsService = Depends(get_analytics_service)):
+def get_resumen_diario(service: AnalyticsService = Depends(get_analytics_service)):
     """Obtiene un resumen diario de estadísticas (Totales de hoy)"""
     try:
         # Obtenemos la fecha de hoy en formato YYYY-MM-DD
@@ -63,7 +68,7 @@ async def get_resumen_diario(service: AnalyticsService = Depends(get_analytics_s
         
         # Llamamos al servicio
         summary = service.get_resumen_diario(today)
-        return summary
+        return RespuestaJSON(summary)
     
     except Exception as e:
         # Es mejor capturar Exception general si el servicio lanza errores genéricos
@@ -71,8 +76,8 @@ async def get_resumen_diario(service: AnalyticsService = Depends(get_analytics_s
     
 
 
-@router.get("/rendimiento-medico/pdf")
-async def get_rendimiento_medico_pdf(
+@router.get("/rendimiento-medico/pdf", dependencies=[Depends(LIMITE_PDF)])
+def get_rendimiento_medico_pdf(
     fecha_desde: str,
     fecha_hasta: str,
     id_medico: int=None,
@@ -114,23 +119,42 @@ async def get_rendimiento_medico_pdf(
         print(e)
         raise HTTPException(status_code=500, detail=f"Error generando PDF: {str(e)}")
 
+@router.get("/rendimiento-medico/export", dependencies=[Depends(LIMITE_EXPORTACION)])
+def exportar_rendimiento_medico(
+    fecha_desde: str,
+    fecha_hasta: str,
+    id_medico: int = None,
+    formato: Literal["ndjson", "csv"] = "ndjson"
+):
+    """
+    Exporta el listado de rendimiento médico en NDJSON o CSV, en streaming.
+    Uso: GET /estadisticas/rendimiento-medico/export?fecha_desde=...&fecha_hasta=...&formato=csv
+    """
+    try:
+        return respuesta_exportacion(
+            f"rendimiento_medico_{fecha_desde}_{fecha_hasta}", formato,
+            lambda db: AnalyticsService(db).exportar_rendimiento_medico(fecha_desde, fecha_hasta, id_medico)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.post("/turnos_por_especialidad")
-async def get_turnos_por_especialidad(fechas:dict, service: AnalyticsService = Depends(get_analytics_service)):
+def get_turnos_por_especialidad(fechas:dict, service: AnalyticsService = Depends(get_analytics_service)):
     """Obtiene estadísticas de turnos por especialidad"""
     try:
         stats = service.get_turnos_por_especialidad(fechas.get("fecha_desde"), fechas.get("fecha_hasta"))
-        return stats
+        return RespuestaJSON(stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo estadísticas por especialidad: {str(e)}")
     
 @router.post("/rendimiento-medico")
-async def get_rendimiento_medico(
+def get_rendimiento_medico(
     datos: dict,
       service: AnalyticsService = Depends(get_analytics_service)):
     """Obtiene el rendimiento de médicos entre dos fechas"""
     try:
         stats = service.get_rendimiento_medico(datos.get("fecha_desde"), datos.get("fecha_hasta"), datos.get("id_medico"))
-        return stats
+        return RespuestaJSON(stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo rendimiento médico: {str(e)}")
     
@@ -1,10 +1,11 @@
 import datetime
 from fastapi import APIRouter, Depends, status, HTTPException
-from fastapi.encoders import jsonable_encoder
-from typing import List
-import sqlite3
-from database import get_db
+from typing import List, Optional
 from services.auth_service import AuthService
+from utils.security import ServicioHashOcupadoError
+from concurrencia import LIMITE_AUTH
+from utils.tokens import Sesion, sesion_actual, sesion_si_valida, emitir_token
+from utils.serializacion import RespuestaJSON
 
 router = APIRouter(
     prefix="/auth",
@@ -13,13 +14,16 @@ router = APIRouter(
 )
 
 
-def get_auth_service(db: sqlite3.Connection = Depends(get_db)) -> AuthService:
-    """Dependency Injection para el servicio de autenticación"""
-    return AuthService(db)
+def get_auth_service() -> AuthService:
+    """
+    Dependency Injection para el servicio de autenticación. No recibe la conexión del
+    request: toma las conexiones él mismo, sin tenerlas durante el bcrypt
+    """
+    return AuthService()
 
 
-@router.post("/login", response_model=dict)
-async def login(data: dict, service: AuthService = Depends(get_auth_service)):
+@router.post("/login", response_model=dict, dependencies=[Depends(LIMITE_AUTH)])
+def login(data: dict, service: AuthService = Depends(get_auth_service)):
     email = data.get("email")
     password = data.get("password")
     rol = data.get("rol")
@@ -29,29 +33,53 @@ async def login(data: dict, service: AuthService = Depends(get_auth_service)):
 
     try:
         result = service.login(email, password, rol)
-        return jsonable_encoder(result)
+        return RespuestaJSON(result)
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-
-@router.put("/change-password", response_model=dict)
-async def change_password(data: dict, service: AuthService = Depends(get_auth_service)):
-    id_usuario = data.get("id_usuario")
+    except ServicioHashOcupadoError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+@router.post("/logout", response_model=dict)
+def logout(sesion: Sesion = Depends(sesion_actual), service: AuthService = Depends(get_auth_service)):
+    """Revoca el token con el que se hizo el request"""
+    service.cerrar_sesion(sesion)
+    return {"message": "Sesión cerrada"}
+
+@router.get("/me", response_model=dict)
+def me(sesion: Sesion = Depends(sesion_actual)):
+    """Lo que dice el token de sesión (no consulta la base)"""
+    return RespuestaJSON(sesion)
+
+@router.put("/change-password", response_model=dict, dependencies=[Depends(LIMITE_AUTH)])
+def change_password(data: dict,
+                    sesion: Optional[Sesion] = Depends(sesion_si_valida),
+                    service: AuthService = Depends(get_auth_service)):
+    # Con token, el usuario es el del token; sin token (o con uno vencido o revocado), el del body
+    id_usuario = data.get("id_usuario") or (sesion.id_usuario if sesion else None)
     current_password = data.get("current_password")
     new_password = data.get("new_password")
 
     if not id_usuario or not current_password or not new_password:
         raise HTTPException(status_code=400, detail="Faltan campos obligatorios")
+    if sesion and sesion.id_usuario != id_usuario:
+        raise HTTPException(status_code=403, detail="Sólo se puede cambiar la contraseña propia")
 
     try:
         result = service.change_password(id_usuario, current_password, new_password)
-        return jsonable_encoder(result)
+        # El cambio revoca las sesiones abiertas: la de este request sigue con un token nuevo
+        if sesion:
+            token, nueva = emitir_token(sesion.id_usuario, sesion.rol, sesion.roles)
+            result.update(access_token=token, token_type="bearer", expires_in=round(nueva.expira - nueva.emitido))
+        return RespuestaJSON(result)
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except ServicioHashOcupadoError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
-@router.post("/recover-password", status_code=status.HTTP_200_OK)
-async def recover_password(data: dict, service: AuthService = Depends(get_auth_service)):
+@router.post("/recover-password", status_code=status.HTTP_200_OK, dependencies=[Depends(LIMITE_AUTH)])
+def recover_password(data: dict, service: AuthService = Depends(get_auth_service)):
     email = data.get("email")
 
     if not email:
@@ -62,4 +90,6 @@ async def recover_password(data: dict, service: AuthService = Depends(get_auth_s
         return {"message": "Se ha enviado un correo con la nueva contraseña temporal."}
 
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+    except ServicioHashOcupadoError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
\ No newline at end of file
@@ -1,12 +1,15 @@
 import datetime
-from fastapi import APIRouter, Depends, status, HTTPException
-from fastapi.encoders import jsonable_encoder
-from typing import List
+from fastapi import APIRouter, Depends, Request, status, HTTPException
+from typing import List, Literal
 import sqlite3
 from database import get_db
 from models.consulta import ConsultaResponse, ConsultaCreate, ConsultaUpdate
 from services.consulta_service import ConsultaService
 from services.turno_service import TurnoService
+from utils.paginacion import ParametrosLista
+from utils.exportacion import respuesta_exportacion
+from concurrencia import LIMITE_EXPORTACION
+from utils.serializacion import RespuestaJSON
 
 
 router = APIRouter(
@@ -22,14 +25,18 @@ def get_consulta_service(db: sqlite3.Connection = Depends(get_db)) -> ConsultaSe
 
 
 @router.get("/", response_model=List[dict])
-async def get_all_consultas(service: ConsultaService = Depends(get_consulta_service)):
-    """Obtiene todas las consultas"""
-    consultas = service.get_all()
-    return jsonable_encoder(consultas)
+def get_all_consultas(request: Request,
+                            lista: ParametrosLista = Depends(),
+                            service: ConsultaService = Depends(get_consulta_service)):
+    """Obtiene todas las consultas (paginadas con limit/after, proyectadas con fields/expand)"""
+    proyeccion = lista.proyeccion(ConsultaResponse)
+    consultas = service.get_all(limit=lista.limit, after=lista.cursor_id(),
+                                columnas=proyeccion and proyeccion.columnas("id_consulta"))
+    return lista.responder(request, consultas, ("id_consulta",), proyeccion)
 
 
 @router.get("/pacientes_por_fecha", response_model=List[int])
-async def get_pacientes_by_fecha(fecha_consulta: str, service: ConsultaService = Depends(get_consulta_service)):
+def get_pacientes_by_fecha(fecha_consulta: str, service: ConsultaService = Depends(get_consulta_service)):
     """Obtiene IDs de pacientes que tuvieron consultas en una fecha específica"""
     try:
         paciente_ids = service.get_id_pacientes_by_fecha_consulta(fecha_consulta)
@@ -41,7 +48,7 @@ async def get_pacientes_by_fecha(fecha_consulta: str, service: ConsultaService =
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/consultas_por_fecha", response_model=List[int])
-async def get_consultas_by_fecha(fecha_consulta: str, service: ConsultaService = Depends(get_consulta_service)):
+def get_consultas_by_fecha(fecha_consulta: str, service: ConsultaService = Depends(get_consulta_service)):
     """Obtiene IDs de consultas en una fecha específica"""
     try:
         consultas_ids = service.get_id_consultas_by_fecha_consulta(fecha_consulta)
@@ -52,31 +59,46 @@ async def get_consultas_by_fecha(fecha_consulta: str, service: ConsultaService =
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/export", dependencies=[Depends(LIMITE_EXPORTACION)])
+def exportar_consultas(fecha_desde: str, fecha_hasta: str, formato: Literal["ndjson", "csv"] = "ndjson"):
+    """
+    Exporta las consultas entre dos fechas (inclusive) en NDJSON o CSV.
+    La respuesta sale en streaming a medida que se leen las filas, sin armar la lista en memoria.
+    """
+    try:
+        return respuesta_exportacion(
+            f"consultas_{fecha_desde}_{fecha_hasta}", formato,
+            lambda db: ConsultaService(db).exportar(fecha_desde, fecha_hasta)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/{consulta_id}", response_model=dict)
-async def get_consulta_by_id(consulta_id: int, service: ConsultaService = Depends(get_consulta_service)):
+def get_consulta_by_id(consulta_id: int, service: ConsultaService = Depends(get_consulta_service)):
     """Obtiene una consulta por ID"""
     consulta = service.get_by_id(consulta_id)
     if not consulta:
         raise HTTPException(status_code=404, detail="Consulta no encontrada")
-    return jsonable_encoder(consulta)
+    return RespuestaJSON(consulta)
 
 
 @router.get("/paciente/{id_paciente}", response_model=List[dict])
-async def get_consultas_by_paciente(id_paciente: int, service: ConsultaService = Depends(get_consulta_service)):
+def get_consultas_by_paciente(id_paciente: int, service: ConsultaService = Depends(get_consulta_service)):
     """Obtiene todas las consultas de un paciente por su ID"""
     consultas_paciente = service.get_by_paciente_id(id_paciente)
-    return jsonable_encoder(consultas_paciente)
+    return RespuestaJSON(consultas_paciente)
 
 @router.get("/turno/{shift_id}", response_model=dict)
-async def get_consulta_by_shift_id(shift_id: int, service: ConsultaService = Depends(get_consulta_service)):
+def get_consulta_by_shift_id(shift_id: int, service: ConsultaService = Depends(get_consulta_service)):
     """Obtiene la consulta asociada a un ID de Turno específico."""
     consulta = service.get_by_shift_id(shift_id)
     if not consulta:
         raise HTTPException(status_code=404, detail="Consulta no encontrada para el Turno especificado")
-    return jsonable_encoder(consulta)
+    return RespuestaJSON(consulta)
 
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
-async def create_consulta(consulta_data: dict, service: ConsultaService = Depends(get_consulta_service)):
+def create_consulta(consulta_data: dict, service: ConsultaService = Depends(get_consulta_service)):
     """Crea una nueva consulta"""
     try:
         consulta = ConsultaCreate(
@@ -90,7 +112,7 @@ async def create_consulta(consulta_data: dict, service: ConsultaService = Depend
         TurnoService(service.db).marcar_como_atendido(consulta.id_turno)
         resultado = service.create(consulta)
 
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado, status_code=status.HTTP_201_CREATED)
     
     except KeyError as e:
         raise HTTPException(status_code=400, detail=f"Falta el campo obligatorio: {str(e)}")
@@ -99,7 +121,7 @@ async def create_consulta(consulta_data: dict, service: ConsultaService = Depend
 
 
 @router.put("/{consulta_id}", response_model=dict)
-async def update_consulta(
+def update_consulta(
     consulta_id: int,
     consulta_data: dict,
     service: ConsultaService = Depends(get_consulta_service)
@@ -114,14 +136,14 @@ async def update_consulta(
         resultado = service.update(consulta_id, consulta_update)
         if not resultado:
             raise HTTPException(status_code=404, detail="Consulta no encontrada")
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado)
     
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
 
 @router.delete("/{consulta_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_consulta(consulta_id: int, service: ConsultaService = Depends(get_consulta_service)):
+def delete_consulta(consulta_id: int, service: ConsultaService = Depends(get_consulta_service)):
     """Elimina una consulta"""
     try:
         success = service.delete(consulta_id)
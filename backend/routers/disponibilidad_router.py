@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+import sqlite3
+from database import get_db
+from services.disponibilidad_service import DisponibilidadService
+from utils.serializacion import RespuestaJSON
+
+
+router = APIRouter(
+    prefix="/disponibilidad",
+    tags=["Disponibilidad"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+def get_disponibilidad_service(db: sqlite3.Connection = Depends(get_db)) -> DisponibilidadService:
+    """Dependency Injection para el servicio de disponibilidad"""
+    return DisponibilidadService(db)
+
+
+@router.get("/", response_model=List[dict])
+def get_turnos_libres(
+    fecha_desde: str,
+    fecha_hasta: str,
+    id_medico: Optional[int] = None,
+    id_especialidad: Optional[int] = None,
+    id_paciente: Optional[int] = None,
+    service: DisponibilidadService = Depends(get_disponibilidad_service)
+):
+    """
+    Obtiene los turnos libres de un médico (id_medico) o de todos los médicos de una
+    especialidad (id_especialidad) entre dos fechas. Con id_paciente se excluyen los
+    horarios en los que el paciente ya tiene turno.
+    """
+    try:
+        turnos = service.get_turnos_libres(
+            fecha_desde=fecha_desde,
+            fecha_hasta=fecha_hasta,
+            id_medico=id_medico,
+            id_especialidad=id_especialidad,
+            id_paciente=id_paciente
+        )
+        return RespuestaJSON(turnos)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, status, HTTPException
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, Request, status, HTTPException
 from typing import List, Optional
 import sqlite3
 from database import get_db
 from models.medico import MedicoResponse, MedicoCreate, MedicoUpdate
 from services.medico_service import MedicoService
+from utils.paginacion import ParametrosLista
 from services.horario_atencion_service import HorarioAtencionService
 from services.usuario_service import UsuarioService
+from utils.serializacion import RespuestaJSON
 
 
 router = APIRouter(
@@ -21,7 +22,8 @@ def get_medico_service(db: sqlite3.Connection = Depends(get_db)) -> MedicoServic
 
 
 @router.get("/", response_model=List[dict])
-async def get_all_medicos(
+def get_all_medicos(
+    request: Request,
     dni: Optional[str] = None,
     matricula: Optional[str] = None,
     nombre: Optional[str] = None,
@@ -30,8 +32,10 @@ async def get_all_medicos(
     id_usuario: Optional[int] = None,
     id_especialidad: Optional[int] = None,
     telefono: Optional[str] = None,
+    lista: ParametrosLista = Depends(),
     service: MedicoService = Depends(get_medico_service)):
-    """Obtiene todos los medicos"""
+    """Obtiene todos los medicos (paginados con limit/after, proyectados con fields/expand)"""
+    proyeccion = lista.proyeccion(MedicoResponse)
     medicos = service.get_all(
         matricula=matricula,
         id_especialidad=id_especialidad,
@@ -40,27 +44,30 @@ async def get_all_medicos(
         apellido=apellido,
         id_medico=id_medico,
         id_usuario=id_usuario,
-        telefono=telefono
+        telefono=telefono,
+        limit=lista.limit,
+        after=lista.cursor_id(),
+        columnas=proyeccion and proyeccion.columnas("id_medico")
     )
-    return jsonable_encoder(medicos)
+    return lista.responder(request, medicos, ("id_medico",), proyeccion)
 
 
 @router.get("/{medico_id}", response_model=dict)
-async def get_medico_by_id(medico_id: int, service: MedicoService = Depends(get_medico_service)):
+def get_medico_by_id(medico_id: int, service: MedicoService = Depends(get_medico_service)):
     """Obtiene un medico por ID"""
     medico = service.get_by_id(medico_id)
     if not medico:
         raise HTTPException(status_code=404, detail="Médico no encontrado")
-    return jsonable_encoder(medico)
+    return RespuestaJSON(medico)
 
 @router.get("/ligero/", response_model=List[dict])
-async def get_all_medicos_ligero(service: MedicoService = Depends(get_medico_service)):
+def get_all_medicos_ligero(service: MedicoService = Depends(get_medico_service)):
     """Obtiene todos los medicos en formato ligero"""
     medicos = service.get_ligero()
-    return jsonable_encoder(medicos)
+    return RespuestaJSON(medicos)
 
 @router.put("/medicos/{id}/horarios", response_model=List[dict])
-async def update_horarios_medico(
+def update_horarios_medico(
     id: int,
     horarios: List[dict],
     service: MedicoService = Depends(get_medico_service)
@@ -69,19 +76,19 @@ async def update_horarios_medico(
 
 
 @router.get("/mis_pacientes/{medico_id}", response_model=List[dict])
-async def get_mis_pacientes(medico_id: int, service: MedicoService = Depends(get_medico_service)):
+def get_mis_pacientes(medico_id: int, service: MedicoService = Depends(get_medico_service)):
     """Obtiene los pacientes asignados a un médico"""
     pacientes = service.get_pacientes_de_medico(medico_id)
-    return jsonable_encoder(pacientes)
+    return RespuestaJSON(pacientes)
 
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
-async def create_medico(medico_data: dict, service: MedicoService = Depends(get_medico_service)):
+def create_medico(medico_data: dict, service: MedicoService = Depends(get_medico_service)):
     """Crea un nuevo medico"""
     try:
         
         resultado = service.create(medico_data)
         HorarioAtencionService(service.db).crear_horarios_default_para_medico(resultado.id_medico)
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado, status_code=status.HTTP_201_CREATED)
     
     except KeyError as e:
         raise HTTPException(status_code=400, detail=f"Falta el campo obligatorio: {str(e)}")
@@ -90,7 +97,7 @@ async def create_medico(medico_data: dict, service: MedicoService = Depends(get_
 
 
 @router.put("/{medico_id}", response_model=dict)
-async def update_medico(
+def update_medico(
     medico_id: int,
     medico_data: dict,
     service: MedicoService = Depends(get_medico_service)
@@ -112,14 +119,14 @@ async def update_medico(
 
         if not resultado:
             raise HTTPException(status_code=404, detail="Médico no encontrado")
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado)
     
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.delete("/{medico_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_medico(medico_id: int, service: MedicoService = Depends(get_medico_service)):
+def delete_medico(medico_id: int, service: MedicoService = Depends(get_medico_service)):
     """Elimina un medico"""
     try:
         success = service.delete(medico_id)
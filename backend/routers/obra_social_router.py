@@ -1,11 +1,11 @@
 
 from fastapi import APIRouter, HTTPException, Depends, status
-from fastapi.encoders import jsonable_encoder
 from typing import List, Optional
 import sqlite3
 from database import get_db
 from models.obraSocial import ObraSocialResponse, ObraSocialCreate
 from services.obra_social_service import ObraSocialService
+from utils.serializacion import RespuestaJSON
 
 
 router = APIRouter(
@@ -19,30 +19,30 @@ def get_obra_social_service(db: sqlite3.Connection = Depends(get_db)) -> ObraSoc
     return ObraSocialService(db)
 
 @router.get("/", response_model=List[dict])
-async def get_all_obras_sociales(id_obra_social: Optional[int] = None, nombre: Optional[str] = None, cuit: Optional[str] = None, telefono: Optional[str] = None, mail: Optional[str] = None, service: ObraSocialService = Depends(get_obra_social_service)):
+def get_all_obras_sociales(id_obra_social: Optional[int] = None, nombre: Optional[str] = None, cuit: Optional[str] = None, telefono: Optional[str] = None, mail: Optional[str] = None, service: ObraSocialService = Depends(get_obra_social_service)):
     """Obtiene todas las obras sociales"""
     obras_sociales = service.get_all(id_obra_social=id_obra_social, nombre=nombre, cuit=cuit, telefono=telefono, mail=mail)
-    return jsonable_encoder(obras_sociales)
+    return RespuestaJSON(obras_sociales)
 
 
 @router.get("/{obra_social_id}", response_model=dict)
-async def get_obra_social_by_id(obra_social_id: int, service: ObraSocialService = Depends(get_obra_social_service)):
+def get_obra_social_by_id(obra_social_id: int, service: ObraSocialService = Depends(get_obra_social_service)):
     """Obtiene una obra social por ID"""
     obra_social = service.get_by_id(obra_social_id)
     if not obra_social:
         raise HTTPException(status_code=404, detail="Obra Social no encontrada")
-    return jsonable_encoder(obra_social)
+    return RespuestaJSON(obra_social)
 
 # quizas sea innecesario ya que get_all ya devuelve poca info
 @router.get("/ligero/", response_model=List[dict])
-async def get_all_obras_sociales_ligero(service: ObraSocialService = Depends(get_obra_social_service)):
+def get_all_obras_sociales_ligero(service: ObraSocialService = Depends(get_obra_social_service)):
     """Obtiene todas las obras sociales en formato ligero"""
     obras_sociales = service.get_ligero()
-    return jsonable_encoder(obras_sociales)
+    return RespuestaJSON(obras_sociales)
 
 
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
-async def create_obra_social(obra_social_data: dict, service: ObraSocialService = Depends(get_obra_social_service)):
+def create_obra_social(obra_social_data: dict, service: ObraSocialService = Depends(get_obra_social_service)):
     """Crea una nueva obra social"""
     try:
         obra_social = ObraSocialCreate(
@@ -53,7 +53,7 @@ async def create_obra_social(obra_social_data: dict, service: ObraSocialService
             mail=obra_social_data.get('mail')
         )
         resultado = service.create(obra_social)
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado, status_code=status.HTTP_201_CREATED)
     
     except KeyError as e:
         raise HTTPException(status_code=400, detail=f"Falta el campo obligatorio: {str(e)}")
@@ -63,7 +63,7 @@ async def create_obra_social(obra_social_data: dict, service: ObraSocialService
     
 
 @router.put("/{obra_social_id}", response_model=dict)
-async def update_obra_social(
+def update_obra_social(
     obra_social_id: int,
     obra_social_data: dict,
     service: ObraSocialService = Depends(get_obra_social_service)):
@@ -78,13 +78,13 @@ async def update_obra_social(
         resultado = service.update(obra_social_id, nombre, cuit, direccion, telefono, mail)
         if not resultado:
             raise HTTPException(status_code=404, detail="Obra Social no encontrada")
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado)
     
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{obra_social_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_obra_social(obra_social_id: int, service: ObraSocialService = Depends(get_obra_social_service)):
+def delete_obra_social(obra_social_id: int, service: ObraSocialService = Depends(get_obra_social_service)):
     """Elimina una obra social por ID"""
     try:
         eliminado_os = service.delete(obra_social_id)
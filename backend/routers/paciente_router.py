@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, status, HTTPException
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, Request, status, HTTPException
 from typing import List
 import sqlite3
 from database import get_db
 from models.paciente import PacienteResponse, PacienteCreate, PacienteUpdate
 from services.paciente_service import PacienteService
+from utils.paginacion import ParametrosLista
+from utils.serializacion import RespuestaJSON
 
 
 router = APIRouter(
@@ -20,34 +21,39 @@ def get_paciente_service(db: sqlite3.Connection = Depends(get_db)) -> PacienteSe
 
 
 @router.get("/", response_model=List[dict])
-async def get_all_pacientes(
+def get_all_pacientes(
+    request: Request,
     id_paciente: int = None,
     dni: str = None,
     nombre: str = None,
     apellido: str = None,
     id_obra_social: int = None,
     id_usuario: int = None,
+    lista: ParametrosLista = Depends(),
     service: PacienteService = Depends(get_paciente_service)
 ):
-    """Obtiene todos los pacientes"""
-    pacientes = service.get_all(id_paciente, dni, nombre, apellido, id_obra_social, id_usuario)
-    return jsonable_encoder(pacientes)
+    """Obtiene todos los pacientes (paginados con limit/after, proyectados con fields/expand)"""
+    proyeccion = lista.proyeccion(PacienteResponse)
+    pacientes = service.get_all(id_paciente, dni, nombre, apellido, id_obra_social, id_usuario,
+                                limit=lista.limit, after=lista.cursor_id(),
+                                columnas=proyeccion and proyeccion.columnas("id_paciente"))
+    return lista.responder(request, pacientes, ("id_paciente",), proyeccion)
 
 
 @router.get("/{paciente_id}", response_model=dict)
-async def get_paciente_by_id(paciente_id: int, service: PacienteService = Depends(get_paciente_service)):
+def get_paciente_by_id(paciente_id: int, service: PacienteService = Depends(get_paciente_service)):
     """Obtiene un paciente por ID"""
     paciente = service.get_by_id(paciente_id)
     if not paciente:
         raise HTTPException(status_code=404, detail="Paciente no encontrado")
-    return jsonable_encoder(paciente)
+    return RespuestaJSON(paciente)
 
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
-async def create(usuario_data: dict, service: PacienteService = Depends(get_paciente_service)):
+def create(usuario_data: dict, service: PacienteService = Depends(get_paciente_service)):
     """Registra un nuevo paciente junto con su usuario"""
     try:
         resultado = service.create(usuario_data)
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado, status_code=status.HTTP_201_CREATED)
     
     except KeyError as e:
         raise HTTPException(status_code=400, detail=f"Falta el campo obligatorio: {str(e)}")
@@ -56,7 +62,7 @@ async def create(usuario_data: dict, service: PacienteService = Depends(get_paci
 
 
 @router.put("/{paciente_id}", response_model=dict)
-async def update_paciente(
+def update_paciente(
     paciente_id: int,
     paciente_data: dict,
     service: PacienteService = Depends(get_paciente_service)
@@ -75,14 +81,14 @@ async def update_paciente(
         resultado = service.update(paciente_id, paciente_update)
         if not resultado:
             raise HTTPException(status_code=404, detail="Paciente no encontrado")
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado)
     
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
 
 @router.delete("/{paciente_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_paciente(paciente_id: int, service: PacienteService = Depends(get_paciente_service)):
+def delete_paciente(paciente_id: int, service: PacienteService = Depends(get_paciente_service)):
     """Elimina un paciente"""
     try:
         success = service.delete(paciente_id)
@@ -1,4 +1,13 @@
 from fastapi import APIRouter
+import cache_http
+import concurrencia
+import limite_intentos
+from database import CacheCatalogos, ConexionesDB
+from services.bandeja_salida_service import DespachadorEmails
+from services.planificador_service import JobService, PlanificadorJobs
+from services.agenda_ausentes import AgendaAusentes
+from utils.security import ServicioHash
+from utils.tokens import ListaRevocados
 
 # Crear un router para este controlador
 router = APIRouter(
@@ -8,9 +17,40 @@ router = APIRouter(
 
 # Endpoints del controlador
 @router.get("/")
-async def get_path():
+def get_path():
     return [
         {"message": "API corriendo correctamente!"},
     ]
 
 
+
+
+
+@router.get("/salud")
+def get_salud():
+    """Health check de la API con el estado y las métricas de cada subsistema (conexiones, emails, jobs, caches)"""
+    return {
+        "db_ok": ConexionesDB.lectura().verificar() and ConexionesDB.escritura().verificar(),
+        "pool": ConexionesDB.metricas(),
+        "emails": DespachadorEmails().metricas(),
+        "jobs": PlanificadorJobs().metricas(),
+        "ausentes": AgendaAusentes().metricas(),
+        "cache_catalogos": CacheCatalogos().metricas(),
+        "cache_http": cache_http.metricas(),
+        "concurrencia": concurrencia.metricas(),
+        "hash": ServicioHash().metricas(),
+        "sesiones": ListaRevocados().metricas(),
+        "intentos": limite_intentos.AlmacenIntentos().metricas(),
+    }
+
+
+@router.get("/salud/jobs")
+def get_salud_jobs(limite: int = 10):
+    """Lease de cada job (qué proceso lo corre) y sus últimas ejecuciones, de todos los procesos"""
+    with ConexionesDB.lectura().conexion() as conn:
+        service = JobService(conn)
+        leases = service.get_leases()
+        return [
+            {**lease, "ejecuciones": service.get_ejecuciones(lease["nombre"], limite)}
+            for lease in leases
+        ]
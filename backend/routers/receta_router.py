@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, status, HTTPException
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, Request, status, HTTPException
 from fastapi.responses import Response
-from typing import List
+from typing import List, Literal
 import sqlite3
 from database import get_db
 from models.receta import RecetaResponse, RecetaCreate, RecetaUpdate
 from services.receta_service import RecetaService
+from utils.paginacion import ParametrosLista
+from utils.exportacion import respuesta_exportacion
+from concurrencia import LIMITE_EXPORTACION, LIMITE_PDF
 import datetime
+from utils.serializacion import RespuestaJSON
 
 router = APIRouter(
     prefix="/recetas",
@@ -21,23 +24,42 @@ def get_receta_service(db: sqlite3.Connection = Depends(get_db)) -> RecetaServic
 
 
 @router.get("/", response_model=List[dict])
-async def get_all_recetas(service: RecetaService = Depends(get_receta_service)):
-    """Obtiene todas las recetas"""
-    recetas = service.get_all()
-    return jsonable_encoder(recetas)
+def get_all_recetas(request: Request,
+                          lista: ParametrosLista = Depends(),
+                          service: RecetaService = Depends(get_receta_service)):
+    """Obtiene todas las recetas (paginadas con limit/after, proyectadas con fields/expand)"""
+    proyeccion = lista.proyeccion(RecetaResponse)
+    recetas = service.get_all(limit=lista.limit, after=lista.cursor_id(),
+                              columnas=proyeccion and proyeccion.columnas("id_receta"))
+    return lista.responder(request, recetas, ("id_receta",), proyeccion)
+
+
+@router.get("/export", dependencies=[Depends(LIMITE_EXPORTACION)])
+def exportar_recetas(fecha_desde: str, fecha_hasta: str, formato: Literal["ndjson", "csv"] = "ndjson"):
+    """
+    Exporta las recetas emitidas entre dos fechas (inclusive) en NDJSON o CSV.
+    La respuesta sale en streaming a medida que se leen las filas, sin armar la lista en memoria.
+    """
+    try:
+        return respuesta_exportacion(
+            f"recetas_{fecha_desde}_{fecha_hasta}", formato,
+            lambda db: RecetaService(db).exportar(fecha_desde, fecha_hasta)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/{receta_id}", response_model=dict)
-async def get_receta_by_id(receta_id: int, service: RecetaService = Depends(get_receta_service)):
+def get_receta_by_id(receta_id: int, service: RecetaService = Depends(get_receta_service)):
     """Obtiene una receta por ID"""
     receta = service.get_by_id(receta_id)
     if not receta:
         raise HTTPException(status_code=404, detail="Receta no encontrada")
-    return jsonable_encoder(receta)
+    return RespuestaJSON(receta)
 
 
-@router.get("/pdf/{consulta_id}")
-async def get_recetas_pdf_by_consulta(
+@router.get("/pdf/{consulta_id}", dependencies=[Depends(LIMITE_PDF)])
+def get_recetas_pdf_by_consulta(
     consulta_id: int, 
     service: RecetaService = Depends(get_receta_service)
 ):
@@ -63,14 +85,14 @@ async def get_recetas_pdf_by_consulta(
 
 
 @router.get("/consulta/{consulta_id}", response_model=List[dict])
-async def get_recetas_by_consulta(consulta_id: int, service: RecetaService = Depends(get_receta_service)):
+def get_recetas_by_consulta(consulta_id: int, service: RecetaService = Depends(get_receta_service)):
     """Obtiene todas las recetas de una consulta"""
     recetas = service.get_by_consulta_id(consulta_id)
-    return jsonable_encoder(recetas)
+    return RespuestaJSON(recetas)
 
 
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
-async def create_receta(receta_data: dict, service: RecetaService = Depends(get_receta_service)):
+def create_receta(receta_data: dict, service: RecetaService = Depends(get_receta_service)):
     """Crea una nueva receta, inyectando la fecha de emisión del servidor."""
     
     try:
@@ -84,7 +106,7 @@ async def create_receta(receta_data: dict, service: RecetaService = Depends(get_
         )
         
         resultado = service.create(receta)
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado, status_code=status.HTTP_201_CREATED)
     
     except KeyError as e:
         raise HTTPException(status_code=400, detail=f"Falta el campo obligatorio: {str(e)}")
@@ -95,7 +117,7 @@ async def create_receta(receta_data: dict, service: RecetaService = Depends(get_
 
 
 @router.put("/{receta_id}", response_model=dict)
-async def update_receta(
+def update_receta(
     receta_id: int,
     receta_data: dict,
     service: RecetaService = Depends(get_receta_service)
@@ -110,14 +132,14 @@ async def update_receta(
         resultado = service.update(receta_id, receta_update)
         if not resultado:
             raise HTTPException(status_code=404, detail="Receta no encontrada")
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado)
     
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
 
 @router.delete("/{receta_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_receta(receta_id: int, service: RecetaService = Depends(get_receta_service)):
+def delete_receta(receta_id: int, service: RecetaService = Depends(get_receta_service)):
     """Elimina una receta"""
     try:
         success = service.delete(receta_id)
@@ -1,11 +1,11 @@
 
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.encoders import jsonable_encoder
 from typing import List
 import sqlite3
 from database import get_db
 from models.rol import RolResponse, RolCreate, RolUpdate
 from services.rol_service import RolService
+from utils.serializacion import RespuestaJSON
 
 
 router = APIRouter(
@@ -20,21 +20,21 @@ def get_rol_service(db: sqlite3.Connection = Depends(get_db)) -> RolService:
 
 
 @router.get("/", response_model=List[dict])
-async def get_all_roles(service: RolService = Depends(get_rol_service)):
+def get_all_roles(service: RolService = Depends(get_rol_service)):
     """Obtiene todos los roles"""
     roles = service.get_all()
-    return jsonable_encoder(roles)
+    return RespuestaJSON(roles)
 
 @router.get("/{rol_id}", response_model=dict)
-async def get_rol_by_id(rol_id: int, service: RolService = Depends(get_rol_service)):
+def get_rol_by_id(rol_id: int, service: RolService = Depends(get_rol_service)):
     """Obtiene un rol por ID"""
     rol = service.get_by_id(rol_id)
     if not rol:
         raise HTTPException(status_code=404, detail="Rol no encontrado")
-    return jsonable_encoder(rol)
+    return RespuestaJSON(rol)
 
 @router.post("/", response_model=dict, status_code=201)
-async def create_rol(rol_data: dict, service: RolService = Depends(get_rol_service)):
+def create_rol(rol_data: dict, service: RolService = Depends(get_rol_service)):
     try:
         
         rol = RolCreate(
@@ -43,13 +43,13 @@ async def create_rol(rol_data: dict, service: RolService = Depends(get_rol_servi
         )
 
         resultado = service.create(rol)
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado, status_code=201)
     except ValueError as e:
         # Si hay error (ej: nombre duplicado), lanzamos un 400 Bad Request
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{rol_id}", response_model=dict)
-async def update_rol(
+def update_rol(
     rol_id: int,
     rol_data: dict,
     service: RolService = Depends(get_rol_service)
@@ -66,12 +66,12 @@ async def update_rol(
 
     try:
         updated_rol = service.update(rol_id, rol_update)
-        return jsonable_encoder(updated_rol)
+        return RespuestaJSON(updated_rol)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{rol_id}", status_code=204)
-async def delete_rol(rol_id: int, service: RolService = Depends(get_rol_service)):
+def delete_rol(rol_id: int, service: RolService = Depends(get_rol_service)):
     """Elimina un rol existente"""
     try:
         success = service.delete(rol_id)
@@ -1,11 +1,14 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.encoders import jsonable_encoder
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from typing import List, Literal, Optional
 import sqlite3
-from database import get_db
-from models.turno import TurnoCreate
-from services.turno_service import TurnoService
+from database import get_db, get_db_escritura
+from models.turno import TurnoCreate, TurnoResponse
+from services.turno_service import TurnoService, TurnoNoDisponibleError
+from utils.paginacion import ParametrosLista
+from utils.exportacion import respuesta_exportacion
+from concurrencia import LIMITE_EXPORTACION
+from utils.serializacion import RespuestaJSON
 
 router = APIRouter(
     prefix="/turnos",
@@ -17,43 +20,66 @@ def get_turno_service(db: sqlite3.Connection = Depends(get_db)) -> TurnoService:
     """Dependency Injection para el servicio de turnos"""
     return TurnoService(db)
 
+def get_turno_service_escritura(db: sqlite3.Connection = Depends(get_db_escritura)) -> TurnoService:
+    """Servicio de turnos sobre la conexión de escritura (para los GET que modifican datos)"""
+    return TurnoService(db)
+
 @router.get("/", response_model=List[dict])
-async def get_all_turnos(service: TurnoService = Depends(get_turno_service)):
-    """Obtiene todos los turnos"""
-    turnos = service.get_all()
-    return jsonable_encoder(turnos)
+def get_all_turnos(request: Request,
+                         lista: ParametrosLista = Depends(),
+                         service: TurnoService = Depends(get_turno_service)):
+    """Obtiene todos los turnos (paginados con limit/after, proyectados con fields/expand)"""
+    proyeccion = lista.proyeccion(TurnoResponse)
+    turnos = service.get_all(limit=lista.limit, after=lista.cursor_id(),
+                             columnas=proyeccion and proyeccion.columnas("id_turno"))
+    return lista.responder(request, turnos, ("id_turno",), proyeccion)
 
 
 @router.get("/prueba_notificaciones", status_code=status.HTTP_200_OK)
-async def notificar_recordatorios(service: TurnoService = Depends(get_turno_service)):
+def notificar_recordatorios(service: TurnoService = Depends(get_turno_service_escritura)):
     turnos_notificados = service.notificar_recordatorios_turnos()
-    return {"mensaje": "Recordatorios de turnos notificados", "turnos": jsonable_encoder(turnos_notificados)}
+    return RespuestaJSON({"mensaje": "Recordatorios de turnos notificados", "turnos": turnos_notificados})
+
+@router.get("/export", dependencies=[Depends(LIMITE_EXPORTACION)])
+def exportar_turnos(fecha_desde: str, fecha_hasta: str, formato: Literal["ndjson", "csv"] = "ndjson", id_medico: Optional[int] = None):
+    """
+    Exporta los turnos entre dos fechas (inclusive) en NDJSON o CSV.
+    La respuesta sale en streaming a medida que se leen las filas, sin armar la lista en memoria.
+    """
+    try:
+        return respuesta_exportacion(
+            f"turnos_{fecha_desde}_{fecha_hasta}", formato,
+            lambda db: TurnoService(db).exportar(fecha_desde, fecha_hasta, id_medico)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
 @router.get("/{turno_id}", response_model=dict)
-async def get_turno_by_id(turno_id: int, service: TurnoService = Depends(get_turno_service)):
+def get_turno_by_id(turno_id: int, service: TurnoService = Depends(get_turno_service)):
     """Obtiene un turno por ID"""
     turno = service.get_by_id(turno_id)
     if not turno:
         raise HTTPException(status_code=404, detail="Turno no encontrado")
-    return jsonable_encoder(turno)
+    return RespuestaJSON(turno)
     
 
 @router.get("/paciente/proximos/{paciente_id}", response_model=List[dict])
-async def get_proximos_turnos_paciente(paciente_id: int, service: TurnoService = Depends(get_turno_service)):
+def get_proximos_turnos_paciente(paciente_id: int, service: TurnoService = Depends(get_turno_service)):
     """Obtiene los próximos turnos de un paciente"""
     turnos = service.get_proximos_turnos_paciente(paciente_id)
-    return jsonable_encoder(turnos)
+    return RespuestaJSON(turnos)
 
 @router.get("/medico/proximos/{medico_id}", response_model=List[dict])
-async def get_proximos_turnos_medico(medico_id: int, service: TurnoService = Depends(get_turno_service)):
+def get_proximos_turnos_medico(medico_id: int, service: TurnoService = Depends(get_turno_service)):
     """Obtiene los próximos turnos de un paciente"""
     turnos = service.get_proximos_turnos_medico(medico_id)
-    return jsonable_encoder(turnos)
+    return RespuestaJSON(turnos)
 
 
 # listado de todos los turnos de un determinado paciente dados entre 2 fechas desde hasta
 @router.get("/paciente/historial", response_model=List[dict])
-async def get_historial_turnos_paciente(
+def get_historial_turnos_paciente(
     paciente_id: int,
     fecha_desde: str,
     fecha_hasta: str,
@@ -61,11 +87,11 @@ async def get_historial_turnos_paciente(
 ):
     """Obtiene el historial de turnos de un paciente entre dos fechas"""
     turnos = service.get_historial_desde_hasta(paciente_id, fecha_desde, fecha_hasta)
-    return jsonable_encoder(turnos)
+    return RespuestaJSON(turnos)
 
 # listado de todos los turnos de un determinado medico dados entre 2 fechas desde hasta
 @router.get("/medico/agenda", response_model=List[dict])
-async def get_agenda_medico(
+def get_agenda_medico(
     id_medico: int,
     fecha_desde: str,
     fecha_hasta: str,
@@ -73,10 +99,10 @@ async def get_agenda_medico(
 ):
     """Obtiene la agenda de un médico entre dos fechas"""
     turnos = service.get_agenda_desde_hasta(id_medico, fecha_desde, fecha_hasta)
-    return jsonable_encoder(turnos)
+    return RespuestaJSON(turnos)
 
 @router.post("/cancelar", response_model=dict)
-async def cancelar_turno(
+def cancelar_turno(
     data: dict, 
     service: TurnoService = Depends(get_turno_service)
     ):
@@ -87,13 +113,13 @@ async def cancelar_turno(
         if id_turno is None:
             raise HTTPException(status_code=400, detail="Falta el campo 'id_turno' en el cuerpo de la solicitud.")
         turno_cancelado = service.marcar_como_cancelado(id_turno) 
-        return jsonable_encoder(turno_cancelado)
+        return RespuestaJSON(turno_cancelado)
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
-async def create_turno(turno_data: dict, service: TurnoService = Depends(get_turno_service)):
+def create_turno(turno_data: dict, service: TurnoService = Depends(get_turno_service)):
     try:
         turno = TurnoCreate(
             id_paciente=turno_data['id_paciente'],
@@ -104,15 +130,17 @@ async def create_turno(turno_data: dict, service: TurnoService = Depends(get_tur
             motivo_consulta=turno_data.get('motivo_consulta')
         )
         resultado = service.create(turno)
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado, status_code=status.HTTP_201_CREATED)
     except KeyError as e:
         raise HTTPException(status_code=400, detail=f"Falta el campo obligatorio: {str(e)}")
+    except TurnoNoDisponibleError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
 
 @router.put("/{turno_id}", response_model=dict)
-async def update_turno(
+def update_turno(
     turno_id: int, 
     turno_data: dict, 
     service: TurnoService = Depends(get_turno_service)):
@@ -121,13 +149,13 @@ async def update_turno(
         resultado = service.update(turno_id, turno_data)
         if not resultado:
             raise HTTPException(status_code=404, detail="Turno no encontrado")
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
 
 @router.delete("/{turno_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_turno(turno_id: int, service: TurnoService = Depends(get_turno_service)):
+def delete_turno(turno_id: int, service: TurnoService = Depends(get_turno_service)):
     """Elimina un turno"""
     try:
         resultado = service.delete(turno_id)
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, status, HTTPException
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, Request, status, HTTPException
 from typing import List
 import sqlite3
 from database import get_db
 from models.usuarioRol import UsuarioRolResponse, UsuarioRolCreate
 from services.usuario_rol_service import UsuarioRolService
+from utils.paginacion import ParametrosLista
+from utils.serializacion import RespuestaJSON
 
 
 router = APIRouter(
@@ -20,28 +21,35 @@ def get_usuario_rol_service(db: sqlite3.Connection = Depends(get_db)) -> Usuario
 
 
 @router.get("/", response_model=List[dict])
-async def get_all_usuario_roles(service: UsuarioRolService = Depends(get_usuario_rol_service)):
-    """Obtiene todas las relaciones usuario-rol"""
-    usuario_roles = service.get_all()
-    return jsonable_encoder(usuario_roles)
+def get_all_usuario_roles(request: Request,
+                                lista: ParametrosLista = Depends(),
+                                service: UsuarioRolService = Depends(get_usuario_rol_service)):
+    """
+    Obtiene todas las relaciones usuario-rol (paginadas con limit/after, proyectadas con
+    fields/expand). El cursor es '<id_usuario>:<id_rol>'.
+    """
+    proyeccion = lista.proyeccion(UsuarioRolResponse)
+    usuario_roles = service.get_all(limit=lista.limit, after=lista.cursor_par(),
+                                    columnas=proyeccion and proyeccion.columnas("id_usuario", "id_rol"))
+    return lista.responder(request, usuario_roles, ("id_usuario", "id_rol"), proyeccion)
 
 
 @router.get("/usuario/{usuario_id}", response_model=List[dict])
-async def get_roles_by_usuario(usuario_id: int, service: UsuarioRolService = Depends(get_usuario_rol_service)):
+def get_roles_by_usuario(usuario_id: int, service: UsuarioRolService = Depends(get_usuario_rol_service)):
     """Obtiene todos los roles de un usuario"""
     roles = service.get_by_usuario_id(usuario_id)
-    return jsonable_encoder(roles)
+    return RespuestaJSON(roles)
 
 
 @router.get("/rol/{rol_id}", response_model=List[dict])
-async def get_usuarios_by_rol(rol_id: int, service: UsuarioRolService = Depends(get_usuario_rol_service)):
+def get_usuarios_by_rol(rol_id: int, service: UsuarioRolService = Depends(get_usuario_rol_service)):
     """Obtiene todos los usuarios con un rol específico"""
     usuarios = service.get_by_rol_id(rol_id)
-    return jsonable_encoder(usuarios)
+    return RespuestaJSON(usuarios)
 
 
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
-async def create_usuario_rol(usuario_rol_data: dict, service: UsuarioRolService = Depends(get_usuario_rol_service)):
+def create_usuario_rol(usuario_rol_data: dict, service: UsuarioRolService = Depends(get_usuario_rol_service)):
     """Crea una nueva relación usuario-rol"""
     try:
         usuario_rol = UsuarioRolCreate(
@@ -49,7 +57,7 @@ async def create_usuario_rol(usuario_rol_data: dict, service: UsuarioRolService
             id_rol=usuario_rol_data['id_rol']
         )
         resultado = service.create(usuario_rol)
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado, status_code=status.HTTP_201_CREATED)
     
     except KeyError as e:
         raise HTTPException(status_code=400, detail=f"Falta el campo obligatorio: {str(e)}")
@@ -58,7 +66,7 @@ async def create_usuario_rol(usuario_rol_data: dict, service: UsuarioRolService
 
 
 @router.delete("/{usuario_id}/{rol_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_usuario_rol(usuario_id: int, rol_id: int, service: UsuarioRolService = Depends(get_usuario_rol_service)):
+def delete_usuario_rol(usuario_id: int, rol_id: int, service: UsuarioRolService = Depends(get_usuario_rol_service)):
     """Elimina una relación usuario-rol"""
     try:
         success = service.delete(usuario_id, rol_id)
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.encoders import jsonable_encoder
 from typing import List
 import sqlite3
 from database import get_db
 from models.usuario import UsuarioCreate, UsuarioUpdate, UsuarioResponse
 from services.usuario_service import UsuarioService
+from utils.security import ServicioHashOcupadoError
+from utils.serializacion import RespuestaJSON
 
 router = APIRouter(
     prefix="/usuarios",
@@ -17,35 +18,37 @@ def get_usuario_service(db: sqlite3.Connection = Depends(get_db)) -> UsuarioServ
     return UsuarioService(db)
 
 @router.get("/", response_model=List[dict])
-async def get_all_usuarios(service: UsuarioService = Depends(get_usuario_service)):
+def get_all_usuarios(service: UsuarioService = Depends(get_usuario_service)):
     """Obtiene todos los usuarios"""
     usuarios = service.get_all()
-    return jsonable_encoder(usuarios)
+    return RespuestaJSON(usuarios)
 
 
 @router.get("/{usuario_id}", response_model=dict)
-async def get_usuario_by_id(usuario_id: int, service: UsuarioService = Depends(get_usuario_service)):
+def get_usuario_by_id(usuario_id: int, service: UsuarioService = Depends(get_usuario_service)):
     """Obtiene un usuario por ID"""
     usuario = service.get_by_id(usuario_id)
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    return jsonable_encoder(usuario)
+    return RespuestaJSON(usuario)
 
 
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
-async def create_usuario(usuario_data: dict, service: UsuarioService = Depends(get_usuario_service)):
+def create_usuario(usuario_data: dict, service: UsuarioService = Depends(get_usuario_service)):
     try:
         resultado = service.create(usuario_data)
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado, status_code=status.HTTP_201_CREATED)
     
     except KeyError as e:
         raise HTTPException(status_code=400, detail=f"Falta el campo obligatorio: {str(e)}")
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except ServicioHashOcupadoError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
     
 @router.put("/{usuario_id}", response_model=dict)
-async def update_usuario(
+def update_usuario(
     usuario_id: int, 
     usuario_data: dict, 
     service: UsuarioService = Depends(get_usuario_service)):
@@ -54,14 +57,14 @@ async def update_usuario(
         resultado = service.update(usuario_id, usuario_data)
         if not resultado:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
-        return jsonable_encoder(resultado)
+        return RespuestaJSON(resultado)
     
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.delete("/{usuario_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_usuario(usuario_id: int, service: UsuarioService = Depends(get_usuario_service)):
+def delete_usuario(usuario_id: int, service: UsuarioService = Depends(get_usuario_service)):
     """Elimina un usuario por ID"""
     try:
         success = service.delete(usuario_id)
@@ -0,0 +1,196 @@
+# AgendaAusentes
+# Vencimientos (fecha_hora_fin) de los turnos pendientes en un heap en memoria. Un hilo duerme
+# hasta el próximo vencimiento y recién ahí marca los ausentes: sin turnos por vencer no se
+# toca la base. Se carga al iniciar y TurnoService la mantiene al día en cada cambio; el
+# proceso dueño del job 'ausentes' la recarga cada tanto con los turnos de todos los procesos.
+
+import heapq
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import config
+from utils.fechas import FORMATO_FECHA_HORA, ahora_local
+
+# Turnos pendientes con su fin (usa idx_turno_estado_fin)
+_SQL_PENDIENTES = """
+    SELECT id_turno, fecha_hora_fin FROM Turno
+    WHERE id_estado_turno = (SELECT id_estado_turno FROM EstadoTurno WHERE nombre = 'Pendiente')
+"""
+
+# Si marcar falla (base ocupada o caída) se reintenta después de esta espera
+_ESPERA_REINTENTO_SEG = 5.0
+
+
+def _segundos_hasta(fecha_hora: str) -> float:
+    return (datetime.strptime(fecha_hora, FORMATO_FECHA_HORA) - datetime.now()).total_seconds()
+
+
+class AgendaAusentes:
+    """
+    Heap de (fecha_hora_fin, id_turno) de los turnos pendientes, único por proceso.
+    Cancelar, atender o reprogramar un turno no saca su entrada del heap (sería O(n)): se
+    actualiza `_vencimientos` y al llegar al tope la entrada vieja se descarta sin ir a la base.
+    Cuando vence un turno el hilo espera AUSENTES_VENTANA_SEG más, así los que terminan a la
+    misma hora (todo un bloque de la agenda) se marcan juntos con un solo UPDATE.
+    Con varios procesos cada uno tiene su agenda; marcar es idempotente (sólo toca pendientes
+    vencidos), así que a lo sumo se repite un UPDATE que no cambia nada. Cada agenda sólo se
+    entera de los turnos que cambia su proceso: si ese proceso se va (scale-down, caída) sus
+    turnos quedan sin vigilar, por eso el dueño del lease del job 'ausentes' llama a recargar().
+    """
+    _instance: Optional['AgendaAusentes'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AgendaAusentes, cls).__new__(cls)
+            cls._instance._cond = threading.Condition()
+            cls._instance._heap = []
+            cls._instance._vencimientos = {}
+            cls._instance._id_estado_pendiente = None
+            cls._instance._hilo = None
+            cls._instance._detener = False
+            cls._instance._contadores = {"disparos": 0, "marcados": 0, "descartados": 0, "recargados": 0, "errores": 0}
+        return cls._instance
+
+    def iniciar(self, db, marcar: Callable[[], List[int]]):
+        """
+        Carga los turnos pendientes de la base y arranca el hilo. `marcar` marca los ausentes
+        (abre su propia conexión) y devuelve los ids marcados. Los turnos ya vencidos al
+        arrancar (la API estuvo apagada) se marcan enseguida.
+        """
+        if self._hilo is not None:
+            return
+        filas = db.execute(_SQL_PENDIENTES).fetchall()
+        id_pendiente = db.execute("SELECT id_estado_turno FROM EstadoTurno WHERE nombre = 'Pendiente'").fetchone()
+        with self._cond:
+            self._id_estado_pendiente = id_pendiente[0]
+            self._vencimientos = {id_turno: fin for id_turno, fin in filas}
+            self._heap = [(fin, id_turno) for id_turno, fin in filas]
+            heapq.heapify(self._heap)
+            self._detener = False
+        self._hilo = threading.Thread(target=self._trabajar, args=(marcar,), name="agenda-ausentes", daemon=True)
+        self._hilo.start()
+
+    def recargar(self, db) -> int:
+        """
+        Suma a la agenda los turnos pendientes de la base que no tenía (creados o reprogramados
+        por otro proceso) y devuelve cuántos. No saca nada: lo que otro proceso canceló o
+        atendió, al vencer, sólo dispara un UPDATE que no cambia nada.
+        """
+        if self._hilo is None:
+            return 0
+        filas = db.execute(_SQL_PENDIENTES).fetchall()
+        nuevos = 0
+        with self._cond:
+            for id_turno, fin in filas:
+                if self._vencimientos.get(id_turno) != fin:
+                    self._vencimientos[id_turno] = fin
+                    heapq.heappush(self._heap, (fin, id_turno))
+                    nuevos += 1
+            self._contadores["recargados"] += nuevos
+            if nuevos:
+                self._cond.notify()
+        return nuevos
+
+    def detener(self, timeout: float = 10.0):
+        with self._cond:
+            self._detener = True
+            self._cond.notify()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+        self._hilo = None
+
+    def programar(self, id_turno: int, fecha_hora_fin: str):
+        """Agrega (o reprograma) el vencimiento de un turno pendiente"""
+        with self._cond:
+            if self._id_estado_pendiente is None:
+                return  # sin iniciar (scripts, benchmarks): no hay hilo que lo use
+            self._vencimientos[id_turno] = fecha_hora_fin
+            heapq.heappush(self._heap, (fecha_hora_fin, id_turno))
+            # Sólo hace falta despertar al hilo si este vencimiento pasa a ser el primero
+            if self._heap[0] == (fecha_hora_fin, id_turno):
+                self._cond.notify()
+
+    def quitar(self, id_turno: int):
+        """El turno dejó de estar pendiente (cancelado, atendido, borrado)"""
+        with self._cond:
+            self._vencimientos.pop(id_turno, None)
+
+    def registrar(self, turno):
+        """Refleja el estado actual de un turno recién creado o modificado"""
+        if turno.id_estado_turno == self._id_estado_pendiente:
+            self.programar(turno.id_turno, turno.fecha_hora_fin)
+        else:
+            self.quitar(turno.id_turno)
+
+    def metricas(self) -> Dict:
+        with self._cond:
+            proximo = self._proximo()
+            return {
+                "activa": self._hilo is not None,
+                "pendientes": len(self._vencimientos),
+                "proximo_vencimiento": proximo[0] if proximo else None,
+                **self._contadores,
+            }
+
+    def _proximo(self) -> Optional[Tuple[str, int]]:
+        """Tope del heap, descartando las entradas viejas (con el lock tomado)"""
+        while self._heap:
+            fin, id_turno = self._heap[0]
+            if self._vencimientos.get(id_turno) == fin:
+                return fin, id_turno
+            heapq.heappop(self._heap)
+            self._contadores["descartados"] += 1
+        return None
+
+    def _sacar_vencidos(self) -> List[Tuple[str, int]]:
+        """Saca del heap los turnos cuyo fin ya pasó (los que marca `fecha_hora_fin < ahora`)"""
+        ahora = ahora_local()
+        vencidos = []
+        while True:
+            proximo = self._proximo()
+            if proximo is None or proximo[0] >= ahora:
+                return vencidos
+            heapq.heappop(self._heap)
+            del self._vencimientos[proximo[1]]
+            vencidos.append(proximo)
+
+    def _trabajar(self, marcar: Callable[[], List[int]]):
+        while True:
+            with self._cond:
+                while True:
+                    if self._detener:
+                        return
+                    proximo = self._proximo()
+                    if proximo is None:
+                        self._cond.wait()
+                        continue
+                    # Las fechas tienen resolución de segundos y el UPDATE compara fin < ahora
+                    espera = _segundos_hasta(proximo[0]) + 1 + config.AUSENTES_VENTANA_SEG
+                    if espera > 0:
+                        self._cond.wait(espera)
+                        continue
+                    vencidos = self._sacar_vencidos()
+                    if vencidos:
+                        break
+
+            try:
+                ids_marcados = marcar()
+            except Exception as e:
+                print(f"[AUSENTES] Error: {e}")
+                with self._cond:
+                    self._contadores["errores"] += 1
+                    # Vuelven al heap; los que cambiaron mientras tanto ya tienen otro vencimiento
+                    for fin, id_turno in vencidos:
+                        if id_turno not in self._vencimientos:
+                            self._vencimientos[id_turno] = fin
+                            heapq.heappush(self._heap, (fin, id_turno))
+                    self._cond.wait(_ESPERA_REINTENTO_SEG)
+                continue
+
+            with self._cond:
+                self._contadores["disparos"] += 1
+                self._contadores["marcados"] += len(ids_marcados)
+                # Pudo marcar turnos de otros procesos que esta agenda también tenía
+                for id_turno in ids_marcados:
+                    self._vencimientos.pop(id_turno, None)
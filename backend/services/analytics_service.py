@@ -1,6 +1,8 @@
 # AnalyticsService 
 # aca se implementan las funciones de estadisticas y reportes del sistema
 
+from utils.fechas import rango_dia, rango_dias
+
 
 class AnalyticsService:
     def __init__(self, db_connection):
@@ -12,54 +14,56 @@ class AnalyticsService:
         """Resumen del día (Totales hoy). Devuelve Turnos totales, pacientes atendidos, cancelados, nuevos registros. hasta ese momento en ese dia"""
         
         summary = {}
+        # Rango [hoy 00:00, mañana 00:00): compara la columna directo y usa el índice
+        hoy = rango_dia(fecha_hora_actual)
         try:
             # 1. Total turnos hoy (Cualquier estado)
             self.cursor.execute("""
                 SELECT COUNT(*) FROM Turno
-                WHERE DATE(fecha_hora_inicio) = DATE(?)
-            """, (fecha_hora_actual,))
+                WHERE fecha_hora_inicio >= ? AND fecha_hora_inicio < ?
+            """, hoy)
             summary['total_turnos'] = self.cursor.fetchone()[0]
 
             # 2. Turnos atendidos (Estado = 'Atendido' o 'Realizado')
             # Usamos subquery para no depender del ID numérico fijo
             self.cursor.execute("""
                 SELECT COUNT(*) FROM Turno
-                WHERE DATE(fecha_hora_inicio) = DATE(?)
+                WHERE fecha_hora_inicio >= ? AND fecha_hora_inicio < ?
                 AND id_estado_turno = 2
-            """, (fecha_hora_actual,))
+            """, hoy)
             summary['turnos_atendidos'] = self.cursor.fetchone()[0]
 
             # 3. Turnos cancelados (Estado = 'Cancelado')
             self.cursor.execute("""
                 SELECT COUNT(*) FROM Turno
-                WHERE DATE(fecha_hora_inicio) = DATE(?)
+                WHERE fecha_hora_inicio >= ? AND fecha_hora_inicio < ?
                 AND id_estado_turno = 3
-            """, (fecha_hora_actual,))
+            """, hoy)
             summary['turnos_cancelados'] = self.cursor.fetchone()[0]
 
             # 4. Turnos pendientes (Estado = 'Pendiente')
             self.cursor.execute("""
                 SELECT COUNT(*) FROM Turno
-                WHERE DATE(fecha_hora_inicio) = DATE(?)
+                WHERE fecha_hora_inicio >= ? AND fecha_hora_inicio < ?
                 AND id_estado_turno = 1
-            """, (fecha_hora_actual,))
+            """, hoy)
             summary['turnos_pendientes'] = self.cursor.fetchone()[0]
 
             # 5. Turnos ausentes (Estado = 'Ausente')
             self.cursor.execute("""
                 SELECT COUNT(*) FROM Turno
-                WHERE DATE(fecha_hora_inicio) = DATE(?)
+                WHERE fecha_hora_inicio >= ? AND fecha_hora_inicio < ?
                 AND id_estado_turno = 4
-            """, (fecha_hora_actual,))
+            """, hoy)
             summary['turnos_ausentes'] = self.cursor.fetchone()[0]
 
             # 6. Pacientes Atendidos (Estado = 'Atendido' o 'Realizado')
             # Usamos subquery para no depender del ID numérico fijo
             self.cursor.execute("""
                 SELECT COUNT(DISTINCT id_paciente) FROM Turno
-                WHERE DATE(fecha_hora_inicio) = DATE(?)
+                WHERE fecha_hora_inicio >= ? AND fecha_hora_inicio < ?
                 AND id_estado_turno = 2
-            """, (fecha_hora_actual,))
+            """, hoy)
             summary['pacientes_atendidos'] = self.cursor.fetchone()[0]
 
             return summary
@@ -78,9 +82,9 @@ class AnalyticsService:
                 FROM Turno T
                 JOIN Medico M ON T.id_medico = M.id_medico
                 JOIN Especialidad E ON M.id_especialidad = E.id_especialidad
-                WHERE DATE(T.fecha_hora_inicio) BETWEEN DATE(?) AND DATE(?)
+                WHERE T.fecha_hora_inicio >= ? AND T.fecha_hora_inicio < ?
                 GROUP BY E.nombre
-            """, (fecha_desde, fecha_hasta))
+            """, rango_dias(fecha_desde, fecha_hasta))
             results = self.cursor.fetchall()
 
             stats = []
@@ -95,49 +99,50 @@ class AnalyticsService:
         except Exception as e:
             raise e
         
+    def _consultar_rendimiento_medico(self, fecha_desde: str, fecha_hasta: str, id_medico: int = None):
+        """Ejecuta la consulta de turnos del reporte de rendimiento y devuelve el cursor sin leer"""
+        query = """
+            SELECT 
+                T.id_turno, 
+                DATE(T.fecha_hora_inicio) AS fecha, 
+                TIME(T.fecha_hora_inicio) AS hora,
+                P.apellido || ', ' || P.nombre AS paciente,
+                COALESCE(NULLIF(OS.nombre, ''), 'Particular') AS obra_social,
+                ET.nombre AS estado
+            FROM Turno T
+            JOIN Paciente P ON T.id_paciente = P.id_paciente
+            LEFT JOIN ObraSocial OS ON P.id_obra_social = OS.id_obra_social 
+            JOIN EstadoTurno ET ON T.id_estado_turno = ET.id_estado_turno
+            WHERE T.fecha_hora_inicio >= ? AND T.fecha_hora_inicio < ?
+        """
+
+        params = list(rango_dias(fecha_desde, fecha_hasta))
+
+        # El filtro opcional va antes del ORDER BY
+        if id_medico is not None:
+            query += " AND T.id_medico = ?"
+            params.append(id_medico)
+
+        query += " ORDER BY T.fecha_hora_inicio ASC"
+
+        self.cursor.execute(query, tuple(params))
+        return self.cursor
+
     def get_rendimiento_medico(self, fecha_desde: str, fecha_hasta: str, id_medico: int = None):
         """Devuelve una lista de turnos para un médico"""
         print("Obteniendo rendimiento médico entre", fecha_desde, "y", fecha_hasta)
         
         try:
-            # 1. BORRAMOS EL 'ORDER BY' DE AQUÍ PARA PONERLO AL FINAL
-            query = """
-                SELECT 
-                    T.id_turno, 
-                    DATE(T.fecha_hora_inicio) AS fecha, 
-                    TIME(T.fecha_hora_inicio) AS hora,
-                    P.apellido || ', ' || P.nombre AS paciente,
-                    OS.nombre AS obra_social,
-                    ET.nombre AS estado
-                FROM Turno T
-                JOIN Paciente P ON T.id_paciente = P.id_paciente
-                LEFT JOIN ObraSocial OS ON P.id_obra_social = OS.id_obra_social 
-                JOIN EstadoTurno ET ON T.id_estado_turno = ET.id_estado_turno
-                WHERE DATE(T.fecha_hora_inicio) BETWEEN DATE(?) AND DATE(?)
-            """
-
-            params = [fecha_desde, fecha_hasta]
-
-            # 2. Agregamos el filtro opcional ANTES del ORDER BY
-            if id_medico is not None:
-                query += " AND T.id_medico = ?"
-                params.append(id_medico)
-
-            # 3. Ahora sí, ponemos el ORDER BY al final de todo
-            query += " ORDER BY T.fecha_hora_inicio ASC"
-
-            self.cursor.execute(query, tuple(params))
-            results = self.cursor.fetchall()
+            results = self._consultar_rendimiento_medico(fecha_desde, fecha_hasta, id_medico).fetchall()
 
             stats = []
             for row in results:
                 stats.append({
                     "id_turno": row[0],
-                    "fecha": row[1],      # Antes pusiste fecha_hora_inicio, pero el SQL trae DATE
-                    "hora": row[2],       # Antes pusiste fecha_hora_fin, pero el SQL trae TIME
+                    "fecha": row[1],
+                    "hora": row[2],
                     "paciente": row[3],
-                    # Manejo de nulos por si es Particular
-                    "obra_social": row[4] if row[4] else "Particular",
+                    "obra_social": row[4],  # 'Particular' si no tiene
                     "estado": row[5]
                 })
 
@@ -145,6 +150,10 @@ class AnalyticsService:
             
         except Exception as e:
             raise e
+
+    def exportar_rendimiento_medico(self, fecha_desde: str, fecha_hasta: str, id_medico: int = None):
+        """Mismas filas que get_rendimiento_medico, como cursor para exportar en streaming"""
+        return self._consultar_rendimiento_medico(fecha_desde, fecha_hasta, id_medico)
         
     
     def get_volumen_pacientes(self, fecha_desde: str, fecha_hasta: str):
@@ -153,11 +162,11 @@ class AnalyticsService:
             self.cursor.execute("""
                 SELECT DATE(fecha_hora_inicio) AS fecha, COUNT(DISTINCT id_paciente) AS total_pacientes
                 FROM Turno
-                WHERE DATE(fecha_hora_inicio) BETWEEN DATE(?) AND DATE(?)
+                WHERE fecha_hora_inicio >= ? AND fecha_hora_inicio < ?
                 AND id_estado_turno = 2
                 GROUP BY DATE(fecha_hora_inicio)
                 ORDER BY DATE(fecha_hora_inicio) ASC
-            """, (fecha_desde, fecha_hasta))
+            """, rango_dias(fecha_desde, fecha_hasta))
             results = self.cursor.fetchall()
 
             stats = []
@@ -182,8 +191,8 @@ class AnalyticsService:
                     SUM(CASE WHEN id_estado_turno = 2 THEN 1 ELSE 0 END) AS asistencias,
                     SUM(CASE WHEN id_estado_turno = 4 THEN 1 ELSE 0 END) AS ausencias
                 FROM Turno
-                WHERE DATE(fecha_hora_inicio) BETWEEN DATE(?) AND DATE(?)
-            """, (fecha_desde, fecha_hasta))
+                WHERE fecha_hora_inicio >= ? AND fecha_hora_inicio < ?
+            """, rango_dias(fecha_desde, fecha_hasta))
             results = self.cursor.fetchall()
 
             stats = []
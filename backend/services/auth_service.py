@@ -1,33 +1,46 @@
 from http.client import HTTPException
-import sqlite3
+from typing import Optional
+from database import ConexionesDB
 from models.usuario import UsuarioUpdate
-from models.usuarioRol import UsuarioRolResponse
-from utils.security import verify_password, hash_password, validar_contraseña
+from models.usuarioRol import SesionResponse
+from utils.security import verify_password, hash_password, validar_contraseña, necesita_rehash, ServicioHash
 from services.usuario_service import UsuarioService
 from services.rol_service import RolService
 from utils.email_sender import EmailSender
+from utils.tokens import Sesion, emitir_token, ListaRevocados
 import secrets
 
 
 class AuthService:
-    def __init__(self, db: sqlite3.Connection):
-        self.db = db
-        self.cursor = db.cursor()
-        self.usuario_service = UsuarioService(db)
-        self.rol_service = RolService(db)
+    """
+    Login y contraseñas. No usa la conexión del request: el bcrypt (~250 ms por hash) corre
+    sin ninguna conexión tomada. Las lecturas toman una conexión del pool de lectura y sólo
+    las escrituras cortas (rehash, contraseña nueva) toman el escritor, así los logins no se
+    serializan entre sí ni frenan a las reservas.
+    """
 
     def login(self, email: str, password: str, rol: str):
-        # 1. Buscar usuario por email
-        row = self.cursor.execute("""
-            SELECT id_usuario, password_hash, activo
-            FROM usuario
-            WHERE email = ?
-        """, (email,)).fetchone()
-
-        if not row:
-            raise ValueError(f"El usuario con el mail '{email}' no fue encontrado")
-
-        id_usuario, password_hash, activo = row
+        # 1. Buscar usuario por email y los roles que tiene asignados
+        with ConexionesDB.lectura().conexion() as conn:
+            row = conn.execute("""
+                SELECT id_usuario, password_hash, activo
+                FROM usuario
+                WHERE email = ?
+            """, (email,)).fetchone()
+
+            if not row:
+                raise ValueError(f"El usuario con el mail '{email}' no fue encontrado")
+
+            id_usuario, password_hash, activo = row
+
+            rol_service = RolService(conn)
+            ids_roles = [r[0] for r in conn.execute("""
+                SELECT id_rol
+                FROM usuarioRol
+                WHERE id_usuario = ?
+            """, (id_usuario,)).fetchall()]
+            roles = [r.nombre for r in map(rol_service.get_by_id, ids_roles) if r is not None]
+            usuario = UsuarioService(conn).get_by_id(id_usuario)
 
         if not activo:
             raise ValueError("El usuario está desactivado")
@@ -36,44 +49,63 @@ class AuthService:
         if not verify_password(password, password_hash):
             raise ValueError("Contraseña incorrecta")
 
-        # 3. Obtener rol completo por nombre
-        rol_completo = self.rol_service.get_by_name(rol)
-        if not rol_completo:
-            raise ValueError(f"Rol '{rol}' no existe")
+        # Si cambió BCRYPT_COSTO, el hash se regenera con el costo nuevo ahora que se tiene
+        # la contraseña en claro (una sola vez por usuario)
+        if necesita_rehash(password_hash):
+            self._rehashear(id_usuario, password, password_hash)
 
-        # 4. Verificar que el usuario tenga asignado ese rol
-        row_ur = self.cursor.execute("""
-            SELECT id_usuario, id_rol
-            FROM usuarioRol
-            WHERE id_usuario = ? AND id_rol = ?
-        """, (id_usuario, rol_completo.id_rol)).fetchone()
+        # 3. Verificar que el rol exista (get_by_name lanza ValueError si no) y que el usuario
+        #    lo tenga asignado. Recién después de la contraseña, así no se responde nada sin ella
+        with ConexionesDB.lectura().conexion() as conn:
+            rol_completo = RolService(conn).get_by_name(rol)
 
-        if not row_ur:
+        if rol_completo.id_rol not in ids_roles:
             raise ValueError(f"El usuario no tiene asignado el rol '{rol}'")
 
-        # 5. Obtener usuario completo desde UsuarioService
-        usuario = self.usuario_service.get_by_id(id_usuario)
-
-        # 6. Construir respuesta
-        return UsuarioRolResponse(
+        # 4. Construir respuesta con el token de sesión
+        token, sesion = emitir_token(id_usuario, rol_completo.nombre, roles)
+        return SesionResponse(
             id_usuario=id_usuario,
             id_rol=rol_completo.id_rol,
             usuario=usuario,
-            rol=rol_completo
+            rol=rol_completo,
+            access_token=token,
+            expires_in=round(sesion.expira - sesion.emitido)
         )
 
+    def _rehashear(self, id_usuario: int, password: str, hash_anterior: str):
+        """Reemplaza el hash sólo si nadie lo cambió mientras tanto (p. ej. un cambio de contraseña)"""
+        nuevo_hash = hash_password(password)
+        with ConexionesDB.escritura().conexion() as conn:
+            conn.execute("""
+                UPDATE usuario
+                SET password_hash = ?
+                WHERE id_usuario = ? AND password_hash = ?
+            """, (nuevo_hash, id_usuario, hash_anterior))
+            conn.commit()
+        ServicioHash().contar_rehash()
+
+    def _password_hash(self, id_usuario: int) -> Optional[str]:
+        with ConexionesDB.lectura().conexion() as conn:
+            row = conn.execute("""
+                SELECT password_hash
+                FROM usuario
+                WHERE id_usuario = ?
+            """, (id_usuario,)).fetchone()
+        return row[0] if row else None
+
+    def cerrar_sesion(self, sesion: Sesion):
+        """Revoca el token de la sesión para todos los procesos"""
+        with ConexionesDB.escritura().conexion() as conn:
+            ListaRevocados().revocar(conn, sesion)
+            conn.commit()
+
     def change_password(self, id_usuario: int, current_password: str, new_password: str):
-        row = self.cursor.execute("""
-            SELECT password_hash
-            FROM usuario
-            WHERE id_usuario = ?
-        """, (id_usuario,)).fetchone()
+        password_hash = self._password_hash(id_usuario)
 
-        if not row:
+        if password_hash is None:
             raise ValueError("Usuario no encontrado")
 
-        password_hash = row[0]
-
         if not verify_password(current_password, password_hash):
             raise ValueError("La contraseña actual es incorrecta")
         
@@ -81,23 +113,31 @@ class AuthService:
 
         new_hash = hash_password(new_password)
 
-        self.cursor.execute("""
-            UPDATE usuario
-            SET password_hash = ?
-            WHERE id_usuario = ?
-        """, (new_hash, id_usuario))
-
-        self.db.commit()
+        # Si la contraseña cambió mientras se calculaba el hash, la "actual" ya no lo es
+        with ConexionesDB.escritura().conexion() as conn:
+            cambiada = conn.execute("""
+                UPDATE usuario
+                SET password_hash = ?
+                WHERE id_usuario = ? AND password_hash = ?
+            """, (new_hash, id_usuario, password_hash)).rowcount
+            if cambiada:
+                # Las sesiones abiertas con la contraseña anterior dejan de valer
+                ListaRevocados().revocar_usuario(conn, id_usuario)
+            conn.commit()
+
+        if not cambiada:
+            raise ValueError("La contraseña actual es incorrecta")
 
         return {"message": "Contraseña actualizada exitosamente"}
 
 
     def recover_password(self, email: str):
-        row = self.cursor.execute("""
-            SELECT id_usuario
-            FROM usuario
-            WHERE email = ?
-        """, (email,)).fetchone()
+        with ConexionesDB.lectura().conexion() as conn:
+            row = conn.execute("""
+                SELECT id_usuario
+                FROM usuario
+                WHERE email = ?
+            """, (email,)).fetchone()
 
         if not row:
             raise ValueError("El email no está registrado")
@@ -108,14 +148,16 @@ class AuthService:
         temp_password = secrets.token_urlsafe(8)
         password_hash = hash_password(temp_password)
 
-        self.cursor.execute("""
-            UPDATE usuario
-            SET password_hash = ?
-            WHERE id_usuario = ?
-        """, (password_hash, id_usuario))
-        self.db.commit()
+        with ConexionesDB.escritura().conexion() as conn:
+            conn.execute("""
+                UPDATE usuario
+                SET password_hash = ?
+                WHERE id_usuario = ?
+            """, (password_hash, id_usuario))
+            ListaRevocados().revocar_usuario(conn, id_usuario)
+            conn.commit()
 
-        # Enviar email
+        # Enviar email (ya sin ninguna conexión tomada: el SMTP puede tardar)
         cuerpo = f"""
 Hola,
 Se ha solicitado la recuperación de tu contraseña en Turnero Vitalis.
@@ -136,4 +178,4 @@ Equipo Turnero Vitalis
         if not success:
             raise ValueError("No se pudo enviar el correo")
 
-        return {"message": "Se ha enviado una contraseña temporal a tu correo"}
\ No newline at end of file
+        return {"message": "Se ha enviado una contraseña temporal a tu correo"}
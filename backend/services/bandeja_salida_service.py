@@ -0,0 +1,233 @@
+# BandejaSalida
+# Emails pendientes de envío. Los servicios encolan dentro de su propia transacción y un pool
+# acotado de workers (DespachadorEmails) los envía en segundo plano, con reintentos y backoff.
+
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import config
+from database import ConexionesDB
+from utils.transporte_email import transporte_email
+from utils.fechas import ahora_local, ahora_local_mas
+
+PENDIENTE = 'pendiente'
+FALLIDO = 'fallido'
+
+# Máximo de parámetros por cada IN (...)
+TAMANIO_LOTE_IN = 500
+
+
+def clave_recordatorio(id_turno: int, email: str) -> str:
+    """Clave de idempotencia del recordatorio de un turno para un destinatario"""
+    return f"recordatorio:{id_turno}:{email.strip().lower()}"
+
+
+def clave_confirmacion_reserva(id_turno: int, email: str, fecha_reserva: str) -> str:
+    """Clave de idempotencia de la confirmación de una reserva (un turno reutilizado es otra reserva)"""
+    return f"reserva:{id_turno}:{email.strip().lower()}:{fecha_reserva}"
+
+
+def espera_reintento(intentos: int) -> float:
+    """Segundos hasta el próximo intento: backoff exponencial acotado"""
+    return min(config.EMAIL_BACKOFF_BASE_SEG * 2 ** max(intentos - 1, 0), config.EMAIL_BACKOFF_MAX_SEG)
+
+
+class BandejaSalidaService:
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+        self.cursor = db.cursor()
+
+    def encolar(self, clave: str, destinatario: str, asunto: str, cuerpo: str,
+                id_turno: Optional[int] = None) -> bool:
+        """
+        Agrega un mail a la bandeja (sin commit: va en la transacción de quien lo encola).
+        Devuelve False si ya había un mail con esa clave, que no se vuelve a enviar.
+        """
+        ahora = ahora_local()
+        self.cursor.execute("""
+            INSERT INTO BandejaSalida (clave, destinatario, asunto, cuerpo, id_turno, proximo_intento, fecha_creacion)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (clave) DO NOTHING
+        """, (clave, destinatario, asunto, cuerpo, id_turno, ahora, ahora))
+        return self.cursor.rowcount == 1
+
+    def encolar_lote(self, mensajes: Iterable[Tuple[str, str, str, str, Optional[int]]]) -> int:
+        """
+        Encola varios mails (clave, destinatario, asunto, cuerpo, id_turno) con un executemany,
+        sin commit. Devuelve cuántos eran nuevos (los de clave repetida se ignoran).
+        """
+        ahora = ahora_local()
+        self.cursor.executemany("""
+            INSERT INTO BandejaSalida (clave, destinatario, asunto, cuerpo, id_turno, proximo_intento, fecha_creacion)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (clave) DO NOTHING
+        """, ((*mensaje, ahora, ahora) for mensaje in mensajes))
+        return max(self.cursor.rowcount, 0)
+
+    def tomar_lote(self, limite: int) -> List[sqlite3.Row]:
+        """
+        Reserva hasta `limite` mensajes vencidos para un worker y suma un intento a cada uno.
+        Es un solo UPDATE, así dos workers nunca toman el mismo mensaje; la reserva dura
+        EMAIL_RESERVA_SEG y si el worker no informa el resultado el mensaje se vuelve a tomar.
+        """
+        ahora = ahora_local()
+        try:
+            self.cursor.execute("""
+                UPDATE BandejaSalida
+                SET estado = 'enviando', intentos = intentos + 1, proximo_intento = ?
+                WHERE id_mensaje IN (
+                    SELECT id_mensaje FROM BandejaSalida
+                    WHERE estado IN ('pendiente', 'enviando') AND proximo_intento <= ?
+                    ORDER BY proximo_intento
+                    LIMIT ?
+                )
+                RETURNING id_mensaje, destinatario, asunto, cuerpo, intentos
+            """, (ahora_local_mas(seconds=config.EMAIL_RESERVA_SEG), ahora, limite))
+            lote = self.cursor.fetchall()
+            self.db.commit()
+            return lote
+        except sqlite3.Error:
+            self.db.rollback()
+            raise
+
+    def registrar_resultados(self, enviados: List[int], fallidos: List[Tuple[sqlite3.Row, str]]) -> int:
+        """
+        Guarda el resultado de un lote en una transacción: los enviados quedan como tales y los
+        fallidos vuelven a pendiente con backoff, o quedan fallidos si agotaron los intentos.
+        Devuelve cuántos quedaron fallidos definitivamente.
+        """
+        ahora = ahora_local()
+        definitivos = 0
+        try:
+            for i in range(0, len(enviados), TAMANIO_LOTE_IN):
+                lote = enviados[i:i + TAMANIO_LOTE_IN]
+                marcadores = ", ".join("?" for _ in lote)
+                self.cursor.execute(f"""
+                    UPDATE BandejaSalida SET estado = 'enviado', fecha_envio = ?, ultimo_error = NULL
+                    WHERE id_mensaje IN ({marcadores})
+                """, (ahora, *lote))
+
+            filas = []
+            for mensaje, error in fallidos:
+                agotado = mensaje['intentos'] >= config.EMAIL_MAX_INTENTOS
+                definitivos += agotado
+                filas.append((
+                    FALLIDO if agotado else PENDIENTE,
+                    ahora_local_mas(seconds=espera_reintento(mensaje['intentos'])),
+                    error[:500],
+                    mensaje['id_mensaje'],
+                ))
+            self.cursor.executemany("""
+                UPDATE BandejaSalida SET estado = ?, proximo_intento = ?, ultimo_error = ?
+                WHERE id_mensaje = ?
+            """, filas)
+            self.db.commit()
+            return definitivos
+        except sqlite3.Error:
+            self.db.rollback()
+            raise
+
+
+class DespachadorEmails:
+    """
+    Pool acotado de workers (EMAIL_WORKERS hilos) que vacía la bandeja de salida.
+    Cada lote se manda por una sesión del transporte de email (que las reutiliza entre lotes)
+    y cuando no hay trabajo se cierran las sesiones ociosas. Los accesos a la base son cortos
+    y pasan por la conexión de escritura; el envío se hace sin tener la conexión tomada.
+    """
+    _instance: Optional['DespachadorEmails'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(DespachadorEmails, cls).__new__(cls)
+            cls._instance._hilos = []
+            cls._instance._despertar = threading.Event()
+            cls._instance._detener = threading.Event()
+            cls._instance._lock = threading.Lock()
+            cls._instance._contadores = {"enviados": 0, "reintentos": 0, "fallidos": 0}
+        return cls._instance
+
+    def iniciar(self, workers: Optional[int] = None):
+        if self._hilos:
+            return
+        self._detener.clear()
+        for n in range(workers or config.EMAIL_WORKERS):
+            hilo = threading.Thread(target=self._trabajar, name=f"email-worker-{n + 1}", daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+
+    def detener(self, timeout: float = 10.0):
+        """Pide a los workers que terminen (completan el lote en curso), los espera y cierra el transporte"""
+        self._detener.set()
+        self._despertar.set()
+        for hilo in self._hilos:
+            hilo.join(timeout)
+        self._hilos = []
+        transporte_email().cerrar()
+
+    def despertar(self):
+        """Avisa que hay mensajes nuevos, para no esperar a la próxima revisión periódica"""
+        self._despertar.set()
+
+    def metricas(self) -> Dict:
+        with self._lock:
+            metricas = {"workers": len(self._hilos), **self._contadores}
+        metricas["transporte"] = transporte_email().metricas()
+        return metricas
+
+    def _contar(self, **incrementos):
+        with self._lock:
+            for nombre, cantidad in incrementos.items():
+                self._contadores[nombre] += cantidad
+
+    @staticmethod
+    def _enviar_uno(mensaje) -> Optional[Exception]:
+        try:
+            transporte_email().enviar(*mensaje)
+            return None
+        except Exception as e:
+            return e
+
+    def _trabajar(self):
+        while not self._detener.is_set():
+            try:
+                with ConexionesDB.escritura().conexion() as conn:
+                    lote = BandejaSalidaService(conn).tomar_lote(config.EMAIL_LOTE)
+            except Exception as e:
+                print(f"[EMAILS] Error al leer la bandeja: {e}")
+                lote = []
+
+            if not lote:
+                # Sin trabajo no tiene sentido mantener sesiones SMTP abiertas de más
+                transporte_email().cerrar_ociosas()
+                self._despertar.wait(config.EMAIL_ESPERA_SEG)
+                self._despertar.clear()
+                continue
+
+            # Todo el lote viaja por una misma sesión del transporte. Si el lote entero falla con
+            # algo inesperado se manda de a uno: así cada mensaje registra su propio error y uno
+            # roto no termina el worker (ni, al vencer la reserva, el siguiente que lo tome)
+            mensajes = [(m['destinatario'], m['asunto'], m['cuerpo']) for m in lote]
+            try:
+                resultados = transporte_email().enviar_lote(mensajes)
+            except Exception as e:
+                print(f"[EMAILS] Error al enviar el lote, se envía de a un mensaje: {e}")
+                resultados = [self._enviar_uno(mensaje) for mensaje in mensajes]
+            enviados, fallidos = [], []
+            for mensaje, error in zip(lote, resultados):
+                if error is None:
+                    enviados.append(mensaje['id_mensaje'])
+                else:
+                    fallidos.append((mensaje, f"{type(error).__name__}: {error}"))
+
+            try:
+                with ConexionesDB.escritura().conexion() as conn:
+                    definitivos = BandejaSalidaService(conn).registrar_resultados(enviados, fallidos)
+                self._contar(enviados=len(enviados), reintentos=len(fallidos) - definitivos, fallidos=definitivos)
+            except Exception as e:
+                # Los mensajes siguen reservados: se reintentan cuando venza la reserva
+                print(f"[EMAILS] Error al registrar el resultado del lote: {e}")
+
+            if fallidos:
+                print(f"[EMAILS] {len(enviados)} enviados, {len(fallidos)} con error (se reintentan con backoff)")
@@ -1,7 +1,11 @@
 import sqlite3
 from typing import List, Optional
 from models.consulta import ConsultaResponse, ConsultaCreate, ConsultaUpdate
-from services.turno_service import TurnoService
+from services.turno_service import TurnoService, TAMANIO_LOTE_IN
+from services.agenda_ausentes import AgendaAusentes
+from database import IdentityMap
+from utils.fechas import normalizar_fecha_hora, rango_dia, rango_dias
+from utils.paginacion import filas_planas
 
 class ConsultaService:
     
@@ -10,48 +14,94 @@ class ConsultaService:
         self.cursor = db.cursor()
     
     def _get_consulta_completa(self, consulta_id: int) -> Optional[ConsultaResponse]:
-        """Obtiene una consulta con su turno relacionado"""
-        self.cursor.execute("""
-            SELECT * FROM Consulta WHERE id_consulta = ?
-        """, (consulta_id,))
-        
-        row = self.cursor.fetchone()
-        
-        if not row:
-            return None
-        
-        consulta_dict = dict(row)
-        
-        # Obtener turno completo usando TurnoService
-        turno_obj = None
-        if consulta_dict.get('id_turno'):
-            turno_service = TurnoService(self.db)
-            turno_obj = turno_service.get_by_id(consulta_dict['id_turno'])
-        
-        return ConsultaResponse(
-            id_consulta=consulta_dict['id_consulta'],
-            id_turno=consulta_dict['id_turno'],
-            fecha_consulta=consulta_dict['fecha_consulta'],
-            diagnostico=consulta_dict.get('diagnostico'),
-            notas_privadas_medico=consulta_dict.get('notas_privadas_medico'),
-            tratamiento=consulta_dict.get('tratamiento'),
-            turno=turno_obj,
-        )
-    
-    def get_all(self) -> List[ConsultaResponse]:
-        """Obtiene todas las consultas"""
-        self.cursor.execute("SELECT id_consulta FROM Consulta")
+        """Obtiene una consulta con su turno relacionado (si ya se cargó en el request sale del identity map)"""
+        return IdentityMap.de(self.db).obtener('Consulta', consulta_id, lambda: self._cargar_consulta_completa(consulta_id))
+
+    def _cargar_consulta_completa(self, consulta_id: int) -> Optional[ConsultaResponse]:
+        """Obtiene una consulta con su turno relacionado desde la base"""
+        consultas = self._get_consultas_completas("WHERE id_consulta = ?", (consulta_id,))
+        return consultas[0] if consultas else None
+
+    def _get_consultas_completas(self, condiciones: str = "", params: tuple = ()) -> List[ConsultaResponse]:
+        """
+        Obtiene consultas con su turno completo: una consulta para las filas de Consulta
+        y los turnos se precargan por lotes en el identity map del request.
+        """
+        self.cursor.execute(f"SELECT * FROM Consulta {condiciones}", params)
         rows = self.cursor.fetchall()
-        
+
+        turno_service = TurnoService(self.db)
+        turno_service.precargar([row['id_turno'] for row in rows])
+
+        mapa = IdentityMap.de(self.db)
         consultas = []
         for row in rows:
-            consulta_id = dict(row)['id_consulta']
-            consulta_completa = self._get_consulta_completa(consulta_id)
-            if consulta_completa:
-                consultas.append(consulta_completa)
-        
+            consulta_dict = dict(row)
+
+            turno_obj = None
+            if consulta_dict.get('id_turno'):
+                turno_obj = turno_service.get_by_id(consulta_dict['id_turno'])
+
+            consulta = ConsultaResponse(
+                id_consulta=consulta_dict['id_consulta'],
+                id_turno=consulta_dict['id_turno'],
+                fecha_consulta=consulta_dict['fecha_consulta'],
+                diagnostico=consulta_dict.get('diagnostico'),
+                notas_privadas_medico=consulta_dict.get('notas_privadas_medico'),
+                tratamiento=consulta_dict.get('tratamiento'),
+                turno=turno_obj,
+            )
+            consultas.append(mapa.registrar('Consulta', consulta.id_consulta, consulta))
+
         return consultas
+
+    def precargar(self, consulta_ids: List[int]):
+        """Carga por lotes en el identity map las consultas indicadas que todavía no estén"""
+        mapa = IdentityMap.de(self.db)
+        pendientes = sorted({i for i in consulta_ids if i is not None and not mapa.contiene('Consulta', i)})
+
+        for inicio in range(0, len(pendientes), TAMANIO_LOTE_IN):
+            lote = pendientes[inicio:inicio + TAMANIO_LOTE_IN]
+            marcadores = ", ".join("?" for _ in lote)
+            self._get_consultas_completas(f"WHERE id_consulta IN ({marcadores})", tuple(lote))
     
+    def get_all(self, limit: Optional[int] = None, after: Optional[int] = None,
+                columnas: Optional[List[str]] = None) -> List[ConsultaResponse]:
+        """
+        Obtiene todas las consultas, o una página de `limit` consultas con id mayor a `after`.
+        Con `columnas` (proyección plana) devuelve filas de Consulta con sólo esas columnas
+        """
+        if columnas is not None:
+            paginado = limit is not None or after is not None
+            self.cursor.execute(
+                f"SELECT {', '.join(columnas)} FROM Consulta"
+                + (" WHERE id_consulta > ? ORDER BY id_consulta LIMIT ?" if paginado else ""),
+                (after or 0, limit if limit is not None else -1) if paginado else ()
+            )
+            return filas_planas(self.cursor)
+        if limit is None and after is None:
+            return self._get_consultas_completas()
+        return self._get_consultas_completas(
+            "WHERE id_consulta > ? ORDER BY id_consulta LIMIT ?", (after or 0, limit if limit is not None else -1)
+        )
+    
+    def exportar(self, fecha_desde: str, fecha_hasta: str) -> sqlite3.Cursor:
+        """Consultas entre dos fechas (inclusive) como filas planas; devuelve el cursor sin leer"""
+        self.cursor.execute("""
+            SELECT
+                c.id_consulta, c.id_turno, c.fecha_consulta,
+                t.id_paciente, p.apellido || ', ' || p.nombre AS paciente,
+                t.id_medico, m.apellido || ', ' || m.nombre AS medico,
+                c.diagnostico, c.tratamiento, c.notas_privadas_medico
+            FROM Consulta c
+            LEFT JOIN Turno t ON t.id_turno = c.id_turno
+            LEFT JOIN Paciente p ON p.id_paciente = t.id_paciente
+            LEFT JOIN Medico m ON m.id_medico = t.id_medico
+            WHERE c.fecha_consulta >= ? AND c.fecha_consulta < ?
+            ORDER BY c.fecha_consulta, c.id_consulta
+        """, rango_dias(fecha_desde, fecha_hasta))
+        return self.cursor
+
     def get_by_id(self, consulta_id: int) -> Optional[ConsultaResponse]:
         """Obtiene una consulta por su ID"""
         return self._get_consulta_completa(consulta_id)
@@ -64,8 +114,8 @@ class ConsultaService:
             SELECT DISTINCT T.id_paciente
             FROM Consulta C
             JOIN Turno T ON C.id_turno = T.id_turno
-            WHERE DATE(C.fecha_consulta) = DATE(?)
-        """, (fecha_consulta,))
+            WHERE C.fecha_consulta >= ? AND C.fecha_consulta < ?
+        """, rango_dia(fecha_consulta))
         
         rows = self.cursor.fetchall()
         
@@ -81,8 +131,8 @@ class ConsultaService:
         self.cursor.execute("""
             SELECT id_consulta
             FROM Consulta
-            WHERE DATE(fecha_consulta) = DATE(?)
-        """, (fecha_consulta,))
+            WHERE fecha_consulta >= ? AND fecha_consulta < ?
+        """, rango_dia(fecha_consulta))
         
         rows = self.cursor.fetchall()
         
@@ -121,7 +171,7 @@ class ConsultaService:
                 VALUES (?, ?, ?, ?, ?)
             """, (
                 consulta_data.id_turno,
-                consulta_data.fecha_consulta,
+                normalizar_fecha_hora(consulta_data.fecha_consulta),
                 consulta_data.diagnostico,
                 consulta_data.notas_privadas_medico,
                 consulta_data.tratamiento
@@ -191,13 +241,18 @@ class ConsultaService:
 
             self.cursor.execute("DELETE FROM Consulta WHERE id_consulta = ?", (consulta_id,))
             
+            turno_revertido = None
             if existing.id_turno:
                 self.cursor.execute(
-                    "UPDATE Turno SET id_estado_turno = 1 WHERE id_turno = ?", 
+                    "UPDATE Turno SET id_estado_turno = 1 WHERE id_turno = ? RETURNING fecha_hora_fin", 
                     (existing.id_turno,)
                 )
+                turno_revertido = self.cursor.fetchone()
                 
             self.db.commit()
+            # Vuelve a ser pendiente: si ya pasó, la agenda lo marca como ausente
+            if turno_revertido:
+                AgendaAusentes().programar(existing.id_turno, turno_revertido['fecha_hora_fin'])
             return True
             
         except sqlite3.IntegrityError as e:
@@ -209,27 +264,7 @@ class ConsultaService:
         
     def get_by_paciente_id(self, paciente_id: int) -> List[ConsultaResponse]:
         """Obtiene todas las consultas asociadas a un paciente específico"""
-        self.cursor.execute("""
-            SELECT C.id_consulta
-            FROM Consulta C
-            JOIN Turno T ON C.id_turno = T.id_turno
-            WHERE T.id_paciente = ?
-        """, (paciente_id,))
-        
-        rows = self.cursor.fetchall()
-        
-        consultas = []
-        for row in rows:
-            consulta_id = dict(row)['id_consulta']
-            consulta_completa = self._get_consulta_completa(consulta_id)
-            if consulta_completa:
-                consultas.append(consulta_completa)
-        
-        return consultas
-    
-    
-
-
-        
-
-        
\ No newline at end of file
+        return self._get_consultas_completas(
+            "WHERE id_turno IN (SELECT id_turno FROM Turno WHERE id_paciente = ?)",
+            (paciente_id,)
+        )
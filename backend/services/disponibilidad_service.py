@@ -0,0 +1,101 @@
+# DisponibilidadService
+# Calcula los turnos libres de un médico (o de todos los médicos de una especialidad) en un
+# rango de fechas. Sale del calendario materializado (Slot) cuando está generado para todo el
+# rango; si no, expande sus HorarioAtencion en turnos de duracion_turno_min y descarta los
+# que se solapan con turnos ya reservados (no cancelados). Nunca ofrece horarios pasados.
+
+import sqlite3
+from datetime import timedelta
+from typing import List, Optional
+
+import config
+from models.disponibilidad import TurnoLibreResponse
+from services.indice_turnos import IndiceTurnos, MEDICO, PACIENTE
+from services.slot_service import PlantillasHorario, SlotService
+from utils.fechas import a_fecha, ahora_local, FORMATO_FECHA
+
+
+class DisponibilidadService:
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+        self.cursor = db.cursor()
+
+    def _medicos_de_especialidad(self, id_especialidad: int) -> List[int]:
+        self.cursor.execute("SELECT id_medico FROM Medico WHERE id_especialidad = ? ORDER BY id_medico", (id_especialidad,))
+        return [row['id_medico'] for row in self.cursor.fetchall()]
+
+    def get_turnos_libres(self,
+                          fecha_desde: str,
+                          fecha_hasta: str,
+                          id_medico: Optional[int] = None,
+                          id_especialidad: Optional[int] = None,
+                          id_paciente: Optional[int] = None) -> List[TurnoLibreResponse]:
+        """
+        Turnos libres entre fecha_desde y fecha_hasta (inclusive) de un médico o de todos los
+        médicos de una especialidad, ordenados por fecha y médico. Si se indica id_paciente se
+        descartan también los horarios en los que el paciente ya tiene otro turno.
+        """
+        if id_medico is None and id_especialidad is None:
+            raise ValueError("Debe indicar id_medico o id_especialidad")
+
+        desde = a_fecha(fecha_desde)
+        hasta = a_fecha(fecha_hasta)
+        if hasta < desde:
+            raise ValueError("fecha_hasta no puede ser anterior a fecha_desde")
+        if (hasta - desde).days + 1 > config.DISPONIBILIDAD_MAX_DIAS:
+            raise ValueError(f"El rango no puede superar los {config.DISPONIBILIDAD_MAX_DIAS} días")
+
+        if id_medico is not None:
+            medico_ids = [id_medico]
+        else:
+            medico_ids = self._medicos_de_especialidad(id_especialidad)
+
+        # Lo que ya pasó no se ofrece
+        ahora = ahora_local()
+        desde = max(desde, a_fecha(ahora))
+        dias = []
+        dia = desde
+        while dia <= hasta:
+            dias.append((dia.strftime(FORMATO_FECHA), dia.weekday()))
+            dia += timedelta(days=1)
+
+        # Los médicos con el calendario (Slot) generado hasta fecha_hasta se resuelven con una
+        # sola consulta sobre el índice de slots libres; el resto se calcula desde la plantilla.
+        # El rango empieza en fecha_desde (o ahora, si ya empezó): nunca antes
+        slot_service = SlotService(self.db)
+        con_slots = slot_service.get_medicos_con_horizonte(medico_ids, hasta)
+        libres = [
+            (slot.fecha_hora_inicio, slot.id_medico, slot.fecha_hora_fin)
+            for slot in slot_service.get_libres(
+                sorted(con_slots), max(desde.strftime(FORMATO_FECHA), ahora),
+                (hasta + timedelta(days=1)).strftime(FORMATO_FECHA)
+            )
+            if slot.fecha_hora_inicio > ahora
+        ]
+
+        sin_slots = [i for i in medico_ids if i not in con_slots]
+        plantillas = PlantillasHorario().obtener(self.db, sin_slots)
+        indice = IndiceTurnos()
+        for id_med in sin_slots:
+            plantilla = plantillas.get(id_med)
+            if not plantilla:
+                continue
+
+            candidatos = [
+                (f"{fecha} {hora_inicio}", f"{fecha} {hora_fin}")
+                for fecha, dia_semana in dias
+                for hora_inicio, hora_fin in plantilla[dia_semana]
+            ]
+            candidatos = [c for c in candidatos if c[0] > ahora]
+            candidatos = indice.libres(self.db, MEDICO, id_med, candidatos)
+            libres.extend((inicio, id_med, fin) for inicio, fin in candidatos)
+
+        if id_paciente is not None:
+            libres_paciente = set(indice.libres(self.db, PACIENTE, id_paciente, [(i, f) for i, _, f in libres]))
+            libres = [l for l in libres if (l[0], l[2]) in libres_paciente]
+
+        libres.sort()
+        return [
+            TurnoLibreResponse(id_medico=id_med, fecha_hora_inicio=inicio, fecha_hora_fin=fin)
+            for inicio, id_med, fin in libres
+        ]
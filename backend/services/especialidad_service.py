@@ -1,6 +1,7 @@
 import sqlite3
 from typing import List, Optional
 from models.especialidad import EspecialidadResponse, EspecialidadCreate, EspecialidadUpdate
+from database import CacheCatalogos
 
 class EspecialidadService:
     def __init__(self, db: sqlite3.Connection):
@@ -8,7 +9,11 @@ class EspecialidadService:
         self.cursor = db.cursor()
         
     def _get_especialidad_completa(self, especialidad_id: int) -> Optional[EspecialidadResponse]:
-        """Obtiene una especialidad completa por ID"""
+        """Obtiene una especialidad completa por ID (sale del cache de catálogos si ya se cargó)"""
+        return CacheCatalogos().obtener(self.db, 'Especialidad', especialidad_id, lambda: self._cargar_especialidad_completa(especialidad_id))
+
+    def _cargar_especialidad_completa(self, especialidad_id: int) -> Optional[EspecialidadResponse]:
+        """Obtiene una especialidad completa por ID desde la base"""
         self.cursor.execute("SELECT * FROM especialidad WHERE id_especialidad = ?", (especialidad_id,))
         row = self.cursor.fetchone()
         if not row:
@@ -81,6 +86,7 @@ class EspecialidadService:
             ))
             
             self.db.commit()
+            CacheCatalogos().invalidar('Especialidad')
             
             # Obtener la especialidad recién creada
             especialidad_id = self.cursor.lastrowid
@@ -106,6 +112,7 @@ class EspecialidadService:
             """, (nombre, descripcion, especialidad_id))
             
             self.db.commit()
+            CacheCatalogos().invalidar('Especialidad')
             
             return self._get_especialidad_completa(especialidad_id)
             
@@ -123,6 +130,7 @@ class EspecialidadService:
         try:
             self.cursor.execute("DELETE FROM especialidad WHERE id_especialidad = ?", (especialidad_id,))
             self.db.commit()
+            CacheCatalogos().invalidar('Especialidad')
             return True
             
         except sqlite3.IntegrityError as e:
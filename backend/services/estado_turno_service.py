@@ -2,6 +2,7 @@
 import sqlite3
 from typing import List, Optional
 from models.estadoturno import EstadoTurnoCreate, EstadoTurnoResponse
+from database import CacheCatalogos
 
 
 class EstadoTurnoService:
@@ -10,7 +11,11 @@ class EstadoTurnoService:
         self.cursor = db.cursor()
 
     def _get_estado_turno_completo(self, estado_turno_id: int) -> Optional[EstadoTurnoResponse]:
-        """Obtiene un estado de turno completo por ID"""
+        """Obtiene un estado de turno completo por ID (sale del cache de catálogos si ya se cargó)"""
+        return CacheCatalogos().obtener(self.db, 'EstadoTurno', estado_turno_id, lambda: self._cargar_estado_turno_completo(estado_turno_id))
+
+    def _cargar_estado_turno_completo(self, estado_turno_id: int) -> Optional[EstadoTurnoResponse]:
+        """Obtiene un estado de turno completo por ID desde la base"""
         self.cursor.execute("SELECT * FROM estadoturno WHERE id_estado_turno = ?", (estado_turno_id,))
         row = self.cursor.fetchone()
         if not row:
@@ -41,6 +46,20 @@ class EstadoTurnoService:
     def get_by_id(self, estado_turno_id: int) -> Optional[EstadoTurnoResponse]:
         """Obtiene un estado de turno por su ID"""
         return self._get_estado_turno_completo(estado_turno_id)
+
+    def get_id_por_nombre(self, nombre: str) -> int:
+        """Id del estado de turno con ese nombre ('Pendiente', 'Cancelado', ...), cacheado"""
+        estado = CacheCatalogos().obtener(self.db, 'EstadoTurno', ('nombre', nombre), lambda: self._cargar_por_nombre(nombre))
+        if not estado:
+            raise ValueError(f"Estado de turno '{nombre}' no existe")
+        return estado.id_estado_turno
+
+    def _cargar_por_nombre(self, nombre: str) -> Optional[EstadoTurnoResponse]:
+        self.cursor.execute("SELECT id_estado_turno FROM estadoturno WHERE nombre = ?", (nombre,))
+        row = self.cursor.fetchone()
+        if not row:
+            return None
+        return self._get_estado_turno_completo(row['id_estado_turno'])
     
 
     def create(self, estado_data: EstadoTurnoCreate) -> EstadoTurnoResponse:
@@ -55,6 +74,7 @@ class EstadoTurnoService:
             ))
             
             self.db.commit()
+            CacheCatalogos().invalidar('EstadoTurno')
             
             # Obtener el estado recién creado
             estado_id = self.cursor.lastrowid
@@ -80,6 +100,7 @@ class EstadoTurnoService:
             """, (nombre, descripcion, estado_turno_id))
             
             self.db.commit()
+            CacheCatalogos().invalidar('EstadoTurno')
             
             return self._get_estado_turno_completo(estado_turno_id)
             
@@ -96,6 +117,7 @@ class EstadoTurnoService:
         try:
             self.cursor.execute("DELETE FROM estadoturno WHERE id_estado_turno = ?", (estado_turno_id,))
             self.db.commit()
+            CacheCatalogos().invalidar('EstadoTurno')
             return True
             
         except sqlite3.IntegrityError as e:
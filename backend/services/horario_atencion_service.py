@@ -3,6 +3,7 @@ import sqlite3
 from typing import List, Optional
 from models.horarioAtencion import HorarioAtencionResponse, HorarioAtencionCreate, HorarioAtencionUpdate
 from services.medico_service import MedicoService
+from services.slot_service import PlantillasHorario, SlotService
 
 
 class HorarioAtencionService:
@@ -39,6 +40,11 @@ class HorarioAtencionService:
             duracion_turno_min=data['duracion_turno_min'],
             medico=medico_obj
         )
+
+    def _horarios_modificados(self, id_medico: int):
+        """Después de cambiar horarios: re-expandir la plantilla y rehacer los slots libres del médico"""
+        PlantillasHorario().invalidar(id_medico)
+        SlotService(self.db).regenerar(id_medico)
      
     def get_all(self) -> List[HorarioAtencionResponse]:
         """Obtiene todos los horarios de atención"""
@@ -99,8 +105,11 @@ class HorarioAtencionService:
         
         return horarios
     
-    def create(self, horario_data: HorarioAtencionCreate) -> HorarioAtencionResponse:
-        """Crea un nuevo horario de atención"""
+    def create(self, horario_data: HorarioAtencionCreate, regenerar_slots: bool = True) -> HorarioAtencionResponse:
+        """
+        Crea un nuevo horario de atención.
+        Con regenerar_slots=False no rehace el calendario (queda a cargo de quien llama).
+        """
         try:
             # Validar que el médico existe
             self.cursor.execute("SELECT id_medico FROM Medico WHERE id_medico = ?", (horario_data.id_medico,))
@@ -124,6 +133,8 @@ class HorarioAtencionService:
             ))
             
             self.db.commit()
+            if regenerar_slots:
+                self._horarios_modificados(horario_data.id_medico)
             
             # Obtener el horario recién creado
             horario_id = self.cursor.lastrowid
@@ -166,6 +177,7 @@ class HorarioAtencionService:
             query = f"UPDATE HorarioAtencion SET {', '.join(update_fields)} WHERE id_horario_atencion = ?"
             self.cursor.execute(query, update_values)
             self.db.commit()
+            self._horarios_modificados(existing.id_medico)
             
             return self._get_horario_atencion_completo(horario_id)
             
@@ -182,6 +194,7 @@ class HorarioAtencionService:
         try:
             self.cursor.execute("DELETE FROM HorarioAtencion WHERE id_horario_atencion = ?", (horario_id,))
             self.db.commit()
+            self._horarios_modificados(existing.id_medico)
             return True
             
         except sqlite3.IntegrityError as e:
@@ -242,6 +255,7 @@ class HorarioAtencionService:
                     VALUES (?, ?, ?, ?, ?)
                 """, horario)
             self.db.commit()
+            self._horarios_modificados(id_medico)
         except sqlite3.IntegrityError as e:
             self.db.rollback()
             raise ValueError("Error al crear horarios por defecto para el médico: " + str(e))
@@ -260,8 +274,11 @@ class HorarioAtencionService:
         self.db.commit()
 
         for horario_data in horarios:
-            nuevo_horario = self.create(horario_data)
+            nuevo_horario = self.create(horario_data, regenerar_slots=False)
             horarios_actualizados.append(nuevo_horario)
+
+        # El calendario se rehace una sola vez con todos los horarios nuevos
+        self._horarios_modificados(id_medico)
             
         return horarios_actualizados
     
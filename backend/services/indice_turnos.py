@@ -0,0 +1,197 @@
+# IndiceTurnos
+# Índice en memoria de los intervalos ocupados (turnos no cancelados) por médico y por paciente.
+# Lo usan la validación de solapamiento al reservar y la búsqueda de disponibilidad,
+# que así no consultan la base en cada chequeo. Cuando cambia la versión de Turno en
+# VersionTabla se leen las filas nuevas de CambioTurno y se descartan sólo las agendas de los
+# médicos y pacientes que cambiaron, así ve también lo que escriben los otros procesos.
+
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from database import version_tabla
+from services.estado_turno_service import EstadoTurnoService
+
+MEDICO = 'medico'
+PACIENTE = 'paciente'
+
+# Turnos no cancelados de una persona (usan idx_turno_medico_fecha / idx_turno_paciente_fecha)
+_SQL_AGENDA = {
+    MEDICO: """
+        SELECT id_turno, fecha_hora_inicio, fecha_hora_fin FROM Turno
+        WHERE id_medico = ? AND id_estado_turno != ?
+        ORDER BY fecha_hora_inicio
+    """,
+    PACIENTE: """
+        SELECT id_turno, fecha_hora_inicio, fecha_hora_fin FROM Turno
+        WHERE id_paciente = ? AND id_estado_turno != ?
+        ORDER BY fecha_hora_inicio
+    """,
+}
+
+# Más cambios pendientes que esto: se descarta todo en vez de ir persona por persona
+_CAMBIOS_MAX = 1000
+
+
+class _Agenda:
+    """
+    Intervalos [inicio, fin) de una persona, ordenados por inicio.
+    max_fin[i] es el mayor fin entre los intervalos 0..i: con eso, para saber si algo se
+    solapa con [a, b) alcanza con un bisect (intervalos que empiezan antes de b) y mirar
+    max_fin del último; y para listarlos se recorre hacia atrás hasta que max_fin <= a.
+    Las fechas son texto en formato canónico, que se ordena igual que las fechas.
+    """
+
+    def __init__(self):
+        self.inicios: List[str] = []
+        self.fines: List[str] = []
+        self.ids: List[int] = []
+        self.max_fin: List[str] = []
+
+    def _recalcular_max_fin(self, desde: int):
+        del self.max_fin[desde:]
+        anterior = self.max_fin[desde - 1] if desde > 0 else ""
+        for fin in self.fines[desde:]:
+            anterior = fin if fin > anterior else anterior
+            self.max_fin.append(anterior)
+
+    def agregar(self, id_turno: int, inicio: str, fin: str):
+        pos = bisect_right(self.inicios, inicio)
+        self.inicios.insert(pos, inicio)
+        self.fines.insert(pos, fin)
+        self.ids.insert(pos, id_turno)
+        self._recalcular_max_fin(pos)
+
+    def solapados(self, inicio: str, fin: str) -> Iterator[Tuple[str, str, int]]:
+        """Intervalos que se solapan con [inicio, fin), del que empieza más tarde al más temprano"""
+        i = bisect_left(self.inicios, fin) - 1
+        while i >= 0 and self.max_fin[i] > inicio:
+            if self.fines[i] > inicio:
+                yield self.inicios[i], self.fines[i], self.ids[i]
+            i -= 1
+
+
+class IndiceTurnos:
+    """
+    Índice único por proceso. Cada agenda (médico o paciente) se carga de la base la primera
+    vez que se consulta y vale hasta que CambioTurno registra una escritura que la toca (de
+    este proceso o de otro): entonces se descarta sólo esa y se vuelve a cargar cuando se usa.
+    Mientras la versión de Turno no cambie no se lee nada más (la versión se lee una vez por
+    request). Las agendas se cargan sin el lock: el lock sólo protege los diccionarios.
+    """
+    _instance: Optional['IndiceTurnos'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(IndiceTurnos, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._agendas = {}
+            cls._instance._version = None
+            cls._instance._ultimo_cambio = None
+            cls._instance._descartes = 0
+            cls._instance._descartes_totales = 0
+        return cls._instance
+
+    def id_estado_cancelado(self, db) -> int:
+        """Id del EstadoTurno 'Cancelado' (sale del cache de catálogos)"""
+        return EstadoTurnoService(db).get_id_por_nombre('Cancelado')
+
+    def _sincronizar(self, db):
+        """Descarta las agendas de las personas con turnos que cambiaron desde el último cambio visto"""
+        version = version_tabla(db, 'Turno')
+        with self._lock:
+            if self._version is not None and version <= self._version:
+                return
+            ultimo = self._ultimo_cambio
+
+        if ultimo is None:
+            # Primera vez: no hay nada cargado, alcanza con saber desde dónde seguir
+            fila = db.execute("SELECT MAX(id_cambio) FROM CambioTurno").fetchone()
+            cambios, hasta = None, fila[0] or 0
+        else:
+            cambios = db.execute("""
+                SELECT id_cambio, id_medico, id_paciente FROM CambioTurno
+                WHERE id_cambio > ?
+                ORDER BY id_cambio
+                LIMIT ?
+            """, (ultimo, _CAMBIOS_MAX + 1)).fetchall()
+            hasta = cambios[-1][0] if cambios else ultimo
+
+        with self._lock:
+            if self._ultimo_cambio != ultimo:
+                # Otro hilo sincronizó mientras tanto: lo leído ya se aplicó (o es más viejo)
+                return
+            if cambios is None:
+                pass
+            elif len(cambios) > _CAMBIOS_MAX or (cambios and cambios[0][0] != ultimo + 1):
+                # Demasiados cambios, o ya se borraron algunos de los que faltaban ver
+                self._agendas.clear()
+                self._descartes_totales += 1
+            else:
+                personas: Set[Tuple[str, int]] = set()
+                for _, id_medico, id_paciente in cambios:
+                    personas.add((MEDICO, id_medico))
+                    personas.add((PACIENTE, id_paciente))
+                for clave in personas:
+                    if self._agendas.pop(clave, None) is not None:
+                        self._descartes += 1
+            self._ultimo_cambio = hasta
+            if self._version is None or version > self._version:
+                self._version = version
+
+    def _agenda(self, db, tipo: str, id_persona: int) -> _Agenda:
+        """Devuelve la agenda de la persona, cargándola de la base si todavía no está"""
+        # Con una transacción abierta se verían turnos sin confirmar: se arma una agenda
+        # para esta consulta sola, sin tocar el índice
+        en_transaccion = db.in_transaction
+        clave = (tipo, id_persona)
+        if not en_transaccion:
+            self._sincronizar(db)
+            with self._lock:
+                agenda = self._agendas.get(clave)
+                ultimo = self._ultimo_cambio
+            if agenda is not None:
+                return agenda
+
+        # CambioTurno se leyó antes que los turnos: lo cargado es al menos tan nuevo como él
+        agenda = _Agenda()
+        filas = db.execute(_SQL_AGENDA[tipo], (id_persona, self.id_estado_cancelado(db))).fetchall()
+        for id_turno, inicio, fin in filas:
+            agenda.agregar(id_turno, inicio, fin)
+        if not en_transaccion:
+            with self._lock:
+                # Si mientras se cargaba se aplicaron cambios nuevos, pueden tocar a esta persona
+                # con datos posteriores a la carga: se usa sólo para esta consulta
+                if self._ultimo_cambio == ultimo:
+                    self._agendas.setdefault(clave, agenda)
+        return agenda
+
+    def hay_solapamiento(self, db, tipo: str, id_persona: int, inicio: str, fin: str,
+                         excluir_turno: Optional[int] = None) -> bool:
+        """True si la persona tiene un turno no cancelado que se solapa con [inicio, fin)"""
+        agenda = self._agenda(db, tipo, id_persona)
+        return any(id_turno != excluir_turno for _, _, id_turno in agenda.solapados(inicio, fin))
+
+    def libres(self, db, tipo: str, id_persona: int, candidatos: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Filtra los intervalos candidatos (inicio, fin) que no se solapan con ningún turno de la persona"""
+        agenda = self._agenda(db, tipo, id_persona)
+        if not agenda.ids:
+            return list(candidatos)
+        inicios, max_fin = agenda.inicios, agenda.max_fin
+        resultado = []
+        for inicio, fin in candidatos:
+            k = bisect_left(inicios, fin) - 1
+            if k < 0 or max_fin[k] <= inicio:
+                resultado.append((inicio, fin))
+        return resultado
+
+    def metricas(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "version": self._version,
+                "ultimo_cambio": self._ultimo_cambio,
+                "agendas_cargadas": len(self._agendas),
+                "turnos_indexados": sum(len(a.ids) for a in self._agendas.values()),
+                "descartes": self._descartes,
+                "descartes_totales": self._descartes_totales,
+            }
@@ -4,6 +4,9 @@ from models.usuarioRol import UsuarioRolCreate
 from models.medico import MedicoCreate, MedicoUpdate, MedicoResponse
 from services.usuario_service import UsuarioService
 from services.especialidad_service import EspecialidadService
+from database import IdentityMap
+from services.slot_service import PlantillasHorario, SlotService
+from utils.paginacion import filas_planas
 
 
 class MedicoService:
@@ -13,7 +16,11 @@ class MedicoService:
         self.cursor = db.cursor()
     
     def _get_medico_completo(self, medico_id: int) -> Optional[MedicoResponse]:
-        """Obtiene un médico con sus relaciones"""
+        """Obtiene un médico con sus relaciones (si ya se cargó en el request sale del identity map)"""
+        return IdentityMap.de(self.db).obtener('Medico', medico_id, lambda: self._cargar_medico_completo(medico_id))
+
+    def _cargar_medico_completo(self, medico_id: int) -> Optional[MedicoResponse]:
+        """Obtiene un médico con sus relaciones desde la base"""
         self.cursor.execute("SELECT * FROM medico WHERE id_medico = ?", (medico_id,))
         medico_row = self.cursor.fetchone()
         
@@ -56,10 +63,16 @@ class MedicoService:
                 id_medico: int = None,
                 id_usuario: int = None,
                 id_especialidad: int = None, 
-                telefono: str = None) -> List[MedicoResponse]:
+                telefono: str = None,
+                limit: Optional[int] = None,
+                after: Optional[int] = None,
+                columnas: Optional[List[str]] = None) -> List[MedicoResponse]:
 
-        """Obtiene todos los médicos"""
-        sql = "SELECT id_medico FROM medico"
+        """
+        Obtiene todos los médicos (con `limit`, una página de médicos con id mayor a `after`).
+        Con `columnas` (proyección plana) devuelve filas de Medico con sólo esas columnas
+        """
+        sql = f"SELECT {', '.join(columnas or ['id_medico'])} FROM medico"
 
         condiciones = []
         valores = []
@@ -96,10 +109,20 @@ class MedicoService:
             condiciones.append("telefono = ?")
             valores.append(telefono)
 
+        if after is not None:
+            condiciones.append("id_medico > ?")
+            valores.append(after)
+
         if condiciones:
             sql += " WHERE " + " AND ".join(condiciones)
 
+        if limit is not None or after is not None:
+            sql += " ORDER BY id_medico LIMIT ?"
+            valores.append(limit if limit is not None else -1)
+
         self.cursor.execute(sql, tuple(valores))
+        if columnas is not None:
+            return filas_planas(self.cursor, ("noti_cancel_email_act",))
         rows = self.cursor.fetchall()
         
         medicos = []
@@ -254,7 +277,10 @@ class MedicoService:
         
         try:
             self.cursor.execute("DELETE FROM Medico WHERE id_medico = ?", (medico_id,))
+            SlotService(self.db).eliminar_medico(medico_id)
             self.db.commit()
+            # Sus HorarioAtencion se borran en cascada
+            PlantillasHorario().invalidar(medico_id)
 
             # Eliminar usuario asociado si no tiene otro rol
             if existing.id_usuario:
@@ -2,6 +2,7 @@
 import sqlite3
 from typing import List, Optional
 from models.obraSocial import ObraSocialResponse, ObraSocialCreate, ObraSocialUpdate
+from database import CacheCatalogos
 
 class ObraSocialService:
     def __init__(self, db: sqlite3.Connection):
@@ -9,7 +10,11 @@ class ObraSocialService:
         self.cursor = db.cursor()
 
     def _get_obra_social_completa(self, obra_social_id: int) -> Optional[ObraSocialResponse]:
-        """Obtiene una obra social completa por ID"""
+        """Obtiene una obra social completa por ID (sale del cache de catálogos si ya se cargó)"""
+        return CacheCatalogos().obtener(self.db, 'ObraSocial', obra_social_id, lambda: self._cargar_obra_social_completa(obra_social_id))
+
+    def _cargar_obra_social_completa(self, obra_social_id: int) -> Optional[ObraSocialResponse]:
+        """Obtiene una obra social completa por ID desde la base"""
         self.cursor.execute("SELECT * FROM obrasocial WHERE id_obra_social = ?", (obra_social_id,))
         row = self.cursor.fetchone()
         if not row:
@@ -27,12 +32,11 @@ class ObraSocialService:
 
     def get_particular_os_id(self):
         """Busca y retorna el id_obra_social cuyo nombre es 'Particular'."""
-        self.cursor.execute("SELECT id_obra_social FROM ObraSocial WHERE nombre = 'Particular'")
-        row = self.cursor.fetchone()
-        if not row:
+        obra_social = self.get_by_name('Particular')
+        if not obra_social:
             raise ValueError("Error de configuración: No se encuentra la Obra Social 'Particular' en la base de datos.")
         
-        return dict(row)['id_obra_social']
+        return obra_social.id_obra_social
     
     def get_all(self,
                 id_obra_social: Optional[int] = None,
@@ -109,6 +113,7 @@ class ObraSocialService:
             ))
             
             self.db.commit()
+            CacheCatalogos().invalidar('ObraSocial')
             
             # Obtener la obra social recién creada
             obra_social_id = self.cursor.lastrowid
@@ -152,6 +157,7 @@ class ObraSocialService:
             ))
             
             self.db.commit()
+            CacheCatalogos().invalidar('ObraSocial')
             
             return self._get_obra_social_completa(obra_social_id)
             
@@ -168,6 +174,7 @@ class ObraSocialService:
         try:
             self.cursor.execute("DELETE FROM obrasocial WHERE id_obra_social = ?", (obra_social_id,))
             self.db.commit()
+            CacheCatalogos().invalidar('ObraSocial')
             return True
             
         except sqlite3.IntegrityError as e:
@@ -176,13 +183,15 @@ class ObraSocialService:
         
 
     def get_by_name(self, nombre: str) -> Optional[ObraSocialResponse]:
-        """Obtiene una obra social por su nombre"""
+        """Obtiene una obra social por su nombre (sale del cache de catálogos si ya se cargó)"""
+        return CacheCatalogos().obtener(self.db, 'ObraSocial', ('nombre', nombre), lambda: self._cargar_por_nombre(nombre))
+
+    def _cargar_por_nombre(self, nombre: str) -> Optional[ObraSocialResponse]:
         self.cursor.execute("SELECT id_obra_social FROM obrasocial WHERE nombre = ?", (nombre,))
         row = self.cursor.fetchone()
         if not row:
             return None
-        obra_social_id = dict(row)['id_obra_social']
-        return self._get_obra_social_completa(obra_social_id)
+        return self._get_obra_social_completa(dict(row)['id_obra_social'])
     
     
     
\ No newline at end of file
@@ -5,6 +5,8 @@ from models.usuarioRol import UsuarioRolCreate, UsuarioRolResponse
 from services.usuario_service import UsuarioService
 from services.obra_social_service import ObraSocialService
 from datetime import date
+from database import IdentityMap
+from utils.paginacion import filas_planas
 
 
 class PacienteService:
@@ -14,7 +16,11 @@ class PacienteService:
         self.cursor = db.cursor()
     
     def _get_paciente_completo(self, paciente_id: int) -> Optional[PacienteResponse]:
-        """Obtiene un paciente con sus relaciones"""
+        """Obtiene un paciente con sus relaciones (si ya se cargó en el request sale del identity map)"""
+        return IdentityMap.de(self.db).obtener('Paciente', paciente_id, lambda: self._cargar_paciente_completo(paciente_id))
+
+    def _cargar_paciente_completo(self, paciente_id: int) -> Optional[PacienteResponse]:
+        """Obtiene un paciente con sus relaciones desde la base"""
         self.cursor.execute("""
             SELECT * FROM Paciente WHERE id_paciente = ?
         """, (paciente_id,))
@@ -53,10 +59,13 @@ class PacienteService:
             noti_reserva_email_act=bool(paciente_dict.get('noti_reserva_email_act'))
         )
     
-    def get_all(self, id_paciente: Optional[int] = None, dni: Optional[str] = None, nombre: Optional[str] = None, apellido: Optional[str] = None, id_obra_social: Optional[int] = None, id_usuario: Optional[int] = None) -> List[PacienteResponse]:
-        """Obtiene todos los pacientes"""
+    def get_all(self, id_paciente: Optional[int] = None, dni: Optional[str] = None, nombre: Optional[str] = None, apellido: Optional[str] = None, id_obra_social: Optional[int] = None, id_usuario: Optional[int] = None, limit: Optional[int] = None, after: Optional[int] = None, columnas: Optional[List[str]] = None) -> List[PacienteResponse]:
+        """
+        Obtiene todos los pacientes (con `limit`, una página de pacientes con id mayor a `after`).
+        Con `columnas` (proyección plana) devuelve filas de Paciente con sólo esas columnas
+        """
         
-        sql = "SELECT * FROM Paciente"
+        sql = f"SELECT {', '.join(columnas)} FROM Paciente" if columnas is not None else "SELECT * FROM Paciente"
         params = []
         conditions = []
 
@@ -78,9 +87,17 @@ class PacienteService:
         if id_usuario is not None:
             conditions.append("id_usuario = ?")
             params.append(id_usuario)
+        if after is not None:
+            conditions.append("id_paciente > ?")
+            params.append(after)
         if conditions:
             sql += " WHERE " + " AND ".join(conditions)
+        if limit is not None or after is not None:
+            sql += " ORDER BY id_paciente LIMIT ?"
+            params.append(limit if limit is not None else -1)
         self.cursor.execute(sql, params)
+        if columnas is not None:
+            return filas_planas(self.cursor, ("noti_reserva_email_act",))
         
         # self.cursor.execute("SELECT id_paciente FROM Paciente")
         rows = self.cursor.fetchall()
@@ -0,0 +1,217 @@
+# Jobs en segundo plano
+# Cada job tiene un lease en la base (JobLease): con varios procesos de la API
+# (uvicorn --workers N) sólo lo corre el proceso dueño del lease, y si ese proceso se cae el
+# lease vence y lo toma otro. Cada ejecución queda en el historial (JobEjecucion) con su duración.
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+import config
+from database import ConexionesDB
+from utils.fechas import ahora_local, ahora_local_mas
+
+OK = 'ok'
+ERROR = 'error'
+
+
+class JobService:
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+        self.cursor = db.cursor()
+
+    def tomar_lease(self, nombre: str, duenio: str, duracion_seg: float) -> bool:
+        """
+        Toma o renueva el lease del job por `duracion_seg`. Es un solo UPSERT: sólo pisa el
+        lease si ya era de `duenio` o si venció, así dos procesos nunca lo tienen a la vez.
+        Devuelve True si el lease quedó para `duenio`.
+        """
+        try:
+            self.cursor.execute("""
+                INSERT INTO JobLease (nombre, duenio, vence) VALUES (?, ?, ?)
+                ON CONFLICT (nombre) DO UPDATE SET duenio = excluded.duenio, vence = excluded.vence
+                WHERE JobLease.duenio = excluded.duenio OR JobLease.vence < ?
+            """, (nombre, duenio, ahora_local_mas(seconds=duracion_seg), ahora_local()))
+            tomado = self.cursor.rowcount == 1
+            self.db.commit()
+            return tomado
+        except sqlite3.Error:
+            self.db.rollback()
+            raise
+
+    def liberar_leases(self, nombres: List[str], duenio: str) -> int:
+        """Da por vencidos los leases de `duenio` (al apagar), para que otro proceso los tome enseguida"""
+        ahora = ahora_local()
+        try:
+            self.cursor.executemany("UPDATE JobLease SET vence = ? WHERE nombre = ? AND duenio = ?",
+                                    ((ahora, nombre, duenio) for nombre in nombres))
+            liberados = self.cursor.rowcount
+            self.db.commit()
+            return liberados
+        except sqlite3.Error:
+            self.db.rollback()
+            raise
+
+    def registrar_ejecucion(self, nombre: str, duenio: str, inicio: str, duracion_ms: float,
+                            estado: str, resultado: Optional[str], error: Optional[str]):
+        try:
+            self.cursor.execute("""
+                INSERT INTO JobEjecucion (nombre, duenio, inicio, fin, duracion_ms, estado, resultado, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (nombre, duenio, inicio, ahora_local(), round(duracion_ms, 3), estado, resultado, error))
+            self.db.commit()
+        except sqlite3.Error:
+            self.db.rollback()
+            raise
+
+    def purgar_historial(self, dias: int) -> int:
+        """Borra las ejecuciones de hace más de `dias` días"""
+        try:
+            self.cursor.execute("DELETE FROM JobEjecucion WHERE inicio < ?", (ahora_local_mas(days=-dias),))
+            borradas = self.cursor.rowcount
+            self.db.commit()
+            return borradas
+        except sqlite3.Error:
+            self.db.rollback()
+            raise
+
+    def get_leases(self) -> List[Dict]:
+        self.cursor.execute("SELECT nombre, duenio, vence FROM JobLease ORDER BY nombre")
+        return [dict(fila) for fila in self.cursor.fetchall()]
+
+    def get_ejecuciones(self, nombre: str, limite: int = 20) -> List[Dict]:
+        """Últimas ejecuciones de un job, de la más reciente a la más vieja"""
+        self.cursor.execute("""
+            SELECT id_ejecucion, nombre, duenio, inicio, fin, duracion_ms, estado, resultado, error
+            FROM JobEjecucion
+            WHERE nombre = ?
+            ORDER BY inicio DESC
+            LIMIT ?
+        """, (nombre, limite))
+        return [dict(fila) for fila in self.cursor.fetchall()]
+
+
+class _Job:
+    def __init__(self, nombre: str, funcion: Callable[[], Any], intervalo_seg: float, al_iniciar: bool):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.intervalo_seg = intervalo_seg
+        self.al_iniciar = al_iniciar
+        self.ejecuciones = 0
+        self.errores = 0
+        self.omitidas = 0
+        self.ultima_duracion_ms: Optional[float] = None
+
+
+class PlanificadorJobs:
+    """
+    Corre los jobs registrados con `agregar` cada `intervalo_seg` (con APScheduler) pero, antes
+    de cada corrida, toma el lease del job en la base: si lo tiene otro proceso la corrida se
+    omite. El lease dura intervalo + JOB_LEASE_MARGEN_SEG y el dueño lo renueva en cada corrida,
+    así el job queda siempre en el mismo proceso mientras ése siga vivo.
+    """
+    _instance: Optional['PlanificadorJobs'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(PlanificadorJobs, cls).__new__(cls)
+            cls._instance.duenio = f"{socket.gethostname()}:{os.getpid()}"
+            cls._instance._jobs = {}
+            cls._instance._scheduler = None
+            cls._instance._lock = threading.Lock()
+        return cls._instance
+
+    def agregar(self, nombre: str, funcion: Callable[[], Any], intervalo_seg: float, al_iniciar: bool = False):
+        """
+        Registra un job. Lo que devuelve `funcion` se guarda como resultado de la ejecución y
+        una excepción la deja registrada como error. `al_iniciar` lo corre también al arrancar.
+        """
+        if intervalo_seg <= 0:
+            raise ValueError(f"El intervalo del job '{nombre}' debe ser mayor a 0")
+        self._jobs[nombre] = _Job(nombre, funcion, intervalo_seg, al_iniciar)
+
+    def iniciar(self):
+        if self._scheduler is not None:
+            return
+        # coalesce: si una corrida se atrasó (la conexión de escritura estaba ocupada) no se
+        # encadenan varias seguidas; max_instances: un job nunca se superpone consigo mismo
+        self._scheduler = BackgroundScheduler(job_defaults={"coalesce": True, "max_instances": 1})
+        for job in self._jobs.values():
+            # Ojo: next_run_time=None deja el job pausado, así que sólo se pasa para correrlo ya
+            al_iniciar = {"next_run_time": datetime.now()} if job.al_iniciar else {}
+            self._scheduler.add_job(self._ejecutar, 'interval', args=(job,), id=job.nombre,
+                                    seconds=job.intervalo_seg, **al_iniciar)
+        self._scheduler.start()
+
+    def detener(self):
+        """Espera a que terminen los jobs en curso y libera los leases de este proceso"""
+        if self._scheduler is None:
+            return
+        self._scheduler.shutdown(wait=True)
+        self._scheduler = None
+        try:
+            with ConexionesDB.escritura().conexion() as conn:
+                JobService(conn).liberar_leases(list(self._jobs), self.duenio)
+        except Exception as e:
+            print(f"[JOBS] Error al liberar los leases: {e}")
+
+    def metricas(self) -> Dict:
+        """Contadores de este proceso; el historial de todos los procesos está en JobEjecucion"""
+        with self._lock:
+            return {
+                "duenio": self.duenio,
+                "activo": self._scheduler is not None,
+                "jobs": {
+                    job.nombre: {
+                        "intervalo_seg": job.intervalo_seg,
+                        "ejecuciones": job.ejecuciones,
+                        "errores": job.errores,
+                        "omitidas": job.omitidas,
+                        "ultima_duracion_ms": job.ultima_duracion_ms,
+                    }
+                    for job in self._jobs.values()
+                },
+            }
+
+    def _ejecutar(self, job: _Job):
+        try:
+            with ConexionesDB.escritura().conexion() as conn:
+                tomado = JobService(conn).tomar_lease(job.nombre, self.duenio,
+                                                      job.intervalo_seg + config.JOB_LEASE_MARGEN_SEG)
+        except Exception as e:
+            print(f"[JOBS] No se pudo tomar el lease de '{job.nombre}': {e}")
+            return
+        if not tomado:
+            # Lo corre otro proceso
+            with self._lock:
+                job.omitidas += 1
+            return
+
+        inicio = ahora_local()
+        t0 = time.perf_counter()
+        resultado, error = None, None
+        try:
+            devuelto = job.funcion()
+            resultado = None if devuelto is None else str(devuelto)[:500]
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:500]
+            print(f"[JOBS] Error en '{job.nombre}': {error}")
+        duracion_ms = 1000 * (time.perf_counter() - t0)
+
+        with self._lock:
+            job.ejecuciones += 1
+            job.errores += error is not None
+            job.ultima_duracion_ms = round(duracion_ms, 3)
+
+        try:
+            with ConexionesDB.escritura().conexion() as conn:
+                JobService(conn).registrar_ejecucion(job.nombre, self.duenio, inicio, duracion_ms,
+                                                     ERROR if error else OK, resultado, error)
+        except Exception as e:
+            print(f"[JOBS] No se pudo registrar la ejecución de '{job.nombre}': {e}")
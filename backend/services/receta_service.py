@@ -2,6 +2,8 @@ import sqlite3
 from typing import List, Optional
 from models.receta import RecetaResponse, RecetaCreate, RecetaUpdate
 from services.consulta_service import ConsultaService
+from utils.fechas import rango_dias
+from utils.paginacion import filas_planas
 
 
 class RecetaService:
@@ -39,10 +41,26 @@ class RecetaService:
             consulta=consulta_obj
         )
     
-    def get_all(self) -> List[RecetaResponse]:
-        """Obtiene todas las recetas"""
-        self.cursor.execute("SELECT id_receta FROM Receta")
+    def get_all(self, limit: Optional[int] = None, after: Optional[int] = None,
+                columnas: Optional[List[str]] = None) -> List[RecetaResponse]:
+        """
+        Obtiene todas las recetas, o una página de `limit` recetas con id mayor a `after`.
+        Con `columnas` (proyección plana) devuelve filas de Receta con sólo esas columnas
+        """
+        seleccion = ", ".join(columnas or ["id_receta", "id_consulta"])
+        if limit is None and after is None:
+            self.cursor.execute(f"SELECT {seleccion} FROM Receta")
+        else:
+            self.cursor.execute(
+                f"SELECT {seleccion} FROM Receta WHERE id_receta > ? ORDER BY id_receta LIMIT ?",
+                (after or 0, limit if limit is not None else -1)
+            )
+        if columnas is not None:
+            return filas_planas(self.cursor)
         rows = self.cursor.fetchall()
+
+        # Las consultas (y sus turnos) se cargan por lotes antes de armar cada receta
+        ConsultaService(self.db).precargar([row['id_consulta'] for row in rows])
         
         recetas = []
         for row in rows:
@@ -53,6 +71,23 @@ class RecetaService:
         
         return recetas
     
+    def exportar(self, fecha_desde: str, fecha_hasta: str) -> sqlite3.Cursor:
+        """Recetas emitidas entre dos fechas (inclusive) como filas planas; devuelve el cursor sin leer"""
+        self.cursor.execute("""
+            SELECT
+                r.id_receta, r.id_consulta, r.fecha_emision, r.medicamento, r.dosis, r.instrucciones,
+                t.id_paciente, p.apellido || ', ' || p.nombre AS paciente,
+                t.id_medico, m.apellido || ', ' || m.nombre AS medico
+            FROM Receta r
+            LEFT JOIN Consulta c ON c.id_consulta = r.id_consulta
+            LEFT JOIN Turno t ON t.id_turno = c.id_turno
+            LEFT JOIN Paciente p ON p.id_paciente = t.id_paciente
+            LEFT JOIN Medico m ON m.id_medico = t.id_medico
+            WHERE r.fecha_emision >= ? AND r.fecha_emision < ?
+            ORDER BY r.fecha_emision, r.id_receta
+        """, rango_dias(fecha_desde, fecha_hasta))
+        return self.cursor
+
     def get_by_id(self, receta_id: int) -> Optional[RecetaResponse]:
         """Obtiene una receta por su ID"""
         return self._get_receta_completa(receta_id)
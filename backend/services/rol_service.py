@@ -2,6 +2,7 @@ from http.client import HTTPException
 import sqlite3
 from typing import List, Optional
 from models.rol import RolResponse, RolCreate, RolUpdate
+from database import CacheCatalogos
 
 
 class RolService:
@@ -10,7 +11,11 @@ class RolService:
         self.cursor = db.cursor()
 
     def _get_rol_completo(self, rol_id: int) -> Optional[RolResponse]:
-        """Obtiene un rol completo por ID"""
+        """Obtiene un rol completo por ID (sale del cache de catálogos si ya se cargó)"""
+        return CacheCatalogos().obtener(self.db, 'Rol', rol_id, lambda: self._cargar_rol_completo(rol_id))
+
+    def _cargar_rol_completo(self, rol_id: int) -> Optional[RolResponse]:
+        """Obtiene un rol completo por ID desde la base"""
         self.cursor.execute("SELECT * FROM rol WHERE id_rol = ?", (rol_id,))
         row = self.cursor.fetchone()
         if not row:
@@ -52,6 +57,7 @@ class RolService:
             ))
             
             self.db.commit()
+            CacheCatalogos().invalidar('Rol')
             
             # Obtener el rol recién creado
             rol_id = self.cursor.lastrowid
@@ -78,6 +84,7 @@ class RolService:
             """, (nombre, descripcion, rol_id))
             
             self.db.commit()
+            CacheCatalogos().invalidar('Rol')
             
             return self._get_rol_completo(rol_id)
             
@@ -94,6 +101,7 @@ class RolService:
         try:
             self.cursor.execute("DELETE FROM rol WHERE id_rol = ?", (rol_id,))
             self.db.commit()
+            CacheCatalogos().invalidar('Rol')
             return True
             
         except sqlite3.IntegrityError as e:
@@ -102,11 +110,17 @@ class RolService:
         
                     
     def get_by_name(self, nombre: str) -> Optional[RolResponse]:
-        """Obtiene un rol por su nombre"""
+        """Obtiene un rol por su nombre (sale del cache de catálogos si ya se cargó)"""
+        rol = CacheCatalogos().obtener(self.db, 'Rol', ('nombre', nombre), lambda: self._cargar_rol_por_nombre(nombre))
+        if not rol:
+            raise ValueError(f"Rol '{nombre}' no existe")
+        return rol
+
+    def _cargar_rol_por_nombre(self, nombre: str) -> Optional[RolResponse]:
         self.cursor.execute("SELECT * FROM rol WHERE nombre = ?", (nombre,))
         row = self.cursor.fetchone()
         if not row:
-            raise ValueError(f"Rol '{nombre}' no existe")
+            return None
 
         role_dict = dict(row)
         return RolResponse(
@@ -0,0 +1,300 @@
+# SlotService
+# Calendario materializado de turnos reservables (tabla Slot): una fila por médico y horario,
+# generada desde HorarioAtencion (expandido en plantillas semanales, ver PlantillasHorario)
+# hasta un horizonte móvil (config.SLOT_HORIZONTE_DIAS).
+# Reservar un turno es reclamar su fila con un UPDATE condicional, y buscar libres es una
+# sola consulta sobre el índice parcial de slots libres.
+
+import sqlite3
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import config
+from database import version_tabla
+from models.slot import SlotResponse
+from utils.fechas import a_fecha, ahora_local, FORMATO_FECHA
+
+
+# Turnos de un día de la semana como pares ('HH:MM:SS', 'HH:MM:SS'), ordenados
+PlantillaSemanal = List[List[Tuple[str, str]]]
+
+
+def _hora(valor: str) -> time:
+    """Las horas de HorarioAtencion vienen como 'HH:MM' (o 'HH:MM:SS')"""
+    return time.fromisoformat(valor)
+
+
+def expandir_horarios(filas) -> PlantillaSemanal:
+    """
+    Arma la plantilla semanal de un médico a partir de sus filas de HorarioAtencion:
+    para cada día (0=lunes ... 6=domingo) los turnos que entran enteros en cada franja.
+    """
+    plantilla: PlantillaSemanal = [[] for _ in range(7)]
+    base = datetime(2000, 1, 1)
+    for fila in filas:
+        duracion = timedelta(minutes=fila['duracion_turno_min'])
+        if duracion <= timedelta(0):
+            continue
+        inicio = datetime.combine(base, _hora(fila['hora_inicio']))
+        fin_franja = datetime.combine(base, _hora(fila['hora_fin']))
+        while inicio + duracion <= fin_franja:
+            fin = inicio + duracion
+            plantilla[fila['dia_semana']].append((inicio.strftime("%H:%M:%S"), fin.strftime("%H:%M:%S")))
+            inicio = fin
+    for turnos_dia in plantilla:
+        turnos_dia.sort()
+    return plantilla
+
+
+class PlantillasHorario:
+    """
+    Cache por proceso de las plantillas semanales de cada médico. Los horarios cambian poco,
+    así que se expanden una sola vez; HorarioAtencionService llama invalidar() al modificarlos
+    y los cambios de otros procesos se detectan por la versión de HorarioAtencion (VersionTabla).
+    """
+    _instance: Optional['PlantillasHorario'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(PlantillasHorario, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._plantillas = {}
+            cls._instance._version = None
+        return cls._instance
+
+    def obtener(self, db, medico_ids: List[int]) -> Dict[int, PlantillaSemanal]:
+        version = version_tabla(db, 'HorarioAtencion')
+        with self._lock:
+            if version != self._version and not db.in_transaction:
+                self._plantillas.clear()
+                self._version = version
+            # Una transacción que cambió los horarios ve otra versión: se expande sin cachear
+            usar_cache = version == self._version
+            cacheadas = {i: self._plantillas[i] for i in medico_ids if usar_cache and i in self._plantillas}
+        faltantes = [i for i in medico_ids if i not in cacheadas]
+        if faltantes:
+            filas_por_medico: Dict[int, list] = {i: [] for i in faltantes}
+            marcadores = ", ".join("?" for _ in faltantes)
+            filas = db.execute(f"""
+                SELECT id_medico, dia_semana, hora_inicio, hora_fin, duracion_turno_min
+                FROM HorarioAtencion WHERE id_medico IN ({marcadores})
+            """, faltantes).fetchall()
+            for fila in filas:
+                filas_por_medico[fila['id_medico']].append(fila)
+            for id_medico, filas_medico in filas_por_medico.items():
+                cacheadas[id_medico] = expandir_horarios(filas_medico)
+            with self._lock:
+                if usar_cache and self._version == version:
+                    self._plantillas.update((i, cacheadas[i]) for i in faltantes)
+        return cacheadas
+
+    def invalidar(self, id_medico: Optional[int] = None):
+        """Descarta la plantilla de un médico (o todas) para que se vuelva a expandir"""
+        with self._lock:
+            if id_medico is None:
+                self._plantillas.clear()
+            else:
+                self._plantillas.pop(id_medico, None)
+
+
+# Vincula los slots libres de un médico que se solapan con un turno no cancelado
+# (cubre turnos cargados por fuera de la API o con duraciones distintas a la del horario)
+SQL_VINCULAR_OCUPADOS = """
+    UPDATE Slot
+    SET id_turno = (
+        SELECT t.id_turno FROM Turno t
+        WHERE t.id_medico = Slot.id_medico
+        AND t.id_estado_turno != (SELECT id_estado_turno FROM EstadoTurno WHERE nombre = 'Cancelado')
+        AND t.fecha_hora_inicio < Slot.fecha_hora_fin
+        AND t.fecha_hora_fin > Slot.fecha_hora_inicio
+        LIMIT 1
+    )
+    WHERE id_medico = ? AND id_turno IS NULL
+    AND fecha_hora_inicio >= ? AND fecha_hora_inicio < ?
+    AND EXISTS (
+        SELECT 1 FROM Turno t
+        WHERE t.id_medico = Slot.id_medico
+        AND t.id_estado_turno != (SELECT id_estado_turno FROM EstadoTurno WHERE nombre = 'Cancelado')
+        AND t.fecha_hora_inicio < Slot.fecha_hora_fin
+        AND t.fecha_hora_fin > Slot.fecha_hora_inicio
+    )
+"""
+
+
+class SlotService:
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+        self.cursor = db.cursor()
+
+    def _slot_desde_fila(self, row) -> SlotResponse:
+        return SlotResponse(
+            id_slot=row['id_slot'],
+            id_medico=row['id_medico'],
+            fecha_hora_inicio=row['fecha_hora_inicio'],
+            fecha_hora_fin=row['fecha_hora_fin'],
+            id_turno=row['id_turno']
+        )
+
+    def get_horizonte(self, id_medico: int) -> Optional[date]:
+        """Último día (inclusive) con slots generados para el médico, o None si nunca se generaron"""
+        self.cursor.execute("SELECT generado_hasta FROM SlotHorizonte WHERE id_medico = ?", (id_medico,))
+        row = self.cursor.fetchone()
+        return a_fecha(row['generado_hasta']) if row else None
+
+    def get_medicos_con_horizonte(self, medico_ids: List[int], hasta: date) -> set:
+        """Médicos (de la lista) cuyo calendario está generado al menos hasta la fecha dada"""
+        con_horizonte = set()
+        for i in range(0, len(medico_ids), 500):
+            lote = medico_ids[i:i + 500]
+            marcadores = ", ".join("?" for _ in lote)
+            self.cursor.execute(f"""
+                SELECT id_medico FROM SlotHorizonte
+                WHERE generado_hasta >= ? AND id_medico IN ({marcadores})
+            """, (hasta.strftime(FORMATO_FECHA), *lote))
+            con_horizonte.update(row['id_medico'] for row in self.cursor.fetchall())
+        return con_horizonte
+
+    def _generar(self, id_medico: int, desde: date, hasta: date):
+        """Inserta los slots de [desde, hasta] que falten y marca los que ya están ocupados (sin commit)"""
+        plantilla = PlantillasHorario().obtener(self.db, [id_medico]).get(id_medico)
+        ahora = ahora_local()
+        filas = []
+        dia = desde
+        while plantilla and dia <= hasta:
+            fecha = dia.strftime(FORMATO_FECHA)
+            for hora_inicio, hora_fin in plantilla[dia.weekday()]:
+                inicio = f"{fecha} {hora_inicio}"
+                if inicio > ahora:
+                    filas.append((id_medico, inicio, f"{fecha} {hora_fin}"))
+            dia += timedelta(days=1)
+
+        # Los que ya existen (p. ej. ocupados por un turno) quedan como están
+        self.cursor.executemany("""
+            INSERT OR IGNORE INTO Slot (id_medico, fecha_hora_inicio, fecha_hora_fin)
+            VALUES (?, ?, ?)
+        """, filas)
+        self.cursor.execute(SQL_VINCULAR_OCUPADOS, (
+            id_medico,
+            desde.strftime(FORMATO_FECHA),
+            (hasta + timedelta(days=1)).strftime(FORMATO_FECHA)
+        ))
+        self.cursor.execute("""
+            INSERT INTO SlotHorizonte (id_medico, generado_hasta) VALUES (?, ?)
+            ON CONFLICT (id_medico) DO UPDATE SET generado_hasta = excluded.generado_hasta
+        """, (id_medico, hasta.strftime(FORMATO_FECHA)))
+
+    def asegurar_horizonte(self, id_medico: int, hasta: Optional[str] = None):
+        """
+        Extiende los slots del médico hasta hoy + SLOT_HORIZONTE_DIAS, o hasta la fecha
+        pedida si es más lejana (con tope SLOT_HORIZONTE_MAX_DIAS). Si ya están generados no hace nada.
+        """
+        hoy = date.today()
+        objetivo = hoy + timedelta(days=config.SLOT_HORIZONTE_DIAS)
+        if hasta is not None:
+            pedido = a_fecha(hasta)
+            if pedido > hoy + timedelta(days=config.SLOT_HORIZONTE_MAX_DIAS):
+                raise ValueError(f"No se pueden reservar turnos a más de {config.SLOT_HORIZONTE_MAX_DIAS} días")
+            objetivo = max(objetivo, pedido)
+
+        actual = self.get_horizonte(id_medico)
+        if actual is not None and actual >= objetivo:
+            return
+
+        desde = hoy if actual is None else max(hoy, actual + timedelta(days=1))
+        try:
+            self._generar(id_medico, desde, objetivo)
+            self.db.commit()
+        except sqlite3.Error as e:
+            self.db.rollback()
+            raise ValueError("Error al generar el calendario de turnos: " + str(e))
+
+    def asegurar_horizonte_todos(self) -> int:
+        """Extiende el horizonte de todos los médicos y borra los slots libres que ya pasaron"""
+        self.cursor.execute("DELETE FROM Slot WHERE id_turno IS NULL AND fecha_hora_inicio < ?", (ahora_local(),))
+        self.db.commit()
+
+        self.cursor.execute("SELECT id_medico FROM Medico")
+        medico_ids = [row['id_medico'] for row in self.cursor.fetchall()]
+        for id_medico in medico_ids:
+            self.asegurar_horizonte(id_medico)
+        return len(medico_ids)
+
+    def regenerar(self, id_medico: int):
+        """
+        Rehace los slots futuros libres del médico después de un cambio en sus HorarioAtencion.
+        Los ocupados se conservan (el turno ya está reservado aunque el horario haya cambiado).
+        """
+        hoy = date.today()
+        actual = self.get_horizonte(id_medico)
+        hasta = max(hoy + timedelta(days=config.SLOT_HORIZONTE_DIAS), actual or hoy)
+        try:
+            self.cursor.execute("""
+                DELETE FROM Slot
+                WHERE id_medico = ? AND id_turno IS NULL AND fecha_hora_inicio > ?
+            """, (id_medico, ahora_local()))
+            self._generar(id_medico, hoy, hasta)
+            self.db.commit()
+        except sqlite3.Error as e:
+            self.db.rollback()
+            raise ValueError("Error al regenerar el calendario de turnos: " + str(e))
+
+    def eliminar_medico(self, id_medico: int):
+        """Borra el calendario de un médico dado de baja (sin commit)"""
+        self.cursor.execute("DELETE FROM Slot WHERE id_medico = ?", (id_medico,))
+        self.cursor.execute("DELETE FROM SlotHorizonte WHERE id_medico = ?", (id_medico,))
+
+    def get_slot(self, id_medico: int, fecha_hora_inicio: str) -> Optional[SlotResponse]:
+        """Slot del médico que empieza exactamente en fecha_hora_inicio (búsqueda por el índice único)"""
+        self.asegurar_horizonte(id_medico, hasta=fecha_hora_inicio)
+        return self.buscar_slot(id_medico, fecha_hora_inicio)
+
+    def buscar_slot(self, id_medico: int, fecha_hora_inicio: str) -> Optional[SlotResponse]:
+        """Como get_slot pero sin extender el horizonte (no escribe: sirve dentro de una transacción)"""
+        self.cursor.execute("""
+            SELECT * FROM Slot WHERE id_medico = ? AND fecha_hora_inicio = ?
+        """, (id_medico, fecha_hora_inicio))
+        row = self.cursor.fetchone()
+        return self._slot_desde_fila(row) if row else None
+
+    def get_libres(self, medico_ids: List[int], desde: str, hasta: str) -> List[SlotResponse]:
+        """Slots libres de los médicos con inicio en [desde, hasta), ordenados por fecha y médico"""
+        libres = []
+        # Por lotes para no pasar el límite de parámetros de SQLite
+        for i in range(0, len(medico_ids), 500):
+            lote = medico_ids[i:i + 500]
+            marcadores = ", ".join("?" for _ in lote)
+            self.cursor.execute(f"""
+                SELECT * FROM Slot
+                WHERE id_turno IS NULL
+                AND fecha_hora_inicio >= ? AND fecha_hora_inicio < ?
+                AND id_medico IN ({marcadores})
+                ORDER BY fecha_hora_inicio, id_medico
+            """, (desde, hasta, *lote))
+            libres.extend(self._slot_desde_fila(row) for row in self.cursor.fetchall())
+        if len(medico_ids) > 500:
+            libres.sort(key=lambda s: (s.fecha_hora_inicio, s.id_medico))
+        return libres
+
+    def reclamar(self, id_slot: int, id_turno: int) -> bool:
+        """
+        Asigna el slot al turno sólo si sigue libre. Devuelve False si otro lo reclamó antes.
+        No hace commit: corre dentro de la transacción de la reserva.
+        """
+        self.cursor.execute("""
+            UPDATE Slot SET id_turno = ? WHERE id_slot = ? AND id_turno IS NULL
+        """, (id_turno, id_slot))
+        return self.cursor.rowcount == 1
+
+    def liberar(self, id_turno: int):
+        """Deja libres los slots de un turno cancelado o borrado (sin commit)"""
+        self.cursor.execute("UPDATE Slot SET id_turno = NULL WHERE id_turno = ?", (id_turno,))
+
+    def sincronizar_turno(self, id_turno: int, id_medico: int, fecha_hora_inicio: str, fecha_hora_fin: str):
+        """
+        Vuelve a vincular los slots de un turno reprogramado o reasignado (sin commit):
+        libera los que tenía y ocupa los que ahora se le solapan.
+        """
+        self.liberar(id_turno)
+        # Desde el comienzo del día: un slot que empieza antes del turno también puede solaparse
+        self.cursor.execute(SQL_VINCULAR_OCUPADOS, (id_medico, fecha_hora_inicio[:10], fecha_hora_fin))
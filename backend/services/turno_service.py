@@ -1,13 +1,96 @@
 
 import sqlite3
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from models.turno import TurnoCreate, TurnoResponse
-from services.paciente_service import PacienteService
-from services.medico_service import MedicoService
+from models.paciente import PacienteResponse
+from models.medico import MedicoResponse
+from models.usuario import UsuarioResponse
+from services.obra_social_service import ObraSocialService
+from services.especialidad_service import EspecialidadService
 from services.estado_turno_service import EstadoTurnoService
-from services.horario_atencion_service import HorarioAtencionService
-from utils.email_sender import *
+from services.slot_service import SlotService
+from services.bandeja_salida_service import BandejaSalidaService, DespachadorEmails, clave_recordatorio, clave_confirmacion_reserva
+from models.slot import SlotResponse
+from database import IdentityMap
+from services.indice_turnos import IndiceTurnos, MEDICO, PACIENTE
+from services.agenda_ausentes import AgendaAusentes
+from utils.fechas import normalizar_fecha_hora, rango_dias, ahora_local, ahora_local_mas
+from utils.paginacion import filas_planas
 
+# Máximo de parámetros por cada IN (...) al precargar entidades en lote
+TAMANIO_LOTE_IN = 500
+
+# Campos cuyo cambio modifica qué horario ocupa un turno (slots e índice en memoria)
+CAMPOS_OCUPACION = {'id_estado_turno', 'id_medico', 'id_paciente', 'fecha_hora_inicio', 'fecha_hora_fin'}
+
+# Turnos no cancelados que se solapan con [inicio, fin) para el médico y para el paciente.
+# Params: id_medico, id_cancelado, fin, inicio, id_paciente, id_cancelado, fin, inicio
+SQL_CONFLICTOS_RESERVA = """
+    SELECT
+        EXISTS (
+            SELECT 1 FROM Turno
+            WHERE id_medico = ? AND id_estado_turno != ? AND fecha_hora_inicio < ? AND fecha_hora_fin > ?
+        ) AS solapa_medico,
+        EXISTS (
+            SELECT 1 FROM Turno
+            WHERE id_paciente = ? AND id_estado_turno != ? AND fecha_hora_inicio < ? AND fecha_hora_fin > ?
+        ) AS solapa_paciente
+"""
+
+
+# Turnos pendientes sin recordatorio que empiezan en [desde, hasta], con lo necesario para
+# armar los mails (sin hidratar paciente ni médico completos)
+SQL_RECORDATORIOS = """
+    SELECT
+        t.id_turno, t.fecha_hora_inicio,
+        p.nombre AS p_nombre, up.email AS p_email, up.recordatorios_activados AS p_recordatorios,
+        m.nombre AS m_nombre, um.email AS m_email, um.recordatorios_activados AS m_recordatorios
+    FROM Turno t
+    LEFT JOIN Paciente p ON p.id_paciente = t.id_paciente
+    LEFT JOIN Usuario up ON up.id_usuario = p.id_usuario
+    LEFT JOIN Medico m ON m.id_medico = t.id_medico
+    LEFT JOIN Usuario um ON um.id_usuario = m.id_usuario
+    WHERE t.id_estado_turno = (SELECT id_estado_turno FROM EstadoTurno WHERE nombre = 'Pendiente')
+    AND t.fecha_hora_inicio BETWEEN ? AND ?
+    AND t.recordatorio_notificado = 0
+    ORDER BY t.fecha_hora_inicio
+"""
+
+
+class TurnoNoDisponibleError(ValueError):
+    """El horario ya está tomado por otro turno del médico o del paciente (el router responde 409)"""
+
+
+# Trae el turno con paciente y medico (cada uno con su usuario) en un solo JOIN, asi hidratar
+# N turnos cuesta 1 consulta y no ~10 por fila. Obra social, especialidad y estado salen del
+# cache de catálogos (CacheCatalogos), así que no hace falta traerlos en cada fila.
+SELECT_TURNO_COMPLETO = """
+    SELECT
+        t.id_turno, t.id_paciente, t.id_medico, t.id_estado_turno,
+        t.fecha_hora_inicio, t.fecha_hora_fin, t.motivo_consulta,
+        t.recordatorio_notificado, t.reserva_notificada,
+
+        p.id_paciente AS p_id_paciente, p.dni AS p_dni, p.nombre AS p_nombre,
+        p.apellido AS p_apellido, p.telefono AS p_telefono, p.id_usuario AS p_id_usuario,
+        p.fecha_nacimiento AS p_fecha_nacimiento, p.id_obra_social AS p_id_obra_social,
+        p.nro_afiliado AS p_nro_afiliado, p.noti_reserva_email_act AS p_noti_reserva_email_act,
+
+        up.id_usuario AS up_id_usuario, up.email AS up_email, up.activo AS up_activo,
+        up.recordatorios_activados AS up_recordatorios_activados,
+
+        m.id_medico AS m_id_medico, m.matricula AS m_matricula, m.dni AS m_dni,
+        m.nombre AS m_nombre, m.apellido AS m_apellido, m.telefono AS m_telefono,
+        m.id_usuario AS m_id_usuario, m.id_especialidad AS m_id_especialidad,
+        m.noti_cancel_email_act AS m_noti_cancel_email_act,
+
+        um.id_usuario AS um_id_usuario, um.email AS um_email, um.activo AS um_activo,
+        um.recordatorios_activados AS um_recordatorios_activados
+    FROM Turno t
+    LEFT JOIN Paciente p ON p.id_paciente = t.id_paciente
+    LEFT JOIN Usuario up ON up.id_usuario = p.id_usuario
+    LEFT JOIN Medico m ON m.id_medico = t.id_medico
+    LEFT JOIN Usuario um ON um.id_usuario = m.id_usuario
+"""
 
 
 class TurnoService:
@@ -16,124 +99,259 @@ class TurnoService:
         self.cursor = db.cursor()
 
     def _hay_solapamiento_turnos(self, id_persona: int, fecha_hora_inicio: str, fecha_hora_fin: str, es_medico: bool) -> bool:
-        """Verifica si hay solapamiento de turnos para un médico o paciente, excluyendo turnos cancelados."""
-        campo_id = 'id_medico' if es_medico else 'id_paciente'
-        
-        self.cursor.execute("SELECT id_estado_turno FROM EstadoTurno WHERE nombre = 'Cancelado'")
-        ID_ESTADO_CANCELADO = self.cursor.fetchone()['id_estado_turno']
-        
-        self.cursor.execute(f"""
-            SELECT COUNT(*) as count FROM turno
-            WHERE {campo_id} = ?
-            AND id_estado_turno != {ID_ESTADO_CANCELADO} -- 🔑 EXCLUYE TURNOS CANCELADOS
-            AND (
-                (datetime(fecha_hora_inicio) < datetime(?) AND datetime(fecha_hora_fin) > datetime(?))
-                OR
-                (datetime(fecha_hora_inicio) >= datetime(?) AND datetime(fecha_hora_inicio) < datetime(?))
-                OR
-                (datetime(fecha_hora_fin) > datetime(?) AND datetime(fecha_hora_fin) <= datetime(?))
-            )
-        """, (id_persona, fecha_hora_fin, fecha_hora_inicio, fecha_hora_inicio, fecha_hora_fin, fecha_hora_inicio, fecha_hora_fin))
-        
-        row = self.cursor.fetchone()
-
-        return row['count'] > 0
+        """
+        Verifica si hay solapamiento de turnos para un médico o paciente, excluyendo turnos cancelados.
+        Se resuelve con el índice en memoria (IndiceTurnos), sin consultar los turnos.
+        """
+        return IndiceTurnos().hay_solapamiento(
+            self.db,
+            MEDICO if es_medico else PACIENTE,
+            id_persona,
+            normalizar_fecha_hora(fecha_hora_inicio),
+            normalizar_fecha_hora(fecha_hora_fin),
+        )
 
-    def _es_turno_valido(self, turno_data: TurnoCreate) -> bool:
-        """Valida si un turno cumple con las reglas de negocio"""
+    def _es_turno_valido(self, turno_data: TurnoCreate, slot: Optional[SlotResponse]) -> bool:
+        """
+        Valida si un turno cumple con las reglas de negocio usando el índice en memoria.
+        Es el chequeo rápido previo a tomar el lock de escritura; el definitivo lo hace
+        _verificar_reserva dentro de la transacción.
+        """
         
         # - El turno no se solapa con otros turnos del mismo médico
-        # - El turno está dentro del horario laboral del médico 
+        # - El turno está dentro del horario laboral del médico (coincide con un slot de su calendario)
         # - El paciente no tiene otro turno en el mismo horario
 
-        esta_dentro_horario = HorarioAtencionService(self.db).esta_dentro_de_horario(
-            id_medico=turno_data.id_medico,
-            fecha_hora_inicio=turno_data.fecha_hora_inicio,
-            fecha_hora_fin=turno_data.fecha_hora_fin
-        )
-
-        id_medico = turno_data.id_medico
-        id_paciente = turno_data.id_paciente
+        esta_dentro_horario = slot is not None and slot.fecha_hora_fin == turno_data.fecha_hora_fin
 
-        hay_solapamiento_medico = self._hay_solapamiento_turnos(
-            id_persona=id_medico,
+        hay_solapamiento_medico = (slot is not None and slot.id_turno is not None) or self._hay_solapamiento_turnos(
+            id_persona=turno_data.id_medico,
             fecha_hora_inicio=turno_data.fecha_hora_inicio,
             fecha_hora_fin=turno_data.fecha_hora_fin,
             es_medico=True
         )
 
         hay_solapamiento_paciente = self._hay_solapamiento_turnos(
-            id_persona=id_paciente,
+            id_persona=turno_data.id_paciente,
             fecha_hora_inicio=turno_data.fecha_hora_inicio,
             fecha_hora_fin=turno_data.fecha_hora_fin,
             es_medico=False
         )
 
-        print(f"Intento post creacion turno: Medico {id_medico}, Paciente {id_paciente}, Inicio {turno_data.fecha_hora_inicio}, Fin {turno_data.fecha_hora_fin}")
-        print(f"Dentro horario? {esta_dentro_horario} | Solapamiento medico? {hay_solapamiento_medico} | Solapamiento paciente? {hay_solapamiento_paciente}")
-        
+        return self._validar_reserva(turno_data, esta_dentro_horario, hay_solapamiento_medico, hay_solapamiento_paciente)
+
+    def _verificar_reserva(self, turno_data: TurnoCreate, id_estado_cancelado: int) -> SlotResponse:
+        """
+        Repite la validación contra la base, con la transacción BEGIN IMMEDIATE ya abierta:
+        ninguna otra conexión puede escribir entre este chequeo y el reclamo del slot.
+        Devuelve el slot a reclamar.
+        """
+        slot = SlotService(self.db).buscar_slot(turno_data.id_medico, turno_data.fecha_hora_inicio)
+        inicio, fin = turno_data.fecha_hora_inicio, turno_data.fecha_hora_fin
+        conflictos = self.cursor.execute(SQL_CONFLICTOS_RESERVA, (
+            turno_data.id_medico, id_estado_cancelado, fin, inicio,
+            turno_data.id_paciente, id_estado_cancelado, fin, inicio,
+        )).fetchone()
+
+        self._validar_reserva(
+            turno_data,
+            esta_dentro_horario=slot is not None and slot.fecha_hora_fin == fin,
+            hay_solapamiento_medico=(slot is not None and slot.id_turno is not None) or bool(conflictos['solapa_medico']),
+            hay_solapamiento_paciente=bool(conflictos['solapa_paciente']),
+        )
+        return slot
+
+    def _validar_reserva(self, turno_data: TurnoCreate, esta_dentro_horario: bool,
+                         hay_solapamiento_medico: bool, hay_solapamiento_paciente: bool) -> bool:
+        """
+        Traduce el resultado de la validación a un error. El orden es fijo (horario, médico,
+        paciente) para que el mismo conflicto se informe siempre igual.
+        """
         if not esta_dentro_horario:
             raise ValueError("El turno no está dentro del horario de atención del médico")
         
         if hay_solapamiento_medico:
-            raise ValueError("El medico tiene otro turno en el mismo horario")
+            raise TurnoNoDisponibleError("El medico tiene otro turno en el mismo horario")
         
         if hay_solapamiento_paciente:
-            raise ValueError("El paciente tiene otro turno en el mismo horario")
+            raise TurnoNoDisponibleError("El paciente tiene otro turno en el mismo horario")
         
         return True
 
-    def _get_turno_completo(self, turno_id: int) -> Optional[TurnoResponse]:
-        """Obtiene un turno con sus relaciones"""
-        self.cursor.execute("SELECT * FROM turno WHERE id_turno = ?", (turno_id,))
-        row = self.cursor.fetchone()
-        
-        if not row:
+    def _usuario_desde_fila(self, row: sqlite3.Row, prefijo: str, mapa: IdentityMap) -> Optional[UsuarioResponse]:
+        """Arma el UsuarioResponse embebido en una fila de SELECT_TURNO_COMPLETO"""
+        id_usuario = row[f'{prefijo}_id_usuario']
+        if id_usuario is None:
             return None
-        
-        turno_dict = dict(row)
-        
-        # Obtener relaciones usando sus servicios
+
+        return mapa.obtener('Usuario', id_usuario, lambda: UsuarioResponse(
+            id_usuario=id_usuario,
+            email=row[f'{prefijo}_email'],
+            activo=bool(row[f'{prefijo}_activo']),
+            recordatorios_activados=bool(row[f'{prefijo}_recordatorios_activados'])
+        ))
+
+    def _paciente_desde_fila(self, row: sqlite3.Row, mapa: IdentityMap) -> Optional[PacienteResponse]:
+        """Arma el PacienteResponse (con usuario y obra social) de una fila de SELECT_TURNO_COMPLETO"""
+        if row['p_id_paciente'] is None:
+            return None
+
+        obra_social_obj = None
+        if row['p_id_obra_social'] is not None:
+            obra_social_obj = ObraSocialService(self.db).get_by_id(row['p_id_obra_social'])
+
+        return PacienteResponse(
+            dni=row['p_dni'],
+            nombre=row['p_nombre'],
+            apellido=row['p_apellido'],
+            telefono=row['p_telefono'],
+            id_paciente=row['p_id_paciente'],
+            id_usuario=row['p_id_usuario'],
+            fecha_nacimiento=row['p_fecha_nacimiento'],
+            id_obra_social=row['p_id_obra_social'],
+            nro_afiliado=row['p_nro_afiliado'],
+            usuario=self._usuario_desde_fila(row, 'up', mapa),
+            obra_social=obra_social_obj,
+            noti_reserva_email_act=bool(row['p_noti_reserva_email_act'])
+        )
+
+    def _medico_desde_fila(self, row: sqlite3.Row, mapa: IdentityMap) -> Optional[MedicoResponse]:
+        """Arma el MedicoResponse (con usuario y especialidad) de una fila de SELECT_TURNO_COMPLETO"""
+        if row['m_id_medico'] is None:
+            return None
+
+        especialidad_obj = None
+        if row['m_id_especialidad'] is not None:
+            especialidad_obj = EspecialidadService(self.db).get_by_id(row['m_id_especialidad'])
+
+        return MedicoResponse(
+            id_medico=row['m_id_medico'],
+            matricula=row['m_matricula'],
+            dni=row['m_dni'],
+            nombre=row['m_nombre'],
+            apellido=row['m_apellido'],
+            telefono=row['m_telefono'],
+            id_usuario=row['m_id_usuario'],
+            id_especialidad=row['m_id_especialidad'],
+            usuario=self._usuario_desde_fila(row, 'um', mapa),
+            especialidad=especialidad_obj,
+            noti_cancel_email_act=bool(row['m_noti_cancel_email_act'])
+        )
+
+    def _turno_desde_fila(self, row: sqlite3.Row, mapa: IdentityMap) -> TurnoResponse:
+        """
+        Arma el TurnoResponse completo a partir de una fila de SELECT_TURNO_COMPLETO.
+        Las entidades anidadas pasan por el identity map: un paciente o médico que
+        aparece en muchos turnos se construye una sola vez por request, y obra social,
+        especialidad y estado salen ya armados del cache de catálogos.
+        """
         paciente_obj = None
-        if turno_dict.get('id_paciente'):
-            paciente_obj = PacienteService(self.db).get_by_id(turno_dict['id_paciente'])
-        
+        if row['p_id_paciente'] is not None:
+            paciente_obj = mapa.obtener('Paciente', row['p_id_paciente'], lambda: self._paciente_desde_fila(row, mapa))
+
         medico_obj = None
-        if turno_dict.get('id_medico'):
-            medico_obj = MedicoService(self.db).get_by_id(turno_dict['id_medico'])
-        
+        if row['m_id_medico'] is not None:
+            medico_obj = mapa.obtener('Medico', row['m_id_medico'], lambda: self._medico_desde_fila(row, mapa))
+
         estado_turno_obj = None
-        if turno_dict.get('id_estado_turno'):
-            estado_turno_obj = EstadoTurnoService(self.db).get_by_id(turno_dict['id_estado_turno'])
-        
-        return TurnoResponse(
-            id_turno=turno_dict['id_turno'],
-            id_paciente=turno_dict['id_paciente'],
-            id_medico=turno_dict['id_medico'],
-            id_estado_turno=turno_dict['id_estado_turno'],
-            fecha_hora_inicio=turno_dict['fecha_hora_inicio'],
-            fecha_hora_fin=turno_dict['fecha_hora_fin'],
-            motivo_consulta=turno_dict.get('motivo_consulta'),
-            recordatorio_notificado=bool(turno_dict.get('recordatorio_notificado', 0)),
-            reserva_notificada=bool(turno_dict.get('reserva_notificada', 0)),
+        if row['id_estado_turno'] is not None:
+            estado_turno_obj = EstadoTurnoService(self.db).get_by_id(row['id_estado_turno'])
+
+        turno = TurnoResponse(
+            id_turno=row['id_turno'],
+            id_paciente=row['id_paciente'],
+            id_medico=row['id_medico'],
+            id_estado_turno=row['id_estado_turno'],
+            fecha_hora_inicio=row['fecha_hora_inicio'],
+            fecha_hora_fin=row['fecha_hora_fin'],
+            motivo_consulta=row['motivo_consulta'],
+            recordatorio_notificado=bool(row['recordatorio_notificado'] or 0),
+            reserva_notificada=bool(row['reserva_notificada'] or 0),
             paciente=paciente_obj,
             medico=medico_obj,
             estado_turno=estado_turno_obj
         )
+        return mapa.registrar('Turno', turno.id_turno, turno)
 
-    def get_all(self) -> List[TurnoResponse]:
-        """Obtiene todos los turnos"""
-        self.cursor.execute("SELECT id_turno FROM turno")
+    def _get_turnos_completos(self, condiciones: str = "", params: tuple = (), orden: str = "ORDER BY t.id_turno") -> List[TurnoResponse]:
+        """Obtiene turnos con todas sus relaciones usando una sola consulta, sin importar cuantas filas haya"""
+        mapa = IdentityMap.de(self.db)
+        self.cursor.execute(f"{SELECT_TURNO_COMPLETO} {condiciones} {orden}", params)
         rows = self.cursor.fetchall()
-        
-        turnos = []
-        for row in rows:
-            turno_id = dict(row)['id_turno']
-            turno_completo = self._get_turno_completo(turno_id)
-            if turno_completo:
-                turnos.append(turno_completo)
-        
-        return turnos
+
+        return [self._turno_desde_fila(row, mapa) for row in rows]
+
+    def _get_turno_completo(self, turno_id: int) -> Optional[TurnoResponse]:
+        """Obtiene un turno con sus relaciones (si ya se cargó en el request sale del identity map)"""
+        def cargar():
+            turnos = self._get_turnos_completos("WHERE t.id_turno = ?", (turno_id,), orden="")
+            return turnos[0] if turnos else None
+
+        return IdentityMap.de(self.db).obtener('Turno', turno_id, cargar)
+
+    def precargar(self, turno_ids: List[int]):
+        """
+        Carga en el identity map del request los turnos indicados que todavía no estén,
+        en consultas por lotes de IN (...), para que quienes los anidan (consultas, recetas)
+        no hagan una consulta por fila.
+        """
+        mapa = IdentityMap.de(self.db)
+        pendientes = sorted({i for i in turno_ids if i is not None and not mapa.contiene('Turno', i)})
+
+        for inicio in range(0, len(pendientes), TAMANIO_LOTE_IN):
+            lote = pendientes[inicio:inicio + TAMANIO_LOTE_IN]
+            marcadores = ", ".join("?" for _ in lote)
+            self._get_turnos_completos(f"WHERE t.id_turno IN ({marcadores})", tuple(lote), orden="")
+
+    def get_all(self, limit: Optional[int] = None, after: Optional[int] = None,
+                columnas: Optional[List[str]] = None) -> List[TurnoResponse]:
+        """
+        Obtiene todos los turnos, o una página de `limit` turnos con id mayor a `after`.
+        Con `columnas` (proyección plana, ya validada) devuelve filas de Turno con sólo esas columnas
+        """
+        if columnas is not None:
+            paginado = limit is not None or after is not None
+            self.cursor.execute(
+                f"SELECT {', '.join(columnas)} FROM Turno"
+                + (" WHERE id_turno > ? ORDER BY id_turno LIMIT ?" if paginado else " ORDER BY id_turno"),
+                (after or 0, limit if limit is not None else -1) if paginado else ()
+            )
+            return filas_planas(self.cursor, ("recordatorio_notificado", "reserva_notificada"))
+        if limit is None and after is None:
+            return self._get_turnos_completos()
+        return self._get_turnos_completos(
+            "WHERE t.id_turno > ?", (after or 0, limit if limit is not None else -1),
+            orden="ORDER BY t.id_turno LIMIT ?"
+        )
+
+    def exportar(self, fecha_desde: str, fecha_hasta: str, id_medico: Optional[int] = None) -> sqlite3.Cursor:
+        """
+        Turnos entre dos fechas (inclusive) como filas planas, para exportar en streaming:
+        devuelve el cursor ya ejecutado y quien lo usa lo lee de a lotes (utils/exportacion.py)
+        """
+        sql = """
+            SELECT
+                t.id_turno, t.fecha_hora_inicio, t.fecha_hora_fin, et.nombre AS estado,
+                t.id_paciente, p.apellido || ', ' || p.nombre AS paciente, p.dni AS dni_paciente,
+                COALESCE(os.nombre, 'Particular') AS obra_social,
+                t.id_medico, m.apellido || ', ' || m.nombre AS medico, e.nombre AS especialidad,
+                t.motivo_consulta
+            FROM Turno t
+            JOIN EstadoTurno et ON et.id_estado_turno = t.id_estado_turno
+            LEFT JOIN Paciente p ON p.id_paciente = t.id_paciente
+            LEFT JOIN ObraSocial os ON os.id_obra_social = p.id_obra_social
+            LEFT JOIN Medico m ON m.id_medico = t.id_medico
+            LEFT JOIN Especialidad e ON e.id_especialidad = m.id_especialidad
+            WHERE t.fecha_hora_inicio >= ? AND t.fecha_hora_inicio < ?
+        """
+        params = list(rango_dias(fecha_desde, fecha_hasta))
+        if id_medico is not None:
+            sql += " AND t.id_medico = ?"
+            params.append(id_medico)
+        sql += " ORDER BY t.fecha_hora_inicio, t.id_turno"
+
+        self.cursor.execute(sql, params)
+        return self.cursor
 
     def get_by_id(self, turno_id: int) -> Optional[TurnoResponse]:
         """Obtiene un turno por su ID"""
@@ -141,115 +359,87 @@ class TurnoService:
 
     def get_proximos_turnos_paciente(self, paciente_id: int) -> List[TurnoResponse]:
         """Obtiene los próximos turnos de un paciente"""
-        self.cursor.execute("""
-            SELECT id_turno FROM turno
-            WHERE id_paciente = ? AND datetime(fecha_hora_inicio) > datetime('now', 'localtime')
-            ORDER BY fecha_hora_inicio ASC
-        """, (paciente_id,))
-        
-        rows = self.cursor.fetchall()
-        
-        turnos = []
-        for row in rows:
-            turno_id = dict(row)['id_turno']
-            turno_completo = self._get_turno_completo(turno_id)
-            if turno_completo:
-                turnos.append(turno_completo)
-        
-        return turnos
+        return self._get_turnos_completos(
+            "WHERE t.id_paciente = ? AND t.fecha_hora_inicio > ?",
+            (paciente_id, ahora_local()),
+            orden="ORDER BY t.fecha_hora_inicio ASC"
+        )
     
     def get_proximos_turnos_medico(self, medico_id: int) -> List[TurnoResponse]:
         """Obtiene los próximos turnos de un medico"""
-        self.cursor.execute("""
-            SELECT id_turno FROM turno
-            WHERE id_medico = ? AND datetime(fecha_hora_inicio) > datetime('now', 'localtime')
-            ORDER BY fecha_hora_inicio ASC
-        """, (medico_id,))
-        
-        rows = self.cursor.fetchall()
-        
-        turnos = []
-        for row in rows:
-            turno_id = dict(row)['id_turno']
-            turno_completo = self._get_turno_completo(turno_id)
-            if turno_completo:
-                turnos.append(turno_completo)
-        
-        return turnos
+        return self._get_turnos_completos(
+            "WHERE t.id_medico = ? AND t.fecha_hora_inicio > ?",
+            (medico_id, ahora_local()),
+            orden="ORDER BY t.fecha_hora_inicio ASC"
+        )
 
     def get_historial_desde_hasta(self, paciente_id: int, fecha_desde: str, fecha_hasta: str) -> List[TurnoResponse]:
         """Obtiene el historial de turnos de un paciente entre dos fechas"""
-        self.cursor.execute("""
-            SELECT id_turno FROM turno
-            WHERE id_paciente = ? AND date(fecha_hora_inicio) BETWEEN date(?) AND date(?)
-            ORDER BY fecha_hora_inicio DESC
-        """, (paciente_id, fecha_desde, fecha_hasta))
-        
-        rows = self.cursor.fetchall()
-        
-        turnos = []
-        for row in rows:
-            turno_id = dict(row)['id_turno']
-            turno_completo = self._get_turno_completo(turno_id)
-            if turno_completo:
-                turnos.append(turno_completo)
-        
-        return turnos
+        desde, hasta = rango_dias(fecha_desde, fecha_hasta)
+        return self._get_turnos_completos(
+            "WHERE t.id_paciente = ? AND t.fecha_hora_inicio >= ? AND t.fecha_hora_inicio < ?",
+            (paciente_id, desde, hasta),
+            orden="ORDER BY t.fecha_hora_inicio DESC"
+        )
     
     def get_agenda_desde_hasta(self, id_medico: int, fecha_desde: str, fecha_hasta: str) -> List[TurnoResponse]:
         """Obtiene la agenda de un médico entre dos fechas"""
-        self.cursor.execute("""
-            SELECT id_turno FROM turno
-            WHERE id_medico = ? AND date(fecha_hora_inicio) BETWEEN date(?) AND date(?)
-            ORDER BY fecha_hora_inicio ASC
-        """, (id_medico, fecha_desde, fecha_hasta))
-        
-        rows = self.cursor.fetchall()
-        
-        turnos = []
-        for row in rows:
-            turno_id = dict(row)['id_turno']
-            turno_completo = self._get_turno_completo(turno_id)
-            if turno_completo:
-                turnos.append(turno_completo)
-        
-        return turnos
+        desde, hasta = rango_dias(fecha_desde, fecha_hasta)
+        return self._get_turnos_completos(
+            "WHERE t.id_medico = ? AND t.fecha_hora_inicio >= ? AND t.fecha_hora_inicio < ?",
+            (id_medico, desde, hasta),
+            orden="ORDER BY t.fecha_hora_inicio ASC"
+        )
 
     def create(self, turno_data: TurnoCreate) -> TurnoResponse:
         """
-        Crea un nuevo turno, reutilizando un slot cancelado si está disponible.
+        Crea un nuevo turno reclamando su slot del calendario.
+        Si en ese horario hay un turno cancelado se reutiliza la fila (id_medico + inicio es único).
+
+        Validación y reclamo corren en una sola transacción BEGIN IMMEDIATE: se toma el lock
+        de escritura de la base antes de releer el slot y los solapamientos, así dos reservas
+        simultáneas del mismo horario (aunque vengan de otro proceso) se ordenan y la segunda
+        recibe TurnoNoDisponibleError en vez de un error de integridad.
         """
         ID_ESTADO_PENDIENTE = 1 
         ID_ESTADO_CANCELADO = 3 
 
-        self._es_turno_valido(turno_data) 
+        # Las fechas se guardan siempre en formato canónico para poder compararlas por índice
+        turno_data.fecha_hora_inicio = normalizar_fecha_hora(turno_data.fecha_hora_inicio)
+        turno_data.fecha_hora_fin = normalizar_fecha_hora(turno_data.fecha_hora_fin)
+
+        # Extender el horizonte hace su propio commit, por eso va antes de abrir la transacción
+        slot_service = SlotService(self.db)
+        slot = slot_service.get_slot(turno_data.id_medico, turno_data.fecha_hora_inicio)
+
+        # Chequeo rápido con el índice en memoria: los conflictos evidentes no llegan a tomar el lock
+        self._es_turno_valido(turno_data, slot) 
         
+        self.cursor.execute("BEGIN IMMEDIATE")
         try:
+            slot = self._verificar_reserva(turno_data, ID_ESTADO_CANCELADO)
+
             self.cursor.execute("""
-                SELECT id_turno FROM turno
-                WHERE id_medico = ?
-                AND id_estado_turno = ?
-                AND (
-                    (datetime(fecha_hora_inicio) <= datetime(?) AND datetime(fecha_hora_fin) >= datetime(?))
-                )
-                LIMIT 1
-            """, (turno_data.id_medico, ID_ESTADO_CANCELADO, turno_data.fecha_hora_inicio, turno_data.fecha_hora_fin))
-
-            row_cancelado = self.cursor.fetchone()
-
-            if row_cancelado:
-                turno_cancelado_id = dict(row_cancelado)['id_turno']
-                
-                datos_actualizar = {
-                    'id_estado_turno': ID_ESTADO_PENDIENTE,
-                    'id_paciente': turno_data.id_paciente,
-                    'motivo_consulta': turno_data.motivo_consulta,
-                    'recordatorio_notificado': 0,
-                    'reserva_notificada': 0,
-                }
-                
-                self.update(turno_cancelado_id, datos_actualizar)
-                return self._get_turno_completo(turno_cancelado_id)
+                SELECT id_turno, id_estado_turno FROM turno
+                WHERE id_medico = ? AND fecha_hora_inicio = ?
+            """, (turno_data.id_medico, turno_data.fecha_hora_inicio))
+
+            row_existente = self.cursor.fetchone()
+
+            if row_existente and row_existente['id_estado_turno'] == ID_ESTADO_CANCELADO:
+                turno_id = row_existente['id_turno']
+                self.cursor.execute("""
+                    UPDATE turno
+                    SET id_estado_turno = ?, id_paciente = ?, motivo_consulta = ?, fecha_hora_fin = ?,
+                        recordatorio_notificado = 0, reserva_notificada = 0
+                    WHERE id_turno = ?
+                """, (
+                    ID_ESTADO_PENDIENTE,
+                    turno_data.id_paciente,
+                    turno_data.motivo_consulta,
+                    turno_data.fecha_hora_fin,
+                    turno_id
+                ))
 
             else:
                 self.cursor.execute("""
@@ -263,14 +453,52 @@ class TurnoService:
                     turno_data.id_medico,
                     turno_data.motivo_consulta
                 ))
-                
-                self.db.commit()
                 turno_id = self.cursor.lastrowid
-                return self._get_turno_completo(turno_id)
-            
+
+            # Con el lock tomado el slot no puede cambiar desde _verificar_reserva;
+            # el UPDATE condicional queda como resguardo
+            if not slot_service.reclamar(slot.id_slot, turno_id):
+                raise TurnoNoDisponibleError("El medico tiene otro turno en el mismo horario")
+
+            # La confirmación se encola en la misma transacción: si la reserva no se confirma, no sale
+            turno = self._get_turno_completo(turno_id)
+            confirmacion_encolada = self._encolar_confirmacion_reserva(turno)
+
+            self.db.commit()
+
         except sqlite3.IntegrityError as e:
             self.db.rollback()
             raise ValueError("Error al crear/reutilizar el turno: " + str(e))
+        except Exception:
+            self.db.rollback()
+            raise
+
+        AgendaAusentes().registrar(turno)
+        if confirmacion_encolada:
+            DespachadorEmails().despertar()
+        return turno
+
+    def _encolar_confirmacion_reserva(self, turno: TurnoResponse) -> bool:
+        """
+        Encola el mail de confirmación al paciente si lo tiene activado y marca reserva_notificada
+        (sin commit). La clave incluye el momento de la reserva: si el horario se cancela y se
+        vuelve a reservar, la nueva reserva tiene su propia confirmación.
+        """
+        paciente = turno.paciente
+        if not (paciente and paciente.noti_reserva_email_act and paciente.usuario and paciente.usuario.email):
+            return False
+        medico = turno.medico
+        BandejaSalidaService(self.db).encolar(
+            clave=clave_confirmacion_reserva(turno.id_turno, paciente.usuario.email, ahora_local()),
+            destinatario=paciente.usuario.email,
+            asunto="Confirmación de turno médico",
+            cuerpo=f"Estimado/a {paciente.nombre}, su turno con el Dr./Dra. {medico.nombre if medico else ''} "
+                   f"quedó reservado para el día {turno.fecha_hora_inicio}.",
+            id_turno=turno.id_turno
+        )
+        self.cursor.execute("UPDATE turno SET reserva_notificada = 1 WHERE id_turno = ?", (turno.id_turno,))
+        turno.reserva_notificada = True
+        return True
         
     def update(self, turno_id: int, turno_data: dict) -> Optional[TurnoResponse]:
         """Actualiza los datos de un turno existente"""
@@ -283,6 +511,8 @@ class TurnoService:
             update_values = []
             
             for key, value in turno_data.items():
+                if key in ('fecha_hora_inicio', 'fecha_hora_fin') and value is not None:
+                    value = normalizar_fecha_hora(value)
                 update_fields.append(f"{key} = ?")
                 update_values.append(value)
             
@@ -293,9 +523,27 @@ class TurnoService:
             
             query = f"UPDATE turno SET {', '.join(update_fields)} WHERE id_turno = ?"
             self.cursor.execute(query, update_values)
+
+            # Cancelar, reprogramar o reasignar cambia los intervalos ocupados
+            cambia_ocupacion = bool(CAMPOS_OCUPACION & turno_data.keys())
+            if cambia_ocupacion:
+                actualizado = self.cursor.execute(
+                    "SELECT id_turno, id_medico, id_estado_turno, fecha_hora_inicio, fecha_hora_fin FROM turno WHERE id_turno = ?",
+                    (turno_id,)
+                ).fetchone()
+                slot_service = SlotService(self.db)
+                if actualizado['id_estado_turno'] == IndiceTurnos().id_estado_cancelado(self.db):
+                    slot_service.liberar(turno_id)
+                else:
+                    slot_service.sincronizar_turno(
+                        turno_id, actualizado['id_medico'], actualizado['fecha_hora_inicio'], actualizado['fecha_hora_fin']
+                    )
             self.db.commit()
             
-            return self._get_turno_completo(turno_id)
+            turno = self._get_turno_completo(turno_id)
+            if cambia_ocupacion:
+                AgendaAusentes().registrar(turno)
+            return turno
             
         except sqlite3.IntegrityError as e:
             self.db.rollback()
@@ -309,55 +557,87 @@ class TurnoService:
         
         try:
             self.cursor.execute("DELETE FROM turno WHERE id_turno = ?", (turno_id,))
+            SlotService(self.db).liberar(turno_id)
             self.db.commit()
+            AgendaAusentes().quitar(turno_id)
             return True
             
         except sqlite3.IntegrityError as e:
             self.db.rollback()
             raise ValueError("Error al eliminar el turno: " + str(e))
         
-    def notificar_recordatorios_turnos(self):
-        """Marca los turnos que deben ser notificados por recordatorio"""
-        try:
-            self.cursor.execute("""
-                SELECT id_turno, fecha_hora_inicio, id_paciente, id_medico FROM Turno
-                WHERE id_estado_turno = (
-                    SELECT id_estado_turno FROM EstadoTurno WHERE nombre = 'Pendiente'
+    def _recordatorios_pendientes(self, desde: str, hasta: str) -> Iterator[List[sqlite3.Row]]:
+        """
+        Turnos a recordar junto con nombre, email y preferencia de paciente y médico, en tandas
+        de TAMANIO_LOTE_IN filas (fetchmany): la memoria no depende de cuántos turnos haya.
+        """
+        cursor = self.db.cursor()
+        cursor.execute(SQL_RECORDATORIOS, (desde, hasta))
+        while True:
+            filas = cursor.fetchmany(TAMANIO_LOTE_IN)
+            if not filas:
+                return
+            yield filas
+
+    @staticmethod
+    def _mensajes_recordatorio(filas: List[sqlite3.Row]) -> Iterator[Tuple[str, str, str, str, int]]:
+        """Mails a encolar (clave, destinatario, asunto, cuerpo, id_turno) para una tanda de turnos"""
+        for i in filas:
+            if i['p_recordatorios'] and i['p_email']:
+                yield (
+                    clave_recordatorio(i['id_turno'], i['p_email']),
+                    i['p_email'],
+                    "Recordatorio de turno médico",
+                    f"Estimado/a {i['p_nombre']}, le recordamos que tiene un turno programado con el Dr./Dra. {i['m_nombre']} el día {i['fecha_hora_inicio']}.",
+                    i['id_turno'],
+                )
+            if i['m_recordatorios'] and i['m_email']:
+                yield (
+                    clave_recordatorio(i['id_turno'], i['m_email']),
+                    i['m_email'],
+                    "Recordatorio de turno médico",
+                    f"Estimado/a Dr./Dra. {i['m_nombre']}, le recordamos que tiene un turno programado con el paciente {i['p_nombre']} el día {i['fecha_hora_inicio']}.",
+                    i['id_turno'],
                 )
-                AND datetime(fecha_hora_inicio) BETWEEN datetime('now', 'localtime') AND datetime('now', 'localtime', '+1 day')
-                AND recordatorio_notificado = 0
-                """)
 
-            
-            
-            turnos_a_notificar = self.cursor.fetchall()
-            
+    def notificar_recordatorios_turnos(self) -> int:
+        """
+        Encola los recordatorios de los turnos pendientes de las próximas 24 hs y los marca como
+        notificados, todo en una sola transacción. El envío lo hacen después los workers de
+        DespachadorEmails: un SMTP lento o caído no frena este job ni deja turnos sin marcar.
+        Los turnos se leen con un solo JOIN y se procesan por tandas.
+        Devuelve la cantidad de turnos procesados.
+        """
+        try:
+            bandeja = BandejaSalidaService(self.db)
+            procesados = 0
+            encolados = 0
 
-            for i in turnos_a_notificar:
-                p = PacienteService(self.db).get_by_id(i['id_paciente'])
-                m = MedicoService(self.db).get_by_id(i['id_medico'])
-                
-                if p.usuario.recordatorios_activados:
-                    EmailSender.send_email(
-                        destinatario=p.usuario.email,
-                        asunto="Recordatorio de turno médico",
-                        cuerpo=f"Estimado/a {p.nombre}, le recordamos que tiene un turno programado con el Dr./Dra. {m.nombre} el día {i['fecha_hora_inicio']}."
-                    )
+            for filas in self._recordatorios_pendientes(ahora_local(), ahora_local_mas(days=1)):
+                encolados += bandeja.encolar_lote(self._mensajes_recordatorio(filas))
 
-                if m.usuario.recordatorios_activados:
-                    EmailSender.send_email(
-                        destinatario=m.usuario.email,
-                        asunto="Recordatorio de turno médico",
-                        cuerpo=f"Estimado/a Dr./Dra. {m.nombre}, le recordamos que tiene un turno programado con el paciente {p.nombre} el día {i['fecha_hora_inicio']}."
-                    )
+                # Sólo se tocan filas ya leídas: el SELECT en curso no las vuelve a ver
+                ids_turnos = [i['id_turno'] for i in filas]
+                marcadores = ", ".join("?" for _ in ids_turnos)
+                self.cursor.execute(
+                    f"UPDATE Turno SET recordatorio_notificado = 1 WHERE id_turno IN ({marcadores})",
+                    ids_turnos
+                )
+                procesados += len(filas)
 
-                self.update(i['id_turno'], {'recordatorio_notificado': True}) # funciona
+            if not procesados:
+                return 0
+            self.db.commit()
 
-            return len(turnos_a_notificar)
+            if encolados:
+                DespachadorEmails().despertar()
+            return procesados
 
         except sqlite3.Error as e:
+            self.db.rollback()
             raise ValueError("Error al notificar recordatorios de turnos: " + str(e))
         except Exception as e:
+            self.db.rollback()
             raise ValueError("Error inesperado al notificar recordatorios de turnos: " + str(e))
     
     def marcar_como_cancelado(self, id_turno: int) -> List[TurnoResponse]:  
@@ -395,26 +675,30 @@ class TurnoService:
             self.db.rollback()
             raise ValueError("Error al marcar el turno como atendido: " + str(e))
         
-    def marcar_turnos_ausentes(self):
-        """Marca como ausentes los turnos que no fueron atendidos y ya pasaron"""
+    def marcar_turnos_ausentes(self) -> List[int]:
+        """
+        Marca como ausentes los turnos que no fueron atendidos y ya pasaron.
+        Es un único UPDATE ... RETURNING en una transacción, así ponerse al día después de
+        una caída cuesta lo mismo con 1 que con miles de turnos vencidos.
+        Un turno ausente sigue ocupando su horario: slots e índice en memoria no cambian.
+        Devuelve los ids marcados.
+        """
         try:
             self.cursor.execute("""
-                SELECT id_turno FROM Turno
+                UPDATE Turno
+                SET id_estado_turno = (SELECT id_estado_turno FROM EstadoTurno WHERE nombre = 'Ausente')
                 WHERE id_estado_turno = (
                     SELECT id_estado_turno FROM EstadoTurno WHERE nombre = 'Pendiente'
                 )
-                AND datetime(fecha_hora_fin) < datetime('now', 'localtime')
-            """)
+                AND fecha_hora_fin < ?
+                RETURNING id_turno
+            """, (ahora_local(),))
             
-            turnos_a_marcar = self.cursor.fetchall()
-            
-            for i in turnos_a_marcar:
-                self.update(i['id_turno'], {'id_estado_turno': 4})  # 4 es el estado 'Ausente'
-                print(f"Turno ID {i['id_turno']} marcado como Ausente.")
+            ids_marcados = [row['id_turno'] for row in self.cursor.fetchall()]
+            self.db.commit()
             
-            return len(turnos_a_marcar)
+            return ids_marcados
         
         except sqlite3.Error as e:
-            raise ValueError("Error al marcar turnos como ausentes: " + str(e))
-        except Exception as e:
-            raise ValueError("Error inesperado al marcar turnos como ausentes: " + str(e))
\ No newline at end of file
+            self.db.rollback()
+            raise ValueError("Error al marcar turnos como ausentes: " + str(e))
\ No newline at end of file
@@ -1,8 +1,10 @@
 import sqlite3
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from models.usuarioRol import UsuarioRolResponse, UsuarioRolCreate
 from services.usuario_service import UsuarioService
 from services.rol_service import RolService
+from utils.tokens import ListaRevocados
+from utils.paginacion import filas_planas
 
 
 class UsuarioRolService:
@@ -44,9 +46,24 @@ class UsuarioRolService:
             rol=rol_obj
         )
     
-    def get_all(self) -> List[UsuarioRolResponse]:
-        """Obtiene todas las relaciones usuario-rol"""
-        self.cursor.execute("SELECT id_usuario, id_rol FROM UsuarioRol")
+    def get_all(self, limit: Optional[int] = None, after: Optional[Tuple[int, int]] = None,
+                columnas: Optional[List[str]] = None) -> List[UsuarioRolResponse]:
+        """
+        Obtiene todas las relaciones usuario-rol, o una página de `limit` relaciones
+        posteriores a `after` = (id_usuario, id_rol) en el orden de la clave primaria.
+        Con `columnas` (proyección plana) devuelve las filas de UsuarioRol sin armar usuario ni rol
+        """
+        if limit is None and after is None:
+            self.cursor.execute("SELECT id_usuario, id_rol FROM UsuarioRol")
+        else:
+            self.cursor.execute(
+                "SELECT id_usuario, id_rol FROM UsuarioRol WHERE (id_usuario, id_rol) > (?, ?) "
+                "ORDER BY id_usuario, id_rol LIMIT ?",
+                (*(after or (0, 0)), limit if limit is not None else -1)
+            )
+        if columnas is not None:
+            # Las columnas de UsuarioRol son justamente su clave: no hay nada que recortar
+            return filas_planas(self.cursor)
         rows = self.cursor.fetchall()
         
         usuario_roles = []
@@ -136,6 +153,8 @@ class UsuarioRolService:
                 DELETE FROM UsuarioRol 
                 WHERE id_usuario = ? AND id_rol = ?
             """, (id_usuario, id_rol))
+            # Los tokens emitidos llevan la lista de roles: sin este rol hay que volver a ingresar
+            ListaRevocados().revocar_usuario(self.db, id_usuario)
             self.db.commit()
             return True
             
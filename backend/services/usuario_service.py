@@ -4,7 +4,9 @@ from models.usuario import UsuarioCreate, UsuarioUpdate, UsuarioResponse
 from models.paciente import PacienteCreate, PacienteUpdate
 from models.medico import MedicoUpdate
 from utils.security import hash_password, validar_contraseña
+from utils.tokens import ListaRevocados
 from models.usuarioRol import UsuarioRolCreate
+from database import IdentityMap
 
 
 class UsuarioService:
@@ -13,7 +15,11 @@ class UsuarioService:
         self.cursor = db.cursor()
 
     def _get_usuario_completo(self, usuario_id: int) -> Optional[UsuarioResponse]:
-        """Obtiene un usuario completo por ID"""
+        """Obtiene un usuario completo por ID (si ya se cargó en el request sale del identity map)"""
+        return IdentityMap.de(self.db).obtener('Usuario', usuario_id, lambda: self._cargar_usuario_completo(usuario_id))
+
+    def _cargar_usuario_completo(self, usuario_id: int) -> Optional[UsuarioResponse]:
+        """Obtiene un usuario completo por ID desde la base"""
         self.cursor.execute("SELECT * FROM usuario WHERE id_usuario = ?", (usuario_id,))
         row = self.cursor.fetchone()
         if not row:
@@ -81,6 +87,9 @@ class UsuarioService:
                 UPDATE usuario SET email = ?, activo = ?
                 WHERE id_usuario = ?
             """, (email, activo, usuario_id))
+            # Un usuario desactivado no puede seguir usando los tokens que ya tenía
+            if not activo:
+                ListaRevocados().revocar_usuario(self.db, usuario_id)
             
             self.db.commit()
             
@@ -99,6 +108,7 @@ class UsuarioService:
         
         try:
             self.cursor.execute("DELETE FROM usuario WHERE id_usuario = ?", (usuario_id,))
+            ListaRevocados().revocar_usuario(self.db, usuario_id)
             self.db.commit()
             return True
             
@@ -0,0 +1,97 @@
+"""
+Exportación en streaming (NDJSON o CSV) de consultas grandes.
+
+El servicio ejecuta la consulta y devuelve el cursor sin leerlo; acá se lee de a
+EXPORTACION_LOTE_FILAS filas con fetchmany y cada lote sale codificado como un chunk de la
+respuesta. En memoria hay a lo sumo un lote, sin importar cuántas filas tenga el rango.
+
+La exportación usa su propia conexión de lectura (no la del request) y la devuelve al pool
+cuando termina de enviar o cuando el cliente corta; mientras tanto lee siempre la misma
+foto de la base (una única transacción de lectura).
+"""
+import csv
+import io
+import json
+import sqlite3
+from typing import Callable, Iterator, List
+
+from fastapi.responses import StreamingResponse
+
+import config
+from database import ConexionesDB
+
+TIPOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _ndjson(columnas: List[str]) -> Callable[[List[sqlite3.Row]], bytes]:
+    def codificar(filas):
+        return "".join(
+            json.dumps(dict(zip(columnas, fila)), ensure_ascii=False) + "\n" for fila in filas
+        ).encode("utf-8")
+    return codificar
+
+
+def _csv(columnas: List[str]) -> Callable[[List[sqlite3.Row]], bytes]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+
+    def codificar(filas):
+        escritor.writerows(filas)
+        texto = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return texto.encode("utf-8")
+
+    escritor.writerow(columnas)
+    return codificar
+
+
+def _lotes(pool, conexion: sqlite3.Connection, cursor: sqlite3.Cursor, formato: str) -> Iterator[bytes]:
+    try:
+        columnas = [d[0] for d in cursor.description]
+        codificar = _ndjson(columnas) if formato == "ndjson" else _csv(columnas)
+        # El primer chunk sale siempre (en CSV lleva el encabezado aunque no haya filas)
+        yield codificar(cursor.fetchmany(config.EXPORTACION_LOTE_FILAS))
+        while True:
+            filas = cursor.fetchmany(config.EXPORTACION_LOTE_FILAS)
+            if not filas:
+                break
+            yield codificar(filas)
+    finally:
+        cursor.close()
+        pool.devolver(conexion)
+
+
+def respuesta_exportacion(nombre: str, formato: str,
+                          consulta: Callable[[sqlite3.Connection], sqlite3.Cursor]) -> StreamingResponse:
+    """
+    StreamingResponse con el resultado de `consulta(conexion)`, que recibe una conexión de
+    lectura y devuelve el cursor ya ejecutado.
+    Los errores de la consulta (por ejemplo un ValueError por una fecha inválida) se propagan
+    acá, antes de empezar a responder, así el router todavía puede devolver un 400.
+    """
+    pool = ConexionesDB.lectura()
+    conexion = pool.obtener()
+    try:
+        cursor = consulta(conexion)
+    except BaseException:
+        pool.devolver(conexion)
+        raise
+
+    cuerpo = _lotes(pool, conexion, cursor, formato)
+    # Se arma el primer lote ya: desde acá el generador está en curso y, aunque la respuesta
+    # nunca llegue a enviarse, cerrarlo (o que lo recolecte el GC) devuelve la conexión
+    primero = next(cuerpo)
+
+    def enviar():
+        yield primero
+        yield from cuerpo
+
+    return StreamingResponse(
+        enviar(),
+        media_type=TIPOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato}"'},
+    )
@@ -0,0 +1,63 @@
+"""
+Formato canónico de fechas en la base.
+Todas las fechas-hora se guardan como texto 'YYYY-MM-DD HH:MM:SS', que se ordena igual
+que las fechas: así las consultas comparan la columna directamente (sin datetime()/DATE()
+alrededor) y SQLite puede usar los índices.
+"""
+from datetime import date, datetime, timedelta
+from typing import Tuple, Union
+
+FORMATO_FECHA_HORA = "%Y-%m-%d %H:%M:%S"
+FORMATO_FECHA = "%Y-%m-%d"
+
+
+def normalizar_fecha_hora(valor: Union[str, datetime]) -> str:
+    """
+    Lleva una fecha-hora al formato canónico.
+    Acepta datetime o texto ISO ('2025-10-20 09:00', '2025-10-20T09:00:00', ...).
+    """
+    if isinstance(valor, datetime):
+        return valor.strftime(FORMATO_FECHA_HORA)
+    try:
+        return datetime.fromisoformat(str(valor).strip()).strftime(FORMATO_FECHA_HORA)
+    except ValueError:
+        raise ValueError(f"Fecha y hora inválida: '{valor}' (se espera AAAA-MM-DD HH:MM:SS)")
+
+
+def a_fecha(valor: Union[str, date]) -> date:
+    """Convierte 'AAAA-MM-DD' (o una fecha-hora, de la que toma el día) en date"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    try:
+        # Se aceptan tanto 'AAAA-MM-DD' como una fecha-hora completa (se toma el día)
+        return datetime.fromisoformat(str(valor).strip()).date()
+    except ValueError:
+        raise ValueError(f"Fecha inválida: '{valor}' (se espera AAAA-MM-DD)")
+
+
+def rango_dias(fecha_desde: Union[str, date], fecha_hasta: Union[str, date]) -> Tuple[str, str]:
+    """
+    Convierte un rango de días inclusivo [desde, hasta] en el rango semiabierto de
+    fechas-hora [desde 00:00:00, hasta+1 00:00:00) para usar como `col >= ? AND col < ?`.
+    Equivale a `DATE(col) BETWEEN DATE(desde) AND DATE(hasta)` pero usando índices.
+    """
+    desde = a_fecha(fecha_desde)
+    hasta = a_fecha(fecha_hasta) + timedelta(days=1)
+    return desde.strftime(FORMATO_FECHA_HORA), hasta.strftime(FORMATO_FECHA_HORA)
+
+
+def rango_dia(fecha: Union[str, date]) -> Tuple[str, str]:
+    """Rango semiabierto de un único día (equivale a `DATE(col) = DATE(fecha)`)"""
+    return rango_dias(fecha, fecha)
+
+
+def ahora_local() -> str:
+    """Fecha-hora local actual en formato canónico (equivale a datetime('now', 'localtime'))"""
+    return datetime.now().strftime(FORMATO_FECHA_HORA)
+
+
+def ahora_local_mas(**delta) -> str:
+    """Fecha-hora local actual más un timedelta, en formato canónico"""
+    return (datetime.now() + timedelta(**delta)).strftime(FORMATO_FECHA_HORA)
@@ -0,0 +1,178 @@
+"""
+Paginación por cursor (keyset) y proyección de campos para los endpoints de listado.
+
+    GET /turnos/?limit=100                      primera página
+    GET /turnos/?limit=100&after=<cursor>       la siguiente (el cursor viene en X-Next-Cursor)
+    GET /turnos/?fields=id_turno,fecha_hora_inicio
+    GET /turnos/?expand=paciente,medico.especialidad
+
+Sin `limit` ni `after` el listado sale completo, como siempre. El cursor es la clave del
+último elemento devuelto y cada servicio filtra `clave > cursor ORDER BY clave LIMIT n`,
+así pedir la página 1000 cuesta lo mismo que la primera.
+Con `fields` y/o `expand` la respuesta sale plana: sólo los campos simples pedidos (todos si
+no se indica `fields`) y sólo las entidades anidadas listadas en `expand` (con '.' se baja
+un nivel más); sin ninguno de los dos sale el grafo completo de siempre. Los nombres se
+validan contra el modelo del listado (Proyeccion), no contra los elementos, así una página
+vacía responde lo mismo que una llena. Si no se pide ninguna entidad, el servicio lee sólo
+las columnas pedidas de su tabla (sin JOINs ni armar objetos) y devuelve filas planas.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Request
+
+import config
+from utils.serializacion import RespuestaJSON
+
+
+class ParametrosLista:
+    """Dependency con los parámetros comunes de los listados (`Depends(ParametrosLista)`)"""
+
+    def __init__(self,
+                 limit: Optional[int] = Query(None, ge=1, le=config.PAGINA_LIMITE_MAX,
+                                              description="Cantidad máxima de elementos de la página"),
+                 after: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+                 fields: Optional[str] = Query(None, description="Campos simples a devolver, separados por coma"),
+                 expand: Optional[str] = Query(None, description="Entidades anidadas a incluir, p. ej. paciente.usuario")):
+        self.limit = limit
+        self.after = after
+        self.fields = fields
+        self.expand = expand
+
+    def cursor_id(self) -> Optional[int]:
+        """Cursor de los listados ordenados por un id entero"""
+        if self.after is None:
+            return None
+        try:
+            return int(self.after)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Cursor inválido: '{self.after}'")
+
+    def cursor_par(self) -> Optional[Tuple[int, int]]:
+        """Cursor de los listados con clave compuesta de dos ids ('<id>:<id>')"""
+        if self.after is None:
+            return None
+        try:
+            primero, segundo = self.after.split(":")
+            return int(primero), int(segundo)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Cursor inválido: '{self.after}'")
+
+    def proyeccion(self, modelo: type) -> Optional['Proyeccion']:
+        """La proyección pedida, validada contra el modelo del listado (None si no se pidió)"""
+        if self.fields is None and self.expand is None:
+            return None
+        return Proyeccion(modelo, self.fields, self.expand)
+
+    def responder(self, request: Request, elementos: List[Any], claves: Sequence[str],
+                  proyeccion: Optional['Proyeccion'] = None) -> RespuestaJSON:
+        """
+        Arma la respuesta del listado: si la página vino llena agrega el cursor de la siguiente
+        (X-Next-Cursor y Link rel="next", las `claves` del último elemento separadas por ':')
+        y aplica la proyección. Los elementos son modelos o, con una proyección plana, las
+        filas (dicts) que devolvió el servicio.
+        """
+        encabezados = {}
+        if self.limit is not None and len(elementos) == self.limit:
+            ultimo = elementos[-1]
+            valor = ultimo.__getitem__ if isinstance(ultimo, dict) else lambda c: getattr(ultimo, c)
+            cursor = ":".join(str(valor(clave)) for clave in claves)
+            encabezados["X-Next-Cursor"] = cursor
+            siguiente = request.url.include_query_params(after=cursor)
+            encabezados["Link"] = f'<{siguiente}>; rel="next"'
+
+        if proyeccion is None:
+            return RespuestaJSON(elementos, headers=encabezados)
+        return RespuestaJSON(proyeccion.aplicar(elementos), headers=encabezados)
+
+
+def _partes(texto: Optional[str]) -> List[str]:
+    return [p.strip() for p in (texto or "").split(",") if p.strip()]
+
+
+def _arbol_expand(expand: Optional[str]) -> Dict[str, Dict]:
+    """'paciente.usuario,medico' -> {'paciente': {'usuario': {}}, 'medico': {}}"""
+    arbol: Dict[str, Dict] = {}
+    for ruta in _partes(expand):
+        nodo = arbol
+        for parte in ruta.split("."):
+            nodo = nodo.setdefault(parte, {})
+    return arbol
+
+
+def _validar(nombres: Iterable[str], disponibles: Iterable[str], que: str):
+    desconocidos = sorted(set(nombres) - set(disponibles))
+    if desconocidos:
+        raise HTTPException(status_code=400, detail=f"{que} desconocidos: {', '.join(desconocidos)}")
+
+
+def _validar_arbol(arbol: Dict[str, Dict], modelo: type):
+    """Cada nivel de `expand` tiene que nombrar entidades anidadas del modelo de ese nivel"""
+    _validar(arbol, modelo._anidados, "Campos de expand")
+    for nombre, hijos in arbol.items():
+        _validar_arbol(hijos, modelo.clase_anidada(nombre))
+
+
+def _proyectar(obj: Any, modelo: type, simples: Tuple[str, ...], arbol: Dict[str, Dict]) -> Dict[str, Any]:
+    resultado = {}
+    for nombre in modelo._campos:
+        if nombre in arbol:
+            valor = getattr(obj, nombre)
+            clase = modelo.clase_anidada(nombre)
+            if valor is None:
+                resultado[nombre] = None
+            elif isinstance(valor, list):
+                resultado[nombre] = [_proyectar(v, clase, clase.campos_simples(), arbol[nombre]) for v in valor]
+            else:
+                resultado[nombre] = _proyectar(valor, clase, clase.campos_simples(), arbol[nombre])
+        elif nombre in simples:
+            resultado[nombre] = getattr(obj, nombre)
+    return resultado
+
+
+class Proyeccion:
+    """
+    `fields` / `expand` de un listado, validados contra su modelo. `simples` son los campos
+    simples a devolver (en el orden del modelo) y `arbol` las entidades a incluir; pedir una
+    entidad en `fields` equivale a expandirla sin sus anidadas.
+    """
+
+    def __init__(self, modelo: type, fields: Optional[str], expand: Optional[str]):
+        campos = _partes(fields)
+        arbol = _arbol_expand(expand)
+        _validar(campos, modelo._campos, "Campos")
+        for nombre in campos:
+            if nombre in modelo._anidados:
+                arbol.setdefault(nombre, {})
+        _validar_arbol(arbol, modelo)
+
+        self.modelo = modelo
+        self.arbol = arbol
+        self.simples = tuple(c for c in modelo.campos_simples() if not campos or c in campos)
+
+    @property
+    def plana(self) -> bool:
+        """Sin entidades anidadas: alcanza con leer columnas de la tabla del listado"""
+        return not self.arbol
+
+    def columnas(self, *claves: str) -> Optional[List[str]]:
+        """
+        Columnas que tiene que leer el servicio si la proyección es plana (las pedidas más las
+        claves del cursor), o None si hace falta el grafo completo
+        """
+        if not self.plana:
+            return None
+        return list(self.simples) + [c for c in claves if c not in self.simples]
+
+    def aplicar(self, elementos: List[Any]) -> List[Dict[str, Any]]:
+        if self.plana and elementos and isinstance(elementos[0], dict):
+            return [{c: fila[c] for c in self.simples} for fila in elementos]
+        return [_proyectar(e, self.modelo, self.simples, self.arbol) for e in elementos]
+
+
+def filas_planas(cursor, booleanos: Iterable[str] = ()) -> List[Dict[str, Any]]:
+    """Lee las filas de una consulta ya ejecutada como dicts, con los flags 0/1 como bool"""
+    booleanos = set(booleanos)
+    return [
+        {c: bool(v) if c in booleanos else v for c, v in zip(fila.keys(), fila)}
+        for fila in cursor.fetchall()
+    ]
@@ -1,16 +1,166 @@
 import bcrypt
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+import config
+
+
+class ServicioHashOcupadoError(Exception):
+    """Hay demasiados hashes pendientes: el request se rechaza en vez de encolarse sin límite"""
+    pass
+
+
+# Lo que corre en los procesos del pool: funciones de módulo (se pasan por pickle) que
+# devuelven también cuándo empezaron y terminaron, para medir la espera en la cola
+def _hashear(password: bytes, costo: int):
+    inicio = time.time()
+    resultado = bcrypt.hashpw(password, bcrypt.gensalt(rounds=costo))
+    return resultado, inicio, time.time()
+
+
+def _verificar(password: bytes, hashed: bytes):
+    inicio = time.time()
+    resultado = bcrypt.checkpw(password, hashed)
+    return resultado, inicio, time.time()
+
+
+def _calentar():
+    return None
+
+
+class ServicioHash:
+    """
+    bcrypt en un pool de BCRYPT_PROCESOS procesos, único por proceso de la API.
+    Cada hash cuesta cientos de ms de CPU: en procesos aparte no le roban CPU ni GIL a los
+    hilos que atienden requests, y como mucho corren BCRYPT_PROCESOS a la vez (uno por core).
+    Los pedidos que exceden BCRYPT_MAX_PENDIENTES (en curso + en cola) se rechazan con
+    ServicioHashOcupadoError. Con BCRYPT_PROCESOS = 0 se hashea en el mismo hilo que llama
+    (scripts, tests).
+    """
+    _instance: Optional['ServicioHash'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ServicioHash, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._ejecutor = None
+            cls._instance._pendientes = 0
+            cls._instance._contadores = {
+                "hashes": 0, "verificaciones": 0, "rehashes": 0, "rechazados": 0,
+                "pendientes_max": 0, "espera_total_seg": 0.0, "espera_max_seg": 0.0, "calculo_total_seg": 0.0,
+            }
+        return cls._instance
+
+    def iniciar(self):
+        """Levanta los procesos de antemano, así el primer login no paga el arranque"""
+        if config.BCRYPT_PROCESOS <= 0:
+            return
+        ejecutor = self._obtener_ejecutor()
+        for futuro in [ejecutor.submit(_calentar) for _ in range(config.BCRYPT_PROCESOS)]:
+            futuro.result()
+
+    def detener(self):
+        with self._lock:
+            ejecutor, self._ejecutor = self._ejecutor, None
+        if ejecutor is not None:
+            ejecutor.shutdown(wait=True, cancel_futures=True)
+
+    def _descartar_ejecutor(self):
+        with self._lock:
+            ejecutor, self._ejecutor = self._ejecutor, None
+        if ejecutor is not None:
+            ejecutor.shutdown(wait=False, cancel_futures=True)
+
+    def _obtener_ejecutor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._ejecutor is None:
+                # spawn: no hereda hilos ni conexiones abiertas de la API
+                self._ejecutor = ProcessPoolExecutor(
+                    max_workers=config.BCRYPT_PROCESOS, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._ejecutor
+
+    def _ejecutar(self, funcion, *args):
+        with self._lock:
+            if self._pendientes >= config.BCRYPT_MAX_PENDIENTES:
+                self._contadores["rechazados"] += 1
+                raise ServicioHashOcupadoError("Demasiadas operaciones de contraseña en curso, reintentar en unos segundos")
+            self._pendientes += 1
+            self._contadores["pendientes_max"] = max(self._contadores["pendientes_max"], self._pendientes)
+
+        enviado = time.time()
+        try:
+            if config.BCRYPT_PROCESOS <= 0:
+                resultado, inicio, fin = funcion(*args)
+            else:
+                try:
+                    resultado, inicio, fin = self._obtener_ejecutor().submit(funcion, *args).result()
+                except BrokenProcessPool:
+                    # Se murió un proceso del pool (OOM, kill): se arma uno nuevo y se reintenta
+                    self._descartar_ejecutor()
+                    resultado, inicio, fin = self._obtener_ejecutor().submit(funcion, *args).result()
+        finally:
+            with self._lock:
+                self._pendientes -= 1
+
+        with self._lock:
+            espera = max(0.0, inicio - enviado)
+            self._contadores["espera_total_seg"] += espera
+            self._contadores["espera_max_seg"] = max(self._contadores["espera_max_seg"], espera)
+            self._contadores["calculo_total_seg"] += fin - inicio
+        return resultado
+
+    def hashear(self, password: str) -> str:
+        resultado = self._ejecutar(_hashear, password.encode('utf-8'), config.BCRYPT_COSTO)
+        with self._lock:
+            self._contadores["hashes"] += 1
+        return resultado.decode('utf-8')
+
+    def verificar(self, password: str, hashed: str) -> bool:
+        resultado = self._ejecutar(_verificar, password.encode('utf-8'), hashed.encode('utf-8'))
+        with self._lock:
+            self._contadores["verificaciones"] += 1
+        return resultado
+
+    def contar_rehash(self):
+        with self._lock:
+            self._contadores["rehashes"] += 1
+
+    def metricas(self) -> Dict:
+        with self._lock:
+            c = dict(self._contadores)
+            operaciones = c["hashes"] + c["verificaciones"]
+            return {
+                "procesos": config.BCRYPT_PROCESOS,
+                "costo": config.BCRYPT_COSTO,
+                "pendientes": self._pendientes,
+                "pendientes_max": c["pendientes_max"],
+                "hashes": c["hashes"],
+                "verificaciones": c["verificaciones"],
+                "rehashes": c["rehashes"],
+                "rechazados": c["rechazados"],
+                "espera_media_ms": round(c["espera_total_seg"] / operaciones * 1000, 2) if operaciones else 0.0,
+                "espera_max_ms": round(c["espera_max_seg"] * 1000, 2),
+                "calculo_medio_ms": round(c["calculo_total_seg"] / operaciones * 1000, 2) if operaciones else 0.0,
+            }
+
 
 def hash_password(plain_password: str) -> str:
-    return bcrypt.hashpw(
-        plain_password.encode('utf-8'), 
-        bcrypt.gensalt()
-    ).decode('utf-8')
+    return ServicioHash().hashear(plain_password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(
-        plain_password.encode('utf-8'), 
-        hashed_password.encode('utf-8')
-    )
+    return ServicioHash().verificar(plain_password, hashed_password)
+
+def necesita_rehash(hashed_password: str) -> bool:
+    """True si el hash se generó con un costo distinto de BCRYPT_COSTO ('$2b$12$...' -> 12)"""
+    try:
+        return int(hashed_password.split('$')[2]) != config.BCRYPT_COSTO
+    except (IndexError, ValueError):
+        return True
 
 def validar_contraseña(password: str) -> bool:
     """Valida que la contraseña cumpla con los requisitos mínimos"""
@@ -22,4 +172,4 @@ def validar_contraseña(password: str) -> bool:
         raise ValueError("La contraseña debe contener al menos una letra minúscula.")
     if not any(c.isdigit() for c in password):
         raise ValueError("La contraseña debe contener al menos un número.")
-    return True
\ No newline at end of file
+    return True
@@ -0,0 +1,87 @@
+"""
+Serialización de las respuestas a JSON, directo a bytes y sin jsonable_encoder.
+
+jsonable_encoder recorre cada objeto por reflexión y arma una copia entera de la respuesta en
+dicts y listas antes de que se serialice. Acá cada clase de modelo (models.modelo.Modelo) tiene
+un convertidor generado una sola vez, la primera vez que se serializa:
+
+    def convertir(o):
+        return {'id_turno': o.id_turno, 'paciente': o.paciente, ...}
+
+y el encoder (orjson si está instalado, si no el encoder en C de la biblioteca estándar) lo
+llama por cada modelo que encuentra, también los anidados, mientras escribe. El JSON que sale
+es el mismo que con jsonable_encoder + JSONResponse.
+
+    return RespuestaJSON(turnos)
+    return RespuestaJSON(turno, status_code=status.HTTP_201_CREATED)
+
+Para medirlo: `python benchmarks/serializacion.py`.
+"""
+import datetime
+import json
+from typing import Any, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+from models.modelo import Modelo
+
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson se usa json, unas 3 veces más lento
+    orjson = None
+
+_convertidores: Dict[type, Callable[[Any], Any]] = {}
+
+
+def _generar_convertidor(clase: type) -> Callable[[Any], Dict[str, Any]]:
+    """Función `o -> {campo: o.campo, ...}` con los campos de la clase escritos en el código"""
+    campos = ", ".join(f"{campo!r}: o.{campo}" for campo in clase._campos)
+    espacio: Dict[str, Any] = {}
+    exec(f"def convertir(o):\n    return {{{campos}}}\n", espacio)
+    return espacio["convertir"]
+
+
+def _fecha_iso(valor) -> str:
+    return valor.isoformat()
+
+
+def _convertidor(clase: type) -> Callable[[Any], Any]:
+    if issubclass(clase, Modelo):
+        convertidor = _generar_convertidor(clase)
+    elif issubclass(clase, (datetime.datetime, datetime.date, datetime.time)):
+        convertidor = _fecha_iso
+    else:
+        # Cualquier otra cosa (Decimal, Enum, sets, ...) como la convertía FastAPI
+        convertidor = jsonable_encoder
+    _convertidores[clase] = convertidor
+    return convertidor
+
+
+def _por_defecto(valor: Any) -> Any:
+    """Lo que el encoder no sabe escribir solo: modelos, fechas (con json) y el resto"""
+    convertidor = _convertidores.get(type(valor))
+    if convertidor is None:
+        convertidor = _convertidor(type(valor))
+    return convertidor(valor)
+
+
+if orjson is not None:
+    _OPCIONES_ORJSON = orjson.OPT_NON_STR_KEYS
+
+    def a_json(contenido: Any) -> bytes:
+        return orjson.dumps(contenido, default=_por_defecto, option=_OPCIONES_ORJSON)
+else:
+    # Los mismos parámetros que JSONResponse de Starlette
+    _encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_por_defecto)
+
+    def a_json(contenido: Any) -> bytes:
+        return _encoder.encode(contenido).encode("utf-8")
+
+
+class RespuestaJSON(Response):
+    """Respuesta JSON serializada con a_json (los endpoints la devuelven en vez de jsonable_encoder)"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return a_json(content)
@@ -0,0 +1,174 @@
+"""
+Servidor SMTP local mínimo, para desarrollo, pruebas y benchmarks: acepta cualquier login y
+cualquier destinatario y guarda los mensajes en memoria (no los reenvía a ningún lado).
+
+Uso (desde backend/):
+
+    python -m utils.servidor_smtp_local --puerto 1025
+
+y levantar la API con:
+
+    TURNERO_EMAIL_SMTP_HOST=127.0.0.1 TURNERO_EMAIL_SMTP_PUERTO=1025 TURNERO_EMAIL_SMTP_SEGURIDAD=ninguna
+
+También se puede usar desde código (`with ServidorSMTPLocal() as servidor: ... servidor.puerto`).
+Con `latencia_ms` cada escritura del cliente se demora, para simular la ida y vuelta a un
+servidor remoto.
+"""
+import argparse
+import base64
+import socket
+import socketserver
+import threading
+import time
+from typing import List, Tuple
+
+
+class _SesionSMTP(socketserver.BaseRequestHandler):
+    """Atiende una conexión: el subconjunto de SMTP que usa smtplib (EHLO, AUTH, MAIL, RCPT, DATA)"""
+
+    def setup(self):
+        self._buffer = b""
+        # Las respuestas a comandos en pipeline salen en varias escrituras chicas: sin esto
+        # Nagle las retiene esperando el ACK y cada mensaje pagaría ~40 ms de más
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _responder(self, texto: str):
+        self.request.sendall(texto.encode() + b"\r\n")
+
+    def _leer_crudo(self) -> bytes:
+        """Una línea con su fin de línea (b'' si el cliente cerró)"""
+        while b"\n" not in self._buffer:
+            datos = self.request.recv(65536)
+            if not datos:
+                linea, self._buffer = self._buffer, b""
+                return linea
+            # La latencia se cobra por cada escritura del cliente, como una ida y vuelta de red
+            if self.server.latencia:
+                time.sleep(self.server.latencia)
+            self._buffer += datos
+        linea, _, self._buffer = self._buffer.partition(b"\n")
+        return linea + b"\n"
+
+    def _leer_linea(self) -> str:
+        return self._leer_crudo().decode("utf-8", "replace").rstrip("\r\n")
+
+    def handle(self):
+        servidor = self.server.servidor
+        servidor._contar_sesion()
+        remitente, destinatarios = None, []
+        self._responder("220 turnero-local ESMTP")
+        while True:
+            linea = self._leer_linea()
+            comando = linea.split(" ", 1)[0].upper()
+            argumento = linea[len(comando):].strip()
+
+            if comando == "EHLO":
+                self._responder("250-turnero-local\r\n250-8BITMIME\r\n250-PIPELINING\r\n250 AUTH PLAIN LOGIN")
+            elif comando == "HELO":
+                self._responder("250 turnero-local")
+            elif comando == "AUTH":
+                mecanismo, _, inicial = argumento.partition(" ")
+                if mecanismo.upper() == "LOGIN":
+                    self._responder("334 " + base64.b64encode(b"Username:").decode())
+                    self._leer_linea()
+                    self._responder("334 " + base64.b64encode(b"Password:").decode())
+                    self._leer_linea()
+                elif not inicial:
+                    self._responder("334 ")
+                    self._leer_linea()
+                self._responder("235 2.7.0 Authentication successful")
+            elif comando == "MAIL":
+                remitente, destinatarios = argumento.partition(":")[2].strip(), []
+                self._responder("250 OK")
+            elif comando == "RCPT":
+                destinatarios.append(argumento.partition(":")[2].strip())
+                self._responder("250 OK")
+            elif comando == "DATA":
+                self._responder("354 End data with <CR><LF>.<CR><LF>")
+                lineas = []
+                while True:
+                    crudo = self._leer_crudo()
+                    if not crudo or crudo in (b".\r\n", b".\n"):
+                        break
+                    lineas.append(crudo[1:] if crudo.startswith(b"..") else crudo)
+                servidor._guardar(remitente, destinatarios, b"".join(lineas))
+                remitente, destinatarios = None, []
+                self._responder("250 OK: queued")
+            elif comando in ("RSET", "NOOP"):
+                if comando == "RSET":
+                    remitente, destinatarios = None, []
+                self._responder("250 OK")
+            elif comando == "QUIT":
+                self._responder("221 Bye")
+                return
+            elif not linea:
+                return
+            else:
+                self._responder("502 Command not implemented")
+
+
+class _ServidorTCP(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ServidorSMTPLocal:
+    """Levanta el servidor en un hilo; `puerto=0` elige uno libre (queda en .puerto)"""
+
+    def __init__(self, host: str = "127.0.0.1", puerto: int = 0, latencia_ms: float = 0.0,
+                 guardar_mensajes: bool = True):
+        self._tcp = _ServidorTCP((host, puerto), _SesionSMTP)
+        self._tcp.servidor = self
+        self._tcp.latencia = latencia_ms / 1000
+        self.host, self.puerto = self._tcp.server_address[:2]
+        self.guardar_mensajes = guardar_mensajes
+        self.mensajes: List[Tuple[str, List[str], bytes]] = []
+        self.sesiones = 0
+        self.recibidos = 0
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def _contar_sesion(self):
+        with self._lock:
+            self.sesiones += 1
+
+    def _guardar(self, remitente: str, destinatarios: List[str], datos: bytes):
+        with self._lock:
+            self.recibidos += 1
+            if self.guardar_mensajes:
+                self.mensajes.append((remitente, destinatarios, datos))
+
+    def iniciar(self) -> 'ServidorSMTPLocal':
+        self._hilo = threading.Thread(target=self._tcp.serve_forever, name="smtp-local", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._tcp.shutdown()
+        self._tcp.server_close()
+
+    def __enter__(self) -> 'ServidorSMTPLocal':
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor SMTP local que acepta todo y muestra los mensajes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=1025)
+    parser.add_argument("--latencia-ms", type=float, default=0.0, help="demora por cada ida y vuelta")
+    args = parser.parse_args()
+
+    servidor = ServidorSMTPLocal(args.host, args.puerto, args.latencia_ms, guardar_mensajes=False).iniciar()
+    print(f"Servidor SMTP local escuchando en {servidor.host}:{servidor.puerto} (Ctrl+C para salir)")
+    try:
+        ultimo = 0
+        while True:
+            time.sleep(1)
+            if servidor.recibidos != ultimo:
+                ultimo = servidor.recibidos
+                print(f"  {servidor.recibidos} mensajes recibidos en {servidor.sesiones} sesiones")
+    except KeyboardInterrupt:
+        servidor.detener()
@@ -0,0 +1,267 @@
+"""
+Tokens de sesión firmados (formato JWT con HS256, implementado acá sin dependencias).
+
+El login devuelve un access token con el id del usuario, el rol con el que ingresó y todos sus
+roles, firmado con HMAC-SHA256 y la clave del servidor, que vence a los TOKEN_TTL_SEG. Validarlo
+es recalcular la firma y mirar el vencimiento: no toca las tablas de usuarios. Lo único que se
+consulta además es la lista de revocados:
+
+    @router.get("/algo")
+    def algo(sesion: Sesion = Depends(sesion_actual)):
+        sesion.id_usuario, sesion.rol, sesion.roles
+
+Se revoca un token (logout) o todos los de un usuario emitidos hasta ahora (cambio de
+contraseña, usuario desactivado o borrado, rol quitado). Las revocaciones se guardan en la
+tabla TokenRevocado y la clave (si no se fija TURNERO_TOKEN_SECRETO) en ClaveServidor, así
+todos los procesos (uvicorn --workers N) aceptan los mismos tokens y ven los mismos logouts.
+Cada proceso tiene una copia en memoria de los revocados que vuelve a leer cuando cambia la
+versión de TokenRevocado en VersionTabla, que se mira a lo sumo cada
+TOKEN_REVOCADOS_REVISION_SEG: validar un token no consulta la base ni toma ningún lock.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+import config
+from database import ConexionesDB
+from models.modelo import Modelo
+
+
+class TokenInvalidoError(Exception):
+    """Token mal formado, con la firma incorrecta, vencido o revocado"""
+    pass
+
+
+def _b64(datos: bytes) -> str:
+    return base64.urlsafe_b64encode(datos).rstrip(b"=").decode("ascii")
+
+
+def _b64_decodificar(texto: str) -> bytes:
+    return base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+
+
+def _json(datos: Dict) -> bytes:
+    return json.dumps(datos, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+# El encabezado es siempre el mismo: se compara como texto, así nunca se acepta otro algoritmo
+_ENCABEZADO = _b64(_json({"alg": "HS256", "typ": "JWT"}))
+_clave: Optional[bytes] = None
+_lock_clave = threading.Lock()
+
+
+def cargar_clave() -> bytes:
+    """
+    Clave con la que se firman los tokens: TURNERO_TOKEN_SECRETO o, si no está fijado, una al
+    azar que genera el primer proceso y se guarda en ClaveServidor para todos los demás (y
+    para los reinicios). La carga el lifespan al arrancar, antes del primer request.
+    """
+    global _clave
+    with _lock_clave:
+        if _clave is None:
+            if config.TOKEN_SECRETO:
+                _clave = config.TOKEN_SECRETO.encode("utf-8")
+            else:
+                with ConexionesDB.versiones().conexion() as conn:
+                    fila = conn.execute("SELECT valor FROM ClaveServidor WHERE nombre = 'token'").fetchone()
+                if fila is None:
+                    # Si dos procesos arrancan a la vez, el INSERT del segundo no hace nada y lee la del primero
+                    with ConexionesDB.escritura().conexion() as conn:
+                        conn.execute("INSERT OR IGNORE INTO ClaveServidor (nombre, valor) VALUES ('token', ?)",
+                                     (secrets.token_urlsafe(32),))
+                        conn.commit()
+                        fila = conn.execute("SELECT valor FROM ClaveServidor WHERE nombre = 'token'").fetchone()
+                _clave = fila[0].encode("utf-8")
+        return _clave
+
+
+def _firmar(contenido: str) -> bytes:
+    clave = _clave or cargar_clave()
+    return _b64(hmac.new(clave, contenido.encode("utf-8"), hashlib.sha256).digest()).encode("ascii")
+
+
+class Sesion(Modelo):
+    """Lo que lleva un token válido"""
+    __slots__ = ("id_usuario", "rol", "roles", "jti", "emitido", "expira")
+
+    def __init__(self, id_usuario: int, rol: str, roles: List[str], jti: str, emitido: float, expira: float):
+        self.id_usuario = id_usuario
+        self.rol = rol
+        self.roles = roles
+        self.jti = jti
+        self.emitido = emitido
+        self.expira = expira
+
+
+def emitir_token(id_usuario: int, rol: str, roles: List[str]) -> Tuple[str, Sesion]:
+    """Token firmado para el usuario y la sesión que representa"""
+    # iat con fracción de segundo: un login justo después de revocar al usuario tiene que valer
+    emitido = time.time()
+    sesion = Sesion(id_usuario, rol, list(roles), secrets.token_urlsafe(12), emitido, int(emitido) + config.TOKEN_TTL_SEG)
+    contenido = _ENCABEZADO + "." + _b64(_json({
+        "sub": str(id_usuario),
+        "rol": rol,
+        "roles": sesion.roles,
+        "jti": sesion.jti,
+        "iat": sesion.emitido,
+        "exp": sesion.expira,
+    }))
+    return contenido + "." + _firmar(contenido).decode("ascii"), sesion
+
+
+def validar_token(token: str) -> Sesion:
+    """Sesion del token, o TokenInvalidoError. De la base solo lee la versión de TokenRevocado"""
+    partes = token.split(".")
+    if len(partes) != 3 or partes[0] != _ENCABEZADO:
+        raise TokenInvalidoError("Token mal formado")
+    if not hmac.compare_digest(_firmar(partes[0] + "." + partes[1]), partes[2].encode("utf-8")):
+        raise TokenInvalidoError("Firma del token inválida")
+    try:
+        datos = json.loads(_b64_decodificar(partes[1]))
+        sesion = Sesion(int(datos["sub"]), datos["rol"], datos["roles"], datos["jti"], datos["iat"], datos["exp"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise TokenInvalidoError("Token mal formado")
+
+    if sesion.expira <= time.time():
+        raise TokenInvalidoError("El token venció")
+    if ListaRevocados().revocado(sesion):
+        raise TokenInvalidoError("El token fue revocado")
+    return sesion
+
+
+class ListaRevocados:
+    """
+    Tokens revocados antes de vencer, por jti (logout) y por usuario (todos los emitidos hasta
+    un instante). Se escriben en TokenRevocado con la conexión de quien revoca, dentro de su
+    transacción; cada proceso guarda una copia en memoria, único por proceso, que recarga
+    cuando cambia la versión de la tabla. La versión se revisa a lo sumo cada
+    TOKEN_REVOCADOS_REVISION_SEG (una revocación de otro proceso tarda eso en verse; las de
+    este proceso fuerzan la revisión siguiente). Las filas vencidas se borran al revocar.
+    """
+    _instance: Optional['ListaRevocados'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ListaRevocados, cls).__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._version = None
+            cls._instance._proxima_revision = 0.0
+            cls._instance._tokens = {}     # jti -> vencimiento del token
+            cls._instance._usuarios = {}   # id_usuario -> revocados hasta
+            cls._instance._recargas = 0
+        return cls._instance
+
+    def revocar(self, db, sesion: Sesion):
+        """Revoca un token (sin commit: se confirma con la transacción de `db`)"""
+        self._guardar(db, f"jti:{sesion.jti}", None, sesion.expira)
+
+    def revocar_usuario(self, db, id_usuario: int):
+        """Invalida todos los tokens del usuario emitidos hasta ahora (no los de logins posteriores). Sin commit"""
+        ahora = time.time()
+        self._guardar(db, f"usuario:{id_usuario}", ahora, ahora + config.TOKEN_TTL_SEG)
+
+    def _guardar(self, db, clave: str, emitido_hasta: Optional[float], vence: float):
+        db.execute("DELETE FROM TokenRevocado WHERE vence <= ?", (time.time(),))
+        db.execute("""
+            INSERT INTO TokenRevocado (clave, emitido_hasta, vence) VALUES (?, ?, ?)
+            ON CONFLICT (clave) DO UPDATE SET emitido_hasta = excluded.emitido_hasta, vence = excluded.vence
+        """, (clave, emitido_hasta, vence))
+        # La próxima validación de este proceso vuelve a mirar la versión
+        self._proxima_revision = 0.0
+
+    def revocado(self, sesion: Sesion) -> bool:
+        # Sin lock: las lecturas de dict son atómicas con el GIL y los dicts se reemplazan enteros
+        if time.monotonic() >= self._proxima_revision:
+            self._sincronizar()
+        if sesion.jti in self._tokens:
+            return True
+        hasta = self._usuarios.get(sesion.id_usuario)
+        return hasta is not None and sesion.emitido <= hasta
+
+    def _sincronizar(self):
+        """Vuelve a leer TokenRevocado si otro proceso (o éste) lo modificó desde la última vez"""
+        # Si otro hilo ya está revisando, éste sigue con la copia actual en vez de esperarlo
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            ahora = time.monotonic()
+            if ahora < self._proxima_revision:
+                return
+            self._proxima_revision = ahora + config.TOKEN_REVOCADOS_REVISION_SEG
+            self._recargar()
+        finally:
+            self._lock.release()
+
+    def _recargar(self):
+        with ConexionesDB.versiones().conexion() as conn:
+            fila = conn.execute("SELECT version FROM VersionTabla WHERE tabla = 'TokenRevocado'").fetchone()
+            version = fila[0] if fila else 0
+            if version == self._version:
+                return
+            filas = conn.execute("""
+                SELECT clave, emitido_hasta, vence FROM TokenRevocado WHERE vence > ?
+            """, (time.time(),)).fetchall()
+            tokens, usuarios = {}, {}
+            for clave, emitido_hasta, vence in filas:
+                tipo, _, valor = clave.partition(":")
+                if tipo == "jti":
+                    tokens[valor] = vence
+                elif tipo == "usuario":
+                    usuarios[int(valor)] = emitido_hasta
+            # Se reemplazan enteros: quien lee sin el lock ve la copia vieja o la nueva
+            self._tokens, self._usuarios = tokens, usuarios
+            self._version = version
+            self._recargas += 1
+
+    def metricas(self) -> Dict:
+        with self._lock:
+            return {
+                "ttl_seg": config.TOKEN_TTL_SEG,
+                "version": self._version,
+                "revision_seg": config.TOKEN_REVOCADOS_REVISION_SEG,
+                "tokens_revocados": len(self._tokens),
+                "usuarios_revocados": len(self._usuarios),
+                "recargas": self._recargas,
+            }
+
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+def sesion_opcional(credenciales: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> Optional[Sesion]:
+    """Dependency: la sesión del header `Authorization: Bearer ...`, o None si no vino. Un token inválido es 401"""
+    if credenciales is None:
+        return None
+    try:
+        return validar_token(credenciales.credentials)
+    except TokenInvalidoError as e:
+        raise HTTPException(status_code=401, detail=str(e), headers={"WWW-Authenticate": "Bearer"})
+
+
+def sesion_si_valida(credenciales: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> Optional[Sesion]:
+    """
+    Dependency: la sesión del token, o None si no vino o no es válido. Para los endpoints que
+    también identifican al usuario por el body: un token viejo no los hace fallar
+    """
+    if credenciales is None:
+        return None
+    try:
+        return validar_token(credenciales.credentials)
+    except TokenInvalidoError:
+        return None
+
+
+def sesion_actual(sesion: Optional[Sesion] = Depends(sesion_opcional)) -> Sesion:
+    """Dependency: la sesión del token; sin token responde 401"""
+    if sesion is None:
+        raise HTTPException(status_code=401, detail="Falta el token de sesión", headers={"WWW-Authenticate": "Bearer"})
+    return sesion
@@ -0,0 +1,365 @@
+"""
+Transportes de email.
+
+Todo envío (recordatorios, confirmaciones de reserva, recuperación de contraseña) pasa por
+transporte_email(), que devuelve el transporte configurado en EMAIL_TRANSPORTE:
+
+- TransporteSMTP: pool de sesiones SMTP keep-alive. Cada sesión hace el login una vez y manda
+  muchos mensajes (con PIPELINING si el servidor lo ofrece); un lote viaja por la misma sesión.
+- TransporteArchivo: escribe un .eml por mensaje (para revisar los mails en desarrollo).
+- TransporteMemoria: guarda los mensajes en una lista (pruebas y benchmarks).
+
+Todos llevan contadores de envíos, errores y mensajes por segundo (se ven en /salud).
+"""
+import os
+import queue
+import re
+import smtplib
+import ssl
+import threading
+import time
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Tuple
+
+import config
+
+# (destinatario, asunto, cuerpo)
+Mensaje = Tuple[str, str, str]
+
+
+def armar_mensaje(remitente: str, destinatario: str, asunto: str, cuerpo: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg.set_content(cuerpo)
+    msg['Subject'] = asunto
+    msg['From'] = remitente
+    msg['To'] = destinatario
+    return msg
+
+
+class TransporteEmail:
+    """Base de los transportes: arma los mensajes y lleva los contadores"""
+    nombre = ""
+
+    def __init__(self, remitente: str):
+        self.remitente = remitente
+        self._lock_metricas = threading.Lock()
+        self._enviados = 0
+        self._errores = 0
+        self._lotes = 0
+        self._segundos = 0.0
+
+    def enviar(self, destinatario: str, asunto: str, cuerpo: str):
+        """Envía un mensaje; lanza la excepción del transporte si no se pudo"""
+        error = self.enviar_lote([(destinatario, asunto, cuerpo)])[0]
+        if error is not None:
+            raise error
+
+    def enviar_lote(self, mensajes: List[Mensaje]) -> List[Optional[Exception]]:
+        """Envía varios mensajes; devuelve, en el mismo orden, None o la excepción de cada uno"""
+        inicio = time.perf_counter()
+        resultados: List[Optional[Exception]] = []
+        armados = []
+        for destinatario, asunto, cuerpo in mensajes:
+            # Un mensaje que no se puede armar (p. ej. un destinatario con CR/LF) falla sólo él
+            try:
+                armados.append(armar_mensaje(self.remitente, destinatario, asunto, cuerpo))
+                resultados.append(None)
+            except (ValueError, TypeError) as e:
+                resultados.append(e)
+        enviados = iter(self._enviar_lote(armados) if armados else [])
+        resultados = [next(enviados) if r is None else r for r in resultados]
+        errores = sum(1 for r in resultados if r is not None)
+        with self._lock_metricas:
+            self._enviados += len(resultados) - errores
+            self._errores += errores
+            self._lotes += 1
+            self._segundos += time.perf_counter() - inicio
+        return resultados
+
+    def _enviar_lote(self, mensajes: List[EmailMessage]) -> List[Optional[Exception]]:
+        raise NotImplementedError
+
+    def cerrar_ociosas(self):
+        """Libera recursos que no se están usando (sesiones SMTP ociosas)"""
+
+    def cerrar(self):
+        """Libera todo lo abierto por el transporte"""
+
+    def metricas(self) -> Dict:
+        with self._lock_metricas:
+            return {
+                "transporte": self.nombre,
+                "enviados": self._enviados,
+                "errores": self._errores,
+                "lotes": self._lotes,
+                "mensajes_por_seg": round(self._enviados / self._segundos, 1) if self._segundos else 0.0,
+            }
+
+
+class TransporteMemoria(TransporteEmail):
+    nombre = "memoria"
+
+    def __init__(self, remitente: str):
+        super().__init__(remitente)
+        self.mensajes: List[EmailMessage] = []
+
+    def _enviar_lote(self, mensajes: List[EmailMessage]) -> List[Optional[Exception]]:
+        with self._lock_metricas:
+            self.mensajes.extend(mensajes)
+        return [None] * len(mensajes)
+
+
+class TransporteArchivo(TransporteEmail):
+    nombre = "archivo"
+
+    def __init__(self, remitente: str, directorio: str):
+        super().__init__(remitente)
+        self.directorio = directorio
+        self._secuencia = 0
+        os.makedirs(directorio, exist_ok=True)
+
+    def _enviar_lote(self, mensajes: List[EmailMessage]) -> List[Optional[Exception]]:
+        resultados = []
+        for msg in mensajes:
+            with self._lock_metricas:
+                self._secuencia += 1
+                nombre = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._secuencia:06d}.eml"
+            try:
+                with open(os.path.join(self.directorio, nombre), "wb") as f:
+                    f.write(msg.as_bytes())
+                resultados.append(None)
+            except (OSError, ValueError) as e:
+                resultados.append(e)
+        return resultados
+
+
+class _Sesion:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.ultimo_uso = time.monotonic()
+        self.pipelining = smtp.has_extn("pipelining")
+        self.ochobits = smtp.has_extn("8bitmime")
+
+
+class TransporteSMTP(TransporteEmail):
+    """
+    Pool acotado de sesiones SMTP. Un lote toma una sesión, manda todos sus mensajes por ella
+    y la devuelve abierta para el próximo; la conexión TLS y el login se pagan una vez por
+    sesión y no por mensaje. Las sesiones ociosas más de `keepalive` segundos se cierran
+    (los servidores las cortan igual). Si el servidor corta la sesión a mitad de un lote se
+    reconecta una vez; un destinatario rechazado sólo falla ese mensaje.
+    """
+    nombre = "smtp"
+
+    def __init__(self, remitente: str, host: str, puerto: int, seguridad: str = "ssl",
+                 usuario: str = "", password: str = "", tamanio_pool: int = 4,
+                 keepalive: float = 60.0, timeout: float = 20.0):
+        super().__init__(remitente)
+        if seguridad not in ("ssl", "starttls", "ninguna"):
+            raise ValueError(f"Seguridad SMTP desconocida: {seguridad}")
+        self.host = host
+        self.puerto = puerto
+        self.seguridad = seguridad
+        self.usuario = usuario
+        self.password = password
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self._cupos = threading.BoundedSemaphore(tamanio_pool)
+        self._ociosas: "queue.LifoQueue[_Sesion]" = queue.LifoQueue()
+        self._sesiones_creadas = 0
+
+    def _abrir(self) -> _Sesion:
+        context = ssl._create_unverified_context()  # Evita errores de certificado (no recomendado para prod)
+        if self.seguridad == "ssl":
+            smtp = smtplib.SMTP_SSL(self.host, self.puerto, context=context, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.host, self.puerto, timeout=self.timeout)
+        try:
+            if self.seguridad == "starttls":
+                smtp.starttls(context=context)
+            if self.usuario:
+                smtp.login(self.usuario, self.password)
+            smtp.ehlo_or_helo_if_needed()
+        except Exception:
+            smtp.close()
+            raise
+        with self._lock_metricas:
+            self._sesiones_creadas += 1
+        return _Sesion(smtp)
+
+    @staticmethod
+    def _cerrar_sesion(sesion: _Sesion):
+        try:
+            sesion.smtp.quit()
+        except Exception:
+            sesion.smtp.close()
+
+    def _tomar(self) -> _Sesion:
+        """Una sesión ociosa que siga vigente o una nueva (el semáforo acota cuántas hay)"""
+        while True:
+            try:
+                sesion = self._ociosas.get_nowait()
+            except queue.Empty:
+                return self._abrir()
+            if time.monotonic() - sesion.ultimo_uso < self.keepalive:
+                return sesion
+            self._cerrar_sesion(sesion)
+
+    def _enviar_lote(self, mensajes: List[EmailMessage]) -> List[Optional[Exception]]:
+        if not self._cupos.acquire(timeout=self.timeout):
+            return [TimeoutError("No hay sesiones SMTP libres")] * len(mensajes)
+        sesion = None
+        resultados: List[Optional[Exception]] = []
+        try:
+            for msg in mensajes:
+                for intento in (1, 2):
+                    try:
+                        if sesion is None:
+                            sesion = self._tomar()
+                    except OSError as e:
+                        # No se pudo conectar o loguear: el resto del lote falla con el mismo error
+                        resultados.extend([e] * (len(mensajes) - len(resultados)))
+                        return resultados
+                    try:
+                        if sesion.pipelining:
+                            self._enviar_en_pipeline(sesion, msg)
+                        else:
+                            sesion.smtp.send_message(msg)
+                        resultados.append(None)
+                        break
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError,
+                            smtplib.SMTPNotSupportedError) as e:
+                        # Rechazo de este mensaje: la sesión sigue sirviendo para los demás
+                        resultados.append(e)
+                        break
+                    except ValueError as e:
+                        # No se puede codificar (p. ej. una dirección no ASCII sin SMTPUTF8): falla
+                        # antes de escribir en la sesión, que sigue sirviendo para los demás
+                        resultados.append(e)
+                        break
+                    except OSError as e:
+                        # Sesión caída (o vencida del lado del servidor): se descarta y se reintenta una vez
+                        sesion.smtp.close()
+                        sesion = None
+                        if intento == 2:
+                            resultados.append(e)
+            return resultados
+        finally:
+            if sesion is not None:
+                sesion.ultimo_uso = time.monotonic()
+                self._ociosas.put(sesion)
+            self._cupos.release()
+
+    def _enviar_en_pipeline(self, sesion: _Sesion, msg: EmailMessage):
+        """
+        Envía un mensaje con PIPELINING (RFC 2920): MAIL, RCPT y DATA viajan en una sola escritura
+        y el contenido en otra, dos idas y vueltas por mensaje en vez de cuatro.
+        Los rechazos lanzan las mismas excepciones que smtplib.send_message; lo que no se puede
+        codificar, ValueError sin haber escrito nada en la sesión.
+        """
+        smtp = sesion.smtp
+        destinatarios = [d.strip() for d in msg['To'].split(",")]
+        opciones = " BODY=8BITMIME" if sesion.ochobits else ""
+        # El contenido se serializa antes de abrir la transacción: si falla, la sesión queda limpia
+        datos = msg.as_bytes(policy=msg.policy.clone(linesep="\r\n"))
+        datos = re.sub(rb"(?m)^\.", b"..", datos)
+        if not datos.endswith(b"\r\n"):
+            datos += b"\r\n"
+        smtp.send(
+            f"MAIL FROM:<{self.remitente}>{opciones}\r\n"
+            + "".join(f"RCPT TO:<{d}>\r\n" for d in destinatarios)
+            + "DATA\r\n"
+        )
+        respuesta_mail = smtp.getreply()
+        respuestas_rcpt = [smtp.getreply() for _ in destinatarios]
+        respuesta_data = smtp.getreply()
+
+        rechazados = {d: r for d, r in zip(destinatarios, respuestas_rcpt) if r[0] not in (250, 251)}
+        if respuesta_mail[0] != 250 or rechazados or respuesta_data[0] != 354:
+            if respuesta_data[0] == 354:
+                # El servidor aceptó DATA igual: se manda un mensaje vacío y se descarta con RSET
+                smtp.send(b".\r\n")
+                smtp.getreply()
+            smtp.rset()
+            if respuesta_mail[0] != 250:
+                raise smtplib.SMTPSenderRefused(respuesta_mail[0], respuesta_mail[1], self.remitente)
+            if rechazados:
+                raise smtplib.SMTPRecipientsRefused(rechazados)
+            raise smtplib.SMTPDataError(*respuesta_data)
+
+        smtp.send(datos + b".\r\n")
+        codigo, respuesta = smtp.getreply()
+        if codigo != 250:
+            smtp.rset()
+            raise smtplib.SMTPDataError(codigo, respuesta)
+
+    def cerrar_ociosas(self):
+        vigentes = []
+        while True:
+            try:
+                sesion = self._ociosas.get_nowait()
+            except queue.Empty:
+                break
+            if time.monotonic() - sesion.ultimo_uso < self.keepalive:
+                vigentes.append(sesion)
+            else:
+                self._cerrar_sesion(sesion)
+        for sesion in vigentes:
+            self._ociosas.put(sesion)
+
+    def cerrar(self):
+        while True:
+            try:
+                self._cerrar_sesion(self._ociosas.get_nowait())
+            except queue.Empty:
+                break
+
+    def metricas(self) -> Dict:
+        metricas = super().metricas()
+        with self._lock_metricas:
+            metricas["sesiones_creadas"] = self._sesiones_creadas
+        metricas["sesiones_ociosas"] = self._ociosas.qsize()
+        return metricas
+
+
+def crear_transporte(tipo: Optional[str] = None) -> TransporteEmail:
+    """Crea el transporte indicado (por defecto el de EMAIL_TRANSPORTE) con la configuración del backend"""
+    tipo = tipo or config.EMAIL_TRANSPORTE
+    if tipo == "smtp":
+        return TransporteSMTP(
+            remitente=config.EMAIL_REMITENTE,
+            host=config.EMAIL_SMTP_HOST,
+            puerto=config.EMAIL_SMTP_PUERTO,
+            seguridad=config.EMAIL_SMTP_SEGURIDAD,
+            usuario=config.EMAIL_SMTP_USUARIO,
+            password=config.EMAIL_SMTP_PASSWORD,
+            tamanio_pool=config.EMAIL_SMTP_POOL,
+            keepalive=config.EMAIL_SMTP_KEEPALIVE_SEG,
+            timeout=config.EMAIL_SMTP_TIMEOUT_SEG,
+        )
+    if tipo == "archivo":
+        return TransporteArchivo(config.EMAIL_REMITENTE, config.EMAIL_ARCHIVO_DIR)
+    if tipo == "memoria":
+        return TransporteMemoria(config.EMAIL_REMITENTE)
+    raise ValueError(f"Transporte de email desconocido: {tipo}")
+
+
+_transporte: Optional[TransporteEmail] = None
+_lock_transporte = threading.Lock()
+
+
+def transporte_email() -> TransporteEmail:
+    """Transporte único del proceso (se crea la primera vez que se usa)"""
+    global _transporte
+    with _lock_transporte:
+        if _transporte is None:
+            _transporte = crear_transporte()
+        return _transporte
+
+
+def usar_transporte(transporte: TransporteEmail) -> Optional[TransporteEmail]:
+    """Reemplaza el transporte del proceso (benchmarks, pruebas). Devuelve el anterior, sin cerrarlo"""
+    global _transporte
+    with _lock_transporte:
+        anterior, _transporte = _transporte, transporte
+        return anterior
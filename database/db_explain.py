@@ -0,0 +1,272 @@
+"""
+Asesor de índices: corre EXPLAIN QUERY PLAN sobre cada sentencia SQL de backend/services
+y falla (exit 1) si alguna consulta con filtro termina recorriendo una tabla entera (SCAN).
+
+Uso (desde la raíz del repo):
+
+    python database/db_explain.py              # base en memoria con el esquema + migraciones
+    python database/db_explain.py --db ruta.db # contra una base real (usa sus estadísticas)
+    python database/db_explain.py -v           # muestra el plan de cada sentencia
+
+Las sentencias se sacan del código con `ast`: strings literales, f-strings con partes que se
+pueden resolver (constantes del módulo, variables locales simples, defaults de parámetros) y
+los fragmentos "WHERE ..." que se pasan a los helpers `_get_X_completos(condiciones, ...)`.
+Lo que se arma en tiempo de ejecución (filtros opcionales, UPDATE ... SET dinámicos) se
+informa como "dinámico" y no se analiza.
+"""
+import argparse
+import ast
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+
+import db_init
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICES_DIR = os.path.join(os.path.dirname(BASE_DIR), "backend", "services")
+
+PALABRAS_SENTENCIA = ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")
+
+# Tablas de catálogo (unas pocas filas): recorrerlas enteras es más barato que un índice
+TABLAS_CHICAS = {"estadoturno", "rol", "especialidad", "obrasocial"}
+
+# SCAN aceptados a propósito en consultas con filtro: "archivo.py:funcion" -> motivo
+SCANS_PERMITIDOS = {
+}
+
+
+class NoResuelto(Exception):
+    pass
+
+
+class Sentencia:
+    def __init__(self, archivo: str, linea: int, funcion: str, sql: str, dinamico: bool = False):
+        self.archivo = archivo
+        self.linea = linea
+        self.funcion = funcion
+        self.sql = sql
+        self.dinamico = dinamico
+
+    @property
+    def ubicacion(self) -> str:
+        return f"{self.archivo}:{self.linea} ({self.funcion})"
+
+
+def _es_sentencia(texto: str) -> bool:
+    return texto.lstrip().upper().startswith(PALABRAS_SENTENCIA)
+
+
+class _Renderizador:
+    """Convierte nodos de string (literales, f-strings, concatenaciones) en texto SQL"""
+
+    def __init__(self, constantes: dict):
+        self.constantes = constantes
+
+    def render(self, nodo, entorno: dict, estricto: bool = True) -> str:
+        if isinstance(nodo, ast.Constant) and isinstance(nodo.value, (str, int)):
+            return str(nodo.value)
+        if isinstance(nodo, ast.JoinedStr):
+            return "".join(self.render(parte, entorno, estricto) for parte in nodo.values)
+        if isinstance(nodo, ast.FormattedValue):
+            try:
+                return self.render(nodo.value, entorno, estricto)
+            except NoResuelto:
+                if estricto:
+                    raise
+                # Un valor desconocido dentro del SQL: NULL sirve en cualquier posición de valor
+                return "NULL"
+        if isinstance(nodo, ast.BinOp) and isinstance(nodo.op, ast.Add):
+            return self.render(nodo.left, entorno, estricto) + self.render(nodo.right, entorno, estricto)
+        if isinstance(nodo, ast.IfExp):
+            return self.render(nodo.body, entorno, estricto)
+        if isinstance(nodo, ast.Name):
+            if nodo.id in entorno:
+                return self.render(entorno[nodo.id], {}, estricto) if isinstance(entorno[nodo.id], ast.AST) else entorno[nodo.id]
+            if nodo.id in self.constantes:
+                return self.constantes[nodo.id]
+        if (isinstance(nodo, ast.Call) and isinstance(nodo.func, ast.Attribute)
+                and nodo.func.attr == "join" and isinstance(nodo.func.value, ast.Constant)
+                and nodo.args and isinstance(nodo.args[0], ast.GeneratorExp)
+                and isinstance(nodo.args[0].elt, ast.Constant) and nodo.args[0].elt.value == "?"):
+            # ", ".join("?" for _ in lote): marcadores de un IN (...)
+            return "?"
+        raise NoResuelto(ast.dump(nodo)[:80])
+
+
+def _asignaciones_locales(funcion: ast.FunctionDef) -> dict:
+    """Variables locales asignadas una vez a una expresión simple (sirven para resolver f-strings)"""
+    entorno = {}
+    for nodo in ast.walk(funcion):
+        if isinstance(nodo, ast.Assign) and len(nodo.targets) == 1 and isinstance(nodo.targets[0], ast.Name):
+            entorno[nodo.targets[0].id] = nodo.value
+    return entorno
+
+
+def _defaults(funcion: ast.FunctionDef) -> dict:
+    args = funcion.args.args
+    defaults = funcion.args.defaults
+    return {a.arg: d for a, d in zip(args[len(args) - len(defaults):], defaults)}
+
+
+def _helpers_con_condiciones(arbol: ast.Module):
+    """Métodos que ejecutan un f-string con {condiciones}: nombre -> (funcion, plantilla)"""
+    helpers = {}
+    for nodo in ast.walk(arbol):
+        if isinstance(nodo, ast.FunctionDef):
+            for interno in ast.walk(nodo):
+                if isinstance(interno, ast.JoinedStr) and any(
+                        isinstance(p, ast.FormattedValue) and isinstance(p.value, ast.Name) and p.value.id == "condiciones"
+                        for p in interno.values):
+                    helpers[nodo.name] = (nodo, interno)
+    return helpers
+
+
+def _constantes_modulo(arbol: ast.Module) -> dict:
+    constantes = {}
+    for nodo in arbol.body:
+        if (isinstance(nodo, ast.Assign) and len(nodo.targets) == 1 and isinstance(nodo.targets[0], ast.Name)
+                and isinstance(nodo.value, ast.Constant) and isinstance(nodo.value.value, (str, int))):
+            constantes[nodo.targets[0].id] = str(nodo.value.value)
+    return constantes
+
+
+def extraer_sentencias(ruta: str):
+    archivo = os.path.basename(ruta)
+    with open(ruta, encoding="utf-8") as f:
+        arbol = ast.parse(f.read(), filename=ruta)
+
+    render = _Renderizador(_constantes_modulo(arbol))
+    helpers = _helpers_con_condiciones(arbol)
+    plantillas = {id(p) for _, p in helpers.values()}
+    sentencias = []
+
+    def visitar(nodo, funcion):
+        for hijo in ast.iter_child_nodes(nodo):
+            if isinstance(hijo, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                visitar(hijo, hijo)
+                continue
+            nombre = funcion.name if funcion else "<módulo>"
+            entorno = _asignaciones_locales(funcion) if funcion else {}
+
+            # Llamada a un helper con un fragmento WHERE: se arma la sentencia completa
+            if (isinstance(hijo, ast.Call) and isinstance(hijo.func, ast.Attribute)
+                    and hijo.func.attr in helpers and hijo.args):
+                helper, plantilla = helpers[hijo.func.attr]
+                entorno_helper = dict(_defaults(helper))
+                entorno_helper["condiciones"] = hijo.args[0]
+                for kw in hijo.keywords:
+                    entorno_helper[kw.arg] = kw.value
+                try:
+                    usados = {p.value.id for p in plantilla.values
+                              if isinstance(p, ast.FormattedValue) and isinstance(p.value, ast.Name)}
+                    entorno_helper = {k: render.render(v, entorno) for k, v in entorno_helper.items()
+                                      if k in usados}
+                    sql = render.render(plantilla, entorno_helper)
+                    sentencias.append(Sentencia(archivo, hijo.lineno, nombre, sql))
+                except NoResuelto:
+                    sentencias.append(Sentencia(archivo, hijo.lineno, nombre, "", dinamico=True))
+
+            elif isinstance(hijo, (ast.Constant, ast.JoinedStr)) and id(hijo) not in plantillas:
+                texto = hijo.value if isinstance(hijo, ast.Constant) else None
+                if isinstance(hijo, ast.JoinedStr):
+                    try:
+                        texto = render.render(hijo, entorno, estricto=False)
+                    except NoResuelto:
+                        texto = None
+                if isinstance(texto, str) and _es_sentencia(texto):
+                    sentencias.append(Sentencia(archivo, hijo.lineno, nombre, texto))
+                continue
+            visitar(hijo, funcion)
+
+    visitar(arbol, None)
+    return sentencias
+
+
+def _tiene_filtro(sql: str) -> bool:
+    return " WHERE " in f" {' '.join(sql.upper().split())} "
+
+
+def analizar(conn: sqlite3.Connection, sentencia: Sentencia):
+    """Devuelve (plan, tablas recorridas enteras) o lanza sqlite3.Error si no se puede explicar"""
+    n_params = sentencia.sql.count("?")
+    filas = conn.execute(f"EXPLAIN QUERY PLAN {sentencia.sql}", (None,) * n_params).fetchall()
+    plan = [fila[3] for fila in filas]
+    scans = []
+    for detalle in plan:
+        partes = detalle.split()
+        if partes[0] == "SCAN" and len(partes) > 1 and partes[1] != "CONSTANT":
+            tabla = partes[1]
+            scans.append(tabla)
+    return plan, scans
+
+
+def _tabla_real(sql: str, alias: str) -> str:
+    """Resuelve un alias del plan ('t', 'T') al nombre de tabla del FROM/JOIN"""
+    tokens = sql.replace("\n", " ").replace(",", " ").split()
+    for i, token in enumerate(tokens[:-1]):
+        siguiente = tokens[i + 1]
+        if siguiente == alias or (siguiente.upper() == "AS" and i + 2 < len(tokens) and tokens[i + 2] == alias):
+            if i > 0 and tokens[i - 1].upper() in ("FROM", "JOIN", "UPDATE", "INTO"):
+                return token
+    return alias
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", help="base SQLite a usar (default: una en memoria con el esquema actual)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="mostrar el plan de cada sentencia")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    else:
+        conn = sqlite3.connect(":memory:")
+        with contextlib.redirect_stdout(io.StringIO()):
+            db_init.inicializar_esquema(conn)
+
+    sentencias = []
+    for nombre in sorted(os.listdir(SERVICES_DIR)):
+        if nombre.endswith(".py"):
+            sentencias.extend(extraer_sentencias(os.path.join(SERVICES_DIR, nombre)))
+
+    problemas, dinamicas, analizadas = [], 0, 0
+    for s in sentencias:
+        if s.dinamico:
+            dinamicas += 1
+            if args.verbose:
+                print(f"  ~ {s.ubicacion}: dinámico, no se analiza")
+            continue
+        try:
+            plan, scans = analizar(conn, s)
+        except sqlite3.Error:
+            dinamicas += 1
+            if args.verbose:
+                print(f"  ~ {s.ubicacion}: SQL armado en tiempo de ejecución, no se analiza")
+            continue
+        analizadas += 1
+
+        clave = f"{s.archivo}:{s.funcion}"
+        tablas = {_tabla_real(s.sql, alias) for alias in scans}
+        calientes = sorted(
+            t for t in tablas
+            if t.lower() not in TABLAS_CHICAS and _tiene_filtro(s.sql) and clave not in SCANS_PERMITIDOS
+        )
+        if calientes:
+            problemas.append((s, plan, calientes))
+        if args.verbose or calientes:
+            marca = "✗" if calientes else "✓"
+            print(f"  {marca} {s.ubicacion}")
+            for detalle in plan:
+                print(f"        {detalle}")
+
+    print(f"\n{analizadas} sentencias analizadas, {dinamicas} dinámicas sin analizar, "
+          f"{len(problemas)} con SCAN completo sobre tablas grandes")
+    for s, _, tablas in problemas:
+        print(f"  - {s.ubicacion}: SCAN {', '.join(tablas)}")
+    return 1 if problemas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
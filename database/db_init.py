@@ -10,6 +10,10 @@ SQL_SCHEMA = """
 -- Habilitar el soporte de claves foráneas (es necesario en SQLite)
 PRAGMA foreign_keys = ON;
 
+-- Journal en modo WAL (queda guardado en el archivo): las lecturas de la API
+-- no se bloquean mientras el scheduler o un request escriben
+PRAGMA journal_mode = WAL;
+
 -- -----------------------------------------------------
 -- Tabla: Usuario
 -- -----------------------------------------------------
@@ -173,6 +177,339 @@ CREATE UNIQUE INDEX IF NOT EXISTS idx_turno_medico_fecha
 ON Turno (id_medico, fecha_hora_inicio);
 """
 
+# -----------------------------------------------------
+# Migraciones versionadas
+# -----------------------------------------------------
+# Cada migración se aplica una sola vez, en orden. La versión aplicada se guarda en
+# PRAGMA user_version del archivo, así una base existente se actualiza al levantar la API
+# y una base nueva queda directamente en la última versión.
+# Para agregar una: sumar una tupla (version, descripcion, sql) al final de la lista.
+
+FORMATO_FECHA_HORA_SQL = "%Y-%m-%d %H:%M:%S"
+
+# Tablas cuyas escrituras cambian lo que devuelven los GET (ver VersionTabla, migración 6)
+TABLAS_VERSIONADAS = (
+    "Usuario", "Rol", "UsuarioRol", "ObraSocial", "Paciente", "Especialidad", "Medico",
+    "HorarioAtencion", "EstadoTurno", "Turno", "Consulta", "Receta",
+)
+
+
+def _sql_versiones_tablas(tablas) -> str:
+    """Triggers que suman 1 a la versión de cada tabla en cada INSERT, UPDATE o DELETE"""
+    sql = ""
+    for tabla in tablas:
+        sql += f"INSERT OR IGNORE INTO VersionTabla (tabla, version) VALUES ('{tabla}', 0);\n"
+        for operacion in ("INSERT", "UPDATE", "DELETE"):
+            sql += f"""
+        CREATE TRIGGER IF NOT EXISTS trg_version_{tabla.lower()}_{operacion.lower()}
+        AFTER {operacion} ON {tabla}
+        BEGIN
+            UPDATE VersionTabla SET version = version + 1 WHERE tabla = '{tabla}';
+        END;
+"""
+    return sql
+
+
+MIGRACIONES = [
+    (1, "Fechas en formato canónico 'YYYY-MM-DD HH:MM:SS' (consultas por rango usan índices)", f"""
+        UPDATE Turno
+        SET fecha_hora_inicio = strftime('{FORMATO_FECHA_HORA_SQL}', fecha_hora_inicio)
+        WHERE strftime('{FORMATO_FECHA_HORA_SQL}', fecha_hora_inicio) IS NOT NULL
+          AND fecha_hora_inicio != strftime('{FORMATO_FECHA_HORA_SQL}', fecha_hora_inicio);
+
+        UPDATE Turno
+        SET fecha_hora_fin = strftime('{FORMATO_FECHA_HORA_SQL}', fecha_hora_fin)
+        WHERE strftime('{FORMATO_FECHA_HORA_SQL}', fecha_hora_fin) IS NOT NULL
+          AND fecha_hora_fin != strftime('{FORMATO_FECHA_HORA_SQL}', fecha_hora_fin);
+
+        UPDATE Consulta
+        SET fecha_consulta = strftime('{FORMATO_FECHA_HORA_SQL}', fecha_consulta)
+        WHERE strftime('{FORMATO_FECHA_HORA_SQL}', fecha_consulta) IS NOT NULL
+          AND fecha_consulta != strftime('{FORMATO_FECHA_HORA_SQL}', fecha_consulta);
+
+        -- A partir de acá la base rechaza fechas que no estén en formato canónico:
+        -- si se colara un '2025-10-20T09:00' las comparaciones de texto darían mal.
+        CREATE TRIGGER IF NOT EXISTS trg_turno_fechas_canonicas_ins
+        BEFORE INSERT ON Turno
+        WHEN NEW.fecha_hora_inicio IS NOT strftime('{FORMATO_FECHA_HORA_SQL}', NEW.fecha_hora_inicio)
+          OR NEW.fecha_hora_fin IS NOT strftime('{FORMATO_FECHA_HORA_SQL}', NEW.fecha_hora_fin)
+        BEGIN
+            SELECT RAISE(ABORT, 'Turno: fecha_hora_inicio/fin deben tener formato YYYY-MM-DD HH:MM:SS');
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_turno_fechas_canonicas_upd
+        BEFORE UPDATE OF fecha_hora_inicio, fecha_hora_fin ON Turno
+        WHEN NEW.fecha_hora_inicio IS NOT strftime('{FORMATO_FECHA_HORA_SQL}', NEW.fecha_hora_inicio)
+          OR NEW.fecha_hora_fin IS NOT strftime('{FORMATO_FECHA_HORA_SQL}', NEW.fecha_hora_fin)
+        BEGIN
+            SELECT RAISE(ABORT, 'Turno: fecha_hora_inicio/fin deben tener formato YYYY-MM-DD HH:MM:SS');
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_consulta_fecha_canonica_ins
+        BEFORE INSERT ON Consulta
+        WHEN NEW.fecha_consulta IS NOT strftime('{FORMATO_FECHA_HORA_SQL}', NEW.fecha_consulta)
+        BEGIN
+            SELECT RAISE(ABORT, 'Consulta: fecha_consulta debe tener formato YYYY-MM-DD HH:MM:SS');
+        END;
+    """),
+    (2, "Índices compuestos para los caminos de acceso de los servicios (ver database/db_explain.py)", """
+        -- Próximos turnos / historial de un paciente (el de médico ya está cubierto por
+        -- idx_turno_medico_fecha). También lo usa la FK al borrar un paciente.
+        CREATE INDEX IF NOT EXISTS idx_turno_paciente_fecha
+        ON Turno (id_paciente, fecha_hora_inicio);
+
+        -- Recordatorios (pendientes que empiezan en las próximas 24 hs) y FK al borrar un estado
+        CREATE INDEX IF NOT EXISTS idx_turno_estado_fecha
+        ON Turno (id_estado_turno, fecha_hora_inicio);
+
+        -- Ausentes (pendientes cuyo fin ya pasó)
+        CREATE INDEX IF NOT EXISTS idx_turno_estado_fin
+        ON Turno (id_estado_turno, fecha_hora_fin);
+
+        -- Estadísticas por rango de fechas sin otro filtro
+        CREATE INDEX IF NOT EXISTS idx_turno_fecha
+        ON Turno (fecha_hora_inicio);
+
+        CREATE INDEX IF NOT EXISTS idx_consulta_fecha
+        ON Consulta (fecha_consulta);
+
+        CREATE INDEX IF NOT EXISTS idx_receta_consulta
+        ON Receta (id_consulta);
+
+        CREATE INDEX IF NOT EXISTS idx_horario_medico_dia
+        ON HorarioAtencion (id_medico, dia_semana);
+
+        CREATE INDEX IF NOT EXISTS idx_paciente_obra_social_afiliado
+        ON Paciente (id_obra_social, nro_afiliado);
+
+        -- FKs hacia tablas de catálogo (borrar una especialidad o un rol)
+        CREATE INDEX IF NOT EXISTS idx_medico_especialidad
+        ON Medico (id_especialidad);
+
+        CREATE INDEX IF NOT EXISTS idx_usuariorol_rol
+        ON UsuarioRol (id_rol);
+    """),
+    (3, "Calendario materializado de turnos reservables (Slot) por médico", """
+        -- Un turno reservable por médico y horario, generado desde HorarioAtencion para un
+        -- horizonte móvil (ver SlotService). id_turno NULL = libre; reservar es reclamar la fila.
+        CREATE TABLE IF NOT EXISTS Slot (
+          id_slot INTEGER PRIMARY KEY AUTOINCREMENT,
+          id_medico INTEGER NOT NULL,
+          fecha_hora_inicio TEXT NOT NULL,
+          fecha_hora_fin TEXT NOT NULL,
+          id_turno INTEGER,
+          FOREIGN KEY (id_medico) REFERENCES Medico(id_medico) ON DELETE CASCADE,
+          FOREIGN KEY (id_turno) REFERENCES Turno(id_turno) ON DELETE SET NULL
+        );
+
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_slot_medico_inicio
+        ON Slot (id_medico, fecha_hora_inicio);
+
+        -- Búsqueda de libres por rango de fechas: sólo indexa los que están libres
+        CREATE INDEX IF NOT EXISTS idx_slot_libres
+        ON Slot (fecha_hora_inicio, id_medico) WHERE id_turno IS NULL;
+
+        CREATE INDEX IF NOT EXISTS idx_slot_turno
+        ON Slot (id_turno) WHERE id_turno IS NOT NULL;
+
+        -- Hasta qué día (inclusive) están generados los slots de cada médico
+        CREATE TABLE IF NOT EXISTS SlotHorizonte (
+          id_medico INTEGER PRIMARY KEY,
+          generado_hasta TEXT NOT NULL,
+          FOREIGN KEY (id_medico) REFERENCES Medico(id_medico) ON DELETE CASCADE
+        );
+    """),
+    (4, "Bandeja de salida de emails (BandejaSalida) que despachan los workers en segundo plano", """
+        -- Un mail por fila. clave es la clave de idempotencia ('recordatorio:<id_turno>:<email>'):
+        -- encolar dos veces lo mismo no genera un segundo envío.
+        -- estado: pendiente -> enviando -> enviado, o vuelve a pendiente con backoff si falla,
+        -- o queda fallido al agotar los intentos. Un 'enviando' cuyo proximo_intento venció
+        -- (el worker se cayó a mitad del envío) se vuelve a tomar.
+        CREATE TABLE IF NOT EXISTS BandejaSalida (
+          id_mensaje INTEGER PRIMARY KEY AUTOINCREMENT,
+          clave TEXT NOT NULL UNIQUE,
+          destinatario TEXT NOT NULL,
+          asunto TEXT NOT NULL,
+          cuerpo TEXT NOT NULL,
+          id_turno INTEGER,
+          estado TEXT NOT NULL DEFAULT 'pendiente',
+          intentos INTEGER NOT NULL DEFAULT 0,
+          proximo_intento TEXT NOT NULL,
+          ultimo_error TEXT,
+          fecha_creacion TEXT NOT NULL,
+          fecha_envio TEXT,
+          FOREIGN KEY (id_turno) REFERENCES Turno(id_turno) ON DELETE SET NULL
+        );
+
+        -- Lo que los workers tienen para tomar, en orden de vencimiento
+        CREATE INDEX IF NOT EXISTS idx_bandeja_por_enviar
+        ON BandejaSalida (proximo_intento) WHERE estado IN ('pendiente', 'enviando');
+
+        -- FK al borrar un turno
+        CREATE INDEX IF NOT EXISTS idx_bandeja_turno
+        ON BandejaSalida (id_turno) WHERE id_turno IS NOT NULL;
+    """),
+    (5, "Jobs en segundo plano: lease por job (JobLease) e historial de ejecuciones (JobEjecucion)", """
+        -- Una fila por job. Con varios procesos de la API (uvicorn --workers N) sólo corre el
+        -- job el proceso dueño del lease; si deja de renovarlo (se cayó) y vence, lo toma otro.
+        CREATE TABLE IF NOT EXISTS JobLease (
+          nombre TEXT PRIMARY KEY,
+          duenio TEXT NOT NULL,
+          vence TEXT NOT NULL
+        );
+
+        -- Una fila por ejecución. estado: 'ok' o 'error'
+        CREATE TABLE IF NOT EXISTS JobEjecucion (
+          id_ejecucion INTEGER PRIMARY KEY AUTOINCREMENT,
+          nombre TEXT NOT NULL,
+          duenio TEXT NOT NULL,
+          inicio TEXT NOT NULL,
+          fin TEXT NOT NULL,
+          duracion_ms REAL NOT NULL,
+          estado TEXT NOT NULL,
+          resultado TEXT,
+          error TEXT
+        );
+
+        -- Últimas ejecuciones de un job y purga del historial viejo
+        CREATE INDEX IF NOT EXISTS idx_job_ejecucion_nombre_inicio
+        ON JobEjecucion (nombre, inicio);
+        CREATE INDEX IF NOT EXISTS idx_job_ejecucion_inicio
+        ON JobEjecucion (inicio);
+    """),
+    (6, "Versión por tabla (VersionTabla) que suben los triggers en cada escritura, para los ETag de los GET", """
+        -- Un contador por tabla. Lo suben los triggers de abajo, así cuenta también las
+        -- escrituras de otros procesos y de scripts; el middleware de cache HTTP arma el
+        -- ETag de cada GET con las versiones de las tablas que lee.
+        CREATE TABLE IF NOT EXISTS VersionTabla (
+          tabla TEXT PRIMARY KEY,
+          version INTEGER NOT NULL DEFAULT 0
+        );
+    """ + _sql_versiones_tablas(TABLAS_VERSIONADAS)),
+    (7, "Índice por fecha de emisión de las recetas (exportación por rango de fechas)", """
+        CREATE INDEX IF NOT EXISTS idx_receta_fecha
+        ON Receta (fecha_emision);
+    """),
+    (8, "Cubetas del límite de intentos de login / recuperación de contraseña (opcional)", """
+        CREATE TABLE IF NOT EXISTS IntentoCubeta (
+          clave TEXT PRIMARY KEY,
+          tokens REAL NOT NULL,
+          actualizado REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_intento_cubeta_actualizado
+        ON IntentoCubeta (actualizado);
+    """),
+    (9, "Sesiones compartidas entre procesos: clave de firma de los tokens y tokens revocados", """
+        -- Secretos generados una sola vez y compartidos por todos los procesos de la API
+        -- ('token': la clave con la que se firman los tokens de sesión si no se fija
+        -- TURNERO_TOKEN_SECRETO)
+        CREATE TABLE IF NOT EXISTS ClaveServidor (
+          nombre TEXT PRIMARY KEY,
+          valor TEXT NOT NULL
+        );
+
+        -- Tokens revocados antes de vencer. clave: 'jti:<jti>' (un token, logout) o
+        -- 'usuario:<id>' (todos los emitidos hasta emitido_hasta). La fila se puede borrar
+        -- cuando pasa vence: los tokens que cubre ya vencieron.
+        CREATE TABLE IF NOT EXISTS TokenRevocado (
+          clave TEXT PRIMARY KEY,
+          emitido_hasta REAL,
+          vence REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_token_revocado_vence
+        ON TokenRevocado (vence);
+    """ + _sql_versiones_tablas(("TokenRevocado",))),
+    (10, "Registro de cambios de Turno por médico y paciente (índice de turnos en memoria)", """
+        -- Una fila por cada escritura de Turno que cambia la agenda de alguien (alta, baja,
+        -- fechas, estado, médico o paciente). Cada proceso lee las filas nuevas desde la
+        -- última que vio y descarta sólo las agendas de esas personas (indice_turnos.py).
+        -- Se guardan las últimas 10000: un proceso que se atrasó más descarta todo.
+        CREATE TABLE IF NOT EXISTS CambioTurno (
+          id_cambio INTEGER PRIMARY KEY,
+          id_medico INTEGER NOT NULL,
+          id_paciente INTEGER NOT NULL
+        );
+
+        CREATE TRIGGER IF NOT EXISTS trg_cambio_turno_insert
+        AFTER INSERT ON Turno
+        BEGIN
+            INSERT INTO CambioTurno (id_medico, id_paciente) VALUES (NEW.id_medico, NEW.id_paciente);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_cambio_turno_update
+        AFTER UPDATE OF id_medico, id_paciente, id_estado_turno, fecha_hora_inicio, fecha_hora_fin ON Turno
+        BEGIN
+            INSERT INTO CambioTurno (id_medico, id_paciente) VALUES (NEW.id_medico, NEW.id_paciente);
+            INSERT INTO CambioTurno (id_medico, id_paciente)
+            SELECT OLD.id_medico, OLD.id_paciente
+            WHERE OLD.id_medico != NEW.id_medico OR OLD.id_paciente != NEW.id_paciente;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_cambio_turno_delete
+        AFTER DELETE ON Turno
+        BEGIN
+            INSERT INTO CambioTurno (id_medico, id_paciente) VALUES (OLD.id_medico, OLD.id_paciente);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_cambio_turno_recortar
+        AFTER INSERT ON CambioTurno
+        BEGIN
+            DELETE FROM CambioTurno WHERE id_cambio <= NEW.id_cambio - 10000;
+        END;
+    """),
+]
+
+
+def version_esquema(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migraciones(conn):
+    """
+    Aplica las migraciones pendientes (version > user_version) en orden.
+    Cada una corre en su propia transacción junto con el cambio de user_version,
+    así una migración que falla no deja la base a medias.
+    Devuelve la lista de versiones aplicadas.
+    """
+    aplicadas = []
+    actual = version_esquema(conn)
+    for version, descripcion, sql in MIGRACIONES:
+        if version <= actual:
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for sentencia in _separar_sentencias(sql):
+                conn.execute(sentencia)
+            # PRAGMA no acepta parámetros; version es un int de la lista de arriba
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        print(f"Migración {version} aplicada: {descripcion}")
+        aplicadas.append(version)
+    return aplicadas
+
+
+def _separar_sentencias(sql: str):
+    """Parte un script en sentencias completas (respeta los BEGIN ... END; de los triggers)"""
+    sentencia = ""
+    for linea in sql.splitlines(keepends=True):
+        sentencia += linea
+        if sqlite3.complete_statement(sentencia):
+            if sentencia.strip():
+                yield sentencia
+            sentencia = ""
+    if sentencia.strip():
+        yield sentencia
+
+
+def inicializar_esquema(conn):
+    """Crea las tablas que falten y aplica las migraciones pendientes."""
+    conn.executescript(SQL_SCHEMA)
+    return aplicar_migraciones(conn)
+
+
 def crear_base_de_datos():
     """
     Crea la base de datos y las tablas desde cero.
@@ -180,9 +517,8 @@ def crear_base_de_datos():
     conn = None
     try:
         conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
         
-        cursor.executescript(SQL_SCHEMA)
+        inicializar_esquema(conn)
         
         conn.commit()
         print(f"Base de datos '{DB_FILE}' creada exitosamente con todas las tablas.")
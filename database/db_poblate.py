@@ -72,9 +72,13 @@ def get_db():
     return sqlite3.connect(DB_FILE)
 
 def limpiar_base(cursor):
-    tables = ["Receta", "Consulta", "Turno", "HorarioAtencion", "Medico", "Paciente", "UsuarioRol", "Usuario", "ObraSocial", "Especialidad", "EstadoTurno", "Rol"]
+    # Slot / SlotHorizonte y BandejaSalida apuntan a médicos y turnos: si quedaran, los slots
+    # seguirían marcados con ids de turnos borrados (o reutilizados) y el horizonte no los regeneraría.
+    # TokenRevocado también: las revocaciones por usuario caerían sobre los ids nuevos
+    tables = ["TokenRevocado", "BandejaSalida", "Slot", "SlotHorizonte", "Receta", "Consulta", "Turno", "HorarioAtencion", "Medico", "Paciente", "UsuarioRol", "Usuario", "ObraSocial", "Especialidad", "EstadoTurno", "Rol"]
+    existentes = {fila[0] for fila in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()}
     cursor.execute("PRAGMA foreign_keys = OFF;")
-    for table in tables:
+    for table in (t for t in tables if t in existentes):
         cursor.execute(f"DELETE FROM {table};")
         cursor.execute(f"DELETE FROM sqlite_sequence WHERE name='{table}';")
     cursor.execute("PRAGMA foreign_keys = ON;")
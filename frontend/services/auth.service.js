@@ -21,6 +21,20 @@ export const userLogin = async ({ email, password, role }) => {
   }
 };
 
+export const userLogout = async () => {
+  // Se lee ya: quien llama borra el token del sessionStorage sin esperar la respuesta
+  const token = sessionStorage.getItem("token");
+  if (!token) return;
+
+  try {
+    await axiosClient.post("/auth/logout", null, {
+      headers: { Authorization: `Bearer ${token}` },
+    });
+  } catch (error) {
+    console.error("Error al cerrar sesión:", error.response?.data || error.message);
+  }
+};
+
 export const changePassword = async ({
   id_usuario,
   current_password,
@@ -37,6 +51,10 @@ export const changePassword = async ({
       "/auth/change-password",
       changePasswordBody
     );
+    // El cambio revoca las sesiones abiertas: el backend devuelve un token nuevo para esta
+    if (response.data.access_token) {
+      sessionStorage.setItem("token", response.data.access_token);
+    }
     return response.data;
   } catch (error) {
     console.error(
@@ -7,4 +7,13 @@ const axiosClient = axios.create({
   },
 });
 
-export default axiosClient;
\ No newline at end of file
+// Token de sesión que devuelve /auth/login (lo guarda AuthContext)
+axiosClient.interceptors.request.use((config) => {
+  const token = sessionStorage.getItem('token');
+  if (token) {
+    config.headers.Authorization = `Bearer ${token}`;
+  }
+  return config;
+});
+
+export default axiosClient;
@@ -1,7 +1,7 @@
 import React, { createContext, useState, useEffect } from 'react';
 
 // Importar servicios de autenticación y perfiles
-import { getPatientByUserId, getDoctorByUserId } from '../../services/auth.service'; // Asegúrate que estos servicios están aquí o en un archivo de perfil
+import { getPatientByUserId, getDoctorByUserId, userLogout } from '../../services/auth.service'; // Asegúrate que estos servicios están aquí o en un archivo de perfil
 import { mapBackendRoleToFrontend } from '../utils/mappers';
 
 export const AuthContext = createContext(null);
@@ -32,7 +32,10 @@ export const AuthProvider = ({ children }) => {
 
     // --- Lógica de Login (ASÍNCRONA) ---
     const login = async (backendResponse) => {
-        const { usuario, rol } = backendResponse;
+        const { usuario, rol, access_token } = backendResponse;
+
+        // El token va en cada request (ver axiosClient); se guarda antes de cargar el perfil
+        sessionStorage.setItem('token', access_token);
 
         // 1. Crear el objeto de usuario base para el estado 'user'
         const frontendUser = {
@@ -59,6 +62,7 @@ export const AuthProvider = ({ children }) => {
             
         } catch (error) {
             console.error(`Error al cargar el perfil de ${roleName} para el usuario ${userId}:`, error);
+            sessionStorage.removeItem('token');
             // Si hay un error crítico al cargar el perfil, abortamos el login
             throw new Error("Login exitoso, pero el perfil asociado no fue encontrado o está desvinculado.");
         }
@@ -90,6 +94,9 @@ export const AuthProvider = ({ children }) => {
 
     // --- Lógica de Logout ---
     const logout = () => {
+        // Revoca el token en el backend; si falla, igual vence solo
+        userLogout();
+        sessionStorage.removeItem('token');
         sessionStorage.removeItem('user');
         sessionStorage.removeItem('profile');
         setUser(null);